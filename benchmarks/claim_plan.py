@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""The query plan and latency of the pull worker's claim.
+
+Run from the repository root:
+
+    python benchmarks/claim_plan.py [--rows N] [--iterations N]
+
+The benchmark creates a throwaway test database and fills it with
+``--rows`` rows, nine in ten of them completed. It prints the plan and the
+read latency of one queue's claim twice: for a backlog, where most
+uncompleted rows are due, and for an outage, where most wait out a retry.
+Both plans should read ``dl_bg_claim_idx`` with no sort: one queue's rows
+in claim order, up to the first due row.
+
+``tests.settings`` (the default) runs it on SQLite. Use
+``DJANGO_SETTINGS_MODULE=tests.settings_stability`` (make stability-up)
+for PostgreSQL, where the claim is the one ``UPDATE ... SKIP LOCKED``
+statement.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+QUEUES = ('django_logic.critical', 'django_logic.bulk', 'django_logic.slow')
+
+#: The share of uncompleted rows that wait out a retry, per scenario.
+SCENARIOS = (('backlog', 0.1), ('outage', 0.95))
+
+
+def _fill(rows: int, waiting_share: float) -> None:
+    """Replace the table with ``rows`` rows at every priority."""
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    from django_logic.background.models import TransitionMessage
+
+    TransitionMessage.objects.all().delete()
+    pick = random.Random(0)
+    now = timezone.now()
+    batch = []
+    for number in range(rows):
+        completed = pick.random() < 0.9
+        waiting = not completed and pick.random() < waiting_share
+        batch.append(TransitionMessage(
+            app_label='tests', model_name='invoice', instance_id=str(number),
+            process_name='process', transition_name='go',
+            queue_name=pick.choice(QUEUES),
+            priority=pick.randrange(10),
+            is_completed=completed,
+            next_attempt_at=now + timedelta(hours=1) if waiting else now,
+        ))
+        if len(batch) == 5000:
+            TransitionMessage.objects.bulk_create(batch)
+            batch = []
+    TransitionMessage.objects.bulk_create(batch)
+
+
+def _analyze(connection) -> None:
+    from django_logic.background.models import TransitionMessage
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'ANALYZE {connection.ops.quote_name(TransitionMessage._meta.db_table)}')
+
+
+def _measure(candidates, iterations: int) -> list:
+    """Microseconds for each read of the claim's candidate. The stamp is
+    left out, so every iteration sees the same table."""
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        candidates.values_list('pk', 'scheduled').first()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+    import django
+    django.setup()
+    from django.db import connection
+
+    from django_logic.background.safety_nets import _claimable
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        print(f'{connection.vendor}, {args.rows} rows')
+        for name, waiting_share in SCENARIOS:
+            _fill(args.rows, waiting_share)
+            _analyze(connection)
+            candidates = _claimable([QUEUES[0]])
+            samples = sorted(_measure(candidates, args.iterations))
+            p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+            print(f'\n{name}: {waiting_share:.0%} of the uncompleted rows '
+                  f'wait out a retry')
+            print(candidates.values('pk')[:1].explain())
+            print(f'median {statistics.median(samples):.1f} us, '
+                  f'p99 {p99:.1f} us')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
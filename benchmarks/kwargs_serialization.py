@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""Cost of the kwargs path of a background transition, per payload shape.
+
+Run from the repository root:
+
+    python benchmarks/kwargs_serialization.py [--iterations N]
+
+Four stages are timed: ``serialize_kwargs`` at enqueue, writing the
+``kwargs`` column's JSON text, reading it back in the worker, and
+``deserialize_kwargs``. The column codec is timed with the standard library
+and with ``KwargsJSONEncoder`` / ``KwargsJSONDecoder``, which use orjson
+when it is installed.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from uuid import UUID
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+
+def _payloads() -> dict:
+    """Representative kwargs: a few scalars, typed values, an order with
+    line items, and a deep tree."""
+    now = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+    return {
+        'scalars': {'tr_id': 'a' * 32, 'note': 'ship it', 'attempt': 2,
+                    'force': False},
+        'typed': {'when': now, 'day': now.date(), 'amount': Decimal('19.99'),
+                  'order_id': UUID(int=7), 'pair': (1, 'two'),
+                  'tags': {'gift', 'express'}},
+        'line_items': {'lines': [
+            {'sku': f'SKU-{n:05d}', 'quantity': n % 7 + 1,
+             'price': Decimal(f'{n % 90 + 9}.99'), 'discount': 0.1,
+             'ships_on': date(2026, 11, n % 28 + 1), 'note': None}
+            for n in range(500)
+        ]},
+        'deep': {'tree': _tree(6)},
+    }
+
+
+def _tree(depth: int):
+    if not depth:
+        return ['leaf', 1, 2.5, None]
+    return {'left': _tree(depth - 1), 'right': _tree(depth - 1), 'depth': depth}
+
+
+def _measure(function, iterations: int) -> float:
+    """Median microseconds of one call."""
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+    import django
+    django.setup()
+    from django_logic.background import serializers
+
+    print(f'orjson: {"installed" if serializers.orjson else "not installed"}')
+    print(f'{"payload":<12} {"serialize":>10} {"write json":>11} '
+          f'{"write":>8} {"read json":>10} {"read":>8} {"deserialize":>12}')
+    for name, kwargs in _payloads().items():
+        stored = serializers.serialize_kwargs(kwargs)
+        text = json.dumps(stored)
+        timings = [
+            _measure(lambda: serializers.serialize_kwargs(kwargs),
+                     args.iterations),
+            _measure(lambda: json.dumps(stored), args.iterations),
+            _measure(lambda: json.dumps(
+                stored, cls=serializers.KwargsJSONEncoder), args.iterations),
+            _measure(lambda: json.loads(text), args.iterations),
+            _measure(lambda: json.loads(
+                text, cls=serializers.KwargsJSONDecoder), args.iterations),
+            _measure(lambda: serializers.deserialize_kwargs(stored),
+                     args.iterations),
+        ]
+        print(f'{name:<12} {timings[0]:>10.1f} {timings[1]:>11.1f} '
+              f'{timings[2]:>8.1f} {timings[3]:>10.1f} {timings[4]:>8.1f} '
+              f'{timings[5]:>12.1f}')
+    print('(median microseconds per call)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""Acquire and release latency of each state lock backend.
+
+Run from the repository root:
+
+    python benchmarks/lock_backends.py [--iterations N]
+
+The settings module decides which services exist. ``tests.settings`` (the
+default) has only the cache and process-local backends. Use
+``DJANGO_SETTINGS_MODULE=tests.settings_stability`` (make stability-up) to add
+the Redis and PostgreSQL backends. A backend whose service is missing is
+reported as skipped.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+BACKENDS = (
+    'django_logic.locks.LocalLockBackend',
+    'django_logic.locks.CacheLockBackend',
+    'django_logic.locks.RedisLockBackend',
+    'django_logic.locks.PostgresAdvisoryLockBackend',
+)
+
+
+def _measure(backend, iterations: int) -> list:
+    """Microseconds for each acquire-and-release pair."""
+    samples = []
+    for number in range(iterations):
+        key = f'{number:032x}'
+        started = time.perf_counter()
+        token = backend.acquire(key, 60)
+        backend.release(key, token)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+    import django
+    django.setup()
+    from django.utils.module_loading import import_string
+
+    print(f'{"backend":<30} {"median us":>10} {"p99 us":>10}')
+    for path in BACKENDS:
+        name = path.rsplit('.', 1)[1]
+        backend = import_string(path)()
+        try:
+            # One warm-up pair opens connections and loads scripts.
+            _measure(backend, 1)
+        except Exception as exc:
+            print(f'{name:<30} skipped: {type(exc).__name__}: {exc}')
+            continue
+        samples = sorted(_measure(backend, args.iterations))
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(f'{name:<30} {statistics.median(samples):>10.1f} {p99:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""Cold archival: move completed rows out of the hot ``TransitionMessage``
+table.
+
+The claim, ``retry_status`` and ``in_flight_for`` all read the hot table,
+and nothing in the engine reads a completed row again. Audits do, so
+instead of waiting for the cleanup sweep to delete them,
+``archive_completed`` moves completed rows into
+``ArchivedTransitionMessage``, or into gzip-compressed JSONL files. It
+walks the rows in primary-key order, a chunk at a time. Each chunk is
+copied and deleted from the hot table in one short transaction.
+
+``dl_archive`` runs it by hand. With
+``TRANSITION_MESSAGE_ARCHIVE_AFTER_HOURS`` set, the
+``archive_completed_transitions`` safety net runs it into the archive
+table. ``transition_history`` reads an instance's rows from every store.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+from django.db import models as db_models
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from django_logic.background import payloads
+from django_logic.background.models import (
+    ArchivedTransitionMessage,
+    TransitionMessage,
+    TransitionPayload,
+)
+from django_logic.logger import logger
+
+#: Rows per chunk: per transaction, and per file.
+BATCH_SIZE = 1000
+
+#: Where the history rows come from, in ``transition_history``'s ``store``.
+STORE_HOT = 'hot'
+STORE_TABLE = 'archive'
+STORE_FILE = 'file'
+
+_FILE_PREFIX = 'transition_messages-'
+
+
+def _fields() -> list[str]:
+    """The columns an archived row keeps: the archive model's, less its
+    own ``archived_at``."""
+    return [field.attname
+            for field in ArchivedTransitionMessage._meta.concrete_fields
+            if field.attname != 'archived_at']
+
+
+def archive_completed(older_than: timedelta, *, batch_size: int = BATCH_SIZE,
+                      directory: str | None = None,
+                      limit: int | None = None) -> int:
+    """Move the completed rows last modified more than ``older_than`` ago
+    out of the hot table. Returns the number of rows moved.
+
+    Rows go to ``ArchivedTransitionMessage``, or, with ``directory``, to
+    one ``.jsonl.gz`` file per chunk. A file is written and synced
+    before its chunk is deleted. If the delete then fails, the next run
+    writes the same file again under the same name. ``limit`` bounds the
+    rows of one call.
+    """
+    cutoff = timezone.now() - older_than
+    fields = _fields()
+    hot = router.db_for_write(TransitionMessage) or DEFAULT_DB_ALIAS
+    cold = router.db_for_write(ArchivedTransitionMessage) or DEFAULT_DB_ALIAS
+    last_pk, moved = 0, 0
+    while limit is None or moved < limit:
+        size = batch_size if limit is None else min(batch_size, limit - moved)
+        with transaction.atomic(using=hot), transaction.atomic(using=cold):
+            # Keyset pagination: each chunk starts after the last pk, so
+            # the walk never rescans the rows it has passed.
+            rows = list(
+                TransitionMessage.objects
+                .filter(is_completed=True, modified__lt=cutoff, pk__gt=last_pk)
+                .order_by('pk')
+                .select_for_update(skip_locked=True)
+                .values(*fields, 'payload_id')[:size]
+            )
+            if not rows:
+                break
+            # Archived rows keep their kwargs inline, so the payloads go.
+            read = payloads.inline(rows)
+            if directory is None:
+                ArchivedTransitionMessage.objects.bulk_create(
+                    [ArchivedTransitionMessage(**row) for row in rows],
+                    ignore_conflicts=True,
+                )
+            else:
+                _write_file(directory, rows)
+            TransitionMessage.objects.filter(
+                pk__in=[row['id'] for row in rows]).delete()
+            TransitionPayload.objects.filter(pk__in=read).delete()
+        last_pk = rows[-1]['id']
+        moved += len(rows)
+    if moved:
+        logger.info(f'archive_completed: moved {moved} rows to '
+                    f'{directory or ArchivedTransitionMessage._meta.db_table}')
+    return moved
+
+
+def _write_file(directory: str, rows: list[dict]) -> None:
+    name = f'{_FILE_PREFIX}{rows[0]["id"]}-{rows[-1]["id"]}.jsonl.gz'
+    path = os.path.join(directory, name)
+    partial = f'{path}.partial'
+    with open(partial, 'wb') as raw:
+        with gzip.GzipFile(filename=name, mode='wb', fileobj=raw) as stream:
+            for row in rows:
+                stream.write(json.dumps(
+                    row, cls=DjangoJSONEncoder, sort_keys=True).encode('utf-8'))
+                stream.write(b'\n')
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial, path)
+
+
+def _read_files(directory: str, keys: dict) -> list[dict]:
+    """The archived rows in ``directory`` whose columns match ``keys``.
+    Reads every file: the files are for keeping, not for querying."""
+    datetimes = {
+        field.attname for field in ArchivedTransitionMessage._meta.concrete_fields
+        if isinstance(field, db_models.DateTimeField)
+    }
+    found = []
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith(_FILE_PREFIX) and name.endswith('.jsonl.gz')):
+            continue
+        with gzip.open(os.path.join(directory, name), 'rt', encoding='utf-8') as stream:
+            for line in stream:
+                row = json.loads(line)
+                if all(row.get(key) == value for key, value in keys.items()):
+                    for key in datetimes & row.keys():
+                        if row[key] is not None:
+                            row[key] = parse_datetime(row[key])
+                    found.append(row)
+    return found
+
+
+def transition_history(instance, process_name: str | None = None, *,
+                       directory: str | None = None) -> list[dict]:
+    """Every background row of ``instance``, oldest first, from the hot
+    table, the archive table and, with ``directory``, the archive files.
+
+    Each row is a dict of the archived columns plus ``is_completed`` and
+    ``store`` (``'hot'``, ``'archive'`` or ``'file'``). A row found in
+    more than one store is reported once, from the first of that order.
+    ``process_name`` narrows the rows to one process.
+    """
+    keys = {
+        'app_label': instance._meta.app_label,
+        'model_name': instance._meta.model_name,
+        'instance_id': str(instance.pk),
+    }
+    if process_name is not None:
+        keys['process_name'] = process_name
+    fields = _fields()
+    history = {}
+    hot = list(TransitionMessage.objects.filter(**keys).values(
+        *fields, 'is_completed', 'payload_id'))
+    payloads.inline(hot)
+    for row in hot:
+        history[row['id']] = {**row, 'store': STORE_HOT}
+    for row in ArchivedTransitionMessage.objects.filter(**keys).values(*fields):
+        history.setdefault(
+            row['id'], {**row, 'is_completed': True, 'store': STORE_TABLE})
+    if directory is not None:
+        for row in _read_files(directory, keys):
+            row = {field: row.get(field) for field in fields}
+            history.setdefault(
+                row['id'], {**row, 'is_completed': True, 'store': STORE_FILE})
+    return sorted(history.values(), key=lambda row: (row['created'], row['id']))
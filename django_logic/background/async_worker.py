@@ -0,0 +1,152 @@
+"""The asyncio worker behind ``dl_worker --async N``.
+
+For queues that almost only wait on the network, such as a webhook
+fan-out. One event loop keeps up to ``N`` attempts in flight. It waits
+for notifications on an async psycopg 3 connection instead of a
+``select`` on the worker's Django connection, and claims rows as attempts
+finish.
+
+Each attempt runs in lease mode (``runner._arun_leased``), because a
+transaction cannot stay open across an ``await``. The database steps are
+short and run in the loop's executor threads, through Django's sync
+connections; each step closes a connection that broke or grew too old,
+as the thread pool does. Only the LISTEN connection is async. The claim
+stays on the sync ORM path that the other modes share, because one
+claim is a single short query and a second, async copy of it would have
+to be kept in step with the first. A coroutine side-effect is awaited
+on the loop, so a few threads serve hundreds of such attempts. A plain
+side-effect runs in an executor thread. ``--threads`` bounds that
+executor; by default Python sizes it.
+
+Like ``--threads``, this mode gives no crash isolation.
+"""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections, router
+
+from django_logic.background import pull
+from django_logic.background import settings as bg_settings
+from django_logic.logger import logger
+
+
+def run_async_worker(queues: list[str], *, in_flight: int,
+                     threads: int | None = None,
+                     forever: bool = True,
+                     weights: dict[str, int] | None = None) -> None:
+    """Run ``arun_worker`` on a new event loop until it returns."""
+    asyncio.run(arun_worker(
+        queues, in_flight=in_flight, threads=threads, forever=forever,
+        weights=weights))
+
+
+async def arun_worker(queues: list[str], *, in_flight: int,
+                      threads: int | None = None,
+                      forever: bool = True,
+                      weights: dict[str, int] | None = None) -> None:
+    """The loop: keep up to ``in_flight`` attempts running, run the safety
+    nets on schedule, and wait for a notification or a finished attempt.
+
+    ``forever=False`` returns once nothing is claimable and every attempt
+    has finished, as ``run_worker(forever=False)`` does. ``weights``
+    share the claims among ``queues`` (``pull.QueueSchedule``).
+    """
+    from django_logic.background.runner import (
+        _to_thread, arun_background_transition,
+    )
+
+    if bg_settings.lease_seconds() is None:
+        raise ImproperlyConfigured(
+            "The async worker runs every attempt in lease mode. Set "
+            "DJANGO_LOGIC['TRANSITION_MESSAGE_LEASE_SECONDS'] above the "
+            "longest side-effect."
+        )
+    logger.info('pull worker starting: queues=%s async=%d',
+                ','.join(queues), in_flight)
+    loop = asyncio.get_running_loop()
+    if threads is not None:
+        # asyncio.run shuts the default executor down on exit.
+        loop.set_default_executor(ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix='dl_worker'))
+    wake = asyncio.Event()
+    listener = asyncio.create_task(_listen(wake)) if forever else None
+    running: dict[asyncio.Task, int] = {}
+    schedule = pull.QueueSchedule(queues, weights)
+
+    def finished(task: asyncio.Task) -> None:
+        pk = running.pop(task)
+        wake.set()
+        if not task.cancelled() and task.exception() is not None:
+            error = task.exception()
+            logger.error(
+                f'pull: the async attempt for TransitionMessage#{pk} raised '
+                f'{type(error).__name__}: {error}. The row is claimable '
+                f'again once its lease expires.',
+                exc_info=error,
+            )
+
+    nets = pull.SafetyNetSchedule()
+    try:
+        while True:
+            # Cleared before the claim, so a notification that arrives
+            # while the claim runs still ends the wait below.
+            wake.clear()
+            handed = False
+            while len(running) < in_flight:
+                lease_owner = pull.new_lease_owner()
+                claim = await _to_thread(schedule.claim, lease_owner)
+                if claim is None:
+                    break
+                task = asyncio.create_task(arun_background_transition(
+                    claim.pk, lease_owner, claim.scheduled))
+                running[task] = claim.pk
+                task.add_done_callback(finished)
+                handed = True
+            due = nets.take_due()
+            if due:
+                await _to_thread(pull._run_safety_nets, due)
+            if not handed and not running and not forever:
+                return
+            timeout = await _to_thread(pull.wait_seconds, queues)
+            try:
+                await asyncio.wait_for(wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        if listener is not None:
+            listener.cancel()
+
+
+async def _listen(wake: asyncio.Event) -> None:
+    """Set ``wake`` on every notification. Returns, and leaves the poll
+    floor to carry the loop, when the database cannot listen: no psycopg
+    3, a backend other than PostgreSQL, a pooler that rejects LISTEN."""
+    from django_logic.background.models import TransitionMessage
+
+    try:
+        import psycopg
+    except ImportError:
+        logger.warning('pull: --async listens with psycopg 3, which is not '
+                       'installed; polling every %ss.', pull.POLL_SECONDS)
+        return
+    alias = router.db_for_write(TransitionMessage) or DEFAULT_DB_ALIAS
+    wrapper = connections[alias]
+    if wrapper.vendor != 'postgresql':
+        return
+    params = wrapper.get_connection_params()
+    # Both are built for Django's sync connection.
+    params.pop('cursor_factory', None)
+    params.pop('context', None)
+    try:
+        connection = await psycopg.AsyncConnection.connect(
+            autocommit=True, **params)
+        async with connection:
+            await connection.execute(f'LISTEN {pull.NOTIFY_CHANNEL}')
+            async for _notification in connection.notifies():
+                wake.set()
+    except Exception as exc:
+        logger.warning('pull: the async LISTEN connection failed (%s); '
+                       'polling every %ss.', exc, pull.POLL_SECONDS)
@@ -0,0 +1,62 @@
+"""Retry backoff: how long a failed row waits before its next attempt.
+
+``record_error`` turns the wait into ``TransitionMessage.next_attempt_at``,
+and the claim reads only that column. The wait comes from the
+transition's ``retry_backoff=``, else ``TRANSITION_MESSAGE_RETRY_BACKOFF``:
+
+* ``'fixed'`` — ``RETRY_MINUTES`` after every error;
+* ``'exponential'`` — ``RETRY_MINUTES`` after the first error, doubling
+  after each one up to ``RETRY_MAX_MINUTES``. Each wait is drawn between
+  half and all of that, so rows that failed together in an outage do not
+  come back together;
+* a callable — ``backoff(errors_count)`` returns the wait as a
+  ``timedelta``.
+"""
+from __future__ import annotations
+
+import random
+from datetime import timedelta
+
+from django_logic.background import settings as bg_settings
+from django_logic.logger import logger
+
+#: Past this many doublings every wait is the ceiling anyway; the cap
+#: keeps ``2 ** n`` small.
+_MAX_DOUBLINGS = 32
+
+
+def is_retry_backoff(value) -> bool:
+    return callable(value) or value in (
+        bg_settings.RETRY_BACKOFF_FIXED, bg_settings.RETRY_BACKOFF_EXPONENTIAL)
+
+
+def retry_delay(errors_count: int, backoff=None) -> timedelta:
+    """The wait after the ``errors_count``-th error of a row.
+
+    A callable ``backoff`` that raises, or returns something other than a
+    non-negative ``timedelta``, is logged and the setting's backoff is
+    used: the accounting write that asks must never fail.
+    """
+    if callable(backoff):
+        try:
+            delay = backoff(errors_count)
+        except Exception as exc:
+            logger.error(
+                f'retry_backoff {backoff!r} raised {type(exc).__name__}: '
+                f'{exc}; using the TRANSITION_MESSAGE_RETRY_BACKOFF wait.')
+            delay = None
+        if isinstance(delay, timedelta) and delay >= timedelta(0):
+            return delay
+        if delay is not None:
+            logger.error(
+                f'retry_backoff {backoff!r} returned {delay!r}, not a '
+                f'non-negative timedelta; using the '
+                f'TRANSITION_MESSAGE_RETRY_BACKOFF wait.')
+        backoff = None
+    base = timedelta(minutes=bg_settings.retry_minutes())
+    if (backoff or bg_settings.retry_backoff()) == bg_settings.RETRY_BACKOFF_FIXED:
+        return base
+    doublings = min(max(errors_count - 1, 0), _MAX_DOUBLINGS)
+    delay = min(base * 2 ** doublings,
+                timedelta(minutes=bg_settings.retry_max_minutes()))
+    return delay / 2 + delay / 2 * random.random()
@@ -56,9 +56,12 @@ def dispatch_transition(transition_message) -> None:
     In Pull mode, notify the workers after commit — the committed row is
     what they run, so there is nothing to lose or duplicate.
 
-    In Sync mode, execute inline. Exceptions propagate to the caller.
+    In Sync mode, execute inline. Exceptions propagate to the caller. A
+    scheduled row is not due yet, so it waits for ``retry_pending()``.
     """
     if _current_mode() == bg_settings.EXECUTION_SYNC:
+        if transition_message.scheduled:
+            return
         from django_logic.background.runner import run_background_transition
         run_background_transition(transition_message.pk)
         return
@@ -67,6 +70,20 @@ def dispatch_transition(transition_message) -> None:
     transaction.on_commit(notify_workers)
 
 
+def dispatch_transitions(transition_messages) -> None:
+    """``dispatch_transition`` for a batch: one notification after commit
+    in Pull mode, however many rows the batch created."""
+    if not transition_messages:
+        return
+    if _current_mode() == bg_settings.EXECUTION_SYNC:
+        for transition_message in transition_messages:
+            dispatch_transition(transition_message)
+        return
+
+    from django_logic.background.pull import notify_workers
+    transaction.on_commit(notify_workers)
+
+
 def retry_pending() -> int:
     """Run every claimable row inline, once.
 
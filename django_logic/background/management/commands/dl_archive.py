@@ -0,0 +1,64 @@
+"""Move completed ``TransitionMessage`` rows out of the hot table.
+
+    python manage.py dl_archive --older-than-hours 24
+    python manage.py dl_archive --older-than-hours 24 --to-dir /var/archive/dl
+
+Rows go to the ``ArchivedTransitionMessage`` table, or with ``--to-dir``
+to gzip-compressed JSONL files, a chunk per transaction. See
+``django_logic.background.archive``.
+"""
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django_logic.background import archive
+from django_logic.background import settings as bg_settings
+
+
+class Command(BaseCommand):
+    help = 'Move completed background rows to the archive table or to files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-hours', type=float,
+            help='archive completed rows last changed this many hours ago '
+                 '(default: TRANSITION_MESSAGE_ARCHIVE_AFTER_HOURS)',
+        )
+        parser.add_argument(
+            '--to-dir',
+            help='write .jsonl.gz files to this directory instead of the '
+                 'archive table',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=archive.BATCH_SIZE,
+            help='rows per transaction and per file',
+        )
+        parser.add_argument(
+            '--limit', type=int,
+            help='stop after this many rows',
+        )
+
+    def handle(self, *args, **options):
+        hours = options['older_than_hours']
+        if hours is None:
+            hours = bg_settings.archive_after_hours()
+        if hours is None:
+            raise CommandError(
+                "Pass --older-than-hours or set DJANGO_LOGIC"
+                "['TRANSITION_MESSAGE_ARCHIVE_AFTER_HOURS']."
+            )
+        if hours < 0:
+            raise CommandError('--older-than-hours must be at least 0.')
+        for flag, value in (('--batch-size', options['batch_size']),
+                            ('--limit', options['limit'])):
+            if value is not None and value < 1:
+                raise CommandError(f'{flag} must be at least 1.')
+        directory = options['to_dir']
+        if directory is not None and not os.path.isdir(directory):
+            raise CommandError(f'--to-dir: {directory} is not a directory.')
+        moved = archive.archive_completed(
+            timedelta(hours=hours), batch_size=options['batch_size'],
+            directory=directory, limit=options['limit'],
+        )
+        self.stdout.write(f'Archived {moved} rows.')
@@ -0,0 +1,55 @@
+"""Manage the partitioned ``TransitionMessage`` layout (PostgreSQL).
+
+    python manage.py dl_partitions --convert
+    python manage.py dl_partitions
+
+``--convert`` rewrites the table as daily range partitions on
+``created``, once, in a maintenance window. Without it the command does
+what the cleanup safety net does on its own: create the coming days'
+partitions and drop the expired ones. See
+``django_logic.background.partitions``.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from django_logic.background import partitions
+
+
+class Command(BaseCommand):
+    help = ('Convert TransitionMessage to daily partitions, or create and '
+            'drop partitions now.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert', action='store_true',
+            help='rewrite the table in the partitioned layout (copies every '
+                 'row under an exclusive lock)',
+        )
+        parser.add_argument(
+            '--ahead', type=int, default=partitions.PARTITIONS_AHEAD_DAYS,
+            help='days of partitions to keep ready ahead of today',
+        )
+
+    def handle(self, *args, **options):
+        ahead = options['ahead']
+        if ahead < 0:
+            raise CommandError('--ahead must be at least 0.')
+        if options['convert']:
+            try:
+                partitions.convert_table(ahead)
+            except ValueError as exc:
+                raise CommandError(f'--convert: {exc}')
+            self.stdout.write('TransitionMessage now uses daily partitions.')
+            return
+        if not partitions.is_partitioned():
+            raise CommandError(
+                'TransitionMessage is not partitioned. Run '
+                'dl_partitions --convert first (PostgreSQL only).'
+            )
+        created = partitions.create_partitions(ahead)
+        dropped = partitions.drop_expired_partitions()
+        days = partitions.partition_days()
+        self.stdout.write(
+            f'Created {len(created)} partitions, dropped {dropped} expired '
+            f'rows. Partitions: '
+            f'{days[0] if days else "-"} to {days[-1] if days else "-"}.'
+        )
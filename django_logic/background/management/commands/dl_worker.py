@@ -2,14 +2,30 @@
 
     python manage.py dl_worker --queues django_logic.critical,django_logic.fast
 
-One process per SLA group. The
+One process per SLA group. A weight after a queue name, as in
+``--queues django_logic.critical:5,django_logic.bulk:1``, shares the
+worker's claims among its queues (``pull.QueueSchedule``). The
 loop also runs the safety nets (watchdog, stuck report, cleanup), so
 pull mode needs no beat schedule. See docs/design/PULL_WORKERS.md.
+
+``--concurrency N`` runs a prefork pool instead: one supervisor claims
+rows and hands them to N long-lived children
+(``django_logic.background.pool``). ``--threads N`` runs up to N attempts
+at once on a thread pool in one process, for queues whose side-effects
+wait on the network (``django_logic.background.threads``). ``--async N``
+keeps up to N attempts in flight on one event loop, for coroutine
+side-effects (``django_logic.background.async_worker``).
 """
+import os
+
+from django.core.exceptions import ImproperlyConfigured
 from django.core.management.base import BaseCommand, CommandError
 
 from django_logic.background import settings as bg_settings
-from django_logic.background.pull import run_worker
+from django_logic.background.async_worker import run_async_worker
+from django_logic.background.pool import run_pool
+from django_logic.background.pull import parse_queues, run_worker
+from django_logic.background.threads import run_threads
 
 
 class Command(BaseCommand):
@@ -18,19 +34,99 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument(
             '--queues', required=True,
-            help='comma-separated queue names this worker serves',
+            help='comma-separated queue names this worker serves, each with '
+                 'an optional claim weight: critical:5,bulk:1',
         )
         parser.add_argument(
             '--once', action='store_true',
             help='drain what is claimable now, run the safety nets, exit',
         )
+        parser.add_argument(
+            '--concurrency', type=int,
+            help='run a pool of this many long-lived child processes '
+                 '(needs TRANSITION_MESSAGE_LEASE_SECONDS)',
+        )
+        parser.add_argument(
+            '--max-tasks-per-child', type=int,
+            help='replace a pool child after this many attempts',
+        )
+        parser.add_argument(
+            '--max-memory-per-child', type=int,
+            help='replace a pool child once its peak resident memory '
+                 'reaches this many KiB',
+        )
+        parser.add_argument(
+            '--threads', type=int,
+            help='run up to this many attempts at once on a thread pool, '
+                 'without crash isolation (needs '
+                 'TRANSITION_MESSAGE_LEASE_SECONDS); with --async, the size '
+                 'of the executor for database steps and plain side-effects',
+        )
+        parser.add_argument(
+            '--async', type=int, dest='in_flight',
+            help='keep up to this many attempts in flight on an event loop '
+                 '(needs TRANSITION_MESSAGE_LEASE_SECONDS)',
+        )
 
     def handle(self, *args, **options):
         if bg_settings.background_execution() != bg_settings.EXECUTION_PULL:
             raise CommandError(
                 "dl_worker needs DJANGO_LOGIC['BACKGROUND_EXECUTION']='pull'."
             )
-        queues = [q for q in options['queues'].split(',') if q]
+        try:
+            queues, weights = parse_queues(options['queues'])
+        except ValueError as exc:
+            raise CommandError(f'--queues: {exc}.')
         if not queues:
             raise CommandError('--queues must name at least one queue.')
-        run_worker(queues, forever=not options['once'])
+        try:
+            self._run(queues, weights, options)
+        except ImproperlyConfigured as exc:
+            # The modes that need lease mode refuse to start without it.
+            raise CommandError(str(exc)) from exc
+
+    def _run(self, queues, weights, options):
+        concurrency = options['concurrency']
+        max_tasks = options['max_tasks_per_child']
+        max_memory = options['max_memory_per_child']
+        threads = options['threads']
+        in_flight = options['in_flight']
+        for flag, value in (('--concurrency', concurrency),
+                            ('--max-tasks-per-child', max_tasks),
+                            ('--max-memory-per-child', max_memory),
+                            ('--threads', threads),
+                            ('--async', in_flight)):
+            if value is not None and value < 1:
+                raise CommandError(f'{flag} must be at least 1.')
+        pool_options = (concurrency, max_tasks, max_memory) != (None, None, None)
+        if in_flight is not None:
+            if pool_options:
+                raise CommandError(
+                    '--async cannot be combined with the pool options. '
+                    'Run one dl_worker per queue group and mode.'
+                )
+            run_async_worker(queues, in_flight=in_flight, threads=threads,
+                             forever=not options['once'], weights=weights)
+            return
+        if threads is not None:
+            if pool_options:
+                raise CommandError(
+                    '--threads cannot be combined with the pool options. '
+                    'Run one dl_worker per queue group and mode.'
+                )
+            run_threads(queues, threads=threads, forever=not options['once'],
+                        weights=weights)
+            return
+        if concurrency is None and max_tasks is None and max_memory is None:
+            run_worker(queues, forever=not options['once'], weights=weights)
+            return
+        if not hasattr(os, 'fork'):
+            raise CommandError('--concurrency needs os.fork.')
+        run_pool(
+            queues,
+            concurrency=concurrency or 1,
+            max_tasks_per_child=max_tasks,
+            max_memory_per_child=max_memory,
+            forever=not options['once'],
+            weights=weights,
+        )
@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Lease mode: the claim records who runs the attempt and until when."""
+
+    dependencies = [
+        ('django_logic_background', '0009_remove_dispatch_marker'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transitionmessage',
+            name='lease_owner',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='transitionmessage',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """The claim order: ``priority``, then ``created``."""
+
+    dependencies = [
+        ('django_logic_background', '0010_transitionmessage_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transitionmessage',
+            name='priority',
+            field=models.PositiveSmallIntegerField(default=5),
+        ),
+        migrations.AddField(
+            model_name='transitionmessage',
+            name='priority_aged_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='transitionmessage',
+            index=models.Index(
+                condition=models.Q(('is_completed', False)),
+                fields=['priority', 'created'],
+                name='dl_bg_claim_order_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def schedule_waiting_rows(apps, schema_editor):
+    """Give the uncompleted rows the ``next_attempt_at`` the old claim
+    computed: the retry wait after their last error, or none at all at
+    ``MAX_ERRORS``. The other rows keep the migration time: due now."""
+    from django_logic.background import settings as bg_settings
+
+    TransitionMessage = apps.get_model(
+        'django_logic_background', 'TransitionMessage')
+    rows = TransitionMessage.objects.using(
+        schema_editor.connection.alias).filter(is_completed=False)
+    rows.filter(errors_count__gte=bg_settings.max_errors()).update(
+        next_attempt_at=None)
+    rows.filter(
+        errors_count__lt=bg_settings.max_errors(),
+        last_error_dt__isnull=False,
+    ).update(next_attempt_at=models.F('last_error_dt') + timedelta(
+        minutes=bg_settings.retry_minutes()))
+
+
+class Migration(migrations.Migration):
+    """The claim reads ``next_attempt_at`` instead of the retry arithmetic."""
+
+    dependencies = [
+        ('django_logic_background', '0011_transitionmessage_priority'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transitionmessage',
+            name='next_attempt_at',
+            field=models.DateTimeField(
+                blank=True, null=True, default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(schedule_waiting_rows, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='transitionmessage',
+            index=models.Index(
+                condition=models.Q(('is_completed', False)),
+                fields=['queue_name', 'next_attempt_at'],
+                name='dl_bg_next_attempt_idx',
+            ),
+        ),
+    ]
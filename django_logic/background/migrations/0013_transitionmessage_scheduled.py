@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Scheduled rows (``run_at=`` / ``countdown=``): a ``scheduled`` flag,
+    and the per-process constraint no longer counts those rows."""
+
+    dependencies = [
+        ('django_logic_background', '0012_transitionmessage_next_attempt_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transitionmessage',
+            name='scheduled',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RemoveConstraint(
+            model_name='transitionmessage',
+            name='dl_bg_one_uncompleted_per_process',
+        ),
+        migrations.AddConstraint(
+            model_name='transitionmessage',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('is_completed', False), ('scheduled', False)),
+                fields=('app_label', 'model_name', 'instance_id', 'process_name'),
+                name='dl_bg_one_uncompleted_per_process',
+            ),
+        ),
+    ]
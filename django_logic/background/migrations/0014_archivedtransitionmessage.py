@@ -0,0 +1,49 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """The archive table for completed rows (``dl_archive``)."""
+
+    dependencies = [
+        ('django_logic_background', '0013_transitionmessage_scheduled'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTransitionMessage',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created', models.DateTimeField()),
+                ('modified', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('app_label', models.CharField(max_length=100)),
+                ('model_name', models.CharField(max_length=100)),
+                ('instance_id', models.CharField(max_length=255)),
+                ('process_name', models.CharField(max_length=100)),
+                ('field_name', models.CharField(blank=True, default='', max_length=100)),
+                ('transition_name', models.CharField(max_length=100)),
+                ('owning_process_class', models.TextField(blank=True, default='')),
+                ('queue_name', models.CharField(max_length=100)),
+                ('priority', models.PositiveSmallIntegerField(default=5)),
+                ('timeout_seconds', models.PositiveIntegerField(blank=True, null=True)),
+                ('ended_in_failure', models.BooleanField(default=False)),
+                ('errors_count', models.PositiveIntegerField(default=0)),
+                ('last_error_dt', models.DateTimeField(blank=True, null=True)),
+                ('last_error_message', models.TextField(blank=True)),
+                ('failure_side_effect_error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('kwargs', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(
+                        fields=['app_label', 'model_name', 'instance_id'],
+                        name='dl_bg_archived_instance_idx',
+                    ),
+                ],
+            },
+        ),
+    ]
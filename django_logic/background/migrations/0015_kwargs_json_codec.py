@@ -0,0 +1,34 @@
+import django_logic.background.serializers
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """The ``kwargs`` columns write and read their JSON text with orjson
+    when it is installed. No schema change: the column type stays."""
+
+    dependencies = [
+        ('django_logic_background', '0014_archivedtransitionmessage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedtransitionmessage',
+            name='kwargs',
+            field=models.JSONField(
+                blank=True,
+                decoder=django_logic.background.serializers.KwargsJSONDecoder,
+                default=dict,
+                encoder=django_logic.background.serializers.KwargsJSONEncoder,
+            ),
+        ),
+        migrations.AlterField(
+            model_name='transitionmessage',
+            name='kwargs',
+            field=models.JSONField(
+                blank=True,
+                decoder=django_logic.background.serializers.KwargsJSONDecoder,
+                default=dict,
+                encoder=django_logic.background.serializers.KwargsJSONEncoder,
+            ),
+        ),
+    ]
@@ -0,0 +1,44 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Out-of-line storage for large kwargs: the ``TransitionPayload``
+    table, and the row's ``payload`` reference."""
+
+    dependencies = [
+        ('django_logic_background', '0015_kwargs_json_codec'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransitionPayload',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('codec', models.CharField(max_length=8)),
+                ('size', models.PositiveIntegerField()),
+                ('data', models.BinaryField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='transitionmessage',
+            name='payload',
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name='+',
+                to='django_logic_background.transitionpayload',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='transitionmessage',
+            index=models.Index(
+                condition=models.Q(('payload__isnull', False)),
+                fields=['payload'],
+                name='dl_bg_payload_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def set_fillfactor(apps, schema_editor):
+    """Leave free space on each page of the ``TransitionMessage`` table,
+    so its updates can stay on the page. PostgreSQL only. A partitioned
+    table has no storage of its own: its partitions get the setting when
+    they are created."""
+    from django_logic.background.partitions import FILLFACTOR
+
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    TransitionMessage = apps.get_model(
+        'django_logic_background', 'TransitionMessage')
+    table = TransitionMessage._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)',
+                       [table])
+        row = cursor.fetchone()
+        if row and row[0] == 'r':
+            cursor.execute(
+                f'ALTER TABLE {connection.ops.quote_name(table)} '
+                f'SET (fillfactor = {FILLFACTOR})')
+
+
+class Migration(migrations.Migration):
+    """Attempts move to the append-only ``TransitionAttempt`` table.
+    ``dl_bg_started_idx`` goes, so the attempt stamps on the row change no
+    indexed column."""
+
+    dependencies = [
+        ('django_logic_background', '0016_transitionpayload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransitionAttempt',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('number', models.PositiveIntegerField()),
+                ('worker', models.CharField(
+                    blank=True, default='', max_length=255)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('ended_at', models.DateTimeField()),
+                ('duration_ms', models.PositiveIntegerField(
+                    blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='transitionmessage',
+            name='dl_bg_started_idx',
+        ),
+        migrations.AddField(
+            model_name='transitionattempt',
+            name='transition_message',
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name='attempts',
+                to='django_logic_background.transitionmessage',
+            ),
+        ),
+        migrations.RunPython(set_fillfactor, migrations.RunPython.noop),
+    ]
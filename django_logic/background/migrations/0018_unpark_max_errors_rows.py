@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db.models import DateTimeField
+from django.db.models.functions import Coalesce
+
+
+def unpark_rows(apps, schema_editor):
+    """Give the rows parked at ``MAX_ERRORS`` (``next_attempt_at`` null) the
+    time of their last error. The claim now checks ``errors_count``
+    against the setting, so they run again only if it is raised."""
+    TransitionMessage = apps.get_model(
+        'django_logic_background', 'TransitionMessage')
+    TransitionMessage.objects.using(schema_editor.connection.alias).filter(
+        is_completed=False, next_attempt_at__isnull=True,
+    ).update(next_attempt_at=Coalesce(
+        'last_error_dt', 'modified', output_field=DateTimeField()))
+
+
+class Migration(migrations.Migration):
+    """The claim compares ``errors_count`` with ``MAX_ERRORS``."""
+
+    dependencies = [
+        ('django_logic_background', '0017_transitionattempt'),
+    ]
+
+    operations = [
+        migrations.RunPython(unpark_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """One index for the claim: ``queue_name``, then the claim order. The
+    due-time index keeps only the scheduled rows."""
+
+    dependencies = [
+        ('django_logic_background', '0018_unpark_max_errors_rows'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transitionmessage',
+            name='dl_bg_claim_order_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transitionmessage',
+            name='dl_bg_next_attempt_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transitionmessage',
+            index=models.Index(
+                condition=models.Q(('is_completed', False)),
+                fields=['queue_name', 'priority', 'created'],
+                name='dl_bg_claim_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='transitionmessage',
+            index=models.Index(
+                condition=models.Q(('is_completed', False), ('scheduled', True)),
+                fields=['queue_name', 'next_attempt_at'],
+                name='dl_bg_scheduled_idx',
+            ),
+        ),
+    ]
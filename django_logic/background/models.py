@@ -15,17 +15,39 @@ progress.
 """
 from __future__ import annotations
 
+import os
+import socket
+from collections import namedtuple
 from datetime import timedelta
 
-from django.db import OperationalError, models, transaction
+from django.db import OperationalError, connections, models, router, transaction
 from django.utils import timezone
 from model_utils.models import TimeStampedModel
 
+from django_logic.background.serializers import (
+    KwargsJSONDecoder,
+    KwargsJSONEncoder,
+)
+
 
 #: Ceiling for the text columns this module writes (``last_error_message``,
 #: ``failure_side_effect_error``).
 _TEXT_LIMIT = 10_000
 
+#: ``TransitionMessage.priority`` bounds: the claim takes 0 first.
+HIGHEST_PRIORITY = 0
+LOWEST_PRIORITY = 9
+DEFAULT_PRIORITY = 5
+
+#: What ``TransitionMessage.claim_one`` took: the row's pk, and whether it
+#: is a ``run_at=`` row that must be started before its attempt.
+Claim = namedtuple('Claim', ['pk', 'scheduled'])
+
+
+def _duration_ms(started, ended) -> int:
+    # Clamp to 0 to absorb clock skew; cap into PositiveIntegerField.
+    return max(int((ended - started).total_seconds() * 1000), 0)
+
 
 def db_safe_text(value: str, limit: int = _TEXT_LIMIT) -> str:
     """Make ``value`` storable in a Postgres text column.
@@ -47,6 +69,27 @@ def db_safe_text(value: str, limit: int = _TEXT_LIMIT) -> str:
     return text[:limit]
 
 
+def delete_in_pk_windows(queryset, size: int = 10_000) -> int:
+    """Delete the rows of ``queryset``, one window of ``size`` primary
+    keys at a time. Returns the number deleted.
+
+    A sweep that filters with ``NOT EXISTS`` then never reads the whole
+    table in one statement, and each DELETE holds its locks only briefly.
+    """
+    keys = (queryset.model._base_manager.using(queryset.db)
+            .order_by('pk').values_list('pk', flat=True))
+    deleted = 0
+    low = keys.first()
+    while low is not None:
+        high = next(iter(keys.filter(pk__gte=low)[size:size + 1]), None)
+        window = queryset.filter(pk__gte=low)
+        if high is not None:
+            window = window.filter(pk__lt=high)
+        deleted += window.delete()[0]
+        low = high
+    return deleted
+
+
 class TransitionMessage(TimeStampedModel):
     is_completed = models.BooleanField(default=False)
     errors_count = models.PositiveIntegerField(default=0)
@@ -78,6 +121,14 @@ class TransitionMessage(TimeStampedModel):
     completed_at = models.DateTimeField(blank=True, null=True)
     duration_ms = models.PositiveIntegerField(blank=True, null=True)
 
+    # Lease mode (``TRANSITION_MESSAGE_LEASE_SECONDS``). The claim writes
+    # both and commits, and the attempt holds no row lock while its
+    # side-effects run. A row with a live lease is not claimable; an
+    # expired lease makes it claimable again. Blank and null outside lease
+    # mode and between attempts.
+    lease_owner = models.CharField(max_length=255, blank=True, default='')
+    lease_expires_at = models.DateTimeField(blank=True, null=True)
+
     app_label = models.CharField(max_length=100)
     model_name = models.CharField(max_length=100)
     # Stored as text (``str(instance.pk)``) so the background path
@@ -121,8 +172,48 @@ class TransitionMessage(TimeStampedModel):
     # wall-clock limit.
     timeout_seconds = models.PositiveIntegerField(blank=True, null=True)
 
-
-    kwargs = models.JSONField(blank=True, default=dict)
+    # The claim takes rows by ``(priority, created)``: 0 first, 9 last.
+    # Set from ``BackgroundTransition(priority=)`` or the call's
+    # ``priority=``. The aging safety net sets it to 0 once a row has
+    # waited one ``PRIORITY_AGING_MINUTES`` per level, and stamps
+    # ``priority_aged_at``, so a low-priority row cannot wait forever.
+    priority = models.PositiveSmallIntegerField(default=DEFAULT_PRIORITY)
+    priority_aged_at = models.DateTimeField(blank=True, null=True)
+
+    # When a worker may take the row next. The claim checks it on the rows
+    # it reads in claim order. It is in no index but the one of scheduled
+    # rows, so writing it does not touch the claim's index. Now at
+    # enqueue; ``record_error`` moves it by the retry backoff. The claim
+    # and the lease renewals leave it alone: the claim checks the lease
+    # itself. ``MAX_ERRORS`` is not stored here: the claim compares
+    # ``errors_count`` with the setting, so a changed setting applies to
+    # the rows already waiting.
+    next_attempt_at = models.DateTimeField(
+        blank=True, null=True, default=timezone.now)
+
+    # A row enqueued with ``run_at=`` or ``countdown=``. It waits for its
+    # ``next_attempt_at`` without touching the instance: no
+    # ``in_progress_state``, no place under the one-uncompleted-per-process
+    # constraint, not counted by ``in_flight_for``. When it is due, the
+    # worker checks the sources and conditions again and, if they still
+    # hold, clears this flag and writes ``in_progress_state``, as enqueue
+    # would have.
+    scheduled = models.BooleanField(default=False)
+
+    kwargs = models.JSONField(blank=True, default=dict,
+                              encoder=KwargsJSONEncoder,
+                              decoder=KwargsJSONDecoder)
+    # Set when the serialized kwargs were larger than
+    # ``PAYLOAD_THRESHOLD_BYTES``: they are stored compressed in
+    # ``TransitionPayload``, and ``kwargs`` keeps only the engine's keys.
+    # No database constraint: the partitioned layout copies rows with
+    # ``INSERT ... SELECT``, and the cleanup sweep deletes the payloads
+    # no row points to.
+    payload = models.ForeignKey(
+        'TransitionPayload', blank=True, null=True,
+        on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+        related_name='+',
+    )
 
     class Meta:
         app_label = 'django_logic_background'
@@ -135,9 +226,29 @@ class TransitionMessage(TimeStampedModel):
                 fields=['app_label', 'model_name', 'instance_id'],
                 name='dl_bg_instance_idx',
             ),
+            # The claim: one queue's uncompleted rows in claim order. The
+            # scan stops at the first due row, however many completed
+            # rows the table keeps. Whether a row is due changes with the
+            # clock, so it cannot be part of the index's condition.
+            models.Index(
+                fields=['queue_name', 'priority', 'created'],
+                condition=models.Q(is_completed=False),
+                name='dl_bg_claim_idx',
+            ),
+            # The next ``run_at=`` row of these queues
+            # (``pull.wait_seconds``). Only scheduled rows: an index the
+            # claim could use would let the planner sort every due row
+            # instead of stopping at the first one.
+            models.Index(
+                fields=['queue_name', 'next_attempt_at'],
+                condition=models.Q(is_completed=False, scheduled=True),
+                name='dl_bg_scheduled_idx',
+            ),
+            # The cleanup sweep's lookup of the payloads still in use.
             models.Index(
-                fields=['is_completed', 'started_at'],
-                name='dl_bg_started_idx',
+                fields=['payload'],
+                condition=models.Q(payload__isnull=False),
+                name='dl_bg_payload_idx',
             ),
         ]
         constraints = [
@@ -145,9 +256,10 @@ class TransitionMessage(TimeStampedModel):
             # Without process_name in the constraint, two independent state
             # machines on the same model (e.g. ``status`` and
             # ``payment_status``) would falsely conflict.
+            # A scheduled row is not in progress yet, so it takes no place.
             models.UniqueConstraint(
                 fields=['app_label', 'model_name', 'instance_id', 'process_name'],
-                condition=models.Q(is_completed=False),
+                condition=models.Q(is_completed=False, scheduled=False),
                 name='dl_bg_one_uncompleted_per_process',
             ),
         ]
@@ -167,12 +279,26 @@ class TransitionMessage(TimeStampedModel):
         failure path, and the public ``in_flight()`` probe all read
         through it, so a future change to the keying changes it once.
         """
+        return cls._in_flight_among(type(instance), [instance.pk], process_name)
+
+    @classmethod
+    def in_flight_instance_ids(cls, model, pks, process_name: str) -> set:
+        """The ``instance_id`` values among ``pks`` with an uncompleted row,
+        in one query. The bulk form of ``in_flight_for(...).exists()``."""
+        return set(
+            cls._in_flight_among(model, pks, process_name)
+            .values_list('instance_id', flat=True)
+        )
+
+    @classmethod
+    def _in_flight_among(cls, model, pks, process_name: str):
         return cls.objects.filter(
-            app_label=instance._meta.app_label,
-            model_name=instance._meta.model_name,
-            instance_id=str(instance.pk),
+            app_label=model._meta.app_label,
+            model_name=model._meta.model_name,
+            instance_id__in=[str(pk) for pk in pks],
             process_name=process_name,
             is_completed=False,
+            scheduled=False,
         )
 
     RETRYING = 'retrying'
@@ -215,14 +341,17 @@ class TransitionMessage(TimeStampedModel):
 
         In order:
 
+        * a leased attempt whose lease has not expired is still being
+          retried;
         * a running attempt inside its declared per-attempt budget
           (``started_at + timeout_seconds`` plus slack) is still being
           retried — the watchdog's own definition, so the gate cannot
           call an attempt stranded while the watchdog still treats it
           as live;
         * otherwise a row whose newest activity (``modified``, refreshed
-          at attempt start / on every recorded error, or ``started_at``)
-          is within the retry window is still being retried;
+          at attempt start / on every recorded error, ``started_at``, or
+          the ``next_attempt_at`` it waits for) is within the retry
+          window is still being retried;
         * past the window, a row a worker still holds is still being
           retried: an attempt that runs quietly for longer than the
           window is slow, not lost. The probe is a savepointed
@@ -240,19 +369,28 @@ class TransitionMessage(TimeStampedModel):
         row = (
             cls.in_flight_for(instance, process_name)
             .order_by('-modified')
-            .values('pk', 'modified', 'started_at', 'timeout_seconds')
+            .values('pk', 'modified', 'started_at', 'timeout_seconds',
+                    'lease_expires_at', 'next_attempt_at')
             .first()
         )
         if row is None:
             return None
         now = timezone.now()
+        # A leased attempt holds no row lock, so its live lease is the
+        # only sign that it runs.
+        if row['lease_expires_at'] is not None and row['lease_expires_at'] > now:
+            return cls.RETRYING
         started, timeout = row['started_at'], row['timeout_seconds']
         if (
             started is not None and timeout is not None
             and now < started + timedelta(seconds=timeout) + cls.RETRY_SLACK
         ):
             return cls.RETRYING
-        newest = max(t for t in (row['modified'], started) if t is not None)
+        # A row waiting out its backoff is due at ``next_attempt_at``, so
+        # the window counts from there: a long exponential wait is not
+        # stranded.
+        newest = max(t for t in (row['modified'], started,
+                                 row['next_attempt_at']) if t is not None)
         # The whole retry pipeline's span plus slack, floored so short
         # test/dev retry configs don't classify a fresh row as stale.
         retry_window = max(
@@ -327,6 +465,100 @@ class TransitionMessage(TimeStampedModel):
             return False
         return True
 
+    @classmethod
+    def claim_one(
+        cls, candidates: models.QuerySet, lease_owner: str = '',
+        lease_seconds: float | None = None,
+    ) -> Claim | None:
+        """Take the first row of ``candidates`` and stamp its ``started_at``.
+        Returns its ``Claim``, or ``None`` when no row is free. The claim
+        reads ``scheduled`` with the pk, so the attempt only looks for a
+        ``run_at=`` row to start when there is one.
+
+        With ``lease_owner``, the same statement writes the lease:
+        ``lease_owner``, and ``lease_expires_at = now + lease_seconds``.
+        None of the columns it writes is indexed, so on PostgreSQL the
+        claim can be a HOT update.
+
+        On PostgreSQL this is one statement::
+
+            UPDATE ... SET started_at = now
+            WHERE pk = (SELECT pk ... FOR UPDATE SKIP LOCKED LIMIT 1)
+            RETURNING pk, scheduled
+
+        It commits on its own, so the stamp is visible to the watchdog at
+        once, as with ``stamp_attempt_started``. A row that an attempt holds
+        is skipped, not waited on.
+
+        A backend without ``SKIP LOCKED`` (SQLite has no row locks) reads
+        the pk and stamps it with a conditional UPDATE.
+        """
+        alias = router.db_for_write(cls) or candidates.db
+        connection = connections[alias]
+        now = timezone.now()
+        values = {'started_at': now, 'modified': now}
+        if lease_owner:
+            values['lease_owner'] = lease_owner
+            values['lease_expires_at'] = now + timedelta(seconds=lease_seconds)
+        if not connection.features.has_select_for_update_skip_locked:
+            row = candidates.using(alias).values_list(
+                'pk', 'scheduled').first()
+            if row is None:
+                return None
+            stamped = cls.objects.using(alias).filter(
+                pk=row[0], is_completed=False,
+            ).update(**values)
+            return Claim(*row) if stamped else None
+
+        inner_sql, inner_params = (
+            candidates.using(alias).values('pk')[:1]
+            .query.get_compiler(alias).as_sql()
+        )
+        quote = connection.ops.quote_name
+        pk_column = quote(cls._meta.pk.column)
+        fields = [(cls._meta.get_field(name), value)
+                  for name, value in values.items()]
+        assignments = ', '.join(f'{quote(field.column)} = %s'
+                                for field, _value in fields)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {quote(cls._meta.db_table)} '
+                f'SET {assignments} '
+                f'WHERE {pk_column} = ({inner_sql} '
+                f'{connection.ops.for_update_sql(skip_locked=True)}) '
+                f'RETURNING {pk_column}, '
+                f'{quote(cls._meta.get_field("scheduled").column)}',
+                [*(field.get_db_prep_value(value, connection)
+                   for field, value in fields), *inner_params],
+            )
+            row = cursor.fetchone()
+        return Claim(row[0], bool(row[1])) if row else None
+
+    @classmethod
+    def renew_lease(cls, transition_message_id: int, lease_owner: str,
+                    lease_seconds: float) -> bool:
+        """Move ``lease_expires_at`` to ``now + lease_seconds``. Returns False
+        when the lease is no longer ``lease_owner``'s: it expired and
+        another worker claimed the row, or the row completed."""
+        now = timezone.now()
+        expires = now + timedelta(seconds=lease_seconds)
+        return bool(cls.objects.filter(
+            pk=transition_message_id, is_completed=False,
+            lease_owner=lease_owner,
+        ).update(lease_expires_at=expires, modified=now))
+
+    def lease_is_live(self) -> bool:
+        """Whether a leased attempt may still be running on this row."""
+        return (
+            self.lease_expires_at is not None
+            and self.lease_expires_at > timezone.now()
+        )
+
+    def release_lease(self) -> None:
+        self.lease_owner = ''
+        self.lease_expires_at = None
+        self.save(update_fields=['lease_owner', 'lease_expires_at', 'modified'])
+
     def mark_as_completed(
         self, measure_duration: bool = True, *, ended_in_failure: bool = False,
     ) -> None:
@@ -351,12 +583,12 @@ class TransitionMessage(TimeStampedModel):
             self.ended_in_failure = True
             update_fields.append('ended_in_failure')
         if measure_duration and self.started_at is not None:
-            delta = now - self.started_at
-            # Clamp to 0 to absorb clock skew; cap into PositiveIntegerField.
-            ms = max(int(delta.total_seconds() * 1000), 0)
-            self.duration_ms = ms
+            self.duration_ms = _duration_ms(self.started_at, now)
             update_fields.append('duration_ms')
         self.save(update_fields=update_fields)
+        if measure_duration and not ended_in_failure:
+            # A terminal failure has its attempt from record_error already.
+            self._record_attempt(now, number=self.errors_count + 1)
 
     def mark_as_superseded(self, note: str) -> None:
         """Terminal outcome for a row whose instance was moved by something
@@ -372,7 +604,17 @@ class TransitionMessage(TimeStampedModel):
         self.save(update_fields=['last_error_message', 'last_error_dt', 'modified'])
         self.mark_as_completed(measure_duration=False)
 
-    def record_error(self, exception: BaseException) -> None:
+    @staticmethod
+    def next_attempt_after(errors_count: int, backoff=None):
+        """``next_attempt_at`` for a row that now has ``errors_count``
+        errors: after the backoff's wait."""
+        from django_logic.background.backoff import retry_delay
+
+        return timezone.now() + retry_delay(errors_count, backoff)
+
+    def record_error(self, exception: BaseException, backoff=None) -> None:
+        """Count the error and schedule the next attempt by ``backoff``
+        (the transition's ``retry_backoff``; the setting when ``None``)."""
         # db_safe_text, not a bare slice: the accounting write must never be
         # the statement that fails (see its docstring).
         self.last_error_message = db_safe_text(exception)
@@ -381,16 +623,43 @@ class TransitionMessage(TimeStampedModel):
         # read-modify-write on a possibly-stale in-memory errors_count, so
         # two writers racing on the same row — e.g. the watchdog and a
         # reconnected zombie worker that lost its row lock — cannot lose an
-        # increment. .update() bypasses auto_now, so set ``modified`` here.
-        type(self).objects.filter(pk=self.pk).update(
-            errors_count=models.F('errors_count') + 1,
-            last_error_message=self.last_error_message,
-            last_error_dt=self.last_error_dt,
-            modified=self.last_error_dt,
+        # increment. The backoff comes from the count read under the row
+        # lock, the one this UPDATE increments, not from the in-memory
+        # count. .update() bypasses auto_now, so set ``modified`` here.
+        rows = type(self).objects.filter(pk=self.pk)
+        with transaction.atomic(using=rows.db):
+            errors_count = rows.select_for_update().values_list(
+                'errors_count', flat=True).first()
+            if errors_count is None:
+                errors_count = self.errors_count
+            self.next_attempt_at = self.next_attempt_after(
+                errors_count + 1, backoff)
+            rows.update(
+                errors_count=models.F('errors_count') + 1,
+                last_error_message=self.last_error_message,
+                last_error_dt=self.last_error_dt,
+                next_attempt_at=self.next_attempt_at,
+                modified=self.last_error_dt,
+            )
+        # The count read under the lock is the one the UPDATE incremented,
+        # so the caller's MAX_ERRORS comparison sees the true count without
+        # reading the row again.
+        self.errors_count = errors_count + 1
+        self.modified = self.last_error_dt
+        self._record_attempt(self.last_error_dt, number=self.errors_count,
+                             error=self.last_error_message)
+
+    def _record_attempt(self, ended_at, *, number: int, error: str = '') -> None:
+        TransitionAttempt.objects.create(
+            transition_message_id=self.pk,
+            number=number,
+            worker=self.lease_owner or f'{socket.gethostname()}:{os.getpid()}',
+            started_at=self.started_at,
+            ended_at=ended_at,
+            duration_ms=(None if self.started_at is None
+                         else _duration_ms(self.started_at, ended_at)),
+            error=error,
         )
-        # Reflect the committed value in memory so the caller's MAX_ERRORS
-        # comparison sees the true count, not the stale snapshot.
-        self.refresh_from_db(fields=['errors_count', 'modified'])
 
     def record_failure_side_effect_error(
         self, exception: BaseException, *, label: str = '',
@@ -420,3 +689,120 @@ class TransitionMessage(TimeStampedModel):
             f'{existing}; {note}' if existing else note
         )
         self.save(update_fields=['failure_side_effect_error', 'modified'])
+
+
+class ArchivedTransitionMessage(models.Model):
+    """A completed ``TransitionMessage`` moved out of the hot table.
+
+    ``archive.archive_completed`` copies the row and deletes the original
+    in one transaction, so a row is in exactly one of the two tables. The
+    columns are the ones an audit reads; those that only steer a pending
+    row (the lease, ``next_attempt_at``, ``scheduled``, the aging stamp)
+    are dropped. ``id`` is the original row's pk.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    created = models.DateTimeField()
+    modified = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    app_label = models.CharField(max_length=100)
+    model_name = models.CharField(max_length=100)
+    instance_id = models.CharField(max_length=255)
+    process_name = models.CharField(max_length=100)
+    field_name = models.CharField(max_length=100, blank=True, default='')
+    transition_name = models.CharField(max_length=100)
+    owning_process_class = models.TextField(blank=True, default='')
+    queue_name = models.CharField(max_length=100)
+    priority = models.PositiveSmallIntegerField(default=DEFAULT_PRIORITY)
+    timeout_seconds = models.PositiveIntegerField(blank=True, null=True)
+
+    ended_in_failure = models.BooleanField(default=False)
+    errors_count = models.PositiveIntegerField(default=0)
+    last_error_dt = models.DateTimeField(blank=True, null=True)
+    last_error_message = models.TextField(blank=True)
+    failure_side_effect_error = models.TextField(blank=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    duration_ms = models.PositiveIntegerField(blank=True, null=True)
+
+    kwargs = models.JSONField(blank=True, default=dict,
+                              encoder=KwargsJSONEncoder,
+                              decoder=KwargsJSONDecoder)
+
+    class Meta:
+        app_label = 'django_logic_background'
+        indexes = [
+            models.Index(
+                fields=['app_label', 'model_name', 'instance_id'],
+                name='dl_bg_archived_instance_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return (
+            f'ArchivedTransitionMessage#{self.pk} '
+            f'{self.app_label}.{self.model_name}#{self.instance_id} '
+            f'{self.transition_name} on {self.queue_name}'
+        )
+
+
+class TransitionPayload(models.Model):
+    """The compressed kwargs of a ``TransitionMessage`` row whose
+    serialized kwargs are larger than ``PAYLOAD_THRESHOLD_BYTES``.
+
+    The claim, the retry scans and the row lock read only the narrow hot
+    row. The worker reads the payload once it holds the row lock. See
+    ``django_logic.background.payloads``.
+    """
+    id = models.BigAutoField(primary_key=True)
+    #: ``'zlib'`` or ``'zstd'``.
+    codec = models.CharField(max_length=8)
+    #: Bytes of the JSON text before compression.
+    size = models.PositiveIntegerField()
+    data = models.BinaryField()
+
+    class Meta:
+        app_label = 'django_logic_background'
+
+    def __str__(self) -> str:
+        return f'TransitionPayload#{self.pk} ({self.codec}, {self.size} bytes)'
+
+
+class TransitionAttempt(models.Model):
+    """One ended attempt at a ``TransitionMessage`` row. Append-only.
+
+    ``record_error`` writes one per failed attempt, and ``mark_as_completed``
+    one for the attempt that succeeded, in the same transaction as the
+    row's own update. The row keeps only the latest error; this table
+    keeps them all. The death of an attempt's process is recorded when
+    its worker sees it (``pull._record_child_death``). An attempt that
+    dies with its worker has no row here until the watchdog records its
+    timeout.
+
+    No database constraint on ``transition_message``: the partitioned
+    layout's primary key is ``(id, created)``, which ``id`` alone cannot
+    reference. The cleanup sweep deletes the attempts of rows that are
+    neither in the table nor in the archive.
+    """
+    id = models.BigAutoField(primary_key=True)
+    transition_message = models.ForeignKey(
+        TransitionMessage, on_delete=models.DO_NOTHING, db_constraint=False,
+        related_name='attempts',
+    )
+    #: 1 for the first attempt: the row's errors before it, plus one.
+    number = models.PositiveIntegerField()
+    #: ``host:pid`` of the worker, or its lease owner in lease mode.
+    worker = models.CharField(max_length=255, blank=True, default='')
+    started_at = models.DateTimeField(blank=True, null=True)
+    ended_at = models.DateTimeField()
+    duration_ms = models.PositiveIntegerField(blank=True, null=True)
+    #: Empty when the attempt succeeded.
+    error = models.TextField(blank=True)
+
+    class Meta:
+        app_label = 'django_logic_background'
+
+    def __str__(self) -> str:
+        outcome = 'failed' if self.error else 'succeeded'
+        return (f'TransitionAttempt#{self.pk} of TransitionMessage#'
+                f'{self.transition_message_id}: #{self.number} {outcome}')
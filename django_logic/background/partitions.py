@@ -0,0 +1,307 @@
+"""The partitioned ``TransitionMessage`` layout (PostgreSQL, optional).
+
+At millions of rows a day, the cleanup sweep's ``DELETE`` holds locks
+for long, spikes the WAL, and leaves the claim indexes bloated until the
+next vacuum. In the partitioned layout the table is range-partitioned on
+``created``, one partition per UTC day, and retention drops whole
+partitions instead of deleting rows.
+
+``dl_partitions --convert`` rewrites the table once. After that the
+cleanup safety net keeps ``PARTITIONS_AHEAD_DAYS`` days of partitions
+ahead, and drops each day whose partition ended ``CLEANUP_DAYS`` ago.
+Before a day is dropped, the rows the row-by-row sweep would keep are
+copied forward into the DEFAULT partition: uncompleted rows, rows
+modified since the cutoff, and the newest terminal failure per instance
+and process. The DEFAULT partition also takes any row whose day has no
+partition yet. It stays small, and the row-by-row sweep still runs on
+it.
+
+PostgreSQL cannot enforce a unique index across partitions unless the
+index includes the partition key. The primary key is therefore
+``(id, created)``, and ``dl_bg_one_uncompleted_per_process`` becomes one
+unique index per partition. Two uncompleted rows of one process created
+on different days are kept apart by the state lock and the in-flight
+check that enqueue runs under it, not by the database.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.utils import timezone
+
+from django_logic.background import settings as bg_settings
+from django_logic.logger import logger
+
+#: Days of partitions the cleanup keeps ready ahead of today. A missed
+#: day is not an outage: its rows land in the DEFAULT partition, and
+#: creating the day's partition later moves them in.
+PARTITIONS_AHEAD_DAYS = 7
+
+#: Percent of each heap page that inserts fill. The attempt stamps and
+#: the completion update the row in place; the free space lets
+#: PostgreSQL keep the new version on the same page (a HOT update) and
+#: skip the index writes, as long as no indexed column changed.
+FILLFACTOR = 80
+
+
+def _connection():
+    from django_logic.background.models import TransitionMessage
+
+    alias = router.db_for_write(TransitionMessage) or DEFAULT_DB_ALIAS
+    return connections[alias]
+
+
+def _table() -> str:
+    from django_logic.background.models import TransitionMessage
+
+    return TransitionMessage._meta.db_table
+
+
+def partition_name(day: date) -> str:
+    return f'{_table()}_p{day:%Y%m%d}'
+
+
+def default_partition_name() -> str:
+    return f'{_table()}_default'
+
+
+def _bound(day: date) -> str:
+    """The SQL literal of ``day``'s first instant in UTC. Partition bounds
+    are DDL, which takes no query parameters."""
+    moment = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+    return f"'{moment.isoformat()}'"
+
+
+def is_partitioned() -> bool:
+    """Whether the ``TransitionMessage`` table uses the partitioned
+    layout. Always ``False`` off PostgreSQL."""
+    connection = _connection()
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)',
+                       [_table()])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def partition_days() -> list[date]:
+    """The days that have a partition, oldest first. Partitions not named
+    by ``partition_name`` are not ours and are left alone."""
+    prefix = f'{_table()}_p'
+    with _connection().cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = to_regclass(%s)',
+            [_table()],
+        )
+        names = [name for (name,) in cursor.fetchall()]
+    days = []
+    for name in names:
+        if not name.startswith(prefix):
+            continue
+        try:
+            days.append(datetime.strptime(name[len(prefix):], '%Y%m%d').date())
+        except ValueError:
+            continue
+    return sorted(days)
+
+
+def _add_unique_index(cursor, quote, partition: str) -> None:
+    """The per-partition form of ``dl_bg_one_uncompleted_per_process``."""
+    cursor.execute(
+        f'CREATE UNIQUE INDEX IF NOT EXISTS {quote(partition + "_one")} '
+        f'ON {quote(partition)} '
+        f'(app_label, model_name, instance_id, process_name) '
+        f'WHERE NOT is_completed AND NOT scheduled'
+    )
+
+
+def convert_table(ahead_days: int = PARTITIONS_AHEAD_DAYS) -> None:
+    """Rewrite the ``TransitionMessage`` table in the partitioned layout.
+
+    One transaction, under an exclusive lock on the table: every row is
+    copied, so run it in a maintenance window. Days from ``CLEANUP_DAYS``
+    ago to ``ahead_days`` ahead get a partition; older rows go to the
+    DEFAULT partition. Raises ``ValueError`` off PostgreSQL or when the
+    table is partitioned already.
+    """
+    from django_logic.background.models import TransitionMessage
+
+    connection = _connection()
+    if connection.vendor != 'postgresql':
+        raise ValueError('the partitioned layout needs PostgreSQL.')
+    if is_partitioned():
+        raise ValueError(f'{_table()} is partitioned already.')
+    quote = connection.ops.quote_name
+    table = _table()
+    staging = f'{table}_partitioned'
+    today = timezone.now().astimezone(dt_timezone.utc).date()
+    first_day = today - timedelta(days=int(bg_settings.cleanup_days()))
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {quote(table)} IN ACCESS EXCLUSIVE MODE')
+            cursor.execute(
+                f'CREATE TABLE {quote(staging)} (LIKE {quote(table)} '
+                f'INCLUDING DEFAULTS) PARTITION BY RANGE (created)')
+            cursor.execute(
+                f'ALTER TABLE {quote(staging)} ADD CONSTRAINT '
+                f'{quote(staging + "_pkey")} PRIMARY KEY (id, created)')
+            default = default_partition_name()
+            cursor.execute(
+                f'CREATE TABLE {quote(default)} PARTITION OF {quote(staging)} '
+                f'DEFAULT WITH (fillfactor = {FILLFACTOR})')
+            _add_unique_index(cursor, quote, default)
+            day = first_day
+            while day <= today + timedelta(days=ahead_days):
+                _create_partition(cursor, quote, staging, day)
+                day += timedelta(days=1)
+            cursor.execute(
+                f'INSERT INTO {quote(staging)} SELECT * FROM {quote(table)}')
+            # Identity columns on partitioned tables need PostgreSQL 17, so
+            # the id takes its values from a plain sequence.
+            sequence = f'{table}_id_seq'
+            cursor.execute(f'DROP TABLE {quote(table)}')
+            cursor.execute(f'CREATE SEQUENCE {quote(sequence)}')
+            cursor.execute(
+                f"SELECT setval(%s, COALESCE(MAX(id), 0) + 1, false) "
+                f"FROM {quote(staging)}", [sequence])
+            cursor.execute(
+                f"ALTER TABLE {quote(staging)} ALTER COLUMN id "
+                f"SET DEFAULT nextval('{sequence}')")
+            cursor.execute(f'ALTER TABLE {quote(staging)} RENAME TO {quote(table)}')
+            cursor.execute(
+                f'ALTER SEQUENCE {quote(sequence)} OWNED BY {quote(table)}.id')
+            cursor.execute(
+                f'ALTER INDEX {quote(staging + "_pkey")} '
+                f'RENAME TO {quote(table + "_pkey")}')
+        with connection.schema_editor() as editor:
+            for index in TransitionMessage._meta.indexes:
+                editor.add_index(TransitionMessage, index)
+    logger.info(f'dl_partitions: {table} now uses the partitioned layout')
+
+
+def _create_partition(cursor, quote, table: str, day: date) -> None:
+    partition = partition_name(day)
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {quote(partition)} PARTITION OF '
+        f'{quote(table)} FOR VALUES FROM ({_bound(day)}) '
+        f'TO ({_bound(day + timedelta(days=1))}) '
+        f'WITH (fillfactor = {FILLFACTOR})')
+    _add_unique_index(cursor, quote, partition)
+
+
+def create_partition(day: date) -> None:
+    """Create ``day``'s partition.
+
+    Rows of that day that already sit in the DEFAULT partition are moved
+    into it in the same transaction: PostgreSQL refuses to add a range
+    the DEFAULT partition has rows for.
+    """
+    connection = _connection()
+    quote = connection.ops.quote_name
+    table, default = _table(), default_partition_name()
+    partition = partition_name(day)
+    lower, upper = _bound(day), _bound(day + timedelta(days=1))
+    with transaction.atomic(using=connection.alias), \
+            connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM {quote(default)} '
+            f'WHERE created >= {lower} AND created < {upper})')
+        if not cursor.fetchone()[0]:
+            _create_partition(cursor, quote, table, day)
+            return
+        cursor.execute(
+            f'CREATE TABLE {quote(partition)} (LIKE {quote(table)} '
+            f'INCLUDING DEFAULTS) WITH (fillfactor = {FILLFACTOR})')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {quote(default)} '
+            f'WHERE created >= {lower} AND created < {upper} '
+            f'RETURNING *) '
+            f'INSERT INTO {quote(partition)} SELECT * FROM moved')
+        cursor.execute(
+            f'ALTER TABLE {quote(table)} ATTACH PARTITION '
+            f'{quote(partition)} FOR VALUES FROM ({lower}) TO ({upper})')
+        _add_unique_index(cursor, quote, partition)
+
+
+def create_partitions(ahead_days: int = PARTITIONS_AHEAD_DAYS) -> list[date]:
+    """Create the missing partitions from today to ``ahead_days`` ahead.
+    Returns the days created."""
+    today = timezone.now().astimezone(dt_timezone.utc).date()
+    existing = set(partition_days())
+    created = []
+    for offset in range(ahead_days + 1):
+        day = today + timedelta(days=offset)
+        if day not in existing:
+            create_partition(day)
+            created.append(day)
+    if created:
+        logger.info(f'dl_partitions: created partitions for '
+                    f'{", ".join(map(str, created))}')
+    return created
+
+
+def drop_expired_partitions() -> int:
+    """Drop each day whose partition ended ``CLEANUP_DAYS`` ago, after
+    copying the rows the cleanup keeps into the DEFAULT partition.
+    Returns the number of rows dropped.
+
+    The rows to keep are read before the table lock, with the partition
+    still attached. The short transaction that detaches and drops it
+    copies them, plus every row that is uncompleted by then. A day whose
+    lock is not granted within a few seconds is left for the next run.
+    """
+    connection = _connection()
+    quote = connection.ops.quote_name
+    table = _table()
+    cutoff = timezone.now() - timedelta(days=bg_settings.cleanup_days())
+    dropped = 0
+    for day in partition_days():
+        if datetime.combine(day + timedelta(days=1), time.min,
+                            tzinfo=dt_timezone.utc) > cutoff:
+            break
+        partition = partition_name(day)
+        with connection.cursor() as cursor:
+            # A terminal failure is kept while no newer one exists for its
+            # instance and process, as in the row-by-row sweep.
+            cursor.execute(
+                f'SELECT id FROM {quote(partition)} AS candidate '
+                f'WHERE NOT candidate.is_completed OR candidate.modified >= %s '
+                f'OR (candidate.ended_in_failure AND NOT EXISTS ('
+                f'SELECT 1 FROM {quote(table)} AS newer '
+                f'WHERE newer.is_completed AND newer.ended_in_failure '
+                f'AND newer.app_label = candidate.app_label '
+                f'AND newer.model_name = candidate.model_name '
+                f'AND newer.instance_id = candidate.instance_id '
+                f'AND newer.process_name = candidate.process_name '
+                f'AND (newer.completed_at, newer.id) > '
+                f'(candidate.completed_at, candidate.id)))',
+                [cutoff],
+            )
+            keep = [pk for (pk,) in cursor.fetchall()]
+        try:
+            with transaction.atomic(using=connection.alias), \
+                    connection.cursor() as cursor:
+                cursor.execute("SET LOCAL lock_timeout = '5s'")
+                cursor.execute(
+                    f'ALTER TABLE {quote(table)} DETACH PARTITION '
+                    f'{quote(partition)}')
+                cursor.execute(
+                    f'INSERT INTO {quote(table)} SELECT * FROM '
+                    f'{quote(partition)} WHERE id = ANY(%s) OR NOT is_completed',
+                    [keep])
+                kept = cursor.rowcount
+                cursor.execute(f'SELECT count(*) FROM {quote(partition)}')
+                rows = cursor.fetchone()[0]
+                cursor.execute(f'DROP TABLE {quote(partition)}')
+        except Exception as exc:
+            logger.warning(f'dl_partitions: could not drop {partition} ({exc}); '
+                           f'the next cleanup tries again.')
+            break
+        dropped += rows - kept
+        logger.info(f'dl_partitions: dropped {partition}: {rows - kept} rows, '
+                    f'{kept} copied forward')
+    return dropped
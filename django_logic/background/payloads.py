@@ -0,0 +1,165 @@
+"""Out-of-line storage for large kwargs.
+
+The claim, ``retry_status`` and the row lock all read ``TransitionMessage``
+rows, and PostgreSQL stores a large ``kwargs`` document out of line
+(TOAST) and reads it back with the row. With
+``TRANSITION_MESSAGE_PAYLOAD_THRESHOLD_BYTES`` set, enqueue compresses
+kwargs larger than that into a ``TransitionPayload`` row instead, in the
+same transaction as the message. The message keeps only the engine's
+keys (``tr_id``, ``root_id``, ``parent_id``, ``process_class``) in
+``kwargs``, so the hot table stays narrow. The worker reads the payload
+with ``stored_kwargs`` once it holds the row lock.
+
+Payloads are compressed with zstd when a zstd module is available
+(``compression.zstd`` on Python 3.14, or the ``zstandard`` package), and
+with zlib otherwise. Each payload records its codec, so any worker can
+read it as long as it has that codec. The cleanup sweep deletes the
+payloads that no row points to any more (``delete_orphans``).
+"""
+from __future__ import annotations
+
+import json
+import zlib
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.db.models import Exists, OuterRef
+
+from django_logic.background import settings as bg_settings
+from django_logic.background.models import (
+    TransitionMessage,
+    TransitionPayload,
+    delete_in_pk_windows,
+)
+from django_logic.background.serializers import (
+    KwargsJSONDecoder,
+    KwargsJSONEncoder,
+    SerializedKwargs,
+)
+from django_logic.logger import logger
+
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+CODEC_ZLIB = 'zlib'
+CODEC_ZSTD = 'zstd'
+
+#: The kwargs a message keeps inline when its payload moves out. The
+#: worker's restore and the logs read them from the row.
+INLINE_KEYS = ('tr_id', 'root_id', 'parent_id', 'process_class')
+
+
+def _compress(text: bytes) -> tuple[str, bytes]:
+    if zstd is not None:
+        return CODEC_ZSTD, zstd.compress(text)
+    return CODEC_ZLIB, zlib.compress(text)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    if codec == CODEC_ZSTD:
+        if zstd is None:
+            raise ImproperlyConfigured(
+                'This payload is zstd-compressed, and this worker has no '
+                'zstd module. Install zstandard, or run Python 3.14.'
+            )
+        return zstd.decompress(data)
+    raise ValueError(f'unknown payload codec {codec!r}')
+
+
+def offload(rows: list[dict]) -> None:
+    """Move the large kwargs of ``rows``, the field values of messages
+    yet to be written, into payload rows.
+
+    Call it in the transaction that writes the messages. A row whose
+    kwargs encode to more than ``PAYLOAD_THRESHOLD_BYTES`` of JSON gets a
+    ``payload``, and its ``kwargs`` shrink to ``INLINE_KEYS``. A no-op
+    when the setting is unset.
+    """
+    threshold = bg_settings.payload_threshold_bytes()
+    if threshold is None:
+        return
+    large = []
+    for fields in rows:
+        kwargs = fields['kwargs']
+        # The text the column would write: measured here, written once.
+        if isinstance(kwargs, SerializedKwargs):
+            text = kwargs.text
+        else:
+            text = json.dumps(kwargs, cls=KwargsJSONEncoder)
+        # Characters bound the bytes from below: a shorter text cannot be
+        # over the threshold, and needs no UTF-8 copy.
+        if len(text) <= threshold:
+            continue
+        data = text.encode('utf-8')
+        if len(data) > threshold:
+            large.append((fields, data))
+    if not large:
+        return
+    stored = []
+    for _fields, text in large:
+        codec, data = _compress(text)
+        stored.append(TransitionPayload(codec=codec, size=len(text), data=data))
+    alias = router.db_for_write(TransitionPayload) or DEFAULT_DB_ALIAS
+    if connections[alias].features.can_return_rows_from_bulk_insert:
+        TransitionPayload.objects.bulk_create(stored)
+    else:
+        for payload in stored:
+            payload.save(force_insert=True)
+    for (fields, _text), payload in zip(large, stored):
+        fields['payload'] = payload
+        fields['kwargs'] = {key: fields['kwargs'][key]
+                            for key in INLINE_KEYS if key in fields['kwargs']}
+
+
+def stored_kwargs(transition_message: TransitionMessage) -> dict:
+    """The serialized kwargs of ``transition_message``, read from its
+    payload when it has one. Decode them with ``deserialize_kwargs``."""
+    if transition_message.payload_id is None:
+        return transition_message.kwargs
+    payload = TransitionPayload.objects.get(pk=transition_message.payload_id)
+    return _load(payload)
+
+
+def _load(payload: TransitionPayload) -> dict:
+    text = _decompress(payload.codec, bytes(payload.data))
+    return json.loads(text, cls=KwargsJSONDecoder)
+
+
+def inline(rows: list[dict]) -> list[int]:
+    """Put the payload of each ``.values()`` row back in its ``kwargs``,
+    in one query. Each row needs ``kwargs`` and ``payload_id``, and loses
+    ``payload_id``. Returns the pks of the payloads read."""
+    wanted = {row['payload_id'] for row in rows if row['payload_id'] is not None}
+    found = {payload.pk: payload
+             for payload in TransitionPayload.objects.filter(pk__in=wanted)}
+    for row in rows:
+        payload = found.get(row.pop('payload_id'))
+        if payload is not None:
+            row['kwargs'] = _load(payload)
+    return list(found)
+
+
+def delete_orphans() -> int:
+    """Delete the payloads that no ``TransitionMessage`` points to: those
+    of deleted or archived rows, of dropped partitions, and of bulk
+    inserts that lost to a conflict. Returns the number deleted.
+
+    A payload is written in the same transaction as its message, so no
+    committed payload waits for a message that is yet to come. Each
+    payload is checked with ``NOT EXISTS`` on ``dl_bg_payload_idx``, one
+    window of payloads at a time (``delete_in_pk_windows``).
+    """
+    unreferenced = TransitionPayload.objects.exclude(Exists(
+        TransitionMessage.objects.filter(payload=OuterRef('pk')),
+    ))
+    deleted = delete_in_pk_windows(unreferenced)
+    if deleted:
+        logger.info(f'payloads: deleted {deleted} unreferenced payloads')
+    return deleted
@@ -0,0 +1,212 @@
+"""The prefork pool behind ``dl_worker --concurrency N``.
+
+``run_worker`` runs one attempt at a time. The pool keeps ``N``
+long-lived child processes, and one supervisor process claims rows and
+hands their pks to idle children. The supervisor holds the only LISTEN
+connection and runs the safety nets, so one pool replaces ``N`` serial
+workers.
+
+Each child reads pks from its task pipe, runs each through the shared
+execute path, and writes one line back on its result pipe. A child that
+dies during an attempt closes its result pipe. The supervisor then
+records the death on the row, as ``run_once(isolate=True)`` does, and
+starts a replacement.
+
+A child exits on its own after ``max_tasks_per_child`` attempts, or when
+its peak resident memory reaches ``max_memory_per_child`` KiB. The
+supervisor replaces it. This bounds leaks in consumer code.
+
+The pool runs in lease mode only. Without a lease, a claimed row stays
+claimable until its attempt locks it, so the supervisor would hand the
+same row to several children.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+from django_logic.background import pull, restore_cache
+from django_logic.background import settings as bg_settings
+from django_logic.logger import logger
+
+
+@dataclass
+class _Child:
+    pid: int
+    #: Write end of the pipe that carries pks to the child.
+    task_fd: int
+    #: Read end of the pipe that carries the child's results back.
+    result_fd: int
+    #: The pk the child runs now, or ``None`` when it is idle.
+    pk: int | None = None
+
+
+def _peak_memory_kib() -> int:
+    import resource
+
+    # Linux reports ru_maxrss in KiB.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _child_loop(task_fd: int, result_fd: int,
+                max_tasks: int | None, max_memory_kib: int | None) -> None:
+    """Run pks from ``task_fd`` until it closes or a recycle limit is met.
+
+    Each task line is ``"<pk> <lease owner or -> <scheduled 0 or 1>\\n"``. After each attempt
+    the child writes ``"<pk> <recycle>\\n"``. An exception from the
+    attempt is not caught: the child dies, and the supervisor accounts
+    for the death.
+    """
+    from django_logic.background.runner import run_background_transition
+
+    done = 0
+    with os.fdopen(task_fd, 'r') as tasks:
+        for line in iter(tasks.readline, ''):
+            raw_pk, lease_owner, scheduled = line.split()
+            pk = int(raw_pk)
+            run_background_transition(
+                pk, claimed=True,
+                lease_owner='' if lease_owner == '-' else lease_owner,
+                scheduled=scheduled == '1')
+            done += 1
+            recycle = bool(
+                (max_tasks and done >= max_tasks)
+                or (max_memory_kib and _peak_memory_kib() >= max_memory_kib)
+            )
+            os.write(result_fd, f'{pk} {int(recycle)}\n'.encode())
+            if recycle:
+                return
+
+
+def _spawn(children: list[_Child], max_tasks: int | None,
+           max_memory_kib: int | None) -> _Child:
+    """Fork one child. Connections are closed first, so the two sides
+    never share a database session."""
+    connections.close_all()
+    task_read, task_write = os.pipe()
+    result_read, result_write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            # A sibling's task pipe left open here would keep that
+            # sibling from seeing end-of-file at shutdown.
+            for sibling in children:
+                os.close(sibling.task_fd)
+                os.close(sibling.result_fd)
+            os.close(task_write)
+            os.close(result_read)
+            _child_loop(task_read, result_write, max_tasks, max_memory_kib)
+            status = 0
+        finally:
+            # _exit, so a crashing attempt cannot run the supervisor's
+            # cleanup handlers or flush its buffers twice.
+            os._exit(status)
+    os.close(task_read)
+    os.close(result_write)
+    return _Child(pid=pid, task_fd=task_write, result_fd=result_read)
+
+
+def _reap(child: _Child) -> int:
+    os.close(child.task_fd)
+    os.close(child.result_fd)
+    _, raw_status = os.waitpid(child.pid, 0)
+    return os.waitstatus_to_exitcode(raw_status)
+
+
+def _collect(child: _Child) -> bool:
+    """Read the child's result. Returns whether the child is gone and
+    needs a replacement."""
+    data = os.read(child.result_fd, 64)
+    if data:
+        _pk, recycle = data.split()
+        child.pk = None
+        if recycle == b'1':
+            _reap(child)
+            return True
+        return False
+    exit_code = _reap(child)
+    if child.pk is not None:
+        logger.error(
+            f'pull: pool child {child.pid} died (exit {exit_code}) while it '
+            f'ran TransitionMessage#{child.pk}. Its row lock died with it; '
+            f'the error recorded here paces the next claim.'
+        )
+        pull._record_child_death(child.pk, exit_code)
+    else:
+        logger.error(f'pull: idle pool child {child.pid} died '
+                     f'(exit {exit_code}); starting a replacement.')
+    return True
+
+
+def run_pool(queues: list[str], *, concurrency: int,
+             max_tasks_per_child: int | None = None,
+             max_memory_per_child: int | None = None,
+             forever: bool = True,
+             weights: dict[str, int] | None = None) -> None:
+    """The supervisor loop: keep ``concurrency`` children busy with
+    claimed pks, run the safety nets on schedule, and replace children
+    that die or reach a recycle limit.
+
+    ``forever=False`` returns once nothing is claimable and every child
+    is idle, as ``run_worker(forever=False)`` does. ``weights`` share
+    the claims among ``queues`` (``pull.QueueSchedule``).
+    """
+    if bg_settings.lease_seconds() is None:
+        raise ImproperlyConfigured(
+            "The pool runs every attempt in lease mode. Set "
+            "DJANGO_LOGIC['TRANSITION_MESSAGE_LEASE_SECONDS'] above the "
+            "longest side-effect."
+        )
+    logger.info('pull pool starting: queues=%s concurrency=%d',
+                ','.join(queues), concurrency)
+    # Before the first fork: each child inherits the caches.
+    restore_cache.warm()
+    schedule = pull.QueueSchedule(queues, weights)
+    children: list[_Child] = []
+    nets = pull.SafetyNetSchedule()
+    try:
+        for _ in range(concurrency):
+            children.append(_spawn(
+                children, max_tasks_per_child, max_memory_per_child))
+        while True:
+            handed = False
+            for child in children:
+                if child.pk is not None:
+                    continue
+                lease_owner = pull.new_lease_owner()
+                claim = schedule.claim(lease_owner)
+                if claim is None:
+                    break
+                child.pk = claim.pk
+                os.write(child.task_fd,
+                         f'{claim.pk} {lease_owner or "-"} '
+                         f'{int(claim.scheduled)}\n'.encode())
+                handed = True
+            due = nets.take_due()
+            if due:
+                pull._run_safety_nets(due)
+            busy = any(child.pk is not None for child in children)
+            if not handed and not busy and not forever:
+                return
+            # A NOTIFY sent while a replacement was forked is lost with
+            # the closed connection; the poll floor covers it.
+            ready = pull._wait_for_work(
+                pull.wait_seconds(queues),
+                [child.result_fd for child in children])
+            for child in [c for c in children if c.result_fd in ready]:
+                if _collect(child):
+                    children.remove(child)
+                    children.append(_spawn(
+                        children, max_tasks_per_child, max_memory_per_child))
+    finally:
+        # A closed task pipe ends each child's loop after its current
+        # attempt.
+        for child in children:
+            try:
+                _reap(child)
+            except OSError:
+                pass
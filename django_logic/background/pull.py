@@ -7,11 +7,12 @@ duplicated, or published to a queue nobody consumes — the defect class
 recorded in the design record (``docs/design/PULL_WORKERS.md``, issue
 #217).
 
-The claim's WHERE clause is the retry rule:
+The claim's WHERE clause is the retry rule, read from one column,
+``next_attempt_at``:
 
 * a fresh row is claimable at once;
-* a row whose attempt just failed becomes claimable again after
-  ``RETRY_MINUTES`` — nothing has to re-dispatch it, it is simply
+* a row whose attempt just failed becomes claimable again when its
+  retry backoff ends — nothing has to re-dispatch it, it is simply
   visible again;
 * a row whose attempt runs right now is row-locked by that attempt, so
   ``SKIP LOCKED`` passes over it;
@@ -25,19 +26,29 @@ interval — the row waits in the database either way.
 
 The worker loop also runs the safety nets (the watchdog, the stuck
 finalizer and its no-worker report, the cleanup sweep), so nothing has
-to be scheduled anywhere else.
+to be scheduled anywhere else. On PostgreSQL one worker per database
+runs them: the one that holds the safety-net advisory lock
+(``SafetyNetLeadership``).
 """
 from __future__ import annotations
 
+import hashlib
 import os
 import select
+import socket
 import time
+import uuid
+from typing import TYPE_CHECKING
 
-from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db import DEFAULT_DB_ALIAS, connections, router
 
+from django_logic.background import restore_cache
 from django_logic.background import settings as bg_settings
 from django_logic.logger import logger
 
+if TYPE_CHECKING:
+    from django_logic.background.models import Claim
+
 #: One channel for every queue. The notification carries no payload and
 #: means only "ask the database now"; the claim's queue filter does the
 #: routing, so per-queue channels would buy nothing.
@@ -47,9 +58,10 @@ NOTIFY_CHANNEL = 'django_logic_work'
 #: this often even when no notification arrives.
 POLL_SECONDS = 5.0
 
-#: How often the loop runs the safety nets (watchdog, stuck report,
-#: cleanup) that beat used to schedule.
-SAFETY_NET_SECONDS = 60.0
+#: The session advisory lock the safety-net leader holds. Folded from a
+#: name as ``PostgresAdvisoryLockBackend.lock_id`` folds a state key.
+SAFETY_NET_LOCK_ID = int(
+    hashlib.sha256(b'django_logic.safety_nets').hexdigest()[:16], 16) - (1 << 63)
 
 
 def notify_workers() -> None:
@@ -65,27 +77,104 @@ def notify_workers() -> None:
         logger.warning('pull: NOTIFY failed (the poll floor covers it): %s', exc)
 
 
-def claim_next(queues: list[str]) -> int | None:
-    """Return the pk of one claimable row for ``queues``, or ``None``.
+def new_lease_owner() -> str:
+    """A lease owner token for one claim: ``host:pid:random``. The host
+    and pid tell an operator where the attempt runs; the random part
+    tells two claims of the same row by one process apart."""
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}'
+
+
+def claim_next(queues: list[str], lease_owner: str = '') -> Claim | None:
+    """Claim one row for ``queues``: return its ``Claim``, or ``None``.
 
-    The lock taken by ``SKIP LOCKED`` is released when this short
-    transaction ends; the runner then takes its own row lock for the
-    attempt. Two workers can race through that gap, and the loser exits
-    through the runner's existing skip-if-locked guard — wasteful once
-    in a while, never wrong.
+    The claim and the ``started_at`` stamp are one statement
+    (``TransitionMessage.claim_one``), so the caller passes
+    ``claimed=True`` to the runner and the attempt does not stamp again.
+    The ``SKIP LOCKED`` lock ends with that statement. The attempt then
+    takes its own row lock. Two workers can race through that gap, and
+    the loser exits through the runner's skip-if-locked guard.
+
+    With ``lease_owner`` (lease mode), the claim also writes the lease,
+    and the runner must be given the same owner.
     """
+    from django_logic.background.models import TransitionMessage
     from django_logic.background.safety_nets import _claimable
 
-    with transaction.atomic():
-        return (
-            _claimable(queues)
-            .select_for_update(skip_locked=True)
-            .values_list('pk', flat=True)
-            .first()
-        )
+    return TransitionMessage.claim_one(
+        _claimable(queues), lease_owner,
+        bg_settings.lease_seconds() if lease_owner else None,
+    )
+
 
+def parse_queues(spec: str) -> tuple[list[str], dict[str, int]]:
+    """Parse ``dl_worker --queues``: ``"critical:5,bulk:1,default"``.
+
+    Returns the queue names in order and their weights. A queue without a
+    weight weighs 1. Raises ``ValueError`` on a weight that is not a whole
+    number >= 1, or on a queue named twice.
+    """
+    queues, weights = [], {}
+    for part in spec.split(','):
+        name, _, weight = part.strip().partition(':')
+        if not name:
+            continue
+        if name in weights:
+            raise ValueError(f'queue {name!r} is named twice')
+        if not weight:
+            weights[name] = 1
+        elif weight.isdigit() and int(weight) >= 1:
+            weights[name] = int(weight)
+        else:
+            raise ValueError(
+                f'queue {name!r} has weight {weight!r}; a weight is a whole '
+                f'number >= 1')
+        queues.append(name)
+    return queues, weights
+
+
+class QueueSchedule:
+    """Weighted fair claiming across the queues one worker serves.
+
+    ``claim_next(queues)`` takes the oldest row of all the queues together,
+    so a burst on one queue holds the worker until it drains. The schedule
+    instead picks the queue to try first on each claim, by smooth weighted
+    round-robin: with ``critical:5,bulk:1`` and both queues busy,
+    ``critical`` goes first on five claims out of six, spread out rather
+    than in a run. When that queue has nothing claimable, the same claim
+    falls back to the other queues, so an idle queue never stalls the
+    worker.
+    """
 
-def run_once(queues: list[str], *, isolate: bool = False) -> bool:
+    def __init__(self, queues: list[str], weights: dict[str, int] | None = None):
+        self.queues = list(queues)
+        self.weights = {queue: (weights or {}).get(queue, 1) for queue in queues}
+        self._total = sum(self.weights.values())
+        self._credit = dict.fromkeys(self.queues, 0)
+
+    def next_queue(self) -> str:
+        for queue in self.queues:
+            self._credit[queue] += self.weights[queue]
+        # max() keeps the first listed queue on a tie.
+        first = max(self.queues, key=self._credit.__getitem__)
+        self._credit[first] -= self._total
+        return first
+
+    def claim(self, lease_owner: str = '') -> Claim | None:
+        """``claim_next`` for this worker's queues, in schedule order. At
+        most two claim statements: the queue whose turn it is, then the
+        rest."""
+        if len(self.queues) == 1:
+            return claim_next(self.queues, lease_owner)
+        first = self.next_queue()
+        claim = claim_next([first], lease_owner)
+        if claim is None:
+            claim = claim_next(
+                [queue for queue in self.queues if queue != first], lease_owner)
+        return claim
+
+
+def run_once(queues: list[str], *, isolate: bool = False,
+             schedule: QueueSchedule | None = None) -> bool:
     """Claim and execute at most one row. Returns whether one ran.
 
     With ``isolate=True`` (what the worker loop uses) the attempt runs in
@@ -95,20 +184,30 @@ def run_once(queues: list[str], *, isolate: bool = False) -> bool:
     which gives a crashing attempt the same paced, bounded retries as a
     failing one; before this, every crash killed the whole worker process
     and the platform's restart backoff parked the queue group with it.
+    
+    ``schedule`` picks the queue to claim from (``QueueSchedule``);
+    without it the oldest row of all ``queues`` is taken.
     """
     from django_logic.background.runner import run_background_transition
 
-    pk = claim_next(queues)
-    if pk is None:
+    lease_owner = new_lease_owner() if bg_settings.lease_seconds() else ''
+    if schedule is not None:
+        claim = schedule.claim(lease_owner)
+    else:
+        claim = claim_next(queues, lease_owner)
+    if claim is None:
         return False
     if isolate and hasattr(os, 'fork'):
-        _run_attempt_in_child(pk)
+        _run_attempt_in_child(claim.pk, lease_owner, claim.scheduled)
     else:
-        run_background_transition(pk)
+        run_background_transition(claim.pk, claimed=True,
+                                  lease_owner=lease_owner,
+                                  scheduled=claim.scheduled)
     return True
 
 
-def _run_attempt_in_child(pk: int) -> None:
+def _run_attempt_in_child(pk: int, lease_owner: str = '',
+                          scheduled: bool | None = None) -> None:
     """Run one attempt in a forked child and account for its death.
 
     Both sides must not share a database connection — a connection closed
@@ -124,7 +223,6 @@ def _run_attempt_in_child(pk: int) -> None:
     """
     from django.db import connections
 
-    from django_logic.background.models import TransitionMessage
     from django_logic.background.runner import run_background_transition
 
     connections.close_all()
@@ -132,7 +230,9 @@ def _run_attempt_in_child(pk: int) -> None:
     if child == 0:
         status = 1
         try:
-            run_background_transition(pk)
+            run_background_transition(
+                pk, claimed=True, lease_owner=lease_owner,
+                scheduled=scheduled)
             status = 0
         finally:
             # _exit, so a crashing attempt cannot run the parent's cleanup
@@ -154,27 +254,45 @@ def _record_child_death(pk: int, exit_code: int) -> None:
     """Record a died attempt on the row — unless the row completed first.
 
     Another worker on the same queue can claim the row the moment the
-    child's lock dies and finish it before this write. One conditional
+    child's lock dies and finish it before this write. The conditional
     UPDATE keeps the guard and the write in the same statement, so a
-    completed row can never take the death as an error.
+    completed row can never take the death as an error. It also ends a
+    lease, so the transition's retry backoff alone paces the next claim.
+    The death is one failed attempt in ``TransitionAttempt``, numbered
+    after the row's earlier errors.
     """
+    from django.db import transaction
     from django.db.models import F
     from django.utils import timezone
 
     from django_logic.background.models import TransitionMessage, db_safe_text
+    from django_logic.background.runner import retry_backoff_of
 
     now = timezone.now()
-    updated = TransitionMessage.objects.filter(
-        pk=pk, is_completed=False,
-    ).update(
-        errors_count=F('errors_count') + 1,
-        last_error_message=db_safe_text(
-            f'[crashed] the attempt process died (exit {exit_code}) '
-            f'before the attempt finished'
-        ),
-        last_error_dt=now,
-        modified=now,
+    error = db_safe_text(
+        f'[crashed] the attempt process died (exit {exit_code}) '
+        f'before the attempt finished'
     )
+    with transaction.atomic():
+        # Locked, so the backoff and the attempt number are computed from
+        # the count this UPDATE increments. The whole row is read: the
+        # transition's retry_backoff is resolved from it.
+        row = (TransitionMessage.objects.select_for_update()
+               .filter(pk=pk, is_completed=False).first())
+        updated = row is not None and TransitionMessage.objects.filter(
+            pk=pk, is_completed=False,
+        ).update(
+            errors_count=F('errors_count') + 1,
+            next_attempt_at=TransitionMessage.next_attempt_after(
+                row.errors_count + 1, retry_backoff_of(row)),
+            last_error_message=error,
+            last_error_dt=now,
+            lease_owner='',
+            lease_expires_at=None,
+            modified=now,
+        )
+        if updated:
+            row._record_attempt(now, number=row.errors_count + 1, error=error)
     if not updated:
         logger.info(
             f'pull: TransitionMessage#{pk} completed on another worker '
@@ -182,34 +300,159 @@ def _record_child_death(pk: int, exit_code: int) -> None:
         )
 
 
-def _run_safety_nets() -> None:
+class SafetyNetSchedule:
+    """When each safety net is next due in one worker loop.
+
+    Every net is due when the loop starts, then every
+    ``bg_settings.safety_net_seconds()[name]`` after its last turn. A
+    worker that is not the leader still takes its turns; it only asks
+    for the leadership again and runs nothing.
+    """
+
+    def __init__(self):
+        self._next_run: dict[str, float] = {}
+
+    def due(self) -> bool:
+        now = time.monotonic()
+        return any(self._next_run.get(name, 0.0) <= now
+                   for name in bg_settings.SAFETY_NETS)
+
+    def take_due(self) -> list[str]:
+        """The names of the nets due now, each moved to its next turn."""
+        now = time.monotonic()
+        intervals = bg_settings.safety_net_seconds()
+        due = [name for name in bg_settings.SAFETY_NETS
+               if self._next_run.get(name, 0.0) <= now]
+        for name in due:
+            self._next_run[name] = now + intervals[name]
+        return due
+
+
+class SafetyNetLeadership:
+    """Whether this process runs the safety nets.
+
+    On PostgreSQL the leader is the process that holds the session
+    advisory lock ``SAFETY_NET_LOCK_ID``. The lock lives on a dedicated
+    connection, outside every transaction and outside Django's
+    connection handling, so only the end of that session releases it.
+    When the leader dies, PostgreSQL ends its session, and the next
+    worker whose nets come due takes the lock. The session carries the
+    worker's ``host:pid`` as its ``application_name``, which is what
+    ``safety_net_leader`` reports.
+
+    On other databases every worker runs the safety nets, as before.
+    """
+
+    def __init__(self):
+        self._connection = None
+        self._pid = None
+
+    def holds(self) -> bool:
+        from django_logic.background.models import TransitionMessage
+
+        alias = router.db_for_write(TransitionMessage) or DEFAULT_DB_ALIAS
+        if connections[alias].vendor != 'postgresql':
+            return True
+        if self._pid != os.getpid():
+            # A forked child does not own its parent's session.
+            self._connection, self._pid = None, os.getpid()
+        if self._connection is not None:
+            try:
+                with self._connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                return True
+            except Exception as exc:
+                logger.warning('pull: the safety-net leader session broke (%s); '
+                               'another worker may take over.', exc)
+                self._close()
+        return self._try_acquire(alias)
+
+    def _try_acquire(self, alias: str) -> bool:
+        name = f'dl_worker {socket.gethostname()}:{os.getpid()}'
+        connection = connections.create_connection(alias)
+        # The async worker asks from its executor threads.
+        connection.inc_thread_sharing()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT set_config(%s, %s, false)',
+                               ['application_name', name[:63]])
+                cursor.execute('SELECT pg_try_advisory_lock(%s)',
+                               [SAFETY_NET_LOCK_ID])
+                won = cursor.fetchone()[0]
+        except Exception as exc:
+            logger.warning('pull: could not ask for the safety-net '
+                           'leadership: %s', exc)
+            won = False
+        if not won:
+            connection.close()
+            return False
+        self._connection = connection
+        logger.info('pull: %s now runs the safety nets for this database.',
+                    name)
+        return True
+
+    def _close(self) -> None:
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+
+#: One per process, shared by its loops.
+_leadership = SafetyNetLeadership()
+
+
+def safety_net_leader() -> str | None:
+    """The ``dl_worker host:pid`` that runs the safety nets now, or
+    ``None`` when no worker holds the leadership or the database is not
+    PostgreSQL."""
+    from django_logic.background.models import TransitionMessage
+
+    alias = router.db_for_write(TransitionMessage) or DEFAULT_DB_ALIAS
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        # pg_locks shows a 64-bit advisory id as two 32-bit halves.
+        cursor.execute(
+            "SELECT activity.application_name FROM pg_locks AS locks "
+            "JOIN pg_stat_activity AS activity ON activity.pid = locks.pid "
+            "WHERE locks.locktype = 'advisory' AND locks.objsubid = 1 "
+            "AND locks.granted AND locks.database = (SELECT oid FROM "
+            "pg_database WHERE datname = current_database()) "
+            "AND locks.classid::bigint = %s AND locks.objid::bigint = %s",
+            [(SAFETY_NET_LOCK_ID >> 32) & 0xFFFFFFFF,
+             SAFETY_NET_LOCK_ID & 0xFFFFFFFF],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _run_safety_nets(names=bg_settings.SAFETY_NETS) -> None:
     """The periodic work beat used to own: abandoned-attempt watchdog,
     the stuck finalizer and its never-started report, and the cleanup
-    sweep. Called from the loop, so pull mode needs no beat process."""
-    from django_logic.background.safety_nets import (
-        cleanup_completed_transitions,
-        detect_stuck_transitions,
-        watchdog_stale_attempts,
-    )
+    sweep; plus the archival and the priority aging. Called from the loop, so pull mode
+    needs no beat process. Runs ``names`` only in the leader."""
+    from django_logic.background import safety_nets
 
-    for step in (
-        watchdog_stale_attempts,
-        detect_stuck_transitions,
-        cleanup_completed_transitions,
-    ):
+    if not _leadership.holds():
+        return
+    for name in names:
         try:
-            step()
+            getattr(safety_nets, name)()
         except Exception as exc:
-            logger.error('pull: safety net %s failed: %s',
-                         getattr(step, '__name__', step), exc)
+            logger.error('pull: safety net %s failed: %s', name, exc)
 
 
-def _wait_for_work(timeout: float) -> None:
-    """Sleep until a notification arrives or ``timeout`` passes.
+def _wait_for_work(timeout: float, extra_fds: list[int] = ()) -> list[int]:
+    """Sleep until a notification arrives, one of ``extra_fds`` becomes
+    readable, or ``timeout`` passes. Returns the readable ``extra_fds``.
 
     Holds one LISTEN connection per worker process. When the connection
     cannot listen (a pooler that rejects LISTEN, a broken socket), the
-    wait degrades to a plain sleep and the poll floor carries the loop.
+    wait degrades to a plain wait on ``extra_fds`` and the poll floor
+    carries the loop.
     """
     from django_logic.background.models import TransitionMessage
 
@@ -220,35 +463,71 @@ def _wait_for_work(timeout: float) -> None:
         raw = connection.connection
         with raw.cursor() as cursor:
             cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
-        select.select([raw], [], [], timeout)
+        ready, _, _ = select.select([raw, *extra_fds], [], [], timeout)
         raw.poll()
         raw.notifies.clear()
     except Exception:
-        time.sleep(timeout)
+        if not extra_fds:
+            time.sleep(timeout)
+            return []
+        ready, _, _ = select.select(list(extra_fds), [], [], timeout)
+    return [fd for fd in ready if fd in extra_fds]
+
+
+def wait_seconds(queues: list[str]) -> float:
+    """How long the loop may wait before it asks the database again: the
+    poll floor, or less when a ``run_at=`` row of ``queues`` comes due
+    sooner. No notification announces it, so without this it would wait
+    for the next poll. A retry whose backoff ends waits for the next poll:
+    its wait is minutes, and the poll floor is seconds.
+    """
+    from django.db.models import Min
+    from django.utils import timezone
+
+    from django_logic.background.models import TransitionMessage
+
+    try:
+        now = timezone.now()
+        due = TransitionMessage.objects.filter(
+            is_completed=False, scheduled=True, queue_name__in=queues,
+            next_attempt_at__gt=now,
+        ).aggregate(due=Min('next_attempt_at'))['due']
+    except Exception as exc:
+        logger.warning('pull: could not read the next due time (%s); '
+                       'polling every %ss.', exc, POLL_SECONDS)
+        return POLL_SECONDS
+    if due is None:
+        return POLL_SECONDS
+    return max(0.0, min(POLL_SECONDS, (due - now).total_seconds()))
 
 
-def run_worker(queues: list[str], *, forever: bool = True) -> None:
+def run_worker(queues: list[str], *, forever: bool = True,
+               weights: dict[str, int] | None = None) -> None:
     """The worker loop: drain claimable rows, run the safety nets on
     schedule, wait for a notification, repeat.
 
+    ``weights`` share the claims among ``queues`` (``QueueSchedule``).
     ``forever=False`` runs exactly one drain-and-safety-net pass — for
     tests and for a one-off catch-up command.
     """
     logger.info('pull worker starting: queues=%s', ','.join(queues))
-    last_safety_net = 0.0
+    # Before the first fork: each attempt's child inherits the caches.
+    restore_cache.warm()
+    schedule = QueueSchedule(queues, weights)
+    nets = SafetyNetSchedule()
     while True:
         ran_any = False
-        while run_once(queues, isolate=True):
+        while run_once(queues, isolate=True, schedule=schedule):
             ran_any = True
             # A sustained backlog must not starve the safety nets: break
             # out of the drain when they are due and come back after.
-            if time.monotonic() - last_safety_net >= SAFETY_NET_SECONDS:
+            if nets.due():
                 break
-        if time.monotonic() - last_safety_net >= SAFETY_NET_SECONDS:
-            _run_safety_nets()
-            last_safety_net = time.monotonic()
+        due = nets.take_due()
+        if due:
+            _run_safety_nets(due)
         if ran_any:
             continue
         if not forever:
             return
-        _wait_for_work(POLL_SECONDS)
+        _wait_for_work(wait_seconds(queues))
@@ -0,0 +1,158 @@
+"""Per-worker caches for the restore of a claimed row.
+
+Each attempt resolves its row to a process class and a transition, and
+``deserialize_kwargs`` reads the user the row was enqueued by. These
+answers rarely change, so a worker keeps them:
+
+- ``transition`` keeps the transition ``runner._find_transition``
+  resolved, by bound process class, ``owning_process_class`` and
+  transition name. An entry holds the compiled dispatch index it came
+  from, and is ignored once the class rebuilds that index because
+  ``transitions`` or ``nested_processes`` changed.
+- ``process_class`` keeps the class a recorded ``process_class`` path
+  names. An entry is ignored once its module is imported again.
+- ``user`` keeps users for ``TRANSITION_MESSAGE_USER_CACHE_SECONDS``.
+  Unset (the default), every attempt reads the user table. Saving or
+  deleting a user drops its entry in this process. Other processes see
+  the change after at most that many seconds.
+
+A forked child starts with a copy of its parent's caches, and what it
+adds dies with it. The worker loop forks one child per attempt, so
+``warm`` fills the caches in the parent, before the first fork: every
+background transition of every bound process, and the process classes.
+The pool and the threads warm the same way. Users are not warmed. Their
+cache pays off in the pool children and the threads, which outlive an
+attempt.
+"""
+from __future__ import annotations
+
+import copy
+import importlib
+import sys
+import time
+from typing import Any
+
+from django_logic.background import settings as bg_settings
+from django_logic.logger import logger
+
+_TRANSITIONS: dict[tuple, tuple] = {}
+_PROCESS_CLASSES: dict[str, tuple] = {}
+_USERS: dict[Any, tuple[float, Any]] = {}
+_invalidated_user_models: set = set()
+
+
+def transition(process_class, owning_path: str, action_name: str):
+    """The cached transition, or ``None`` when there is none or the
+    process tree changed since it was cached."""
+    entry = _TRANSITIONS.get((process_class, owning_path, action_name))
+    if entry is None:
+        return None
+    index, found = entry
+    if process_class._dispatch_index() is not index:
+        return None
+    return found
+
+
+def remember_transition(process_class, owning_path: str, action_name: str,
+                        found) -> None:
+    _TRANSITIONS[(process_class, owning_path, action_name)] = (
+        process_class._dispatch_index(), found)
+
+
+def process_class(dotted: str):
+    """The class the dotted path ``dotted`` names. Imports its module on
+    the first call only."""
+    module_path, class_name = dotted.rsplit('.', 1)
+    entry = _PROCESS_CLASSES.get(dotted)
+    if entry is not None and sys.modules.get(module_path) is entry[0]:
+        return entry[1]
+    module = importlib.import_module(module_path)
+    found = getattr(module, class_name)
+    _PROCESS_CLASSES[dotted] = (module, found)
+    return found
+
+
+def user(user_id):
+    """The user ``user_id``, or ``None`` when it does not exist.
+
+    Each call returns its own object: a side-effect that changes the user
+    it was given cannot change the one the next attempt gets. A missing
+    user is not cached.
+    """
+    from django.contrib.auth import get_user_model
+
+    model = get_user_model()
+    seconds = bg_settings.user_cache_seconds()
+    if not seconds:
+        return _read_user(model, user_id)
+    _invalidate_on_change(model)
+    now = time.monotonic()
+    entry = _USERS.get(user_id)
+    if entry is not None and entry[0] > now:
+        return copy.copy(entry[1])
+    found = _read_user(model, user_id)
+    if found is not None:
+        _USERS[user_id] = (now + seconds, copy.copy(found))
+    return found
+
+
+def _read_user(model, user_id):
+    try:
+        return model.objects.get(pk=user_id)
+    except model.DoesNotExist:
+        return None
+
+
+def _drop_user(sender, instance, **kwargs) -> None:
+    _USERS.pop(instance.pk, None)
+    # The cache key is the user_id as it came out of the kwargs, which
+    # a string primary key and JSON can leave as a different type.
+    _USERS.pop(str(instance.pk), None)
+
+
+def _invalidate_on_change(model) -> None:
+    if model in _invalidated_user_models:
+        return
+    from django.db.models.signals import post_delete, post_save
+
+    for signal in (post_save, post_delete):
+        signal.connect(_drop_user, sender=model, weak=False,
+                       dispatch_uid='django_logic_restore_cache_user')
+    _invalidated_user_models.add(model)
+
+
+def warm() -> int:
+    """Cache the background transitions and the class of every bound
+    process. Call it before forking. Returns the number of transitions
+    cached."""
+    from django_logic.process import ProcessManager
+
+    warmed = 0
+    for binding in ProcessManager.bindings:
+        root = binding.process_class
+        root_path = f'{root.__module__}.{root.__name__}'
+        _PROCESS_CLASSES[root_path] = (sys.modules[root.__module__], root)
+        index = root._dispatch_index()
+        for entry in index.entries:
+            name = entry.transition.action_name
+            if not getattr(entry.transition, 'is_background', False):
+                continue
+            owner = f'{entry.owner.__module__}.{entry.owner.__name__}'
+            found = index.background_in_owner(owner, name)
+            if found is not None:
+                remember_transition(root, owner, name, found)
+                warmed += 1
+            # Rows without an owner resolve by name when the name is
+            # unique in the tree, as _find_transition does.
+            named = index.background_named(name)
+            if len(named) == 1:
+                remember_transition(root, '', name, named[0])
+    logger.info(f'restore cache: warmed {warmed} background transitions')
+    return warmed
+
+
+def clear() -> None:
+    """Empty every cache."""
+    _TRANSITIONS.clear()
+    _PROCESS_CLASSES.clear()
+    _USERS.clear()
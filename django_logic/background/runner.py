@@ -32,6 +32,11 @@ Structure:
    * success callbacks + ``next_transition`` (success path), or
    * failure callbacks (terminal-failure path).
 
+With ``TRANSITION_MESSAGE_LEASE_SECONDS`` set, a pull attempt runs in
+lease mode instead (``_run_leased``): the claim commits a lease on the
+row, the side-effects run with no transaction open, and only the final
+accounting locks the row again.
+
 Side-effect exceptions re-raise out of ``run_background_transition``
 only in **sync mode**, so inline callers and tests can ``assertRaises``
 directly. In **Pull mode** the runner swallows them once it has
@@ -41,23 +46,28 @@ re-raising out of the worker loop would only add noise.
 """
 from __future__ import annotations
 
-import importlib
+import asyncio
+import inspect
 from dataclasses import dataclass
 from datetime import timedelta
 from typing import Any
 
 from django.apps import apps
-from django.db import DEFAULT_DB_ALIAS, OperationalError, transaction
+from django.db import (
+    DEFAULT_DB_ALIAS, IntegrityError, OperationalError, close_old_connections,
+    transaction,
+)
 from django.utils import timezone
 
+from django_logic.background import payloads, restore_cache
 from django_logic.background import settings as bg_settings
 from django_logic.background.models import TransitionMessage, db_safe_text
 from django_logic.background.observability import set_sentry_context
 from django_logic.background.serializers import deserialize_kwargs
 from django_logic.background.transitions import BackgroundAction, BackgroundTransition
-from django_logic.commands import _run_in_savepoint
+from django_logic.commands import _call_hook, _run_in_savepoint
 from django_logic.logger import TransitionEventType, transition_logger
-from django_logic.process import _iter_process_tree, _transition_context
+from django_logic.process import _transition_context
 
 
 @dataclass
@@ -72,17 +82,26 @@ class _Outcome:
     kwargs: dict | None = None
 
 
-def run_background_transition(transition_message_id: int) -> None:
+def run_background_transition(
+    transition_message_id: int, *, claimed: bool = False,
+    lease_owner: str = '', scheduled: bool | None = None,
+) -> None:
     """Run a single attempt at the transition identified by ``transition_message_id``.
 
     Designed to be call-compatible from both the pull worker loop and an
-    inline sync dispatcher.
+    inline sync dispatcher. ``claimed=True`` means the caller's claim
+    (``TransitionMessage.claim_one``) already stamped ``started_at``.
+    ``lease_owner`` is the lease that claim wrote: the attempt then runs
+    in lease mode (see ``_run_leased``). ``scheduled`` is what the claim
+    read; ``None`` when there was no claim (see ``_start_scheduled``).
     """
     # Committed BEFORE the attempt's atomic block, and deliberately not rolled
     # back with it (see TransitionMessage.stamp_attempt_started). The watchdog
     # and the retry starter both read this stamp, and inside the atomic block
     # it was invisible to them.
-    if not TransitionMessage.stamp_attempt_started(transition_message_id):
+    if not claimed and not TransitionMessage.stamp_attempt_started(
+        transition_message_id
+    ):
         # Another attempt holds the row, or the row is completed or gone. Both
         # are exit-silently cases: the periodic starter sends the row to the
         # queue again, so skipping loses nothing.
@@ -92,7 +111,11 @@ def run_background_transition(transition_message_id: int) -> None:
         )
         return
     try:
-        outcome = _run_atomic(transition_message_id)
+        _start_scheduled(transition_message_id, scheduled)
+        if lease_owner:
+            outcome = _run_leased(transition_message_id, lease_owner)
+        else:
+            outcome = _run_atomic(transition_message_id)
     except _StopRetry as exc:
         # The atomic block rolled back, so mark_as_completed could not run
         # inside it. Run it here, in its own statement, so the retry loop
@@ -101,7 +124,155 @@ def run_background_transition(transition_message_id: int) -> None:
         return
     except _NothingToDo:
         return
+    _after_attempt(outcome)
+
+
+def _with_fresh_connection(func, *args, **kwargs):
+    # An executor thread keeps its connection between steps. One that broke
+    # or outlived CONN_MAX_AGE is closed here, as Django does around each
+    # request and as the thread pool does around each attempt.
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def _to_thread(func, *args, **kwargs):
+    """``asyncio.to_thread`` for a step that may use the database."""
+    return await asyncio.to_thread(
+        _with_fresh_connection, func, *args, **kwargs)
+
+
+async def arun_background_transition(
+    transition_message_id: int, lease_owner: str,
+    scheduled: bool | None = None,
+) -> None:
+    """``run_background_transition`` for the async worker, on a row its
+    claim already leased to ``lease_owner``. Must run on an event loop
+    whose default executor bounds the threads of the database steps and
+    the plain side-effects."""
+    try:
+        if scheduled is not False:
+            await _to_thread(
+                _start_scheduled, transition_message_id, scheduled)
+        outcome = await _arun_leased(transition_message_id, lease_owner)
+    except _StopRetry as exc:
+        await _to_thread(
+            _mark_unrestorable_completed, exc.transition_message_id,
+            exc.reason)
+        return
+    except _NothingToDo:
+        return
+    await _to_thread(_after_attempt, outcome)
+
+
+def _start_scheduled(transition_message_id: int,
+                     scheduled: bool | None = None) -> None:
+    """Start a due ``run_at=`` / ``countdown=`` row as enqueue would have
+    started it at that moment: under the state lock, check that the
+    persisted state is still a source and the conditions still hold, then
+    clear ``scheduled`` and write ``in_progress_state``. ``scheduled`` is
+    what the claim read: ``False`` returns at once. Without a claim
+    (``None``) a row that is not scheduled costs one pk lookup.
+
+    When the sources or conditions no longer hold (the order was paid
+    before its auto-cancel came due), the row completes as superseded.
+    When the state is locked, or another background transition of the
+    process is in progress, the row waits a little and is claimed again.
+    Both raise ``_NothingToDo``. Permissions are not checked again: the
+    caller that scheduled the row passed them.
+    """
+    if scheduled is False:
+        return
+    if scheduled is None and not TransitionMessage.objects.filter(
+        pk=transition_message_id, is_completed=False, scheduled=True,
+    ).exists():
+        return
+    started, state = False, None
+    try:
+        with transaction.atomic():
+            transition_message = _lock_uncompleted_row(transition_message_id)
+            if not transition_message.scheduled:
+                return
+            restored, restore_error = _restore_for_attempt(transition_message)
+            if restore_error is not None:
+                # The attempt's own restore records the error.
+                return
+            instance, process, transition = restored
+            current = process.state.get_persisted_state()
+            if current not in transition.sources:
+                reason = f'found {current!r}, not one of sources {transition.sources!r}'
+            elif not transition.conditions.execute(instance):
+                reason = 'its conditions no longer hold'
+            else:
+                reason = None
+            if reason is not None:
+                note = (
+                    f'[superseded] scheduled {transition.action_name}: '
+                    f'{reason} when it came due. Side-effects skipped.'
+                )
+                transition_logger.info(
+                    f'TransitionMessage#{transition_message_id} '
+                    f'{process.state.instance_key}: {note}'
+                )
+                transition_message.mark_as_superseded(note)
+                raise_after = True
+            elif process.state.lock():
+                state = process.state
+                try:
+                    with transaction.atomic():
+                        TransitionMessage.objects.filter(
+                            pk=transition_message_id,
+                        ).update(scheduled=False, modified=timezone.now())
+                except IntegrityError:
+                    raise_after = True
+                else:
+                    if transition.in_progress_state:
+                        state.set_state(transition.in_progress_state)
+                    started, raise_after = True, False
+            else:
+                raise_after = True
+    finally:
+        if state is not None:
+            state.unlock()
+    if started:
+        transition_logger.info(
+            f'TransitionMessage#{transition_message_id}: scheduled '
+            f'{transition.action_name} came due and started'
+        )
+        return
+    if raise_after and reason is None:
+        _wait_to_start(transition_message_id)
+    raise _NothingToDo()
+
+
+def _wait_to_start(transition_message_id: int) -> None:
+    """Put a due scheduled row back for a short wait, as a retry would
+    be, without counting an error. The claim's ``started_at`` and lease
+    are cleared: no attempt ran."""
+    now = timezone.now()
+    wait = max(timedelta(minutes=bg_settings.retry_minutes()),
+               timedelta(seconds=_SCHEDULED_WAIT_SECONDS))
+    TransitionMessage.objects.filter(
+        pk=transition_message_id, is_completed=False,
+    ).update(
+        next_attempt_at=now + wait, started_at=None, lease_owner='',
+        lease_expires_at=None, modified=now,
+    )
+    transition_logger.info(
+        f'TransitionMessage#{transition_message_id}: the instance is locked '
+        f'or busy with another background transition; the scheduled row '
+        f'waits until {(now + wait).isoformat()}'
+    )
+
+
+#: The shortest wait of a due scheduled row whose instance is busy, so a
+#: zero ``RETRY_MINUTES`` does not claim it again in a tight loop.
+_SCHEDULED_WAIT_SECONDS = 5
+
 
+def _after_attempt(outcome: _Outcome) -> None:
     # Best-effort hooks after the transaction commits.
     if outcome.terminal and outcome.succeeded and outcome.transition is not None:
         _run_success_hooks(outcome)
@@ -126,6 +297,12 @@ class _NothingToDo(Exception):
     by another worker. Caller should exit silently."""
 
 
+class _LeaseLost(_NothingToDo):
+    """Internal signal: the attempt's lease expired and another worker
+    claimed the row, or the row completed. That attempt owns the row now,
+    so this one records nothing."""
+
+
 class _StopRetry(Exception):
     """Internal signal: the row refers to a model or transition that no
     longer exists. The atomic block rolled back, so the outer handler marks
@@ -175,6 +352,8 @@ def _mark_unrestorable_completed(transition_message_id: int, reason: str = '') -
             completed_at=now,
             last_error_message=note,
             last_error_dt=now,
+            lease_owner='',
+            lease_expires_at=None,
             modified=now,  # .update() bypasses auto_now
         )
     except Exception as e:
@@ -184,6 +363,20 @@ def _mark_unrestorable_completed(transition_message_id: int, reason: str = '') -
         )
 
 
+def retry_backoff_of(transition_message: TransitionMessage):
+    """The ``retry_backoff`` of the row's transition, for an error recorded
+    outside an attempt. ``None`` (the setting) when the transition can no
+    longer be restored."""
+    try:
+        # In a savepoint: the caller holds the row lock in its own
+        # transaction, and a failed read must not break it.
+        with transaction.atomic():
+            _, _, transition = _restore(transition_message)
+    except Exception:
+        return None
+    return transition.retry_backoff
+
+
 def abandon_timed_out_attempt(transition_message_id: int) -> bool:
     """Record a synthetic timeout error on a row whose current attempt
     has exceeded its declared ``timeout_seconds``.
@@ -223,6 +416,14 @@ def abandon_timed_out_attempt(transition_message_id: int) -> bool:
                 f'by a worker; deferring abandon'
             )
             return False
+        if transition_message.lease_is_live():
+            # Lease mode holds no row lock while the side-effects run. The
+            # lease shows the attempt is still alive.
+            transition_logger.info(
+                f'watchdog: TransitionMessage#{transition_message_id} holds a '
+                f'live lease ({transition_message.lease_owner}); deferring abandon'
+            )
+            return False
 
         # Check the timeout again against the row we just LOCKED. The
         # candidate scan is not synchronised, so a retry dispatch can stamp a
@@ -276,7 +477,8 @@ def abandon_timed_out_attempt(transition_message_id: int) -> bool:
             f'[watchdog timeout] attempt exceeded '
             f'timeout_seconds={transition_message.timeout_seconds}'
         )
-        transition_message.record_error(err)
+        transition_message.record_error(
+            err, retry_backoff_of(transition_message))
 
         max_errors = bg_settings.max_errors()
         if transition_message.errors_count >= max_errors:
@@ -318,6 +520,13 @@ def finalize_stuck_attempt(transition_message_id: int) -> bool:
                 f'worker; deferring finalization'
             )
             return False
+        if transition_message.lease_is_live():
+            transition_logger.info(
+                f'detect_stuck: TransitionMessage#{transition_message_id} holds '
+                f'a live lease ({transition_message.lease_owner}); deferring '
+                f'finalization'
+            )
+            return False
 
         transition_logger.error(
             f'Stuck transition: TransitionMessage#{transition_message.pk} '
@@ -393,7 +602,7 @@ def _finalize_terminal_from_watchdog(
 
     try:
         with transaction.atomic():
-            kwargs = deserialize_kwargs(transition_message.kwargs)
+            kwargs = deserialize_kwargs(payloads.stored_kwargs(transition_message))
     except Exception as exc:
         # kwargs that no longer decode must not block the finalization. Carry
         # on with empty kwargs so failed_state and the completion still land
@@ -564,6 +773,213 @@ def _run_atomic(transition_message_id: int) -> _Outcome:
             _transition_context.reset(token)
 
 
+def _run_leased(transition_message_id: int, lease_owner: str) -> _Outcome:
+    """One attempt in lease mode: three short steps instead of one
+    transaction that stays open while the side-effects run.
+
+    1. Lock the row, check the lease, decode the kwargs, restore the
+       instance and run the state guard. Commit.
+    2. Run the side-effects with no transaction open. After each one the
+       lease is renewed; a lease that is gone stops the attempt.
+    3. Lock the row again, check the lease and the state guard once more,
+       write the target, and account the result. Release the lease.
+
+    The side-effects are not atomic as a group: a failed attempt keeps the
+    database writes of the side-effects that returned before it. Like the
+    external calls of a retried attempt, they must be safe to repeat.
+
+    ``_arun_leased`` is the same attempt for the async worker.
+    """
+    begun = _begin_leased(transition_message_id, lease_owner)
+    if isinstance(begun, _Outcome):
+        return begun
+    token = _transition_context.set(
+        {'root_id': begun.kwargs.get('root_id'),
+         'tr_id': begun.kwargs.get('tr_id')})
+    try:
+        _log_leased_start(begun)
+        error = begun.decode_error
+        if error is None:
+            try:
+                for command in begun.transition.side_effects.commands:
+                    _log_side_effect(begun.kwargs, command)
+                    _call_hook(command, begun.instance, **begun.kwargs)
+                    _renew_lease_or_stop(begun)
+            except _LeaseLost:
+                raise
+            except Exception as side_effect_error:
+                error = side_effect_error
+        return _finish_leased(begun, error)
+    finally:
+        _transition_context.reset(token)
+
+
+async def _arun_leased(transition_message_id: int, lease_owner: str) -> _Outcome:
+    """``_run_leased`` on an event loop. The database steps run in the
+    loop's executor threads; a coroutine side-effect is awaited on the
+    loop, and a plain one runs in an executor thread."""
+    begun = await _to_thread(
+        _begin_leased, transition_message_id, lease_owner)
+    if isinstance(begun, _Outcome):
+        return begun
+    # _to_thread copies the context, so the executor steps log with this
+    # attempt's ids.
+    token = _transition_context.set(
+        {'root_id': begun.kwargs.get('root_id'),
+         'tr_id': begun.kwargs.get('tr_id')})
+    try:
+        _log_leased_start(begun)
+        error = begun.decode_error
+        if error is None:
+            try:
+                for command in begun.transition.side_effects.commands:
+                    _log_side_effect(begun.kwargs, command)
+                    if inspect.iscoroutinefunction(command):
+                        await command(begun.instance, **begun.kwargs)
+                    else:
+                        await _to_thread(
+                            command, begun.instance, **begun.kwargs)
+                    await _to_thread(_renew_lease_or_stop, begun)
+            except _LeaseLost:
+                raise
+            except Exception as side_effect_error:
+                error = side_effect_error
+        return await _to_thread(_finish_leased, begun, error)
+    finally:
+        _transition_context.reset(token)
+
+
+@dataclass
+class _LeasedAttempt:
+    """What the first step of a leased attempt hands to the others."""
+
+    transition_message_id: int
+    lease_owner: str
+    queue_name: str
+    instance: Any
+    transition: BackgroundTransition
+    state: Any
+    kwargs: dict
+    decode_error: BaseException | None
+
+
+def _begin_leased(transition_message_id: int, lease_owner: str) -> '_LeasedAttempt | _Outcome':
+    """Step 1 of a leased attempt. Returns the ``_Outcome`` when the
+    attempt ends here (restore failure, superseded)."""
+    with transaction.atomic():
+        transition_message = _lock_leased_row(transition_message_id, lease_owner)
+        set_sentry_context(transition_message)
+        kwargs, decode_error = _decode_kwargs(transition_message)
+        restored, restore_error = _restore_for_attempt(transition_message)
+        if restore_error is not None:
+            return _released(transition_message, _handle_restore_failure(
+                transition_message, restore_error))
+        instance, process, transition = restored
+        superseded = _superseded_outcome(
+            transition_message, transition, process.state, kwargs)
+        if superseded is not None:
+            return _released(transition_message, superseded)
+    return _LeasedAttempt(
+        transition_message_id=transition_message_id,
+        lease_owner=lease_owner,
+        queue_name=transition_message.queue_name,
+        instance=instance,
+        transition=transition,
+        state=process.state,
+        kwargs=kwargs,
+        decode_error=decode_error,
+    )
+
+
+def _finish_leased(begun: _LeasedAttempt, error: BaseException | None) -> _Outcome:
+    """Step 3 of a leased attempt: write the target and account the
+    result under the row lock, then release the lease."""
+    transition, state, kwargs = begun.transition, begun.state, begun.kwargs
+    with transaction.atomic():
+        transition_message = _lock_leased_row(
+            begun.transition_message_id, begun.lease_owner)
+        if error is not None:
+            return _released(transition_message, _handle_failure(
+                transition_message, transition, state, kwargs, error))
+        superseded = _superseded_outcome(
+            transition_message, transition, state, kwargs)
+        if superseded is not None:
+            return _released(transition_message, superseded)
+        if not isinstance(transition, BackgroundAction):
+            try:
+                _run_in_savepoint(
+                    begun.instance._state.db or DEFAULT_DB_ALIAS,
+                    lambda: state.set_state(transition.target),
+                    require_commit=True,
+                )
+            except Exception as write_error:
+                return _released(transition_message, _handle_failure(
+                    transition_message, transition, state, kwargs,
+                    write_error))
+            transition_logger.info(
+                f'{kwargs.get("tr_id")} '
+                f'{TransitionEventType.SET_STATE.value} '
+                f'{transition.target}'
+            )
+        return _released(transition_message, _handle_success(
+            transition_message, transition, state, kwargs))
+
+
+def _log_leased_start(begun: _LeasedAttempt) -> None:
+    transition_logger.info(
+        f'{begun.kwargs.get("tr_id")} Execute Start '
+        f'{begun.transition.action_name} {begun.state.instance_key} '
+        f'queue={begun.queue_name} lease={begun.lease_owner}'
+    )
+
+
+def _log_side_effect(kwargs: dict, command) -> None:
+    transition_logger.info(
+        f'{kwargs.get("tr_id")} '
+        f'{TransitionEventType.SIDE_EFFECT.value} '
+        f'{getattr(command, "__name__", repr(command))}'
+    )
+
+
+def _renew_lease_or_stop(begun: _LeasedAttempt) -> None:
+    lease_seconds = bg_settings.lease_seconds()
+    if lease_seconds and not TransitionMessage.renew_lease(
+        begun.transition_message_id, begun.lease_owner, lease_seconds,
+    ):
+        transition_logger.error(
+            f'{begun.kwargs.get("tr_id")} TransitionMessage#'
+            f'{begun.transition_message_id}: the lease of {begun.lease_owner} '
+            f'expired while the side-effects ran, and another attempt owns '
+            f'the row now. Stopping this attempt; raise '
+            f'TRANSITION_MESSAGE_LEASE_SECONDS above the longest side-effect.'
+        )
+        raise _LeaseLost()
+
+
+def _lock_leased_row(transition_message_id: int, lease_owner: str) -> TransitionMessage:
+    """Lock the row while ``lease_owner`` still holds its lease, or raise
+    ``_LeaseLost``. The lock is held only for one short step."""
+    try:
+        return (
+            TransitionMessage.objects
+            .select_for_update()
+            .get(pk=transition_message_id, is_completed=False,
+                 lease_owner=lease_owner)
+        )
+    except TransitionMessage.DoesNotExist as exc:
+        transition_logger.info(
+            f'TransitionMessage#{transition_message_id}: the lease of '
+            f'{lease_owner} is gone (the row completed, or another worker '
+            f'claimed it after the lease expired); nothing to record'
+        )
+        raise _LeaseLost() from exc
+
+
+def _released(transition_message: TransitionMessage, outcome: _Outcome) -> _Outcome:
+    transition_message.release_lease()
+    return outcome
+
+
 def _lock_uncompleted_row(transition_message_id: int) -> TransitionMessage:
     """Lock the row for this attempt, or raise ``_NothingToDo``.
 
@@ -603,7 +1019,7 @@ def _decode_kwargs(transition_message) -> 'tuple[dict, BaseException | None]':
     """
     try:
         with transaction.atomic():
-            kwargs = deserialize_kwargs(transition_message.kwargs)
+            kwargs = deserialize_kwargs(payloads.stored_kwargs(transition_message))
     except Exception as exc:
         return {'context': {}}, exc
     # Mirror the synchronous path (Transition._init_transition_context):
@@ -714,7 +1130,7 @@ def _execute_attempt(instance, transition, state, kwargs) -> None:
                 f'{TransitionEventType.SIDE_EFFECT.value} '
                 f'{getattr(command, "__name__", repr(command))}'
             )
-            command(instance, **kwargs)
+            _call_hook(command, instance, **kwargs)
         # The target write belongs INSIDE the attempt savepoint, because it
         # is part of the attempt. A write the database rejects (a CHECK
         # constraint, a pre_save receiver, a save() override, a column
@@ -798,7 +1214,7 @@ def _handle_failure(
     kwargs: dict,
     error: BaseException,
 ) -> _Outcome:
-    transition_message.record_error(error)
+    transition_message.record_error(error, transition.retry_backoff)
     transition_logger.error(
         f'{kwargs.get("tr_id")} {TransitionEventType.FAIL.value}: '
         f'{type(error).__name__}: {error}',
@@ -1032,9 +1448,7 @@ def _restore(transition_message: TransitionMessage):
 
 
 def _load_process_from_path(instance, dotted: str, transition_message: TransitionMessage):
-    module_path, class_name = dotted.rsplit('.', 1)
-    module = importlib.import_module(module_path)
-    process_class = getattr(module, class_name)
+    process_class = restore_cache.process_class(dotted)
     if not transition_message.field_name:
         # Enqueue has recorded the bound field since 0.4; a row without one
         # cannot be restored to a known field, and guessing 'state' could
@@ -1052,10 +1466,10 @@ def _find_transition(process, transition_message: TransitionMessage):
     Enqueue can record a background transition declared on a *nested*
     process, because the synchronous lookup recurses into
     ``nested_processes``. The row records only the *bound* ``process_name``,
-    so the worker restores the parent and walks down the
-    ``nested_processes`` tree. It builds each sub-process with the parent's
-    shared ``state``, the way ``Process.get_available_transitions`` does.
-    Without that walk the nested transition is never found: the row is
+    so the worker restores the parent and looks the transition up in the
+    whole ``nested_processes`` tree, through the compiled index that
+    ``Process.get_available_transitions`` also reads.
+    Without that lookup the nested transition is never found: the row is
     marked completed, the side-effects never run, and the instance is
     stranded in ``in_progress_state``.
 
@@ -1091,11 +1505,17 @@ def _find_transition(process, transition_message: TransitionMessage):
     lookup requires state membership. We skip that check on purpose.
     """
     owning_path = (transition_message.owning_process_class or '').strip()
+    name = transition_message.transition_name
+    cached = restore_cache.transition(type(process), owning_path, name)
+    if cached is not None:
+        return cached
     if owning_path:
         found = _find_background_transition_in_owner(
             process, transition_message.transition_name, owning_path
         )
         if found is not None:
+            restore_cache.remember_transition(
+                type(process), owning_path, name, found)
             return found
         # The row records an owner that is not in the tree: the nested process
         # class was renamed or removed between enqueue and execute. Fall
@@ -1111,6 +1531,11 @@ def _find_transition(process, transition_message: TransitionMessage):
     matches = _background_transitions_named(process, transition_message.transition_name)
     if len(matches) == 1:
         # One match, so the name is enough: the common case for older rows.
+        # A row whose recorded owner is gone is not cached, so each such
+        # row logs the warning above.
+        if not owning_path:
+            restore_cache.remember_transition(
+                type(process), owning_path, name, matches[0])
         return matches[0]
     if len(matches) > 1:
         # The name is ambiguous and no owner resolved, so do NOT guess.
@@ -1133,23 +1558,13 @@ def _find_background_transition_in_owner(process, action_name, owning_path):
     """Return the background transition named ``action_name`` declared on the
     process in the tree whose dotted class path equals ``owning_path``.
 
-    Walks through ``_iter_process_tree`` for its cycle guard. A nested layout
-    that reaches a class twice (A nests B nests A) is legal and the
-    synchronous walk allows it, but here it recursed until ``RecursionError``.
+    Reads the process class's compiled index, whose walk has the cycle guard.
+    A nested layout that reaches a class twice (A nests B nests A) is legal
+    and the synchronous walk allows it, but a plain recursive walk here
+    recursed until ``RecursionError``.
     """
-    for process_cls in _iter_process_tree(type(process)):
-        proc_path = f'{process_cls.__module__}.{process_cls.__name__}'
-        if proc_path != owning_path:
-            continue
-        for transition in process_cls.transitions:
-            if (
-                transition.action_name == action_name
-                and getattr(transition, 'is_background', False)
-            ):
-                return transition
-        # Class matched but it no longer declares the transition (renamed).
-        return None
-    return None
+    return type(process)._dispatch_index().background_in_owner(
+        owning_path, action_name)
 
 
 def _background_transitions_named(process, action_name):
@@ -1159,17 +1574,6 @@ def _background_transitions_named(process, action_name):
     Counts each transition object once. A Process class can be reached through
     two nested paths, and its class-level ``transitions`` are shared objects,
     so without that the ambiguity check in ``_find_transition`` would reject a
-    reused sub-process. ``_iter_process_tree`` supplies the cycle guard (see
-    ``_find_background_transition_in_owner``).
+    reused sub-process.
     """
-    seen, out = set(), []
-    for process_cls in _iter_process_tree(type(process)):
-        for transition in process_cls.transitions:
-            if (
-                transition.action_name == action_name
-                and getattr(transition, 'is_background', False)
-                and id(transition) not in seen
-            ):
-                seen.add(id(transition))
-                out.append(transition)
-    return out
+    return type(process)._dispatch_index().background_named(action_name)
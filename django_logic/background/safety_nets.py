@@ -8,26 +8,39 @@ the retry pass.
 What each one owns:
 
 * :func:`run_pending` — run every claimable row inline. The visibility
-  rule is the same one the pull claim uses: uncompleted, retries left,
-  and past the retry wait after the last recorded error. Sync mode's
-  "time passed" simulation.
+  rule is the same one the pull claim uses: uncompleted, and past its
+  ``next_attempt_at``. Sync mode's "time passed" simulation.
 * :func:`watchdog_stale_attempts` — record a timeout error on attempts
   that outlived their declared ``timeout=``.
 * :func:`detect_stuck_transitions` — finalize rows stuck at
   ``MAX_ERRORS``, and report rows that no worker has ever picked up.
+* :func:`archive_completed_transitions` — move completed rows to the
+  archive table, when ``TRANSITION_MESSAGE_ARCHIVE_AFTER_HOURS`` is set.
 * :func:`cleanup_completed_transitions` — delete old completed rows,
-  keeping the newest terminal-failure row per instance and process.
+  keeping the newest terminal-failure row per instance and process. In
+  the partitioned layout it drops expired days instead. Then it deletes
+  the kwargs payloads no row points to any more.
+* :func:`age_waiting_transitions` — raise the priority of rows that
+  have waited long, so low-priority rows are never starved.
 """
 from __future__ import annotations
 
-from datetime import timedelta
+from datetime import datetime, time, timedelta, timezone as dt_timezone
 
 from django.db import transaction
 from django.db.models import Min, Q
 from django.utils import timezone
 
+from django_logic.background import payloads
 from django_logic.background import settings as bg_settings
-from django_logic.background.models import TransitionMessage
+from django_logic.background.models import (
+    HIGHEST_PRIORITY,
+    LOWEST_PRIORITY,
+    ArchivedTransitionMessage,
+    TransitionAttempt,
+    TransitionMessage,
+    delete_in_pk_windows,
+)
 from django_logic.background.runner import (
     abandon_timed_out_attempt,
     finalize_stuck_attempt,
@@ -38,18 +51,25 @@ from django_logic.logger import logger
 
 def _claimable(queues: list[str] | None = None):
     """Rows a worker may take now. The one place the visibility rule is
-    written — the pull claim and the sync retry pass both read it."""
-    retry_cutoff = timezone.now() - timedelta(
-        minutes=bg_settings.retry_minutes())
+    written — the pull claim and the sync retry pass both read it.
+
+    ``next_attempt_at`` holds the retry wait, and a live lease keeps its
+    row out. The claim reads one queue's rows in order from
+    ``dl_bg_claim_idx`` and stops at the first one that is due, so it
+    steps over only the rows that wait out a retry ahead of that one.
+    ``errors_count`` is checked against ``MAX_ERRORS`` on the same rows,
+    so a lowered setting stops the rows over it and a raised one lets
+    them run again."""
+    now = timezone.now()
     rows = TransitionMessage.objects.filter(
+        Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now),
         is_completed=False,
+        next_attempt_at__lte=now,
         errors_count__lt=bg_settings.max_errors(),
-    ).filter(
-        Q(last_error_dt__isnull=True) | Q(last_error_dt__lt=retry_cutoff)
     )
     if queues is not None:
         rows = rows.filter(queue_name__in=queues)
-    return rows.order_by('created')
+    return rows.order_by('priority', 'created')
 
 
 def run_pending(queues: list[str] | None = None) -> int:
@@ -131,17 +151,22 @@ def detect_stuck_transitions() -> int:
     report_after = max(
         bg_settings.retry_minutes() * (bg_settings.max_errors() + 1), 15,
     )
+    cutoff = now - timedelta(minutes=report_after)
     never_started = (
         TransitionMessage.objects
         .filter(
             is_completed=False,
             started_at__isnull=True,
-            created__lt=now - timedelta(minutes=report_after),
+            created__lt=cutoff,
         )
-        .values_list('pk', 'queue_name', 'created')
+        # A run_at= row waits by design until it comes due.
+        .exclude(scheduled=True, next_attempt_at__gte=cutoff)
+        .values_list('pk', 'queue_name', 'created', 'scheduled',
+                     'next_attempt_at')
     )
-    for pk, queue_name, created in never_started:
-        age_minutes = int((now - created).total_seconds() // 60)
+    for pk, queue_name, created, scheduled, due in never_started:
+        waiting_since = due if scheduled and due else created
+        age_minutes = int((now - waiting_since).total_seconds() // 60)
         logger.error(
             f'detect_stuck_transitions: TransitionMessage#{pk} has waited '
             f'{age_minutes} minutes on queue {queue_name!r} and no worker '
@@ -169,6 +194,23 @@ def detect_stuck_transitions() -> int:
     return finalized
 
 
+#: The most rows one run of the archival safety net moves, so a first
+#: run over a large backlog does not hold the leader's loop for long.
+_ARCHIVE_ROWS_PER_RUN = 50_000
+
+
+def archive_completed_transitions() -> int:
+    """Move completed rows older than ``ARCHIVE_AFTER_HOURS`` to the
+    archive table (``archive.archive_completed``). Does nothing while the
+    setting is unset. Returns the number of rows moved."""
+    from django_logic.background.archive import archive_completed
+
+    hours = bg_settings.archive_after_hours()
+    if hours is None:
+        return 0
+    return archive_completed(timedelta(hours=hours), limit=_ARCHIVE_ROWS_PER_RUN)
+
+
 def cleanup_completed_transitions() -> int:
     """Delete completed rows older than ``CLEANUP_DAYS``.
 
@@ -176,10 +218,30 @@ def cleanup_completed_transitions() -> int:
     instance parked in its ``failed_state``, so the sweep keeps the newest
     such row per instance and process and deletes the rest. One row per
     parked instance stays, however late the investigation comes.
+
+    In the partitioned layout (``partitions``) the sweep creates the
+    coming days' partitions and drops the expired ones instead. The
+    row-by-row delete then runs only on rows older than every day
+    partition, which the DEFAULT partition holds.
+
+    Last, the payloads and the attempts of the deleted rows go
+    (``payloads.delete_orphans`` and ``_delete_orphan_attempts``).
     """
     from django.db.models import OuterRef, Subquery
 
+    from django_logic.background import partitions
+
     cutoff = timezone.now() - timedelta(days=bg_settings.cleanup_days())
+    old_rows = TransitionMessage.objects.filter(
+        is_completed=True, modified__lt=cutoff)
+    dropped = 0
+    if partitions.is_partitioned():
+        partitions.create_partitions()
+        dropped = partitions.drop_expired_partitions()
+        days = partitions.partition_days()
+        if days:
+            old_rows = old_rows.filter(created__lt=datetime.combine(
+                days[0], time.min, tzinfo=dt_timezone.utc))
     # ended_in_failure, not an errors_count comparison: a permanent failure
     # completes at one error, and a retried success can carry several, so
     # the count cannot tell them apart. Every terminal-failure path sets
@@ -201,11 +263,63 @@ def cleanup_completed_transitions() -> int:
     )
     with transaction.atomic():
         deleted, _ = (
-            TransitionMessage.objects
-            .filter(is_completed=True, modified__lt=cutoff)
+            old_rows
             .exclude(failed & Q(pk=Subquery(newest_failed)))
             .delete()
         )
     if deleted:
         logger.info(f'cleanup_completed_transitions: deleted {deleted} rows')
+    payloads.delete_orphans()
+    _delete_orphan_attempts()
+    return deleted + dropped
+
+
+def _delete_orphan_attempts() -> int:
+    """Delete the attempts of rows that are neither in the table nor in
+    the archive. Archived rows keep their attempts, under the same id.
+
+    Each attempt is checked with ``NOT EXISTS`` on the primary keys,
+    one window of attempts at a time (``delete_in_pk_windows``)."""
+    from django.db.models import Exists, OuterRef
+
+    attempts = TransitionAttempt.objects.exclude(Exists(
+        TransitionMessage.objects.filter(pk=OuterRef('transition_message_id')),
+    )).exclude(Exists(
+        ArchivedTransitionMessage.objects.filter(
+            pk=OuterRef('transition_message_id')),
+    ))
+    deleted = delete_in_pk_windows(attempts)
+    if deleted:
+        logger.info(f'cleanup_completed_transitions: deleted {deleted} '
+                    f'attempts of deleted rows')
     return deleted
+
+
+def age_waiting_transitions() -> int:
+    """Raise waiting rows to the highest priority.
+
+    A row declared at level ``p`` qualifies once it has waited ``p``
+    times ``PRIORITY_AGING_MINUTES`` since it was created: the time one
+    level per interval would take to reach the top. It is raised in one
+    step, so each row's indexed ``priority`` is rewritten at most once,
+    and a run that finds no such row writes nothing. The claim orders by
+    ``(priority, created)``, so the rule lives in the column, not in the
+    claim's ORDER BY. ``modified`` is left alone, because aging is not
+    activity on the row.
+    """
+    now = timezone.now()
+    interval = timedelta(minutes=bg_settings.priority_aging_minutes())
+    waited = Q()
+    for level in range(HIGHEST_PRIORITY + 1, LOWEST_PRIORITY + 1):
+        waited |= Q(priority=level,
+                    created__lt=now - interval * (level - HIGHEST_PRIORITY))
+    aged = (
+        TransitionMessage.objects
+        .filter(waited, is_completed=False)
+        # A run_at= row is not waiting for a worker until it is due.
+        .exclude(scheduled=True, next_attempt_at__gt=now)
+        .update(priority=HIGHEST_PRIORITY, priority_aged_at=now)
+    )
+    if aged:
+        logger.info(f'age_waiting_transitions: raised the priority of {aged} rows')
+    return aged
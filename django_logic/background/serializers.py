@@ -13,6 +13,11 @@ Deliberate handling:
   A live request cannot cross the queue; extract ``user`` (which
   is rehydrated) or pass plain values.
 * ``user`` — replaced with ``user_id`` (restored on the worker side).
+* ``priority``, ``run_at``, ``countdown`` — enqueue options of a
+  background call (see :data:`ENQUEUE_OPTIONS`), stored on their own
+  columns. ``BackgroundTransition`` reads them from the call before it
+  serializes the rest. If one still reaches ``serialize_kwargs``, it is
+  dropped loudly like ``request``.
 * ``datetime`` / ``date`` / ``time`` / ``Decimal`` / ``UUID`` / ``tuple``
   / ``set`` / ``frozenset`` — tag-encoded, restored in the worker with the
   original type (recursively, inside dicts/lists/tuples/sets). Two known
@@ -21,14 +26,21 @@ Deliberate handling:
   the zone identity is not), and ``datetime.fold`` is not preserved.
 * ``_transition_context``-managed keys (``tr_id``, ``root_id``,
   ``parent_id``) — stringified when present.
-* Model instances and arbitrary objects — rejected at enqueue via
-  ``json.dumps`` (``TypeError``). Pass a pk and re-fetch in the hook:
+* Model instances and arbitrary objects — rejected at enqueue
+  (``TypeError``). Pass a pk and re-fetch in the hook:
   the worker may run much later and must see fresh rows, not a stale
   snapshot.
 * Non-string dict keys — JSON objects only have string keys, so these are
   stringified in storage and do **not** round-trip. Flagged loudly at
   enqueue (warning, or ``TypeError`` under the strict setting).
 
+``serialize_kwargs`` encodes and checks the whole tree in one walk. The
+``kwargs`` column then writes and reads its JSON text with
+:class:`KwargsJSONEncoder` and :class:`KwargsJSONDecoder`, which use
+`orjson <https://pypi.org/project/orjson/>`_ when it is installed. The
+text is the same JSON document either way, so rows written with and
+without orjson read back alike.
+
 .. note::
 
     Rows written before the typed encoding (plain ISO strings) still
@@ -40,6 +52,7 @@ Deliberate handling:
 from __future__ import annotations
 
 import json
+import math
 from datetime import date, datetime, time
 from decimal import Decimal
 from uuid import UUID
@@ -47,6 +60,21 @@ from uuid import UUID
 from django_logic.background import settings as bg_settings
 from django_logic.logger import transition_logger
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Without the passthrough options orjson would write datetimes, dataclasses
+# and str/int/dict subclasses itself, where the standard library refuses or
+# writes them differently. With them it raises, and the document goes
+# through the standard library.
+_ORJSON_OPTIONS = 0 if orjson is None else (
+    orjson.OPT_PASSTHROUGH_DATETIME
+    | orjson.OPT_PASSTHROUGH_DATACLASS
+    | orjson.OPT_PASSTHROUGH_SUBCLASS
+)
+
 
 class KwargsSerializationError(TypeError):
     """Strict-mode rejection of kwargs that enqueue would otherwise mutate
@@ -61,6 +89,11 @@ class KwargsSerializationError(TypeError):
 
 _CONTEXT_KEYS = ('tr_id', 'root_id', 'parent_id')
 
+#: Call kwargs a background transition reads as enqueue options. They are
+#: never passed to side-effects, so a hook cannot take a kwarg of these
+#: names.
+ENQUEUE_OPTIONS = ('priority', 'run_at', 'countdown')
+
 #: Marker key for tag-encoded values. A caller dict that happens to contain
 #: this key is escaped with the ``'dict'`` tag so it round-trips verbatim.
 TYPE_TAG = '__dl_type__'
@@ -76,31 +109,7 @@ _SCALAR_DECODERS = {
 
 def encode_value(value):
     """Recursively encode a value into tagged, JSON-serializable form."""
-    # datetime before date: datetime is a date subclass.
-    if isinstance(value, datetime):
-        return {TYPE_TAG: 'datetime', 'value': value.isoformat()}
-    if isinstance(value, date):
-        return {TYPE_TAG: 'date', 'value': value.isoformat()}
-    if isinstance(value, time):
-        return {TYPE_TAG: 'time', 'value': value.isoformat()}
-    if isinstance(value, Decimal):
-        return {TYPE_TAG: 'decimal', 'value': str(value)}
-    if isinstance(value, UUID):
-        return {TYPE_TAG: 'uuid', 'value': str(value)}
-    if isinstance(value, tuple):
-        return {TYPE_TAG: 'tuple', 'value': [encode_value(v) for v in value]}
-    if isinstance(value, frozenset):
-        return {TYPE_TAG: 'frozenset', 'value': [encode_value(v) for v in value]}
-    if isinstance(value, set):
-        return {TYPE_TAG: 'set', 'value': [encode_value(v) for v in value]}
-    if isinstance(value, dict):
-        encoded = {k: encode_value(v) for k, v in value.items()}
-        if TYPE_TAG in value:
-            return {TYPE_TAG: 'dict', 'value': encoded}
-        return encoded
-    if isinstance(value, list):
-        return [encode_value(v) for v in value]
-    return value
+    return _Encoder().encode(value)
 
 
 def decode_value(value):
@@ -187,21 +196,132 @@ def _unstorable_text_paths(value, path='kwargs'):
             yield from _unstorable_text_paths(v, f'{path}[{i}]')
 
 
-def serialize_kwargs(kwargs: dict) -> dict:
+class _Encoder:
+    """One walk that tag-encodes a value and notes what cannot be stored.
+
+    The walk records problems instead of raising, and ``serialize_kwargs``
+    reports them afterwards, in the order the separate checks used to run.
+    The paths for the messages are computed only when there is a problem.
+    """
+
+    __slots__ = ('unstorable_text', 'non_string_keys', 'invalid')
+
+    def __init__(self):
+        self.unstorable_text = False
+        self.non_string_keys = False
+        #: The first error ``json.dumps(..., allow_nan=False)`` would raise.
+        self.invalid = None
+
+    def encode(self, value):
+        # Exact types first: they are nearly every node of a real payload.
+        kind = type(value)
+        if kind is str:
+            self._check_text(value)
+            return value
+        if kind is int or kind is bool or value is None:
+            return value
+        if kind is float:
+            self._check_float(value)
+            return value
+        if kind is dict:
+            return self._encode_dict(value)
+        if kind is list:
+            return [self.encode(item) for item in value]
+        return self._encode_other(value)
+
+    def _encode_dict(self, value):
+        encoded = {}
+        for key, item in value.items():
+            if isinstance(key, str):
+                self._check_text(key)
+            else:
+                self._check_key(key)
+            encoded[key] = self.encode(item)
+        if TYPE_TAG in value:
+            return {TYPE_TAG: 'dict', 'value': encoded}
+        return encoded
+
+    def _encode_other(self, value):
+        # datetime before date: datetime is a date subclass.
+        if isinstance(value, datetime):
+            return {TYPE_TAG: 'datetime', 'value': value.isoformat()}
+        if isinstance(value, date):
+            return {TYPE_TAG: 'date', 'value': value.isoformat()}
+        if isinstance(value, time):
+            return {TYPE_TAG: 'time', 'value': value.isoformat()}
+        if isinstance(value, Decimal):
+            return {TYPE_TAG: 'decimal', 'value': str(value)}
+        if isinstance(value, UUID):
+            return {TYPE_TAG: 'uuid', 'value': str(value)}
+        if isinstance(value, tuple):
+            return {TYPE_TAG: 'tuple', 'value': [self.encode(v) for v in value]}
+        if isinstance(value, frozenset):
+            return {TYPE_TAG: 'frozenset',
+                    'value': [self.encode(v) for v in value]}
+        if isinstance(value, set):
+            return {TYPE_TAG: 'set', 'value': [self.encode(v) for v in value]}
+        if isinstance(value, dict):
+            return self._encode_dict(value)
+        if isinstance(value, list):
+            return [self.encode(item) for item in value]
+        # Subclasses of the JSON scalars: json encodes them as their base.
+        if isinstance(value, str):
+            self._check_text(value)
+        elif isinstance(value, float):
+            self._check_float(value)
+        elif not isinstance(value, int):
+            self._fail(TypeError(
+                f'Object of type {type(value).__name__} is not JSON '
+                f'serializable'))
+        return value
+
+    def _check_text(self, value):
+        # isascii() is cheap and true for most strings; only the rest can
+        # hold a lone surrogate.
+        if '\x00' in value:
+            self.unstorable_text = True
+        elif not value.isascii():
+            try:
+                value.encode('utf-8')
+            except UnicodeEncodeError:
+                self.unstorable_text = True
+
+    def _check_float(self, value):
+        if not math.isfinite(value):
+            self._fail(ValueError(
+                f'Out of range float values are not JSON compliant: '
+                f'{value!r}'))
+
+    def _check_key(self, key):
+        self.non_string_keys = True
+        if isinstance(key, float):
+            self._check_float(key)
+        elif not (isinstance(key, int) or key is None):
+            self._fail(TypeError(
+                f'keys must be str, int, float, bool or None, not '
+                f'{type(key).__name__}'))
+
+    def _fail(self, error):
+        if self.invalid is None:
+            self.invalid = error
+
+
+def serialize_kwargs(kwargs: dict) -> SerializedKwargs:
     """Return a JSON-serializable copy of ``kwargs`` fit for storage.
 
-    Drops ``request`` and a caller-supplied ``user_id`` (warning, or
-    ``KwargsSerializationError`` under ``STRICT_KWARGS_SERIALIZATION``) —
-    both are reserved. Replaces ``user`` with ``user_id``.
+    Drops ``request``, a caller-supplied ``user_id`` and the
+    :data:`ENQUEUE_OPTIONS` (warning, or ``KwargsSerializationError``
+    under ``STRICT_KWARGS_SERIALIZATION``) — all are reserved. Replaces
+    ``user`` with ``user_id``.
     Tag-encodes non-JSON-native values so the worker restores real types.
     Non-string dict keys are stringified by JSON persistence and cannot
     round-trip — flagged with a warning (or ``TypeError`` under the strict
     setting). Non-finite floats (``float('nan')`` / ``float('inf')``) are
     not valid JSON despite passing ``json.dumps`` — rejected with a
-    ``TypeError`` naming the offending value. Raises ``TypeError`` via
-    ``json.dumps`` if something unexpected slips through — the caller
-    should let that propagate so the failure is visible at enqueue rather
-    than at the worker.
+    ``TypeError`` naming the offending value. Raises ``TypeError``, with
+    ``json.dumps``'s message, for any other value JSON cannot hold — the
+    caller should let that propagate so the failure is visible at enqueue
+    rather than at the worker. One walk over the tree does all of it.
     """
     out = dict(kwargs)
     if 'request' in out:
@@ -236,6 +356,20 @@ def serialize_kwargs(kwargs: dict) -> dict:
     # the worker reads it from the column, and it must not leak into the kwargs
     # passed to side-effects (it is engine bookkeeping, not caller data).
     out.pop('owning_process_class', None)
+    for name in ENQUEUE_OPTIONS:
+        if name not in out:
+            continue
+        out.pop(name)
+        message = (
+            f"{out.get('tr_id')} {name!r} dropped at kwargs serialization "
+            f"— it is an enqueue option of a background transition, stored "
+            f"on the row's own column, so it can never reach a hook. Pass "
+            f"it to the transition call, or pass hook data under a "
+            f"different name."
+        )
+        if bg_settings.strict_kwargs_serialization():
+            raise KwargsSerializationError(message)
+        transition_logger.warning(message)
 
     user = out.pop('user', None)
     if user is not None:
@@ -250,12 +384,15 @@ def serialize_kwargs(kwargs: dict) -> dict:
         if key in out and out[key] is not None:
             out[key] = str(out[key])
 
+    encoder = _Encoder()
+    encoded = encoder.encode(out)
+
     # PostgreSQL jsonb rejects NUL and lone surrogates, which json.dumps
     # happily encodes — the same class of value as the non-finite floats
     # rejected below, and with the same consequence: enqueue would die with a
     # raw backend DataError at the row write instead of a named TypeError here.
-    unstorable = sorted(set(_unstorable_text_paths(out)))
-    if unstorable:
+    if encoder.unstorable_text:
+        unstorable = sorted(set(_unstorable_text_paths(out)))
         raise KwargsSerializationError(
             f"{out.get('tr_id')} background transition kwargs contain "
             f"characters the database cannot store "
@@ -264,8 +401,8 @@ def serialize_kwargs(kwargs: dict) -> dict:
             f"passing the value."
         )
 
-    bad_keys = sorted(set(_non_string_key_paths(out)))
-    if bad_keys:
+    if encoder.non_string_keys:
+        bad_keys = sorted(set(_non_string_key_paths(out)))
         message = (
             f"{out.get('tr_id')} non-string dict keys in background "
             f"transition kwargs ({', '.join(bad_keys)}) are stringified by "
@@ -277,21 +414,85 @@ def serialize_kwargs(kwargs: dict) -> dict:
             raise KwargsSerializationError(message)
         transition_logger.warning(message)
 
-    out = encode_value(out)
-
-    # Round-trip through json to surface any remaining non-serializable
-    # types at enqueue. Cheap on small dicts and invaluable in tests.
-    # allow_nan=False: Python's json emits the non-standard NaN/Infinity
-    # tokens by default, which would then fail backend-dependently at the
-    # row write. Translated to TypeError to keep the dispatcher contract
-    # (ImproperlyConfigured wraps TypeError, not ValueError).
-    try:
-        json.dumps(out, allow_nan=False)
-    except ValueError as e:
+    # Values JSON cannot hold surface here, at enqueue. Non-finite floats
+    # are a ValueError in json.dumps(allow_nan=False): Python's json emits
+    # the non-standard NaN/Infinity tokens by default, which would then fail
+    # backend-dependently at the row write. Translated to TypeError to keep
+    # the dispatcher contract (ImproperlyConfigured wraps TypeError, not
+    # ValueError).
+    if isinstance(encoder.invalid, ValueError):
         raise TypeError(
-            f"{out.get('tr_id')} kwargs are not valid JSON: {e}"
-        ) from e
-    return out
+            f"{out.get('tr_id')} kwargs are not valid JSON: {encoder.invalid}"
+        ) from encoder.invalid
+    if encoder.invalid is not None:
+        raise encoder.invalid
+    return SerializedKwargs(encoded)
+
+
+# A run of 19 digits may be an integer beyond 64 bits, which orjson reads
+# as a float. Such a text is read by the standard library instead. Mapping
+# every digit to '9' and finding the run is several times faster than a
+# regular expression on a large document.
+_DIGITS = bytes(0x39 if 0x30 <= byte <= 0x39 else 0x20 for byte in range(256))
+_LONG_NUMBER = b'9' * 19
+
+
+def _has_long_number(text: str) -> bool:
+    return _LONG_NUMBER in text.encode('utf-8', 'surrogatepass').translate(_DIGITS)
+
+
+class SerializedKwargs(dict):
+    """What ``serialize_kwargs`` returns: the encoded kwargs, and their
+    JSON ``text``, written once on first use.
+
+    ``payloads.offload`` measures the text, and the ``kwargs`` column
+    writes it as it is, so a row's kwargs are encoded to JSON once.
+    Treat the mapping as read-only: the text does not follow changes.
+    """
+
+    __slots__ = ('_text',)
+
+    @property
+    def text(self) -> str:
+        try:
+            return self._text
+        except AttributeError:
+            # A plain dict: orjson passes a dict subclass through.
+            self._text = KwargsJSONEncoder().encode(dict(self))
+            return self._text
+
+
+class KwargsJSONEncoder(json.JSONEncoder):
+    """Writes the ``kwargs`` column with orjson when it is installed.
+
+    orjson refuses what ``serialize_kwargs`` may still pass through: a
+    non-string key, an integer beyond 64 bits, a subclass of a JSON type.
+    Those documents go through the standard library, as before. orjson
+    writes a non-finite float as ``null``, and a UUID or an enum as its
+    value, but ``serialize_kwargs`` never leaves those in a row.
+    """
+
+    def encode(self, o):
+        if type(o) is SerializedKwargs:
+            return o.text
+        if orjson is not None:
+            try:
+                return orjson.dumps(o, option=_ORJSON_OPTIONS).decode('utf-8')
+            except TypeError:
+                pass
+        return super().encode(o)
+
+
+class KwargsJSONDecoder(json.JSONDecoder):
+    """Reads the ``kwargs`` column with orjson when it is installed."""
+
+    def decode(self, s, *args, **kwargs):
+        if orjson is not None and not _has_long_number(s):
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                pass
+        return super().decode(s, *args, **kwargs)
 
 
 def deserialize_kwargs(raw: dict | None) -> dict:
@@ -309,16 +510,15 @@ def restore_user(kwargs: dict) -> None:
     """In-place: if ``user_id`` is set, swap it for a live ``user`` object.
 
     Called in the worker (via :func:`deserialize_kwargs`). No-op if
-    ``user_id`` is absent.
+    ``user_id`` is absent. Reads through the worker's user cache
+    (``restore_cache.user``).
     """
     user_id = kwargs.pop('user_id', None)
     if user_id is None:
         return
 
-    from django.contrib.auth import get_user_model
-    try:
-        kwargs['user'] = get_user_model().objects.get(pk=user_id)
-    except get_user_model().DoesNotExist:
-        # The user disappeared between enqueue and execute; leave user=None so
-        # permission checks treat the work as system-initiated.
-        kwargs['user'] = None
+    from django_logic.background import restore_cache
+
+    # None when the user disappeared between enqueue and execute, so
+    # permission checks treat the work as system-initiated.
+    kwargs['user'] = restore_cache.user(user_id)
@@ -14,7 +14,7 @@ from django.core.exceptions import ImproperlyConfigured
 # DJANGO_LOGIC is a dict, which every ``.get()`` below assumes — a string or
 # a list used to surface as a bare AttributeError raised from whichever
 # ready() hook read a setting first, naming nothing.
-from django_logic.conf import _conf
+from django_logic.conf import _conf, lock_backend
 
 EXECUTION_SYNC = 'sync'
 EXECUTION_PULL = 'pull'
@@ -118,6 +118,32 @@ def retry_minutes():
         'TRANSITION_MESSAGE_RETRY_MINUTES', 2, minimum=0)
 
 
+RETRY_BACKOFF_FIXED = 'fixed'
+RETRY_BACKOFF_EXPONENTIAL = 'exponential'
+_VALID_RETRY_BACKOFFS = frozenset({RETRY_BACKOFF_FIXED, RETRY_BACKOFF_EXPONENTIAL})
+
+
+def retry_backoff() -> str:
+    """How the wait before a retry grows: ``'fixed'`` (the default) waits
+    ``RETRY_MINUTES`` after every error. ``'exponential'`` doubles the
+    wait after each error, up to ``RETRY_MAX_MINUTES``, with jitter.
+    ``BackgroundTransition(retry_backoff=)`` overrides it per transition."""
+    configured = _conf().get('TRANSITION_MESSAGE_RETRY_BACKOFF',
+                             RETRY_BACKOFF_FIXED)
+    if configured not in _VALID_RETRY_BACKOFFS:
+        raise ImproperlyConfigured(
+            f"DJANGO_LOGIC['TRANSITION_MESSAGE_RETRY_BACKOFF'] must be one "
+            f"of {sorted(_VALID_RETRY_BACKOFFS)}; got {configured!r}."
+        )
+    return configured
+
+
+def retry_max_minutes():
+    """Ceiling (minutes) of one exponential retry wait. Must be >= 0."""
+    return _validated_number(
+        'TRANSITION_MESSAGE_RETRY_MAX_MINUTES', 60, minimum=0)
+
+
 def cleanup_days():
     """Age (days) before completed rows are deleted by the periodic
     cleanup. Must be >= 0. Zero deletes every completed row on the next
@@ -126,6 +152,107 @@ def cleanup_days():
         'TRANSITION_MESSAGE_CLEANUP_DAYS', 7, minimum=0)
 
 
+def lease_seconds():
+    """Lease length (seconds) of a pull attempt, or ``None`` (the default).
+
+    ``None`` keeps the row-locked attempt: one transaction holds the row
+    lock while the side-effects run. A number turns on lease mode: the
+    claim writes a lease and commits, the side-effects run with no
+    transaction open, and a lease that expires makes the row claimable
+    again. Must be >= 1; set it above the longest single side-effect.
+    """
+    if _conf().get('TRANSITION_MESSAGE_LEASE_SECONDS') is None:
+        return None
+    return _validated_number(
+        'TRANSITION_MESSAGE_LEASE_SECONDS', None, minimum=1)
+
+
+def priority_aging_minutes():
+    """Minutes a row waits before the aging safety net raises its
+    priority by one level. Must be >= 1. With the default of 10, a row at
+    the lowest priority reaches the highest within 90 minutes."""
+    return _validated_number(
+        'TRANSITION_MESSAGE_PRIORITY_AGING_MINUTES', 10, minimum=1)
+
+
+def archive_after_hours():
+    """Hours after its last change that a completed row moves to the
+    archive table, or ``None`` (the default): no archival safety net.
+    Must be >= 0."""
+    if _conf().get('TRANSITION_MESSAGE_ARCHIVE_AFTER_HOURS') is None:
+        return None
+    return _validated_number(
+        'TRANSITION_MESSAGE_ARCHIVE_AFTER_HOURS', None, minimum=0)
+
+
+def payload_threshold_bytes():
+    """Size (bytes of JSON) above which a row's kwargs are stored
+    compressed in ``TransitionPayload``, or ``None`` (the default): every
+    row keeps its kwargs inline. A whole number >= 1."""
+    if _conf().get('TRANSITION_MESSAGE_PAYLOAD_THRESHOLD_BYTES') is None:
+        return None
+    return _validated_number(
+        'TRANSITION_MESSAGE_PAYLOAD_THRESHOLD_BYTES', None, minimum=1,
+        integral=True)
+
+
+def user_cache_seconds():
+    """Seconds a worker keeps the user a row was enqueued by, or ``None``
+    (the default): every attempt reads the user table. Must be >= 0."""
+    if _conf().get('TRANSITION_MESSAGE_USER_CACHE_SECONDS') is None:
+        return None
+    return _validated_number(
+        'TRANSITION_MESSAGE_USER_CACHE_SECONDS', None, minimum=0)
+
+
+#: The safety nets, in the order a worker runs them.
+SAFETY_NETS = (
+    'watchdog_stale_attempts',
+    'detect_stuck_transitions',
+    'archive_completed_transitions',
+    'cleanup_completed_transitions',
+    'age_waiting_transitions',
+)
+
+#: How often a safety net runs unless
+#: ``TRANSITION_MESSAGE_SAFETY_NET_SECONDS`` names it.
+DEFAULT_SAFETY_NET_SECONDS = 60
+
+
+def safety_net_seconds() -> dict[str, float]:
+    """Seconds between two runs of each safety net, keyed by its name.
+
+    ``TRANSITION_MESSAGE_SAFETY_NET_SECONDS`` is a dict that overrides
+    some nets, e.g. ``{'cleanup_completed_transitions': 3600}``; the
+    others run every ``DEFAULT_SAFETY_NET_SECONDS``. Each value must be
+    >= 0; zero runs the net on every loop pass, which is for tests.
+    """
+    key = 'TRANSITION_MESSAGE_SAFETY_NET_SECONDS'
+    configured = _conf().get(key, {})
+    if not isinstance(configured, dict):
+        raise ImproperlyConfigured(
+            f"DJANGO_LOGIC[{key!r}] must be a dict of safety net name to "
+            f"seconds, got {configured!r}."
+        )
+    unknown = sorted(set(configured) - set(SAFETY_NETS), key=repr)
+    if unknown:
+        raise ImproperlyConfigured(
+            f"DJANGO_LOGIC[{key!r}] names no safety net "
+            f"{', '.join(map(repr, unknown))}; the nets are "
+            f"{', '.join(SAFETY_NETS)}."
+        )
+    intervals = dict.fromkeys(SAFETY_NETS, DEFAULT_SAFETY_NET_SECONDS)
+    for name, value in configured.items():
+        if (isinstance(value, bool) or not isinstance(value, (int, float))
+                or not math.isfinite(value) or value < 0):
+            raise ImproperlyConfigured(
+                f"DJANGO_LOGIC[{key!r}][{name!r}] must be a finite number "
+                f">= 0, got {value!r}."
+            )
+        intervals[name] = value
+    return intervals
+
+
 def validate_on_ready() -> None:
     """Called from ``apps.BackgroundConfig.ready`` — fail fast on misconfig."""
     mode = background_execution()
@@ -137,7 +264,15 @@ def validate_on_ready() -> None:
     # tick) to explode, or worse, silently misbehave.
     max_errors()
     retry_minutes()
+    retry_backoff()
+    retry_max_minutes()
     cleanup_days()
+    lease_seconds()
+    priority_aging_minutes()
+    safety_net_seconds()
+    archive_after_hours()
+    payload_threshold_bytes()
+    user_cache_seconds()
     _validate_bool('STRICT_KWARGS_SERIALIZATION')
     # Core knobs (LOCK_TIMEOUT, DEFER_UNLOCK_UNTIL_COMMIT) — shared with
     # DjangoLogicConfig.ready so sync-only installs validate them too.
@@ -185,27 +320,51 @@ _LOCAL_CACHE_BACKENDS = (
 )
 
 
+#: Lock backends that keep the lock in the ``default`` cache.
+_CACHE_LOCK_BACKENDS = (
+    'django_logic.locks.CacheLockBackend',
+    'django_logic.locks.RedisLockBackend',
+)
+
+
 def _check_lock_cache_in_pull_mode() -> None:
-    """The state lock lives in the ``default`` cache. In Pull mode the
+    """The state lock must be shared across processes. In Pull mode the
     web process and the workers are different OS processes (usually
-    different hosts), so a local-memory or dummy cache means the lock
-    silently does not lock anything across them.
+    different hosts), so a per-process lock silently does not lock
+    anything across them. That is ``LocalLockBackend``, or a cache lock
+    backend on a local-memory or dummy ``default`` cache.
+
+    A consumer lock backend is not checked: only its author knows where
+    it keeps the lock.
 
     Production (``DEBUG=False``) fails fast; with ``DEBUG=True`` we only
     warn so local pull-mode experiments stay possible.
     """
-    caches = getattr(settings, 'CACHES', {}) or {}
-    backend = (caches.get('default') or {}).get('BACKEND', '')
-    if not backend.startswith(_LOCAL_CACHE_BACKENDS):
-        return
-    message = (
-        f"DJANGO_LOGIC['BACKGROUND_EXECUTION']='pull' but the 'default' "
-        f"cache backend is {backend!r}, which is per-process. The state "
-        f"lock will not be shared between the web processes and the "
-        f"worker processes. Use a cross-process cache for 'default' — "
-        f"e.g. 'django.core.cache.backends.redis.RedisCache', or "
-        f"django-redis via `pip install django-logic[redis]`."
-    )
+    lock_path = lock_backend()
+    if lock_path == 'django_logic.locks.LocalLockBackend':
+        message = (
+            f"DJANGO_LOGIC['BACKGROUND_EXECUTION']='pull' but "
+            f"DJANGO_LOGIC['LOCK_BACKEND'] is {lock_path!r}, which keeps "
+            f"the state lock in process memory. The web processes and the "
+            f"worker processes will not exclude each other. Use "
+            f"CacheLockBackend, RedisLockBackend or "
+            f"PostgresAdvisoryLockBackend."
+        )
+    else:
+        if lock_path not in _CACHE_LOCK_BACKENDS:
+            return
+        caches = getattr(settings, 'CACHES', {}) or {}
+        backend = (caches.get('default') or {}).get('BACKEND', '')
+        if not backend.startswith(_LOCAL_CACHE_BACKENDS):
+            return
+        message = (
+            f"DJANGO_LOGIC['BACKGROUND_EXECUTION']='pull' but the 'default' "
+            f"cache backend is {backend!r}, which is per-process. The state "
+            f"lock will not be shared between the web processes and the "
+            f"worker processes. Use a cross-process cache for 'default' — "
+            f"e.g. 'django.core.cache.backends.redis.RedisCache', or "
+            f"django-redis via `pip install django-logic[redis]`."
+        )
     if getattr(settings, 'DEBUG', False):
         from django_logic.logger import logger
         logger.warning(message)
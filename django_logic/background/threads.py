@@ -0,0 +1,126 @@
+"""The thread pool behind ``dl_worker --threads N``.
+
+Most side-effects wait on the network: a carrier API, a payment provider.
+A forked child per attempt spends nearly all of its time in that wait. The
+thread pool keeps up to ``N`` attempts open at once in one process. The
+main thread claims rows, holds the LISTEN connection and runs the safety
+nets; each pool thread runs ``run_background_transition`` on the pks it is
+given.
+
+Django keeps one database connection per thread, so every pool thread has
+its own connection, and an attempt's row lock and transaction never touch
+another thread's. ``CONN_MAX_AGE`` decides whether a thread keeps its
+connection between attempts, as it does for request threads.
+
+Threads give no crash isolation: an ``os._exit`` or a segmentation fault
+in consumer code ends the whole worker, with every attempt it runs. The
+rows of those attempts are claimable again once their locks, or leases,
+are gone. Choose the mode per queue group: run ``--threads`` for groups
+whose side-effects only wait on I/O, and the default forked attempts for
+the rest. One ``dl_worker`` runs one mode for every queue it names, so
+each group gets its own ``dl_worker``.
+
+The threads run in lease mode only. Without a lease, a claimed row stays
+claimable until its attempt locks it, so every free thread would be given
+the same row.
+"""
+from __future__ import annotations
+
+import socket
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections
+
+from django_logic.background import pull, restore_cache
+from django_logic.background import settings as bg_settings
+from django_logic.logger import logger
+
+
+def _run_in_thread(pk: int, lease_owner: str, scheduled: bool) -> None:
+    from django_logic.background.runner import run_background_transition
+
+    # A connection that broke or outlived CONN_MAX_AGE since this thread's
+    # last attempt is closed here, as Django does around each request.
+    close_old_connections()
+    try:
+        run_background_transition(pk, claimed=True, lease_owner=lease_owner,
+                                  scheduled=scheduled)
+    finally:
+        close_old_connections()
+
+
+def _log_failure(future: Future, pk: int) -> None:
+    error = future.exception()
+    if error is not None:
+        logger.error(
+            f'pull: the attempt thread for TransitionMessage#{pk} raised '
+            f'{type(error).__name__}: {error}. The row is claimable again '
+            f'once the retry wait passes.',
+            exc_info=error,
+        )
+
+
+def run_threads(queues: list[str], *, threads: int,
+                forever: bool = True,
+                weights: dict[str, int] | None = None) -> None:
+    """The main loop: keep up to ``threads`` attempts running, run the
+    safety nets on schedule, and wait for a notification or a finished
+    attempt.
+
+    ``forever=False`` returns once nothing is claimable and every attempt
+    has finished, as ``run_worker(forever=False)`` does. ``weights``
+    share the claims among ``queues`` (``pull.QueueSchedule``).
+    """
+    if bg_settings.lease_seconds() is None:
+        raise ImproperlyConfigured(
+            "The threads run every attempt in lease mode. Set "
+            "DJANGO_LOGIC['TRANSITION_MESSAGE_LEASE_SECONDS'] above the "
+            "longest side-effect."
+        )
+    logger.info('pull worker starting: queues=%s threads=%d',
+                ','.join(queues), threads)
+    restore_cache.warm()
+    # A finished attempt writes one byte here, so the wait below wakes for
+    # it as it does for a notification. A socket pair, because select()
+    # takes sockets on every platform.
+    wake_read, wake_write = socket.socketpair()
+    wake_read.setblocking(False)
+    try:
+        with ThreadPoolExecutor(max_workers=threads,
+                                thread_name_prefix='dl_worker') as executor:
+            _loop(pull.QueueSchedule(queues, weights), threads, forever,
+                  executor, wake_read, wake_write)
+    finally:
+        wake_read.close()
+        wake_write.close()
+
+
+def _loop(schedule, threads, forever, executor, wake_read, wake_write) -> None:
+    running: dict[Future, int] = {}
+    nets = pull.SafetyNetSchedule()
+    while True:
+        handed = False
+        while len(running) < threads:
+            lease_owner = pull.new_lease_owner()
+            claim = schedule.claim(lease_owner)
+            if claim is None:
+                break
+            future = executor.submit(
+                _run_in_thread, claim.pk, lease_owner, claim.scheduled)
+            running[future] = claim.pk
+            future.add_done_callback(lambda _future: wake_write.send(b'.'))
+            handed = True
+        due = nets.take_due()
+        if due:
+            pull._run_safety_nets(due)
+        if not handed and not running and not forever:
+            return
+        if pull._wait_for_work(pull.wait_seconds(schedule.queues),
+                               [wake_read.fileno()]):
+            try:
+                wake_read.recv(4096)
+            except BlockingIOError:
+                pass
+        for future in [f for f in running if f.done()]:
+            _log_failure(future, running.pop(future))
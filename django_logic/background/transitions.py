@@ -17,15 +17,26 @@ shared between both modes.
 """
 from __future__ import annotations
 
+from datetime import datetime, timedelta
 from uuid import UUID
 
+from asgiref.sync import sync_to_async
 from django.core.exceptions import ImproperlyConfigured
 from django.db import IntegrityError, transaction
+from django.utils import timezone
 
+from django_logic.background import payloads
 from django_logic.background import settings as bg_settings
+from django_logic.background.backoff import is_retry_backoff
 from django_logic.background.exceptions import AlreadyInProgress, SourceStateChanged
-from django_logic.background.models import TransitionMessage
+from django_logic.background.models import (
+    DEFAULT_PRIORITY,
+    HIGHEST_PRIORITY,
+    LOWEST_PRIORITY,
+    TransitionMessage,
+)
 from django_logic.background.serializers import (
+    ENQUEUE_OPTIONS,
     KwargsSerializationError,
     serialize_kwargs,
 )
@@ -39,6 +50,11 @@ from django_logic.state import State
 from django_logic.transition import Transition, _refuse_engine_param_kwargs
 
 
+def _is_priority(value) -> bool:
+    return (isinstance(value, int) and not isinstance(value, bool)
+            and HIGHEST_PRIORITY <= value <= LOWEST_PRIORITY)
+
+
 class BackgroundTransition(Transition):
     """State-changing transition that runs its side-effects on a worker process.
 
@@ -48,6 +64,22 @@ class BackgroundTransition(Transition):
           (``'django_logic'``). Name queues per SLA (e.g. ``critical`` /
           ``slow``) and give each its own ``dl_worker`` process to manage
           performance per queue.
+        - ``priority`` — 0 to 9; workers take lower numbers first, and
+          rows of one priority in the order they were created. Defaults
+          to 5. A call's ``priority=`` overrides it for that row, and is
+          not passed to the side-effects. A waiting row is raised to 0
+          once it has waited one
+          ``TRANSITION_MESSAGE_PRIORITY_AGING_MINUTES`` per level, so low
+          priority delays a row but never starves it.
+        - A call's ``run_at=`` (an aware ``datetime``) or ``countdown=``
+          (seconds, or a ``timedelta``) schedules the row for later. It
+          is written now, with the instance untouched; when it is due,
+          the worker checks the sources and conditions again and runs
+          the transition only if they still hold.
+        - ``retry_backoff`` — the wait before each retry: ``'fixed'``,
+          ``'exponential'``, or a callable that takes the row's error
+          count and returns a ``timedelta``. Defaults to
+          ``DJANGO_LOGIC['TRANSITION_MESSAGE_RETRY_BACKOFF']``.
         - ``no_retry_on`` — exception types whose failures are permanent
           for this transition. When a side-effect raises one, the worker
           takes the terminal path on that attempt instead of retrying:
@@ -57,6 +89,11 @@ class BackgroundTransition(Transition):
           :class:`django_logic.background.exceptions.PermanentFailure`,
           which needs no declaration.
 
+    ``priority``, ``run_at`` and ``countdown`` are reserved call names
+    (``serializers.ENQUEUE_OPTIONS``): they are read as enqueue options
+    and never passed to the side-effects, so pass hook data under other
+    names.
+
     Recommended:
         - ``in_progress_state`` — if omitted, the state field does not
           change until the worker finishes. Providing it is strongly
@@ -68,6 +105,7 @@ class BackgroundTransition(Transition):
     """
 
     is_background = True
+    supports_optimistic = False
 
     def __init__(
         self,
@@ -77,6 +115,8 @@ class BackgroundTransition(Transition):
         *,
         queue: str | None = None,
         timeout: int | None = None,
+        priority: int | None = None,
+        retry_backoff=None,
         no_retry_on: tuple = (),
         **kwargs,
     ):
@@ -93,6 +133,19 @@ class BackgroundTransition(Transition):
                     f"be a positive integer number of seconds, got "
                     f"{timeout!r}."
                 )
+        if priority is not None and not _is_priority(priority):
+            raise ImproperlyConfigured(
+                f"BackgroundTransition '{action_name}': priority must be an "
+                f"integer from {HIGHEST_PRIORITY} to {LOWEST_PRIORITY}, got "
+                f"{priority!r}."
+            )
+        if retry_backoff is not None and not is_retry_backoff(retry_backoff):
+            raise ImproperlyConfigured(
+                f"BackgroundTransition '{action_name}': retry_backoff must be "
+                f"'{bg_settings.RETRY_BACKOFF_FIXED}', "
+                f"'{bg_settings.RETRY_BACKOFF_EXPONENTIAL}' or a callable, got "
+                f"{retry_backoff!r}."
+            )
         no_retry_on = tuple(
             no_retry_on if isinstance(no_retry_on, (list, tuple)) else (no_retry_on,)
         )
@@ -105,6 +158,8 @@ class BackgroundTransition(Transition):
                 )
         self.queue = queue
         self.timeout = timeout
+        self.priority = priority
+        self.retry_backoff = retry_backoff
         self.no_retry_on = no_retry_on
         super().__init__(
             action_name=action_name, sources=sources, target=target, **kwargs
@@ -119,10 +174,58 @@ class BackgroundTransition(Transition):
         """
         return self.queue or bg_settings.default_queue()
 
+    def get_priority(self, kwargs: dict) -> int:
+        """The priority of one call's row: the call's ``priority=``, else
+        the declared one, else ``DEFAULT_PRIORITY``."""
+        priority = kwargs.get('priority')
+        if priority is None:
+            return DEFAULT_PRIORITY if self.priority is None else self.priority
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise TypeError(
+                f"{self.action_name}(priority=...) is an enqueue option and "
+                f"must be an integer from {HIGHEST_PRIORITY} to "
+                f"{LOWEST_PRIORITY}, got {type(priority).__name__} "
+                f"{priority!r}."
+            )
+        if not _is_priority(priority):
+            raise ValueError(
+                f"{self.action_name}(priority=...) must be an integer from "
+                f"{HIGHEST_PRIORITY} to {LOWEST_PRIORITY}, got {priority!r}."
+            )
+        return priority
+
+    def get_not_before(self, kwargs: dict) -> datetime | None:
+        """When one call's row may first run: from the call's ``run_at=``
+        or ``countdown=``. ``None`` when neither is given or the moment is
+        not in the future; the row then runs now."""
+        run_at, countdown = kwargs.get('run_at'), kwargs.get('countdown')
+        if run_at is not None and countdown is not None:
+            raise ValueError(
+                f"{self.action_name}() takes run_at= or countdown=, not both.")
+        if run_at is not None:
+            if not isinstance(run_at, datetime) or timezone.is_naive(run_at):
+                raise ValueError(
+                    f"{self.action_name}(run_at=...) must be a timezone-aware "
+                    f"datetime, got {run_at!r}.")
+            not_before = run_at
+        elif countdown is not None:
+            if isinstance(countdown, (int, float)) and not isinstance(countdown, bool):
+                countdown = timedelta(seconds=countdown)
+            if not isinstance(countdown, timedelta) or countdown < timedelta(0):
+                raise ValueError(
+                    f"{self.action_name}(countdown=...) must be a number of "
+                    f"seconds or a timedelta, not negative, got {countdown!r}.")
+            not_before = timezone.now() + countdown
+        else:
+            return None
+        return not_before if not_before > timezone.now() else None
+
     def change_state(self, state: State, **kwargs) -> UUID | None:
         # Before the lock, and before the kwargs are serialized into a row
         # the worker would fail on for the same reason.
         _refuse_engine_param_kwargs(self.action_name, kwargs)
+        self.get_priority(kwargs)
+        not_before = self.get_not_before(kwargs)
         process_class = kwargs.get('process_class', '')
         process_class_name = process_class.split('.')[-1] if process_class else ''
         queue_name = self.get_queue_name()
@@ -144,6 +247,8 @@ class BackgroundTransition(Transition):
                 f"BackgroundTransition '{self.action_name}' rejected by "
                 f"its conditions or permissions."
             )
+        if not_before is not None:
+            return self._schedule(state, kwargs, queue_name, not_before)
 
         # The cache lock guards only this critical section (validate →
         # create the TransitionMessage → write in_progress_state). It is
@@ -206,6 +311,31 @@ class BackgroundTransition(Transition):
 
         return kwargs.get('tr_id')
 
+    def _schedule(self, state: State, kwargs: dict, queue_name: str,
+                  not_before: datetime) -> UUID | None:
+        """Write a scheduled row due at ``not_before``. The instance is not
+        written, so no state lock is taken; the worker takes it when the
+        row is due (``runner._start_scheduled``)."""
+        self._check_db_state_in_sources(state.get_persisted_state())
+        fields = self._message_fields(
+            state, kwargs, queue_name, self._serialize_kwargs(kwargs))
+        with transaction.atomic():
+            payloads.offload([fields])
+            transition_message = TransitionMessage.objects.create(
+                **fields, scheduled=True, next_attempt_at=not_before)
+        transition_logger.info(
+            f'{kwargs.get("tr_id")} TransitionMessage#{transition_message.pk} '
+            f'scheduled for {not_before.isoformat()} (queue={queue_name})'
+        )
+        from django_logic.background.dispatch import dispatch_transition
+        dispatch_transition(transition_message)
+        return kwargs.get('tr_id')
+
+    async def achange_state(self, state: State, **kwargs) -> UUID | None:
+        # The enqueue writes the row and the in-progress state in one
+        # transaction, which Django only opens in sync code.
+        return await sync_to_async(self.change_state)(state, **kwargs)
+
     def _enqueue_atomic(
         self, state: State, kwargs: dict, queue_name: str
     ) -> TransitionMessage:
@@ -215,26 +345,7 @@ class BackgroundTransition(Transition):
         constraint fires (another uncompleted TransitionMessage exists
         for the same instance + process).
         """
-        instance_lookup = {
-            'app_label': state.instance._meta.app_label,
-            'model_name': state.instance._meta.model_name,
-            # Models use different primary-key types (int, UUID, string).
-            # Store the key as text; _restore looks it up with get(pk=...).
-            'instance_id': str(state.instance.pk),
-        }
-        try:
-            serialized = serialize_kwargs(kwargs)
-        except KwargsSerializationError:
-            # Re-raise so the precise strict-mode message is not wrapped
-            # as "not JSON-serializable".
-            raise
-        except TypeError as e:
-            raise ImproperlyConfigured(
-                f"BackgroundTransition '{self.action_name}' received a "
-                f"kwarg that is not JSON-serializable: {e}. Every value "
-                f"passed to a background transition must be persistable "
-                f"on the TransitionMessage row."
-            ) from e
+        serialized = self._serialize_kwargs(kwargs)
 
         with transaction.atomic():
             # Create the TransitionMessage FIRST. It carries the partial
@@ -244,28 +355,10 @@ class BackgroundTransition(Transition):
             # instead would let a model-level constraint on the state
             # column (CHECK, NOT NULL, FK, trigger) surface as the
             # misleading "another transition is already in progress".
+            fields = self._message_fields(state, kwargs, queue_name, serialized)
+            payloads.offload([fields])
             try:
-                transition_message = TransitionMessage.objects.create(
-                    process_name=state.process_name,
-                    # Recorded so the worker can reconstruct the process
-                    # from the stored process_class even when the model
-                    # property was renamed or rebound in between.
-                    field_name=state.field_name,
-                    transition_name=self.action_name,
-                    # The (possibly nested) process class that declared
-                    # this transition, resolved by
-                    # Process._get_transition_method. Lets the worker pick
-                    # the exact transition when an action_name is shared
-                    # across nested processes that use conditions to
-                    # choose. Empty when invoked outside that path (e.g. a
-                    # directly-constructed transition) — the worker then
-                    # falls back to first-match by transition_name.
-                    owning_process_class=kwargs.get('owning_process_class', ''),
-                    queue_name=queue_name,
-                    timeout_seconds=self.timeout,
-                    kwargs=serialized,
-                    **instance_lookup,
-                )
+                transition_message = TransitionMessage.objects.create(**fields)
             except IntegrityError as exc:
                 raise AlreadyInProgress(
                     f"{state.instance_key}: another background transition "
@@ -309,6 +402,253 @@ class BackgroundTransition(Transition):
         )
         return transition_message
 
+    def _serialize_kwargs(self, kwargs: dict):
+        # The enqueue options were read from the call; the row stores
+        # them on their own columns.
+        kwargs = {name: value for name, value in kwargs.items()
+                  if name not in ENQUEUE_OPTIONS}
+        try:
+            return serialize_kwargs(kwargs)
+        except KwargsSerializationError:
+            # Re-raise so the precise strict-mode message is not wrapped
+            # as "not JSON-serializable".
+            raise
+        except TypeError as e:
+            raise ImproperlyConfigured(
+                f"BackgroundTransition '{self.action_name}' received a "
+                f"kwarg that is not JSON-serializable: {e}. Every value "
+                f"passed to a background transition must be persistable "
+                f"on the TransitionMessage row."
+            ) from e
+
+    def _message_fields(self, state: State, kwargs: dict, queue_name: str,
+                        serialized) -> dict:
+        """The field values of one enqueue's ``TransitionMessage`` row."""
+        return dict(
+            app_label=state.instance._meta.app_label,
+            model_name=state.instance._meta.model_name,
+            # Models use different primary-key types (int, UUID, string).
+            # Store the key as text; _restore looks it up with get(pk=...).
+            instance_id=str(state.instance.pk),
+            process_name=state.process_name,
+            # Recorded so the worker can reconstruct the process from the
+            # stored process_class even when the model property was
+            # renamed or rebound in between.
+            field_name=state.field_name,
+            transition_name=self.action_name,
+            # The (possibly nested) process class that declared this
+            # transition, resolved by Process._get_transition_method. Lets
+            # the worker pick the exact transition when an action_name is
+            # shared across nested processes that use conditions to
+            # choose. Empty when invoked outside that path (e.g. a
+            # directly-constructed transition) — the worker then falls
+            # back to first-match by transition_name.
+            owning_process_class=kwargs.get('owning_process_class', ''),
+            queue_name=queue_name,
+            priority=self.get_priority(kwargs),
+            timeout_seconds=self.timeout,
+            kwargs=serialized,
+        )
+
+    def enqueue_many(self, rows, result=None):
+        """Enqueue this transition for many instances in one pass.
+
+        ``rows`` is an iterable of ``(state, kwargs)`` pairs, one per
+        instance, all of one model and process. ``Process.bulk_transition``
+        builds them. Returns a :class:`~django_logic.bulk.BulkTransitionResult`
+        (``result`` when given) with each instance's outcome by pk.
+
+        Each row is checked and logged as ``change_state`` does. The state
+        locks are then taken in one lock backend pass. In one transaction,
+        one SELECT revalidates the rows and one query finds the instances
+        that already have an uncompleted row; those are reported under
+        ``already_in_progress``. One ``bulk_create`` with
+        ``ignore_conflicts`` inserts the rest, and one conditional UPDATE
+        writes ``in_progress_state``. Pull mode sends one notification
+        after commit for the whole batch.
+        """
+        from django_logic.bulk import BulkTransitionResult
+
+        result = BulkTransitionResult() if result is None else result
+        queue_name = self.get_queue_name()
+        pending = []
+        for state, kwargs in rows:
+            pk = state.instance.pk
+            try:
+                _refuse_engine_param_kwargs(self.action_name, kwargs)
+                self.get_priority(kwargs)
+                if self.get_not_before(kwargs) is not None:
+                    raise ValueError(
+                        f"bulk_transition('{self.action_name}') does not "
+                        f"schedule; call {self.action_name}(run_at=...) on "
+                        f"each instance.")
+                self._log_start(
+                    state, kwargs, f' [background queue={queue_name}] [bulk]')
+                if not self.is_valid(state.instance, kwargs.get('user')):
+                    raise TransitionNotAllowed(
+                        f"BackgroundTransition '{self.action_name}' rejected "
+                        f"by its conditions or permissions."
+                    )
+                serialized = self._serialize_kwargs(kwargs)
+            except TransitionNotAllowed as error:
+                result.refused[pk] = error
+            except Exception as error:
+                result.failed[pk] = error
+            else:
+                pending.append((state, kwargs, serialized))
+        if not pending:
+            return result
+
+        held = []
+        got = type(pending[0][0]).lock_many([state for state, _, _ in pending])
+        for row, is_locked in zip(pending, got):
+            state, kwargs, _serialized = row
+            if is_locked:
+                held.append(row)
+                transition_logger.info(
+                    f'{kwargs.get("tr_id")} {TransitionEventType.LOCK.value} '
+                    f'{state.instance_key}'
+                )
+            else:
+                result.locked.append(state.instance.pk)
+                transition_logger.info(
+                    f'{kwargs.get("tr_id")} {TransitionEventType.LOCK.value} '
+                    f'failed {state.instance_key} — state is locked'
+                )
+        if not held:
+            return result
+
+        try:
+            messages = self._enqueue_many_atomic(held, queue_name, result)
+        finally:
+            type(held[0][0]).unlock_many([state for state, _, _ in held])
+            for state, kwargs, _serialized in held:
+                transition_logger.info(
+                    f'{kwargs.get("tr_id")} {TransitionEventType.UNLOCK.value} '
+                    f'{state.instance_key}'
+                )
+
+        from django_logic.background.dispatch import dispatch_transitions
+        dispatch_transitions(messages)
+        return result
+
+    def _enqueue_many_atomic(self, rows, queue_name, result) -> list:
+        """``_enqueue_atomic`` for a batch of locked rows. Returns the
+        created messages."""
+        first = rows[0][0]
+        model = type(first.instance)
+        using = first._using()
+        pks = [state.instance.pk for state, _, _ in rows]
+        with transaction.atomic():
+            persisted = dict(
+                model._base_manager.using(using)
+                .filter(pk__in=pks)
+                .values_list('pk', first.field_name)
+            )
+            # Under the state locks nothing else can enqueue for these
+            # instances, so this read is the conflict report. The
+            # ignore_conflicts below only guards against a writer that
+            # bypasses the lock.
+            busy = TransitionMessage.in_flight_instance_ids(
+                model, pks, first.process_name)
+            ready = []
+            for state, kwargs, serialized in rows:
+                pk = state.instance.pk
+                if persisted.get(pk) not in self.sources:
+                    result.wrong_state.append(pk)
+                elif str(pk) in busy:
+                    result.already_in_progress.append(pk)
+                else:
+                    ready.append((state, kwargs, serialized))
+            if not ready:
+                return []
+
+            rows_fields = [
+                self._message_fields(state, kwargs, queue_name, serialized)
+                for state, kwargs, serialized in ready
+            ]
+            payloads.offload(rows_fields)
+            TransitionMessage.objects.bulk_create(
+                [TransitionMessage(**fields) for fields in rows_fields],
+                ignore_conflicts=True,
+            )
+            # ignore_conflicts hands back no primary keys, so read them.
+            created = dict(
+                TransitionMessage._in_flight_among(
+                    model, [state.instance.pk for state, _, _ in ready],
+                    first.process_name,
+                ).values_list('instance_id', 'pk')
+            )
+            enqueued = []
+            for row in ready:
+                if str(row[0].instance.pk) in created:
+                    enqueued.append(row)
+                else:
+                    result.already_in_progress.append(row[0].instance.pk)
+
+            if self.in_progress_state and enqueued:
+                enqueued = self._write_in_progress_many(
+                    enqueued, created, result)
+
+        messages = []
+        for state, kwargs, _serialized in enqueued:
+            message_pk = created[str(state.instance.pk)]
+            result.enqueued.append(state.instance.pk)
+            messages.append(TransitionMessage(pk=message_pk))
+            transition_logger.info(
+                f'{kwargs.get("tr_id")} TransitionMessage#{message_pk} '
+                f'created (queue={queue_name})'
+            )
+        return messages
+
+    def _write_in_progress_many(self, rows, created, result) -> list:
+        """One conditional UPDATE for ``in_progress_state``. A row that a
+        lockless writer moved after the SELECT loses its new message. A
+        model that needs ``save()`` (see ``State.can_compare_and_set``)
+        is written row by row, as ``bulk`` does."""
+        first = rows[0][0]
+        field_name = first.field_name
+        if first.can_compare_and_set():
+            written, missed = self._update_in_progress(rows)
+        else:
+            written, missed = [], []
+            for row in rows:
+                landed = row[0].set_state(
+                    self.in_progress_state, sources=self.sources)
+                (written if landed else missed).append(row)
+        if missed:
+            TransitionMessage.objects.filter(pk__in=[
+                created.pop(str(state.instance.pk)) for state, _, _ in missed
+            ]).delete()
+            result.wrong_state.extend(state.instance.pk for state, _, _ in missed)
+        for state, kwargs, _serialized in written:
+            setattr(state.instance, field_name, self.in_progress_state)
+            transition_logger.info(
+                f'{kwargs.get("tr_id")} {TransitionEventType.SET_STATE.value} '
+                f'{self.in_progress_state}'
+            )
+        return written
+
+    def _update_in_progress(self, rows) -> tuple[list, list]:
+        first = rows[0][0]
+        field_name = first.field_name
+        queryset = (
+            type(first.instance)._base_manager.using(first._using())
+            .filter(pk__in=[state.instance.pk for state, _, _ in rows])
+        )
+        updated = queryset.filter(
+            **{f'{field_name}__in': self.sources},
+        ).update(**{field_name: self.in_progress_state})
+        if updated == len(rows):
+            return rows, []
+        now = dict(queryset.values_list('pk', field_name))
+        written, missed = [], []
+        for row in rows:
+            pk = row[0].instance.pk
+            (written if now.get(pk) == self.in_progress_state
+             else missed).append(row)
+        return written, missed
+
 
 class BackgroundAction(BackgroundTransition):
     """Background-executed action — runs side-effects with no state change.
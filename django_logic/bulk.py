@@ -0,0 +1,307 @@
+"""Bulk synchronous transitions — ``Process.bulk_transition``.
+
+Runs one action on many instances. The state locks are taken in one lock
+backend pass, and one SELECT re-reads the persisted states of the rows that
+got a lock. A transition without side-effects then writes every target with
+one compare-and-set UPDATE. A transition with side-effects runs them row by
+row, as ``change_state`` does, because each row's side-effects can fail on
+their own.
+
+A background transition is enqueued in one pass by
+``BackgroundTransition.enqueue_many``. Rows whose transition has no batch
+path (an ``Action`` or an optimistic transition) run through their own
+``change_state``, one by one.
+"""
+from dataclasses import dataclass, field
+
+from django.db import transaction
+
+from django_logic.conf import defer_unlock_until_commit as _defer_unlock_until_commit
+from django_logic.exceptions import TransitionNotAllowed
+from django_logic.logger import TransitionEventType, transition_logger
+from django_logic.process import _transition_context
+from django_logic.transition import (
+    Transition,
+    _background_rows_possible,
+    _refuse_engine_param_kwargs,
+)
+
+
+@dataclass
+class BulkTransitionResult:
+    """What ``Process.bulk_transition`` did to each instance, by pk."""
+
+    #: The target state was written.
+    moved: list = field(default_factory=list)
+    #: Another transition held the state lock.
+    locked: list = field(default_factory=list)
+    #: The persisted state was no longer one of the sources.
+    wrong_state: list = field(default_factory=list)
+    #: ``{pk: exception}``: the action did not resolve for the row (its
+    #: conditions or permissions), or a background transition is in
+    #: progress on it.
+    refused: dict = field(default_factory=dict)
+    #: ``{pk: exception}``: a side-effect or the state write raised. The
+    #: failure path ran as on a single call.
+    failed: dict = field(default_factory=dict)
+    #: Background transitions: a ``TransitionMessage`` row was created.
+    enqueued: list = field(default_factory=list)
+    #: Background transitions: the instance already had an uncompleted
+    #: ``TransitionMessage`` row for this process.
+    already_in_progress: list = field(default_factory=list)
+
+    def __len__(self):
+        return (len(self.moved) + len(self.locked) + len(self.wrong_state)
+                + len(self.refused) + len(self.failed) + len(self.enqueued)
+                + len(self.already_in_progress))
+
+
+def run_bulk_transition(process_class, instances, action_name: str,
+                        field_name: str, kwargs: dict) -> BulkTransitionResult:
+    _refuse_engine_param_kwargs(action_name, kwargs)
+    kwargs.pop('action_name', None)
+    result = BulkTransitionResult()
+
+    # Resolve every row before any lock is taken. Conditions and
+    # permissions run per instance, as on a single call.
+    batches, one_by_one, seen = {}, [], set()
+    for instance in instances:
+        if instance.pk in seen:
+            continue
+        seen.add(instance.pk)
+        process = process_class(field_name=field_name, instance=instance)
+        row_kwargs = dict(kwargs)
+        try:
+            transition, owner = process._prepare_call(action_name, row_kwargs)
+        except TransitionNotAllowed as error:
+            result.refused[instance.pk] = error
+            continue
+        if _has_batch_path(process, transition, owner):
+            key = (transition, process.state._using())
+            batches.setdefault(key, []).append((process, row_kwargs))
+        else:
+            one_by_one.append((process, transition, owner, row_kwargs))
+
+    for (transition, _using), rows in batches.items():
+        if transition.is_background:
+            transition.enqueue_many(
+                [(process.state, row_kwargs) for process, row_kwargs in rows],
+                result,
+            )
+        else:
+            _run_batch(transition, rows, result)
+    for process, transition, owner, row_kwargs in one_by_one:
+        _run_one(process, transition, owner, row_kwargs, result)
+    return result
+
+
+def _has_batch_path(process, transition, owner) -> bool:
+    if transition.is_background:
+        return True
+    return not (
+        not transition.target
+        or transition.optimistic
+        or process._inherits_optimistic(transition, owner)
+    )
+
+
+def _run_one(process, transition, owner, row_kwargs, result) -> None:
+    pk = process.instance.pk
+    token = _transition_context.set(
+        {'root_id': row_kwargs['root_id'], 'tr_id': row_kwargs['tr_id']})
+    try:
+        if process._inherits_optimistic(transition, owner):
+            transition.change_state_optimistic(
+                process.state,
+                version_field=(transition.version_field
+                               or owner.version_field),
+                **row_kwargs,
+            )
+        else:
+            transition.change_state(process.state, **row_kwargs)
+    except TransitionNotAllowed as error:
+        result.refused[pk] = error
+    except Exception as error:
+        result.failed[pk] = error
+    else:
+        result.moved.append(pk)
+    finally:
+        _transition_context.reset(token)
+
+
+def _run_batch(transition: Transition, rows: list, result) -> None:
+    states = [process.state for process, _kwargs in rows]
+    state_class = type(states[0])
+    for state, (_process, row_kwargs) in zip(states, rows):
+        transition._log_start(state, row_kwargs, ' [bulk]')
+
+    got = state_class.lock_many(states)
+    held = []
+    for state, row, is_locked in zip(states, rows, got):
+        if is_locked:
+            transition_logger.info(
+                f'{row[1].get("tr_id")} {TransitionEventType.LOCK.value} '
+                f'{state.instance_key}'
+            )
+            held.append(row)
+        else:
+            transition_logger.info(
+                f'{row[1].get("tr_id")} {TransitionEventType.LOCK.value} '
+                f'failed {state.instance_key} — state is locked'
+            )
+            result.locked.append(state.instance.pk)
+    if not held:
+        return
+
+    try:
+        ready, rejected = _revalidate(transition, held, result)
+    except Exception:
+        _release(transition, held, deferrable=False,
+                 note=' after revalidation failure')
+        raise
+    _release(transition, rejected, deferrable=False,
+             note=' after revalidation failure')
+    if not ready:
+        return
+
+    if transition.side_effects.commands or not states[0].can_compare_and_set():
+        for process, row_kwargs in ready:
+            _run_side_effects(transition, process, row_kwargs, result)
+    else:
+        _write_targets(transition, ready, result)
+
+
+def _revalidate(transition, rows, result):
+    """One SELECT for the persisted states, and one for the background gate.
+    Returns the rows that may run and the rows to unlock."""
+    first_state = rows[0][0].state
+    model = type(first_state.instance)
+    pks = [process.instance.pk for process, _kwargs in rows]
+    persisted = dict(
+        model._base_manager.using(first_state._using())
+        .filter(pk__in=pks)
+        .values_list('pk', first_state.field_name)
+    )
+    in_flight = set()
+    if _background_rows_possible(first_state):
+        from django_logic.background.models import TransitionMessage
+
+        in_flight = TransitionMessage.in_flight_instance_ids(
+            model, pks, first_state.process_name)
+
+    ready, rejected = [], []
+    for process, row_kwargs in rows:
+        pk = process.instance.pk
+        if persisted.get(pk) not in transition.sources:
+            result.wrong_state.append(pk)
+            rejected.append((process, row_kwargs))
+        elif str(pk) in in_flight:
+            # The classification of the in-flight row (retrying or
+            # stranded) is the single-call gate's; this rare row pays for
+            # its own query.
+            try:
+                transition._ensure_no_background_in_flight(process.state)
+            except TransitionNotAllowed as error:
+                result.refused[pk] = error
+                rejected.append((process, row_kwargs))
+            else:
+                ready.append((process, row_kwargs))
+        else:
+            ready.append((process, row_kwargs))
+    return ready, rejected
+
+
+def _run_side_effects(transition, process, row_kwargs, result) -> None:
+    """The single-call path from the side-effects on: the row is locked
+    and revalidated already."""
+    pk = process.instance.pk
+    token = _transition_context.set(
+        {'root_id': row_kwargs['root_id'], 'tr_id': row_kwargs['tr_id']})
+    try:
+        transition._init_transition_context(row_kwargs)
+        transition.side_effects.execute(process.state, **row_kwargs)
+    except TransitionNotAllowed:
+        result.wrong_state.append(pk)
+    except Exception as error:
+        result.failed[pk] = error
+    else:
+        result.moved.append(pk)
+    finally:
+        _transition_context.reset(token)
+
+
+def _write_targets(transition, rows, result) -> None:
+    """One compare-and-set UPDATE for every row, then the unlocks and the
+    callbacks per row."""
+    first_state = rows[0][0].state
+    field_name = first_state.field_name
+    queryset = (
+        type(first_state.instance)._base_manager
+        .using(first_state._using())
+        .filter(pk__in=[process.instance.pk for process, _kwargs in rows])
+    )
+    try:
+        updated = queryset.filter(
+            **{f'{field_name}__in': transition.sources},
+        ).update(**{field_name: transition.target})
+    except Exception as error:
+        transition_logger.error(
+            f'bulk target-state write of {transition.action_name!r} failed '
+            f'for {len(rows)} rows; releasing their locks.'
+        )
+        _release(transition, rows, deferrable=False)
+        for process, _kwargs in rows:
+            result.failed[process.instance.pk] = error
+        return
+
+    written = rows
+    if updated != len(rows):
+        # A writer that does not take the state lock moved some rows after
+        # the SELECT. Only this rare case pays for a read to find out which.
+        now = dict(queryset.values_list('pk', field_name))
+        written, missed = [], []
+        for row in rows:
+            pk = row[0].instance.pk
+            (written if now.get(pk) == transition.target else missed).append(row)
+        result.wrong_state.extend(process.instance.pk for process, _ in missed)
+        _release(transition, missed, deferrable=False,
+                 note=' after revalidation failure')
+
+    for process, row_kwargs in written:
+        setattr(process.instance, field_name, transition.target)
+        transition_logger.info(
+            f'{row_kwargs.get("tr_id")} {TransitionEventType.SET_STATE.value} '
+            f'{transition.target}'
+        )
+        result.moved.append(process.instance.pk)
+    _release(transition, written)
+
+    for process, row_kwargs in written:
+        token = _transition_context.set(
+            {'root_id': row_kwargs['root_id'], 'tr_id': row_kwargs['tr_id']})
+        try:
+            transition._init_transition_context(row_kwargs)
+            transition.callbacks.execute(process.state, **row_kwargs)
+            transition.next_transition.execute(process.state, **row_kwargs)
+        finally:
+            _transition_context.reset(token)
+
+
+def _release(transition, rows, deferrable=True, note='') -> None:
+    """Unlock the rows' states with one backend call. Under
+    ``DEFER_UNLOCK_UNTIL_COMMIT`` in an open transaction, each state takes
+    the single-call path, which defers its release."""
+    if not rows:
+        return
+    if deferrable and _defer_unlock_until_commit():
+        using = rows[0][0].state._using()
+        if transaction.get_connection(using).in_atomic_block:
+            for process, row_kwargs in rows:
+                transition._release_lock(process.state, **row_kwargs)
+            return
+    type(rows[0][0].state).unlock_many([process.state for process, _ in rows])
+    for process, row_kwargs in rows:
+        transition_logger.info(
+            f'{row_kwargs.get("tr_id")} {TransitionEventType.UNLOCK.value} '
+            f'{process.state.instance_key}{note}'
+        )
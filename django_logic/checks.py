@@ -203,13 +203,22 @@ _KNOWN_SETTINGS = frozenset({
     'BACKGROUND_EXECUTION',
     'DEFAULT_QUEUE',
     'LEGACY_EXCEPTION_BASE',
+    'LOCK_BACKEND',
     'LOCK_TIMEOUT',
     'DEFER_UNLOCK_UNTIL_COMMIT',
     'STRICT_HOOK_SIGNATURES',
     'STRICT_KWARGS_SERIALIZATION',
     'TRANSITION_MESSAGE_MAX_ERRORS',
     'TRANSITION_MESSAGE_RETRY_MINUTES',
+    'TRANSITION_MESSAGE_RETRY_BACKOFF',
+    'TRANSITION_MESSAGE_RETRY_MAX_MINUTES',
     'TRANSITION_MESSAGE_CLEANUP_DAYS',
+    'TRANSITION_MESSAGE_LEASE_SECONDS',
+    'TRANSITION_MESSAGE_PRIORITY_AGING_MINUTES',
+    'TRANSITION_MESSAGE_SAFETY_NET_SECONDS',
+    'TRANSITION_MESSAGE_ARCHIVE_AFTER_HOURS',
+    'TRANSITION_MESSAGE_PAYLOAD_THRESHOLD_BYTES',
+    'TRANSITION_MESSAGE_USER_CACHE_SECONDS',
 })
 
 
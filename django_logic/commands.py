@@ -4,9 +4,15 @@ Every hook slot on a ``Transition`` — conditions, permissions,
 side-effects, callbacks, failure callbacks — is represented by a
 ``BaseCommand`` subclass that owns a list of callables and knows how to
 run them.
+
+A hook may be a coroutine function. The async API awaits it directly; the
+sync API runs it with ``async_to_sync``. Plain hooks run as they are on the
+sync API, and in a worker thread (``sync_to_async``) on the async API.
 """
+import inspect
 import logging
 
+from asgiref.sync import async_to_sync, sync_to_async
 from django.db import DEFAULT_DB_ALIAS, transaction
 
 from django_logic.exceptions import TransitionTemporarilyUnavailable
@@ -169,6 +175,18 @@ def _log_hook_error(message: str, error: BaseException, **log_kwargs) -> None:
     transition_logger.log(level, message, **log_kwargs)
 
 
+def _call_hook(command, *args, **kwargs):
+    if inspect.iscoroutinefunction(command):
+        return async_to_sync(command)(*args, **kwargs)
+    return command(*args, **kwargs)
+
+
+async def _acall_hook(command, *args, **kwargs):
+    if inspect.iscoroutinefunction(command):
+        return await command(*args, **kwargs)
+    return await sync_to_async(command)(*args, **kwargs)
+
+
 class BaseCommand:
     """Base class for command bundles (Pattern: Command)."""
 
@@ -186,7 +204,9 @@ class BaseCommand:
 
 class Conditions(BaseCommand):
     def execute(self, instance, **kwargs):
-        return all(command(instance, **kwargs) for command in self.commands)
+        return all(
+            _call_hook(command, instance, **kwargs) for command in self.commands
+        )
 
 
 class Permissions(BaseCommand):
@@ -195,7 +215,8 @@ class Permissions(BaseCommand):
         # Callers that need authenticated-only transitions must enforce that
         # at the caller site.
         return user is None or all(
-            command(instance, user, **kwargs) for command in self.commands
+            _call_hook(command, instance, user, **kwargs)
+            for command in self.commands
         )
 
 
@@ -216,7 +237,7 @@ class SideEffects(BaseCommand):
                     f'{kwargs.get("tr_id")} {TransitionEventType.SIDE_EFFECT.value} '
                     f'{getattr(command, "__name__", repr(command))}'
                 )
-                command(state.instance, **kwargs)
+                _call_hook(command, state.instance, **kwargs)
         except Exception as error:
             _log_hook_error(f'{kwargs.get("tr_id")} {error}', error)
             self._transition.fail_transition(state, error, **kwargs)
@@ -224,6 +245,30 @@ class SideEffects(BaseCommand):
         else:
             self._transition.complete_transition(state, **kwargs)
 
+    async def aexecute(self, state: State, **kwargs):
+        """``execute`` for ``Transition.achange_state``.
+
+        The failure path stays sync: it writes ``failed_state`` in a
+        savepoint, and Django only opens transactions in sync code.
+        """
+        try:
+            transition_logger.info(
+                f'{kwargs.get("tr_id")} SideEffects {len(self.commands)}'
+            )
+            for command in self.commands:
+                transition_logger.info(
+                    f'{kwargs.get("tr_id")} {TransitionEventType.SIDE_EFFECT.value} '
+                    f'{getattr(command, "__name__", repr(command))}'
+                )
+                await _acall_hook(command, state.instance, **kwargs)
+        except Exception as error:
+            _log_hook_error(f'{kwargs.get("tr_id")} {error}', error)
+            await sync_to_async(self._transition.fail_transition)(
+                state, error, **kwargs)
+            raise
+        else:
+            await self._transition.acomplete_transition(state, **kwargs)
+
 
 class Callbacks(BaseCommand):
     """Best-effort follow-ups. Exceptions are logged and swallowed.
@@ -260,9 +305,34 @@ class Callbacks(BaseCommand):
                 )
                 if in_transaction:
                     _run_in_savepoint(
-                        using, lambda: command(state.instance, **kwargs))
+                        using,
+                        lambda: _call_hook(command, state.instance, **kwargs))
                 else:
-                    command(state.instance, **kwargs)
+                    _call_hook(command, state.instance, **kwargs)
+            except Exception as error:
+                _log_hook_error(
+                    f'{kwargs.get("tr_id")} {TransitionEventType.CALLBACK.value} '
+                    f'{command_name}: {error}',
+                    error,
+                    exc_info=True,
+                    extra={'kwargs': redact_log_kwargs(kwargs)},
+                )
+
+    async def aexecute(self, state: State, **kwargs):
+        """``execute`` for the async API. Async code runs outside any
+        transaction, so no callback needs a savepoint."""
+        transition_logger.info(
+            f'{kwargs.get("tr_id")} Callbacks {len(self.commands)}'
+        )
+        for command in self.commands:
+            command_name = object.__repr__(command)
+            try:
+                command_name = getattr(command, '__name__', None) or command_name
+                transition_logger.info(
+                    f'{kwargs.get("tr_id")} {TransitionEventType.CALLBACK.value} '
+                    f'{command_name}'
+                )
+                await _acall_hook(command, state.instance, **kwargs)
             except Exception as error:
                 _log_hook_error(
                     f'{kwargs.get("tr_id")} {TransitionEventType.CALLBACK.value} '
@@ -341,3 +411,9 @@ class NextTransition:
                 f"'{self._next_transition}' failed (swallowed): {error}",
                 error,
             )
+
+    async def aexecute(self, state: State, **kwargs):
+        # The follow-up resolves and runs through the sync entrypoint, in
+        # a worker thread. It is best-effort, so it gains nothing from the
+        # native path.
+        return await sync_to_async(self.execute)(state, **kwargs)
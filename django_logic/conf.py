@@ -16,6 +16,7 @@ from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 
 LOCK_TIMEOUT_DEFAULT = 7200
+LOCK_BACKEND_DEFAULT = 'django_logic.locks.CacheLockBackend'
 
 
 def _conf() -> dict:
@@ -41,6 +42,12 @@ def lock_timeout():
     return _conf().get('LOCK_TIMEOUT', LOCK_TIMEOUT_DEFAULT)
 
 
+def lock_backend() -> str:
+    """Dotted path of the state lock backend class (``LOCK_BACKEND``). Read
+    on every call; ``django_logic.locks.get_lock_backend`` resolves it."""
+    return _conf().get('LOCK_BACKEND') or LOCK_BACKEND_DEFAULT
+
+
 def defer_unlock_until_commit() -> bool:
     """Strict runtime reader for ``DEFER_UNLOCK_UNTIL_COMMIT``: only a
     literal ``True`` enables deferral. The setting gates lock-release
@@ -102,6 +109,14 @@ def validate_core_settings() -> None:
             f"DJANGO_LOGIC['LEGACY_EXCEPTION_BASE'] must be the dotted path "
             f"of an exception class (str), or None, got {value!r}."
         )
+    # Type check only, for the same reason. The import happens in
+    # locks.get_lock_backend() on the first lock.
+    value = _conf().get('LOCK_BACKEND')
+    if value is not None and (not isinstance(value, str) or not value):
+        raise ImproperlyConfigured(
+            f"DJANGO_LOGIC['LOCK_BACKEND'] must be the dotted path of a "
+            f"LockBackend class (str), or None, got {value!r}."
+        )
 
 
 def install_legacy_exception_base() -> None:
@@ -0,0 +1,466 @@
+"""State lock backends.
+
+``State.lock()``, ``unlock()`` and ``is_locked()`` delegate to the backend
+named by ``DJANGO_LOGIC['LOCK_BACKEND']``, a dotted path to one of the
+classes below or to a consumer subclass of :class:`LockBackend`.
+
+Every backend takes the same key, ``State._get_hash()``, and returns an
+ownership token from ``acquire``. ``release`` with that token only removes
+the lock if the token still matches, so a holder whose lock expired cannot
+release a successor's lock. ``release`` with ``None`` is a force-release for
+manual repair paths.
+"""
+import os
+import threading
+import time
+import weakref
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    InterfaceError,
+    OperationalError,
+    connections,
+)
+
+from django_logic.conf import lock_backend as _lock_backend_path
+
+
+class LockBackend:
+    """Interface of a state lock backend.
+
+    One instance serves the whole process, so implementations must be safe
+    to call from several threads.
+    """
+
+    def acquire(self, key: str, timeout: float) -> str | None:
+        """Take the lock atomically. Return a new token, or ``None`` when
+        the key is already locked."""
+        raise NotImplementedError
+
+    def release(self, key: str, token: str | None) -> None:
+        """Remove the lock if ``token`` still owns it. ``None`` removes it
+        whoever holds it."""
+        raise NotImplementedError
+
+    def is_locked(self, key: str) -> bool:
+        """Whether the key is locked now. Only a hint: the answer can
+        change before the caller acts on it."""
+        raise NotImplementedError
+
+    def is_locked_many(self, keys: list) -> list:
+        """``is_locked`` for each key, in order. Backends override this
+        when they can answer in one round trip."""
+        return [self.is_locked(key) for key in keys]
+
+    def acquire_many(self, keys: list, timeout: float) -> list:
+        """``acquire`` for each key, in order: a token or ``None`` per key.
+        A key listed twice is acquired once. Each acquire stays atomic on
+        its own; the batch is not all-or-nothing."""
+        tokens, seen = [], set()
+        for key in keys:
+            tokens.append(None if key in seen else self.acquire(key, timeout))
+            seen.add(key)
+        return tokens
+
+    def release_many(self, pairs: list) -> None:
+        """``release`` for each ``(key, token)`` pair."""
+        for key, token in pairs:
+            self.release(key, token)
+
+    # The async methods run the sync ones in a worker thread. A backend
+    # with an async client overrides them. thread_sensitive keeps every
+    # call on one thread, which the advisory-lock session relies on.
+
+    async def aacquire(self, key: str, timeout: float) -> str | None:
+        return await sync_to_async(self.acquire)(key, timeout)
+
+    async def arelease(self, key: str, token: str | None) -> None:
+        await sync_to_async(self.release)(key, token)
+
+    async def ais_locked(self, key: str) -> bool:
+        return await sync_to_async(self.is_locked)(key)
+
+
+class CacheLockBackend(LockBackend):
+    """The lock in Django's ``default`` cache. This is the default.
+
+    ``cache.add`` is atomic on every shared backend, so ``acquire`` is one
+    round trip. ``release`` is a get, a compare and a delete. That pair is
+    not atomic on a generic cache, so a takeover between the compare and
+    the delete can still remove a successor's lock. On Redis,
+    :class:`RedisLockBackend` closes that window.
+    """
+
+    def acquire(self, key, timeout):
+        token = uuid4().hex
+        if cache.add(key, token, timeout):
+            return token
+        return None
+
+    def release(self, key, token):
+        if token is None or cache.get(key) == token:
+            cache.delete(key)
+
+    def is_locked(self, key):
+        return cache.get(key) is not None
+
+    def is_locked_many(self, keys):
+        found = cache.get_many(keys) if keys else {}
+        return [found.get(key) is not None for key in keys]
+
+    # acquire_many keeps the default loop: the cache API has no atomic
+    # multi-key add, and set_many would overwrite other holders' locks.
+
+    def release_many(self, pairs):
+        if not pairs:
+            return
+        stored = cache.get_many([key for key, _token in pairs])
+        owned = [
+            key for key, token in pairs
+            if token is None or stored.get(key) == token
+        ]
+        if owned:
+            cache.delete_many(owned)
+
+    async def aacquire(self, key, timeout):
+        token = uuid4().hex
+        if await cache.aadd(key, token, timeout):
+            return token
+        return None
+
+    async def arelease(self, key, token):
+        if token is None or await cache.aget(key) == token:
+            await cache.adelete(key)
+
+    async def ais_locked(self, key):
+        return await cache.aget(key) is not None
+
+
+#: Delete the key only while it still holds the caller's token. Redis runs
+#: a script atomically, so nothing can take the lock between the two calls.
+_REDIS_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisLockBackend(LockBackend):
+    """The lock in Redis, with an atomic compare-and-delete release.
+
+    Uses the client of the ``default`` cache, which must be Django's
+    ``RedisCache`` or django-redis. Keys go through the cache's
+    ``make_key``, so ``KEY_PREFIX`` and ``VERSION`` still apply. Each call
+    is one round trip: ``SET NX PX`` to acquire, one script to release,
+    ``EXISTS`` or ``MGET`` to read.
+
+    The token is stored raw, not pickled as the cache API would store it.
+    Every process that shares the lock must therefore use this backend.
+    """
+
+    def _client(self):
+        # Django's RedisCache keeps its client in ``_cache``; django-redis
+        # keeps it in ``client``. Neither is public API, so an unknown
+        # backend fails here with a clear message.
+        if hasattr(cache, '_cache') and hasattr(cache._cache, 'get_client'):
+            return cache._cache.get_client(write=True)
+        if hasattr(cache, 'client') and hasattr(cache.client, 'get_client'):
+            return cache.client.get_client(write=True)
+        raise ImproperlyConfigured(
+            "DJANGO_LOGIC['LOCK_BACKEND'] is RedisLockBackend, but the "
+            "'default' cache is not a Redis cache. Use "
+            "django.core.cache.backends.redis.RedisCache or "
+            "django_redis.cache.RedisCache, or choose another lock backend."
+        )
+
+    def acquire(self, key, timeout):
+        token = uuid4().hex
+        if self._client().set(
+                cache.make_key(key), token, nx=True,
+                px=max(1, int(timeout * 1000))):
+            return token
+        return None
+
+    def release(self, key, token):
+        client = self._client()
+        if token is None:
+            client.delete(cache.make_key(key))
+            return
+        client.register_script(_REDIS_RELEASE_SCRIPT)(
+            keys=[cache.make_key(key)], args=[token])
+
+    def is_locked(self, key):
+        return bool(self._client().exists(cache.make_key(key)))
+
+    def is_locked_many(self, keys):
+        if not keys:
+            return []
+        values = self._client().mget([cache.make_key(key) for key in keys])
+        return [value is not None for value in values]
+
+    def acquire_many(self, keys, timeout):
+        if not keys:
+            return []
+        unique = list(dict.fromkeys(keys))
+        tokens = {key: uuid4().hex for key in unique}
+        pipe = self._client().pipeline(transaction=False)
+        for key in unique:
+            pipe.set(cache.make_key(key), tokens[key], nx=True,
+                     px=max(1, int(timeout * 1000)))
+        granted = dict(zip(unique, pipe.execute()))
+        result, seen = [], set()
+        for key in keys:
+            result.append(
+                tokens[key] if granted[key] and key not in seen else None)
+            seen.add(key)
+        return result
+
+    def release_many(self, pairs):
+        if not pairs:
+            return
+        client = self._client()
+        script = client.register_script(_REDIS_RELEASE_SCRIPT)
+        pipe = client.pipeline(transaction=False)
+        for key, token in pairs:
+            if token is None:
+                pipe.delete(cache.make_key(key))
+            else:
+                script(keys=[cache.make_key(key)], args=[token], client=pipe)
+        pipe.execute()
+
+
+#: Connections a forked child inherited from its parent. The child must not
+#: use them or close them: closing would end the parent's session and drop
+#: its locks. Keeping a reference stops garbage collection from closing them.
+_inherited_connections = []
+
+
+def _close_lock_connection(connection) -> None:
+    # Runs in whichever thread collects the session, or at exit.
+    connection.inc_thread_sharing()
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+class _LockSession:
+    """One thread's lock connection and the lock ids it holds. When the
+    thread ends, its thread-local drops the session and the connection
+    is closed."""
+
+    def __init__(self, using):
+        self.connection = connections.create_connection(using)
+        self.held = {}
+        self.pid = os.getpid()
+        self.closer = weakref.finalize(
+            self, _close_lock_connection, self.connection)
+
+
+class PostgresAdvisoryLockBackend(LockBackend):
+    """The lock as a PostgreSQL session-level advisory lock. Needs no cache.
+
+    The key is folded into the 64-bit lock id ``pg_try_advisory_lock``
+    takes. Each thread holds its locks on its own dedicated connection to
+    the ``default`` database. That connection is outside every transaction
+    the engine opens, so a rollback does not release a lock, and an aborted
+    transaction cannot block the unlock. When the process dies, PostgreSQL
+    ends the session and drops its locks, so ``LOCK_TIMEOUT`` is not used.
+
+    A connection that breaks (a database restart, a failover) ended its
+    session, and with it the locks it held. The backend then forgets
+    those locks and runs the query again on a new connection. The
+    connection of a thread that ended is closed.
+
+    Advisory locks are re-entrant within one session, but the state lock
+    must refuse a second acquire. The backend therefore remembers which
+    lock ids its session holds and refuses those itself.
+
+    A force-release (``unlock()`` on a ``State`` that never locked) only
+    works from the thread that holds the lock. Any other holder keeps the
+    lock until it unlocks or its session ends.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+        self._local = threading.local()
+
+    def _session(self) -> _LockSession:
+        """This thread's lock session, opened on first use in this
+        process."""
+        session = getattr(self._local, 'session', None)
+        if session is None or session.pid != os.getpid():
+            if session is not None:
+                session.closer.detach()
+                _inherited_connections.append(session.connection)
+            session = self._local.session = _LockSession(self.using)
+        return session
+
+    def _fetch(self, sql, params) -> list:
+        """The rows of ``sql`` on this thread's lock connection. After a
+        broken connection, once more on a new one."""
+        session = self._session()
+        try:
+            return self._run(session.connection, sql, params)
+        except (OperationalError, InterfaceError):
+            if session.connection.is_usable():
+                raise
+            session.closer()
+            self._local.session = None
+            return self._run(self._session().connection, sql, params)
+
+    @staticmethod
+    def _run(connection, sql, params) -> list:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    @staticmethod
+    def lock_id(key: str) -> int:
+        """The signed 64-bit advisory lock id for a ``State`` hash."""
+        return int(key[:16], 16) - (1 << 63)
+
+    def acquire(self, key, timeout):
+        lock_id = self.lock_id(key)
+        if lock_id in self._session().held:
+            return None
+        [(got,)] = self._fetch('SELECT pg_try_advisory_lock(%s)', [lock_id])
+        if not got:
+            return None
+        token = uuid4().hex
+        # Read after the query: a reconnect replaces the session.
+        self._session().held[lock_id] = token
+        return token
+
+    def acquire_many(self, keys, timeout):
+        if not keys:
+            return []
+        held = self._session().held
+        wanted = list(dict.fromkeys(
+            lock_id for lock_id in map(self.lock_id, keys)
+            if lock_id not in held
+        ))
+        granted = {}
+        if wanted:
+            granted = dict(self._fetch(
+                'SELECT lock_id, pg_try_advisory_lock(lock_id) '
+                'FROM unnest(%s::bigint[]) AS ids(lock_id)',
+                [wanted],
+            ))
+        held = self._session().held
+        tokens = []
+        for lock_id in map(self.lock_id, keys):
+            if granted.pop(lock_id, False):
+                held[lock_id] = uuid4().hex
+                tokens.append(held[lock_id])
+            else:
+                tokens.append(None)
+        return tokens
+
+    def release(self, key, token):
+        session = self._session()
+        lock_id = self.lock_id(key)
+        if lock_id not in session.held or token not in (
+                None, session.held[lock_id]):
+            return
+        try:
+            self._run(session.connection,
+                      'SELECT pg_advisory_unlock(%s)', [lock_id])
+        except (OperationalError, InterfaceError):
+            if session.connection.is_usable():
+                raise
+            # The session ended, and its locks with it.
+            session.closer()
+            self._local.session = None
+            return
+        del session.held[lock_id]
+
+    def is_locked(self, key):
+        return self.is_locked_many([key])[0]
+
+    def is_locked_many(self, keys):
+        if not keys:
+            return []
+        # pg_locks shows a 64-bit advisory id as two 32-bit halves:
+        # classid is the high half and objid the low half.
+        halves = [
+            ((lock_id >> 32) & 0xFFFFFFFF, lock_id & 0xFFFFFFFF)
+            for lock_id in map(self.lock_id, keys)
+        ]
+        locked = set(self._fetch(
+            "SELECT classid::bigint, objid::bigint FROM pg_locks "
+            "WHERE locktype = 'advisory' AND objsubid = 1 AND granted "
+            "AND database = (SELECT oid FROM pg_database "
+            "WHERE datname = current_database()) "
+            "AND objid::bigint = ANY(%s)",
+            [[low for _high, low in halves]],
+        ))
+        return [pair in locked for pair in halves]
+
+
+class LocalLockBackend(LockBackend):
+    """The lock in a dict in this process.
+
+    For a single-process deployment and for test runs. Nothing outside the
+    process sees these locks, so pull mode refuses this backend: the web
+    processes and the workers would not exclude each other.
+    """
+
+    def __init__(self):
+        self._locks = {}
+        self._mutex = threading.Lock()
+
+    def acquire(self, key, timeout):
+        now = time.monotonic()
+        with self._mutex:
+            held = self._locks.get(key)
+            if held is not None and held[1] > now:
+                return None
+            token = uuid4().hex
+            self._locks[key] = (token, now + timeout)
+            return token
+
+    def release(self, key, token):
+        with self._mutex:
+            held = self._locks.get(key)
+            if held is not None and token in (None, held[0]):
+                del self._locks[key]
+
+    def is_locked(self, key):
+        with self._mutex:
+            held = self._locks.get(key)
+            return held is not None and held[1] > time.monotonic()
+
+
+_backends = {}
+
+
+def get_lock_backend() -> LockBackend:
+    """The configured backend. One instance per dotted path, created on
+    first use, so tests can switch ``LOCK_BACKEND`` with
+    ``override_settings``."""
+    path = _lock_backend_path()
+    backend = _backends.get(path)
+    if backend is None:
+        from django.utils.module_loading import import_string
+
+        try:
+            backend_class = import_string(path)
+        except ImportError as exc:
+            raise ImproperlyConfigured(
+                f"DJANGO_LOGIC['LOCK_BACKEND'] could not be imported "
+                f"({path!r}): {exc}"
+            )
+        if not (isinstance(backend_class, type)
+                and issubclass(backend_class, LockBackend)):
+            raise ImproperlyConfigured(
+                f"DJANGO_LOGIC['LOCK_BACKEND'] must name a LockBackend "
+                f"subclass, got {backend_class!r}."
+            )
+        backend = _backends[path] = backend_class()
+    return backend
@@ -10,12 +10,14 @@ import uuid
 from collections import namedtuple
 from contextvars import ContextVar
 
+from asgiref.sync import sync_to_async
 from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
 
 from django_logic.commands import Conditions, Permissions
 from django_logic.exceptions import TransitionNotAllowed
 from django_logic.logger import transition_logger
 from django_logic.state import State
+from django_logic.transition import _refuse_engine_param_kwargs
 
 
 # Per-execution-chain context that propagates transition metadata
@@ -48,6 +50,21 @@ _RESERVED_KWARGS = frozenset({
 })
 
 
+def _refuse_positional_args(item: str, args: tuple) -> None:
+    if args:
+        # Positional arguments used to be dropped, so
+        # ``instance.process.verify(user)`` ran with user=None. That
+        # skips every permission check and loses the audit trail with
+        # no error at all, so fail loudly instead.
+        raise TypeError(
+            f"{item}() accepts keyword arguments only (got "
+            f"{len(args)} positional). Pass user and other values "
+            f"by keyword, e.g. {item}(user=request.user) — a "
+            f"positional user would be dropped and permission "
+            f"checks skipped."
+        )
+
+
 class Process:
     """Declarative container of transitions and nested processes.
 
@@ -69,11 +86,34 @@ class Process:
     permissions_class = Permissions
     state_class = State
     process_name = 'process'
+    #: Run this class's own transitions without the state lock (see
+    #: ``Transition.change_state_optimistic``). A transition's
+    #: ``optimistic=`` overrides it.
+    optimistic = False
+    #: Integer column the optimistic compare-and-set also checks and bumps.
+    version_field = None
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
         _validate_action_names_not_shadowed(cls)
         _validate_unique_background_action_names(cls)
+        cls._dispatch_index()
+
+    @classmethod
+    def _dispatch_index(cls) -> '_DispatchIndex':
+        """The compiled lookup tables for this class as the root of a tree.
+
+        Built when the class is created and rebuilt on the next lookup after
+        ``transitions`` or ``nested_processes`` changes anywhere in the tree
+        (a cycle closed after both classes exist, a test patching a list).
+        Read from ``cls.__dict__``: a subclass is its own root and must not
+        use its parent's tables.
+        """
+        index = cls.__dict__.get('_compiled_dispatch_index')
+        if index is None or not index.is_current():
+            index = _DispatchIndex(cls)
+            cls._compiled_dispatch_index = index
+        return index
 
     def __init__(self, field_name='', instance=None, state=None):
         """Construct either from ``(instance, field_name)`` (normal path
@@ -97,6 +137,7 @@ class Process:
                 field_name=field_name,
                 process_name=self.process_name,
             )
+            self.state.process_class = type(self)
 
     def __getattr__(self, item):
         # Names that start with an underscore are never action names. copy,
@@ -107,27 +148,28 @@ class Process:
         if item.startswith('_'):
             raise AttributeError(item)
 
-        def transition_method(*args, **kwargs):
-            if args:
-                # Positional arguments used to be dropped, so
-                # ``instance.process.verify(user)`` ran with user=None. That
-                # skips every permission check and loses the audit trail with
-                # no error at all, so fail loudly instead.
-                raise TypeError(
-                    f"{item}() accepts keyword arguments only (got "
-                    f"{len(args)} positional). Pass user and other values "
-                    f"by keyword, e.g. {item}(user=request.user) — a "
-                    f"positional user would be dropped and permission "
-                    f"checks skipped."
-                )
-            # Drop an 'action_name' key the caller passed: it would clash with
-            # _get_transition_method's first parameter and raise "multiple
-            # values for argument 'action_name'". No engine path forwards it;
-            # only a hand-built kwargs dict does. The other names in
-            # _RESERVED_KWARGS stay, because next_transition forwards tr_id,
-            # root_id, parent_id and process_class through this same path.
-            kwargs.pop('action_name', None)
-            return self._get_transition_method(item, **kwargs)
+        # ``a<action_name>`` is the async form of an action. A real action
+        # with that name wins, so the alias never hides a declared action.
+        by_action = self._dispatch_index().by_action
+        if item.startswith('a') and item[1:] in by_action and item not in by_action:
+            action_name = item[1:]
+
+            async def transition_method(*args, **kwargs):
+                _refuse_positional_args(item, args)
+                kwargs.pop('action_name', None)
+                return await self._aget_transition_method(action_name, **kwargs)
+        else:
+            def transition_method(*args, **kwargs):
+                _refuse_positional_args(item, args)
+                # Drop an 'action_name' key the caller passed: it would clash
+                # with _get_transition_method's first parameter and raise
+                # "multiple values for argument 'action_name'". No engine path
+                # forwards it; only a hand-built kwargs dict does. The other
+                # names in _RESERVED_KWARGS stay, because next_transition
+                # forwards tr_id, root_id, parent_id and process_class through
+                # this same path.
+                kwargs.pop('action_name', None)
+                return self._get_transition_method(item, **kwargs)
 
         # Django's template engine CALLS any callable it resolves, so
         # ``{{ order.process.approve }}`` used to drive the state machine
@@ -139,6 +181,57 @@ class Process:
         return transition_method
 
     def _get_transition_method(self, action_name: str, **kwargs):
+        transition, owning_process = self._prepare_call(action_name, kwargs)
+        token = _transition_context.set(
+            {'root_id': kwargs['root_id'], 'tr_id': kwargs['tr_id']}
+        )
+        try:
+            if self._inherits_optimistic(transition, owning_process):
+                _refuse_engine_param_kwargs(action_name, kwargs)
+                return transition.change_state_optimistic(
+                    self.state,
+                    version_field=(transition.version_field
+                                   or owning_process.version_field),
+                    **kwargs,
+                )
+            return transition.change_state(self.state, **kwargs)
+        finally:
+            _transition_context.reset(token)
+
+    async def _aget_transition_method(self, action_name: str, **kwargs):
+        """``_get_transition_method`` for ``a<action_name>()``.
+
+        Resolution runs the conditions and permissions, which may query
+        the database, so it runs in a worker thread. The thread gets a
+        copy of the context, so the call chain ids still propagate.
+        """
+        transition, owning_process = await sync_to_async(self._prepare_call)(
+            action_name, kwargs)
+        token = _transition_context.set(
+            {'root_id': kwargs['root_id'], 'tr_id': kwargs['tr_id']}
+        )
+        try:
+            if self._inherits_optimistic(transition, owning_process):
+                _refuse_engine_param_kwargs(action_name, kwargs)
+                return await sync_to_async(transition.change_state_optimistic)(
+                    self.state,
+                    version_field=(transition.version_field
+                                   or owning_process.version_field),
+                    **kwargs,
+                )
+            return await transition.achange_state(self.state, **kwargs)
+        finally:
+            _transition_context.reset(token)
+
+    @staticmethod
+    def _inherits_optimistic(transition, owning_process) -> bool:
+        return (transition.optimistic is None
+                and transition.supports_optimistic
+                and owning_process.optimistic)
+
+    def _prepare_call(self, action_name: str, kwargs: dict):
+        """Resolve ``action_name`` and fill the engine kwargs in place.
+        Returns ``(transition, owning_process)``."""
         parent_ctx = _transition_context.get()
         if parent_ctx:
             kwargs.setdefault('root_id', parent_ctx['root_id'])
@@ -177,13 +270,7 @@ class Process:
                 f"{type(owning_process).__name__}"
             )
 
-        token = _transition_context.set(
-            {'root_id': kwargs['root_id'], 'tr_id': kwargs['tr_id']}
-        )
-        try:
-            return transition.change_state(self.state, **kwargs)
-        finally:
-            _transition_context.reset(token)
+        return transition, owning_process
 
     def is_valid(self, user=None) -> bool:
         permissions = self.permissions_class(commands=self.permissions)
@@ -200,6 +287,12 @@ class Process:
             }
         )
 
+    async def aget_available_actions(self, user=None, action_name=None):
+        """``get_available_actions`` for async callers. The conditions and
+        permissions are sync hooks, so the listing runs in a worker thread."""
+        return await sync_to_async(self.get_available_actions)(
+            user=user, action_name=action_name)
+
     def get_available_transitions(self, user=None, action_name=None):
         """Yield transitions whose conditions/permissions pass."""
         for transition, _owner in self._iter_available_with_owner(
@@ -208,12 +301,84 @@ class Process:
         ):
             yield transition
 
+    @classmethod
+    def available_actions_for(cls, instances, user=None, field_name=None) -> dict:
+        """``get_available_actions(user)`` for many instances at once, as a
+        dict keyed by pk.
+
+        ``instances`` is a queryset or any iterable of model instances.
+        ``field_name`` defaults to the state field this class is bound to on
+        the instances' model.
+
+        Built for list pages. Instances are grouped by their current state,
+        and a group with no transition sourced in that state is answered
+        without any further work. For the rest, the state locks are read
+        with one ``State.is_locked_many`` call (one ``cache.get_many`` on the
+        default backend) instead of one cache read per row and level. The
+        process-level guards run once per instance and class, as in
+        :meth:`get_available_actions`.
+        """
+        instances = list(instances)
+        if not instances:
+            return {}
+        if field_name is None:
+            field_name = ProcessManager.bound_state_field(
+                type(instances[0]), cls)
+        index = cls._dispatch_index()
+
+        available = {}
+        candidates = []
+        for instance in instances:
+            available[instance.pk] = []
+            if index.entries_for_state(getattr(instance, field_name)):
+                candidates.append(
+                    cls(field_name=field_name, instance=instance))
+        locked = cls.state_class.is_locked_many(
+            [process.state for process in candidates])
+        for process, is_locked in zip(candidates, locked):
+            available[process.instance.pk] = sorted({
+                transition.action_name
+                for transition, _owner in process._iter_available_with_owner(
+                    user=user, locked=is_locked,
+                )
+            })
+        return available
+
+    @classmethod
+    def bulk_transition(cls, instances, action_name: str, user=None,
+                        field_name=None, **kwargs):
+        """Run ``action_name`` on many instances. Returns a
+        :class:`~django_logic.bulk.BulkTransitionResult` with each
+        instance's outcome, keyed by pk.
+
+        ``instances`` is a queryset or any iterable of model instances.
+        ``field_name`` defaults to the state field this class is bound to.
+        The action resolves per instance, as ``instance.process.action()``
+        would. The locks are then taken in one lock backend pass, and a
+        transition without side-effects writes all its targets with one
+        UPDATE. A failing row does not stop the others: its exception is
+        in the result, not raised. See ``django_logic.bulk``.
+        """
+        # Imported here: django_logic.bulk imports this module.
+        from django_logic.bulk import BulkTransitionResult, run_bulk_transition
+
+        instances = list(instances)
+        if not instances:
+            return BulkTransitionResult()
+        if field_name is None:
+            field_name = ProcessManager.bound_state_field(
+                type(instances[0]), cls)
+        if user is not None:
+            kwargs['user'] = user
+        return run_bulk_transition(
+            cls, instances, action_name, field_name, kwargs)
+
     def _iter_available_with_owner(
         self,
         user=None,
         action_name=None,
         ignore_state=False,
-        _seen=None,
+        locked=None,
     ):
         """Like :meth:`get_available_transitions`, but yield
         ``(transition, owning_process)`` pairs.
@@ -224,48 +389,66 @@ class Process:
         an ``action_name`` and use conditions to choose. Iteration order
         and filtering are identical to ``get_available_transitions``; that
         method is a thin wrapper that drops the owner.
-        """
-        # Visit each Process CLASS once per walk. Without this, a
-        # nested process reachable by two paths — a diamond, or a duplicated
-        # entry in ``nested_processes`` — yielded every one of its
-        # transitions twice, and ``_resolve_transition_with_owner`` rejected
-        # the single declaration as "several transitions available", with a
-        # hint no condition could satisfy (both matches being the same
-        # object). ``get_available_actions`` set-dedupes, so the action was
-        # advertised and then failed on every call. A nested cycle recursed
-        # until RecursionError. Deduping by class preserves the supported
-        # pattern of one ``action_name`` on *distinct* nested classes
-        # disambiguated by conditions. Mirrors ``_iter_process_tree``.
-        if _seen is None:
-            _seen = set()
-        if id(type(self)) in _seen:
-            return
-        _seen.add(id(type(self)))
 
-        if not self.is_valid(user):
-            return
+        Candidates come from the class's compiled index, already narrowed by
+        ``action_name`` or by the current state. A nested process is only
+        built, and its process-level guards only run, when one of its
+        transitions is a candidate. Its ancestors' guards still gate it: a
+        failing process-level guard hides the whole subtree.
 
-        if not ignore_state and self.state.is_locked():
+        ``locked`` is the state lock's answer when the caller already read
+        it (the bulk listing reads every lock in one call). ``None`` reads it
+        here, when it is first needed.
+        """
+        index = type(self)._dispatch_index()
+        current_state = self.state.get_state()
+        if action_name is not None:
+            entries = index.by_action.get(action_name, ())
+        elif ignore_state:
+            entries = index.entries
+        else:
+            entries = index.entries_for_state(current_state)
+        if not entries:
             return
 
-        for transition in self.transitions:
-            if action_name is not None and transition.action_name != action_name:
+        # Keyed by class: each class appears once per tree (the index walk
+        # deduplicates diamonds and cycles), so one instance per class is
+        # the same set of processes the recursive walk used to build.
+        processes = {}
+        for entry in entries:
+            if not ignore_state and current_state not in entry.sources:
                 continue
-
-            if (
-                self.state.get_state() in transition.sources
-                and transition.is_valid(self.state.instance, user)
-            ):
-                yield transition, self
-
-        for sub_process_class in self.nested_processes:
-            sub_process = sub_process_class(state=self.state)
-            yield from sub_process._iter_available_with_owner(
-                user=user,
-                action_name=action_name,
-                ignore_state=ignore_state,
-                _seen=_seen,
-            )
+            if not self._path_is_valid(entry.path, user, processes):
+                continue
+            if not ignore_state:
+                # Every level shares this State, so one lock read answers
+                # for the whole tree.
+                if locked is None:
+                    locked = self.state.is_locked()
+                if locked:
+                    return
+            if entry.transition.is_valid(self.state.instance, user):
+                yield entry.transition, processes[entry.owner]
+
+    def _path_is_valid(self, path, user, processes) -> bool:
+        """Whether every process on ``path`` (root first) passes its
+        process-level conditions and permissions.
+
+        ``processes`` caches one instance per class for the current lookup,
+        or ``None`` for a class whose guard failed.
+        """
+        for process_cls in path:
+            if process_cls not in processes:
+                process = (
+                    self if process_cls is type(self)
+                    else process_cls(state=self.state)
+                )
+                processes[process_cls] = (
+                    process if process.is_valid(user) else None
+                )
+            if processes[process_cls] is None:
+                return False
+        return True
 
     def _resolve_transition_with_owner(self, action_name: str, user=None):
         """Resolve ``action_name`` to ``(transition, owning_process)``.
@@ -322,6 +505,132 @@ def _iter_process_tree(process_cls, _seen=None):
         yield from _iter_process_tree(sub_process_cls, _seen)
 
 
+#: One transition in a compiled tree. ``owner`` is the class that declares
+#: it, ``path`` the classes from the root down to ``owner`` (their
+#: process-level guards gate it), ``sources`` a frozenset of its sources.
+_IndexEntry = namedtuple(
+    '_IndexEntry', ['transition', 'owner', 'path', 'sources'])
+
+
+def _transitions_key(transitions) -> tuple:
+    """What the index reads from each transition: the object (by
+    identity), its ``action_name`` and its ``sources``. The index's
+    entries keep the transitions alive, so an ``id`` is not reused while
+    the snapshot holds it."""
+    return tuple(
+        (id(transition), transition.action_name,
+         tuple(getattr(transition, 'sources', ()) or ()))
+        for transition in transitions or ()
+    )
+
+
+def _same_elements(items, snapshot: tuple) -> bool:
+    return len(items) == len(snapshot) and all(
+        item is known for item, known in zip(items, snapshot))
+
+
+class _DispatchIndex:
+    """Lookup tables for one root ``Process`` class and its nested tree.
+
+    Every action call, ``get_available_*`` listing and worker restore used to
+    walk ``nested_processes``, build a ``Process`` per level and scan each
+    ``transitions`` list. The tree is static, so the walk runs once here and
+    the callers read dicts.
+
+    Entries keep the order of the depth-first walk, so every lookup yields
+    transitions in the order the recursive walk did. A class reached twice
+    (a diamond or a cycle) is indexed on its first path only, as before.
+    """
+
+    def __init__(self, root_cls):
+        self._snapshot = []
+        entries = []
+        owners_by_path = {}
+        self._walk(root_cls, (), set(), entries, owners_by_path)
+        self.entries = tuple(entries)
+
+        by_action, by_source = {}, {}
+        for entry in self.entries:
+            by_action.setdefault(entry.transition.action_name, []).append(entry)
+            for source in entry.sources:
+                by_source.setdefault(source, []).append(entry)
+        self.by_action = {k: tuple(v) for k, v in by_action.items()}
+        self.by_source = {k: tuple(v) for k, v in by_source.items()}
+
+        self._background_by_owner = {}
+        for path, owner in owners_by_path.items():
+            for transition in owner.transitions or []:
+                if getattr(transition, 'is_background', False):
+                    self._background_by_owner.setdefault(
+                        (path, transition.action_name), transition)
+        self._background_by_name = {}
+        for entry in self.entries:
+            if not getattr(entry.transition, 'is_background', False):
+                continue
+            named = self._background_by_name.setdefault(
+                entry.transition.action_name, [])
+            # One shared transition object listed on two classes is still
+            # one transition.
+            if all(entry.transition is not known for known in named):
+                named.append(entry.transition)
+        #: Whether any class in the tree declares a background transition.
+        #: Without one no ``TransitionMessage`` row can exist for this
+        #: process, and the engine skips the in-flight probe.
+        self.has_background = bool(self._background_by_name)
+
+    def _walk(self, process_cls, parent_path, seen, entries, owners_by_path):
+        if process_cls in seen:
+            return
+        seen.add(process_cls)
+        transitions = getattr(process_cls, 'transitions', None)
+        nested = getattr(process_cls, 'nested_processes', None)
+        self._snapshot.append((
+            process_cls, transitions, _transitions_key(transitions),
+            nested, tuple(nested or ()),
+        ))
+        path = parent_path + (process_cls,)
+        owners_by_path.setdefault(
+            f'{process_cls.__module__}.{process_cls.__name__}', process_cls)
+        for transition in transitions or []:
+            entries.append(_IndexEntry(
+                transition, process_cls, path,
+                frozenset(getattr(transition, 'sources', ()) or ()),
+            ))
+        for sub_process_cls in nested or []:
+            self._walk(sub_process_cls, path, seen, entries, owners_by_path)
+
+    def is_current(self) -> bool:
+        """Whether no class in the tree has changed its ``transitions`` or
+        ``nested_processes`` since the build: the lists, their elements,
+        and each transition's ``action_name`` and ``sources``."""
+        for process_cls, transitions, transitions_key, nested, nested_key in (
+            self._snapshot
+        ):
+            now_transitions = getattr(process_cls, 'transitions', None)
+            now_nested = getattr(process_cls, 'nested_processes', None)
+            if (
+                now_transitions is not transitions
+                or now_nested is not nested
+                or not _same_elements(now_nested or (), nested_key)
+                or _transitions_key(now_transitions) != transitions_key
+            ):
+                return False
+        return True
+
+    def entries_for_state(self, state) -> tuple:
+        """The entries whose sources include ``state``."""
+        return self.by_source.get(state, ())
+
+    def background_in_owner(self, owning_path: str, action_name: str):
+        """The background transition ``action_name`` declared on the class
+        whose dotted path is ``owning_path``, or ``None``."""
+        return self._background_by_owner.get((owning_path, action_name))
+
+    def background_named(self, action_name: str) -> list:
+        """Every distinct background transition named ``action_name``."""
+        return list(self._background_by_name.get(action_name, ()))
+
+
 def _validate_action_names_not_shadowed(process_cls):
     """Reject an ``action_name`` that a real attribute of the ROOT process
     shadows (raised at class creation).
@@ -681,3 +990,32 @@ class ProcessManager:
                 continue
             if isinstance(vars(model).get(name), _ProcessAccessor):
                 delattr(model, name)
+
+    @classmethod
+    def bound_state_field(cls, model, process_class) -> str:
+        """The ``state_field`` that ``process_class`` is bound to on ``model``.
+
+        A multi-table-inheritance child has no binding of its own when it
+        uses its parent's accessor, so the model's MRO is searched in order.
+        Raises ``ImproperlyConfigured`` when there is no binding, or when the
+        same class is bound to several fields and the caller must choose.
+        """
+        for klass in model.__mro__:
+            fields = sorted({
+                binding.state_field for binding in cls.bindings
+                if binding.model is klass
+                and binding.process_class is process_class
+            })
+            if len(fields) == 1:
+                return fields[0]
+            if fields:
+                raise ImproperlyConfigured(
+                    f"{process_class.__name__} is bound to several state "
+                    f"fields on {klass._meta.label} ({', '.join(fields)}). "
+                    f"Pass field_name= to choose one."
+                )
+        raise ImproperlyConfigured(
+            f"{process_class.__name__} is not bound on "
+            f"{model._meta.label}. Bind it with "
+            f"ProcessManager.bind_model_process or pass field_name=."
+        )
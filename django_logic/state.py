@@ -1,13 +1,21 @@
 from hashlib import blake2b
-from uuid import uuid4
 
-from django.core.cache import cache
-from django.db import DEFAULT_DB_ALIAS
+from asgiref.sync import sync_to_async
+
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.db.models import F, Model
+from django.db.models.signals import post_save, pre_save
 
 from django_logic.conf import lock_timeout as _get_lock_timeout
+from django_logic.locks import get_lock_backend
 
 
 class State(object):
+    #: The root ``Process`` class that built this state, or ``None`` for a
+    #: state built directly. The engine reads its tree to skip the
+    #: background in-flight probe when no background transition exists.
+    process_class = None
+
     def __init__(self, instance, field_name: str, process_name=None):
         self.instance = instance
         self.field_name = field_name
@@ -39,18 +47,44 @@ class State(object):
             .get(pk=self.instance.pk)
         )
 
-    def set_state(self, state):
+    #: Whether ``set_state(..., sources=...)`` may write with one
+    #: compare-and-set UPDATE. A subclass sets this to False to keep every
+    #: write on ``save()``. See :meth:`can_compare_and_set`.
+    compare_and_set_writes = True
+
+    def set_state(self, state, sources=None, version_field=None) -> bool:
         """Persist the state field without touching other in-memory fields.
 
         ``update_fields=[self.field_name]`` respects custom ``save()``
         overrides. ``refresh_from_db(fields=[self.field_name])`` only
         re-reads the state column — any side-effect mutations on other
         attributes survive.
+
+        With ``sources``, the write is also the revalidation: it lands only
+        while the persisted state is one of ``sources``, and the return
+        value says whether it did. When :meth:`can_compare_and_set` allows
+        it, that is one ``UPDATE ... WHERE pk = ? AND state IN (sources)``
+        instead of a SELECT, a save and a refresh. Otherwise the persisted
+        row is read first, locked with ``FOR UPDATE`` inside a transaction,
+        and ``save()`` runs as before.
+
+        ``version_field`` names an integer column that must still hold the
+        instance's value. The write increments it.
         """
-        previous = getattr(self.instance, self.field_name)
+        if sources is not None:
+            if self.can_compare_and_set():
+                return self._compare_and_set(state, sources, version_field)
+            if not self._persisted_row_matches(sources, version_field):
+                return False
+        update_fields = [self.field_name]
+        previous = {self.field_name: getattr(self.instance, self.field_name)}
         setattr(self.instance, self.field_name, state)
+        if version_field:
+            update_fields.append(version_field)
+            previous[version_field] = getattr(self.instance, version_field)
+            setattr(self.instance, version_field, previous[version_field] + 1)
         try:
-            self.instance.save(update_fields=[self.field_name])
+            self.instance.save(update_fields=update_fields)
         except Exception:
             # Restore the attribute the database refused. setattr happens
             # before the write, so a rejected save used to leave the instance
@@ -58,9 +92,183 @@ class State(object):
             # exception escaped everything, but the failure paths now swallow
             # a rejected state write, so this phantom instance reaches
             # failure_callbacks and the sync caller.
-            setattr(self.instance, self.field_name, previous)
+            for name, value in previous.items():
+                setattr(self.instance, name, value)
             raise
-        self.instance.refresh_from_db(fields=[self.field_name])
+        self.instance.refresh_from_db(fields=update_fields)
+        return True
+
+    def can_compare_and_set(self) -> bool:
+        """Whether a state write may skip ``save()``.
+
+        A queryset UPDATE runs no ``save()`` override and sends no
+        ``pre_save`` or ``post_save``. So the model must keep
+        ``Model.save`` and have no receivers for either signal. A save
+        patched by a field tracker counts as an override.
+        """
+        model = type(self.instance)
+        return (
+            self.compare_and_set_writes
+            and model.save is Model.save
+            and not pre_save.has_listeners(model)
+            and not post_save.has_listeners(model)
+        )
+
+    def _using(self):
+        return (
+            self.instance._state.db
+            or router.db_for_write(type(self.instance), instance=self.instance)
+        )
+
+    def _persisted_row_matches(self, sources, version_field) -> bool:
+        """The read half of a ``save()``-path compare-and-set. Inside a
+        transaction the row stays locked until it ends, so nothing can
+        move it between this read and the save."""
+        using = self._using()
+        queryset = type(self.instance)._base_manager.using(using)
+        if connections[using].in_atomic_block:
+            queryset = queryset.select_for_update()
+        fields = [self.field_name] + ([version_field] if version_field else [])
+        row = queryset.values_list(*fields).get(pk=self.instance.pk)
+        return row[0] in sources and (
+            not version_field
+            or row[1] == getattr(self.instance, version_field)
+        )
+
+    def _compare_and_set(self, state, sources, version_field=None) -> bool:
+        if not sources:
+            return False
+        model = type(self.instance)
+        connection = connections[self._using()]
+        version = getattr(self.instance, version_field) if version_field else None
+        field = model._meta.get_field(self.field_name)
+        # Under multi-table inheritance the field lives in a parent's
+        # table. That table has its own primary key column, with the
+        # same value as the child's pk.
+        owner = field.model._meta.concrete_model
+        single_table = not version_field or (
+            model._meta.get_field(version_field).model._meta.concrete_model
+            is owner)
+        if connection.vendor == 'postgresql' and single_table:
+            # RETURNING hands back the stored value, so the refresh that
+            # save() needed afterwards comes with the write.
+            pk_field = owner._meta.pk
+            quote = connection.ops.quote_name
+            column = quote(field.column)
+            assignments = f'{column} = %s'
+            condition = f'{column} IN ({", ".join(["%s"] * len(sources))})'
+            params = [
+                field.get_db_prep_save(state, connection),
+                pk_field.get_db_prep_value(self.instance.pk, connection),
+                *(field.get_db_prep_value(source, connection)
+                  for source in sources),
+            ]
+            if version_field:
+                version_column = quote(
+                    model._meta.get_field(version_field).column)
+                assignments += f', {version_column} = {version_column} + 1'
+                condition += f' AND {version_column} = %s'
+                params.append(version)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE {quote(owner._meta.db_table)} SET {assignments} '
+                    f'WHERE {quote(pk_field.column)} = %s AND {condition} '
+                    f'RETURNING {column}',
+                    params,
+                )
+                row = cursor.fetchone()
+            if row is None:
+                return False
+            stored = self._as_read(row[0], connection)
+        else:
+            queryset, values = self._compare_and_set_update(
+                state, sources, version_field)
+            if not queryset.update(**values):
+                return False
+            stored = self._as_read(
+                field.get_db_prep_save(state, connection), connection)
+        self._apply_written(stored, version_field)
+        return True
+
+    def _as_read(self, value, connection):
+        """The column value ``value`` as a read of the row returns it: the
+        backend's and the field's converters (``from_db_value``) run, as
+        they did in the refresh the ``save()`` path makes."""
+        field = type(self.instance)._meta.get_field(self.field_name)
+        column = field.get_col(field.model._meta.db_table)
+        converters = (connection.ops.get_db_converters(column)
+                      + column.get_db_converters(connection))
+        for converter in converters:
+            value = converter(value, column, connection)
+        return value
+
+    def _compare_and_set_update(self, state, sources, version_field):
+        """The queryset and values of the portable compare-and-set."""
+        lookup = {f'{self.field_name}__in': list(sources)}
+        values = {self.field_name: state}
+        if version_field:
+            lookup[version_field] = getattr(self.instance, version_field)
+            values[version_field] = F(version_field) + 1
+        queryset = (
+            type(self.instance)._base_manager.using(self._using())
+            .filter(pk=self.instance.pk, **lookup)
+        )
+        return queryset, values
+
+    def _apply_written(self, stored, version_field) -> None:
+        setattr(self.instance, self.field_name, stored)
+        if version_field:
+            setattr(self.instance, version_field,
+                    getattr(self.instance, version_field) + 1)
+
+    # Async counterparts, for Process.a<action_name>(). Django runs no
+    # transaction in async code, so none of these opens one.
+
+    async def aget_persisted_state(self):
+        """``get_persisted_state`` on the async ORM."""
+        using = self.instance._state.db or DEFAULT_DB_ALIAS
+        return await (
+            type(self.instance)._base_manager
+            .using(using)
+            .values_list(self.field_name, flat=True)
+            .aget(pk=self.instance.pk)
+        )
+
+    async def aset_state(self, state, sources=None, version_field=None) -> bool:
+        """``set_state`` on the async ORM where it can be.
+
+        The compare-and-set is one ``aupdate``. The ``save()`` path runs the
+        sync method in a worker thread, because a ``save()`` override is
+        sync code anyway.
+        """
+        if sources is not None and self.can_compare_and_set():
+            queryset, values = self._compare_and_set_update(
+                state, sources, version_field)
+            if not await queryset.aupdate(**values):
+                return False
+            connection = connections[self._using()]
+            field = type(self.instance)._meta.get_field(self.field_name)
+            self._apply_written(self._as_read(
+                field.get_db_prep_save(state, connection), connection),
+                version_field)
+            return True
+        return await sync_to_async(self.set_state)(
+            state, sources=sources, version_field=version_field)
+
+    async def alock(self):
+        token = await get_lock_backend().aacquire(
+            self._get_hash(), _get_lock_timeout())
+        if token is None:
+            return False
+        self._lock_token = token
+        return True
+
+    async def aunlock(self):
+        await get_lock_backend().arelease(
+            self._get_hash(), getattr(self, '_lock_token', None))
+
+    async def ais_locked(self):
+        return await get_lock_backend().ais_locked(self._get_hash())
 
     @property
     def instance_key(self):
@@ -80,15 +288,16 @@ class State(object):
         Atomically locks the state.
         Returns True if the lock was acquired, False if already locked.
 
-        Stores a unique ownership token as the lock value, so a stale
+        Stores the ownership token the lock backend returns, so a stale
         holder whose lock TTL-expired cannot release a successor's lock
         (see ``unlock``).
         """
-        token = uuid4().hex
-        if cache.add(self._get_hash(), token, _get_lock_timeout()):
-            self._lock_token = token
-            return True
-        return False
+        token = get_lock_backend().acquire(
+            self._get_hash(), _get_lock_timeout())
+        if token is None:
+            return False
+        self._lock_token = token
+        return True
 
     def unlock(self):
         """Release the lock — but only if this State object still owns it.
@@ -96,19 +305,16 @@ class State(object):
         Compare-and-delete on the ownership token issued by ``lock()``:
         if this holder's lock TTL-expired and another caller acquired the
         key since, the stored token no longer matches and the successor's
-        lock is left intact. The get+compare+delete pair is not atomic on
-        generic cache backends, but it shrinks the misdelete window from
-        "always, after any takeover" to a takeover happening between the
-        compare and the delete.
+        lock is left intact. Whether the compare and the delete are one
+        atomic step depends on ``DJANGO_LOGIC['LOCK_BACKEND']``; see
+        ``django_logic.locks``.
 
         A State object that never acquired the lock holds no token and
         falls back to an unconditional delete — the historical
         force-release behavior, kept for manual repair paths.
         """
-        key = self._get_hash()
-        token = getattr(self, '_lock_token', None)
-        if token is None or cache.get(key) == token:
-            cache.delete(key)
+        get_lock_backend().release(
+            self._get_hash(), getattr(self, '_lock_token', None))
 
     def is_locked(self):
         """
@@ -116,4 +322,71 @@ class State(object):
         It might return False due to the race conditions.
         However, `lock` method should guarantees it will be locked only once.
         """
-        return cache.get(self._get_hash()) is not None
+        return get_lock_backend().is_locked(self._get_hash())
+
+    @classmethod
+    def lock_many(cls, states) -> list:
+        """``lock()`` for many states with one backend call where the
+        backend supports it. Returns one bool per state, in order.
+
+        Each lock is taken on its own; a state that loses its race does not
+        undo the others. The caller unlocks the ones it got.
+        """
+        states = list(states)
+        # As in is_locked_many: a subclass with its own lock() is asked
+        # one by one.
+        shared = [type(state).lock is State.lock for state in states]
+        keys = [
+            state._get_hash()
+            for state, plain in zip(states, shared) if plain
+        ]
+        tokens = iter(
+            get_lock_backend().acquire_many(keys, _get_lock_timeout())
+            if keys else ()
+        )
+        locked = []
+        for state, plain in zip(states, shared):
+            if not plain:
+                locked.append(state.lock())
+                continue
+            token = next(tokens)
+            if token is not None:
+                state._lock_token = token
+            locked.append(token is not None)
+        return locked
+
+    @classmethod
+    def unlock_many(cls, states) -> None:
+        """``unlock()`` for many states with one backend call where the
+        backend supports it."""
+        states = list(states)
+        shared = [type(state).unlock is State.unlock for state in states]
+        get_lock_backend().release_many([
+            (state._get_hash(), getattr(state, '_lock_token', None))
+            for state, plain in zip(states, shared) if plain
+        ])
+        for state, plain in zip(states, shared):
+            if not plain:
+                state.unlock()
+
+    @classmethod
+    def is_locked_many(cls, states) -> list:
+        """``is_locked()`` for many states with one backend call (one
+        ``cache.get_many`` on the default backend).
+
+        Returns one bool per state, in order. The answers carry the same
+        race as ``is_locked``: each is only a hint at the moment of reading.
+        """
+        states = list(states)
+        # A subclass that overrides is_locked() keeps its lock somewhere
+        # else, so its states are asked one by one.
+        shared = [type(state).is_locked is State.is_locked for state in states]
+        keys = [
+            state._get_hash()
+            for state, plain in zip(states, shared) if plain
+        ]
+        found = iter(get_lock_backend().is_locked_many(keys) if keys else ())
+        return [
+            next(found) if plain else state.is_locked()
+            for state, plain in zip(states, shared)
+        ]
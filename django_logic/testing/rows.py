@@ -27,8 +27,8 @@ def open_transition_message(
     The row is keyed exactly as enqueue keys it, so the sync gate, the
     enqueue constraint, and ``retry_status`` all see it. With
     ``started_minutes_ago`` the row reads as an attempt that started that
-    long ago — ``started_at`` and ``modified`` both move back, so the
-    retry-window classification answers for that age.
+    long ago — ``started_at``, ``modified`` and ``next_attempt_at`` move
+    back, so the retry-window classification answers for that age.
     """
     from django_logic.background import settings as bg_settings
     from django_logic.background.models import TransitionMessage
@@ -49,6 +49,7 @@ def open_transition_message(
         # .update() bypasses auto_now, which a .save() would reset to now.
         TransitionMessage.objects.filter(pk=row.pk).update(
             started_at=past, created=past, modified=past,
+            next_attempt_at=past,
         )
         row.refresh_from_db()
     return row
@@ -67,6 +67,7 @@ def snapshot(instance, *, state_field: str = 'status', process_name: str = 'proc
     # a second process bound to another state field of the same model can't
     # leak its row into this snapshot.
     try:
+        from django_logic.background.payloads import stored_kwargs
         from django_logic.testing.runner import latest_message
         transition_message = latest_message(instance, process_name=process_name)
         if transition_message is not None:
@@ -80,7 +81,9 @@ def snapshot(instance, *, state_field: str = 'status', process_name: str = 'proc
                 'errors_count': transition_message.errors_count,
                 'last_error_message': transition_message.last_error_message,
                 'timeout_seconds': transition_message.timeout_seconds,
-                'kwargs': transition_message.kwargs,
+                # The full kwargs, also of a row whose kwargs sit in a
+                # payload; the replay writes them back inline.
+                'kwargs': stored_kwargs(transition_message),
                 # The retry/watchdog clock. Without these a snapshot of a hung
                 # or timed-out production row replays as a pristine row: the
                 # retry backoff, the stale-attempt watchdog and the
@@ -88,6 +91,7 @@ def snapshot(instance, *, state_field: str = 'status', process_name: str = 'proc
                 # behaviour the snapshot was taken to reproduce could not be
                 # reproduced.
                 'last_error_dt': _jsonable(transition_message.last_error_dt),
+                'next_attempt_at': _jsonable(transition_message.next_attempt_at),
                 'failure_side_effect_error': transition_message.failure_side_effect_error,
                 'started_at': _jsonable(transition_message.started_at),
                 'completed_at': _jsonable(transition_message.completed_at),
@@ -213,6 +217,12 @@ def from_snapshot(data_or_path, *, model=None):
             # snapshot of the exact row a timeout incident produced could not
             # reproduce the timeout.
             last_error_dt=_restore_dt(tm_data.get('last_error_dt')),
+            # Older snapshots have no next_attempt_at; the row is due now.
+            next_attempt_at=(
+                _restore_dt(tm_data['next_attempt_at'])
+                if 'next_attempt_at' in tm_data
+                else TransitionMessage._meta.get_field(
+                    'next_attempt_at').get_default()),
             failure_side_effect_error=tm_data.get(
                 'failure_side_effect_error', ''),
             started_at=_restore_dt(tm_data.get('started_at')),
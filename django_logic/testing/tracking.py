@@ -15,6 +15,7 @@ both execution modes. Everything is restored on exit.
 """
 from __future__ import annotations
 
+import inspect
 from contextlib import contextmanager
 
 
@@ -75,6 +76,16 @@ def _make_wrapper(fn, tracker, sink_attr, fail_side_effect, fail_with):
         getattr(tracker, sink_attr).append(name)  # record only after success
         return result
 
+    if inspect.iscoroutinefunction(fn):
+        sync_wrapper = wrapper
+
+        async def wrapper(instance, **kwargs):
+            if inject:
+                return sync_wrapper(instance, **kwargs)
+            result = await fn(instance, **kwargs)
+            getattr(tracker, sink_attr).append(name)
+            return result
+
     # Preserve __name__ so django-logic's own logging (command.__name__) works.
     wrapper.__name__ = name
     return wrapper
@@ -139,9 +150,11 @@ def track(transitions, *, fail_side_effect=None, fail_with=None):
     from django_logic.state import State as _State
     original_set_state = _State.set_state
 
-    def _recording_set_state(self, state):
-        result = original_set_state(self, state)
-        tracker.state_trace.append(state)
+    def _recording_set_state(self, state, **kwargs):
+        result = original_set_state(self, state, **kwargs)
+        # A compare-and-set write that missed wrote nothing.
+        if result is not False:
+            tracker.state_trace.append(state)
         return result
     _recording_set_state.__name__ = 'set_state'
     _State.set_state = _recording_set_state
@@ -18,6 +18,7 @@ live in ``django_logic.background.transitions`` (enqueue) and
 """
 from uuid import UUID
 
+from asgiref.sync import sync_to_async
 from django.core.exceptions import ImproperlyConfigured
 from django.db import DEFAULT_DB_ALIAS, transaction
 
@@ -27,6 +28,8 @@ from django_logic.commands import (
     NextTransition,
     Permissions,
     SideEffects,
+    _call_hook,
+    _log_hook_error,
     _run_in_savepoint,
     note_deferred_unlock,
 )
@@ -50,7 +53,9 @@ from django_logic.state import State
 #: Refused up front, before anything is acquired. Distinct from
 #: ``process._RESERVED_KWARGS`` (names the engine forwards itself —
 #: documented, not refused).
-_ENGINE_PARAM_KWARGS = frozenset({'state', 'exception', 'deferrable'})
+_ENGINE_PARAM_KWARGS = frozenset({
+    'state', 'exception', 'deferrable', 'version_field',
+})
 
 
 def _refuse_engine_param_kwargs(action_name: str, kwargs: dict) -> None:
@@ -66,6 +71,18 @@ def _refuse_engine_param_kwargs(action_name: str, kwargs: dict) -> None:
         )
 
 
+def _snapshot_fields(state: State, version_field=None) -> dict:
+    names = [state.field_name] + ([version_field] if version_field else [])
+    return {name: getattr(state.instance, name) for name in names}
+
+
+def _restore_fields(state: State, values: dict) -> None:
+    """Put back the attributes a rolled-back write had already set, so the
+    caller and the failure hooks see what the database holds."""
+    for name, value in values.items():
+        setattr(state.instance, name, value)
+
+
 class Transition:
     """Synchronous transition from a source state to a target state.
 
@@ -73,7 +90,8 @@ class Transition:
       1. lock state
       2. revalidate under the lock: the persisted state is still a valid
          source AND no background transition is in flight on this
-         process (uncompleted ``TransitionMessage``)
+         process (uncompleted ``TransitionMessage``). Without side-effects,
+         the source check moves into the compare-and-set write of step 4
       3. run side-effects
       4. on success: set ``target``, unlock, run callbacks, run ``next_transition``
       5. on failure: set ``failed_state`` (so failure hooks observe the
@@ -101,6 +119,11 @@ class Transition:
     #: consumers introspect it the same way.
     is_background: bool = False
 
+    #: Whether this class can run without the state lock
+    #: (``optimistic=True``). False where there is no final compare-and-set
+    #: write to detect a lost race with.
+    supports_optimistic: bool = True
+
     def __init__(self, action_name: str, sources: list, target: str, **kwargs):
         self.action_name = action_name
         self.target = target
@@ -173,6 +196,16 @@ class Transition:
                 f"the terminal write a silent no-op. Give the failure its "
                 f"own state."
             )
+        # None inherits the mode of the process that declares the
+        # transition (Process.optimistic).
+        self.optimistic = kwargs.get('optimistic')
+        self.version_field = kwargs.get('version_field')
+        if (self.optimistic or self.version_field) and not self.supports_optimistic:
+            raise ImproperlyConfigured(
+                f"{type(self).__name__} {action_name!r}: optimistic= and "
+                f"version_field= need a final state write to detect a lost "
+                f"race, and this transition type has none. Remove them."
+            )
         # Only SideEffects dereferences its transition (to drive
         # complete/fail); the other command bundles never read it.
         # Built through class attributes like the other four, so all five
@@ -209,16 +242,13 @@ class Transition:
     def change_state(self, state: State, **kwargs) -> UUID | None:
         # Before the lock: a clash here must not become a leaked lock.
         _refuse_engine_param_kwargs(self.action_name, kwargs)
-        process_class = kwargs.get('process_class', '')
-        process_class_name = process_class.split('.')[-1] if process_class else ''
-        transition_logger.info(
-            f'{kwargs.get("tr_id")} {TransitionEventType.START.value} '
-            f'{process_class_name} {self.action_name} {state.instance_key} '
-            f'{kwargs.get("root_id")} {kwargs.get("parent_id")}',
-            extra={'kwargs': redact_log_kwargs(kwargs), 'state_hash': state._get_hash()},
-        )
+        if self.optimistic:
+            return self.change_state_optimistic(
+                state, version_field=self.version_field, **kwargs)
+        self._log_start(state, kwargs)
 
-        # lock() is atomic (cache.add / Redis SET NX) and returns False if
+        # lock() is atomic on every lock backend (cache.add, Redis SET NX,
+        # pg_try_advisory_lock) and returns False if
         # the state is already locked, so the acquire alone is sufficient.
         # A separate is_locked() pre-check only adds a TOCTOU window and a
         # redundant round-trip (a stale is_locked()==True could even reject
@@ -252,8 +282,7 @@ class Transition:
         # instance at its source state, ready to run again, with nothing
         # to sweep.)
         try:
-            self._ensure_db_state_in_sources(state)
-            self._ensure_no_background_in_flight(state)
+            self._revalidate_under_lock(state)
         except Exception:
             state.unlock()
             # Without this line the per-instance lifecycle shows a Lock
@@ -268,6 +297,153 @@ class Transition:
         self.side_effects.execute(state, **kwargs)
         return kwargs.get('tr_id')
 
+    async def achange_state(self, state: State, **kwargs) -> UUID | None:
+        """``change_state`` for async callers.
+
+        The lock, the revalidation read, the hooks and the target write
+        run on the event loop: the async lock backend, the async ORM, and
+        coroutine hooks awaited directly. Plain hooks and the background
+        gate run in a worker thread. So does the failure path, which needs
+        a savepoint.
+
+        An optimistic transition runs its sync path in a worker thread:
+        its side-effects and write share a savepoint, and Django only
+        opens transactions in sync code.
+        """
+        _refuse_engine_param_kwargs(self.action_name, kwargs)
+        if self.optimistic:
+            return await sync_to_async(self.change_state)(state, **kwargs)
+        self._log_start(state, kwargs)
+        if not await state.alock():
+            transition_logger.info(
+                f'{kwargs.get("tr_id")} {TransitionEventType.LOCK.value} '
+                f'failed {state.instance_key} — state is locked'
+            )
+            raise TransitionNotAllowed("State is locked")
+        transition_logger.info(
+            f'{kwargs.get("tr_id")} {TransitionEventType.LOCK.value} '
+            f'{state.instance_key}'
+        )
+        try:
+            await self._arevalidate_under_lock(state)
+        except Exception:
+            await state.aunlock()
+            transition_logger.info(
+                f'{kwargs.get("tr_id")} {TransitionEventType.UNLOCK.value} '
+                f'{state.instance_key} after revalidation failure'
+            )
+            raise
+
+        self._init_transition_context(kwargs)
+        await self.side_effects.aexecute(state, **kwargs)
+        return kwargs.get('tr_id')
+
+    def change_state_optimistic(
+        self, state: State, version_field=None, **kwargs,
+    ) -> UUID | None:
+        """Run the transition without the state lock.
+
+        The side-effects and the target write run in one savepoint. The
+        write is a compare-and-set against ``sources`` (and against
+        ``version_field`` when given). When another writer moved the row
+        first, the write misses, the savepoint rolls the side-effects back,
+        and ``TransitionTemporarilyUnavailable`` is raised. A lost race
+        therefore costs one rolled-back attempt instead of a lock held for
+        ``LOCK_TIMEOUT``.
+
+        A failing side-effect rolls back the same way. ``failed_state`` is
+        then written with the same compare-and-set, and the failure
+        callbacks run. Callbacks and ``next_transition`` run after the
+        savepoint is released, as on the locked path.
+
+        Side-effects must not call out to systems that cannot roll back
+        unless they are safe to repeat: a lost race discards only the
+        database writes.
+        """
+        _refuse_engine_param_kwargs(self.action_name, kwargs)
+        self._log_start(state, kwargs, ' [optimistic]')
+        # The lock is what keeps a worker's row from appearing mid-run on
+        # the locked path. Here the gate is checked once, up front; a row
+        # enqueued later moves the state, so the final write misses.
+        self._ensure_no_background_in_flight(state)
+        self._init_transition_context(kwargs)
+
+        def attempt():
+            for command in self.side_effects.commands:
+                transition_logger.info(
+                    f'{kwargs.get("tr_id")} '
+                    f'{TransitionEventType.SIDE_EFFECT.value} '
+                    f'{getattr(command, "__name__", repr(command))}'
+                )
+                _call_hook(command, state.instance, **kwargs)
+            if not state.set_state(
+                    self.target, sources=self.sources,
+                    version_field=version_field):
+                raise TransitionTemporarilyUnavailable(
+                    f"Transition '{self.action_name}' lost an optimistic "
+                    f"race on {state.instance_key}: the row changed while "
+                    f"it ran. Its database writes were rolled back."
+                )
+
+        previous = _snapshot_fields(state, version_field)
+        try:
+            _run_in_savepoint(
+                state.instance._state.db or DEFAULT_DB_ALIAS, attempt,
+                require_commit=True,
+            )
+        except TransitionTemporarilyUnavailable:
+            _restore_fields(state, previous)
+            transition_logger.info(
+                f'{kwargs.get("tr_id")} {self.action_name} lost the race on '
+                f'{state.instance_key}; rolled back'
+            )
+            raise
+        except Exception as error:
+            _restore_fields(state, previous)
+            _log_hook_error(f'{kwargs.get("tr_id")} {error}', error)
+            self._fail_optimistic(state, error, version_field, **kwargs)
+            raise
+        transition_logger.info(
+            f'{kwargs.get("tr_id")} {TransitionEventType.SET_STATE.value} '
+            f'{self.target}'
+        )
+        self.callbacks.execute(state, **kwargs)
+        self.next_transition.execute(state, **kwargs)
+        return kwargs.get('tr_id')
+
+    def _fail_optimistic(self, state: State, exception: Exception,
+                         version_field=None, **kwargs):
+        """``fail_transition`` without a lock: a compare-and-set
+        ``failed_state`` write that never replaces the original error."""
+        if self.failed_state:
+            previous = _snapshot_fields(state, version_field)
+            try:
+                written = _run_in_savepoint(
+                    state.instance._state.db or DEFAULT_DB_ALIAS,
+                    lambda: state.set_state(
+                        self.failed_state, sources=self.sources,
+                        version_field=version_field),
+                    require_commit=True,
+                )
+            except Exception as write_error:
+                written = False
+                transition_logger.error(
+                    f'{kwargs.get("tr_id")} could not write failed_state '
+                    f'{self.failed_state!r} on {state.instance_key}: '
+                    f'{type(write_error).__name__}: {write_error}. The '
+                    f'original failure is re-raised unchanged.',
+                    exc_info=True,
+                )
+            if written:
+                transition_logger.info(
+                    f'{kwargs.get("tr_id")} '
+                    f'{TransitionEventType.SET_STATE.value} '
+                    f'{self.failed_state}'
+                )
+            else:
+                _restore_fields(state, previous)
+        self.failure_callbacks.execute(state, exception=exception, **kwargs)
+
     def complete_transition(self, state: State, **kwargs):
         """Write target state, release the lock, then run callbacks.
 
@@ -286,9 +462,31 @@ class Transition:
         hours of rejected transitions. The release follows the same
         deferral rule as ``fail_transition`` — immediate, since the rejected
         write means nothing landed under this lock.
+
+        A compare-and-set miss means a concurrent write moved the row out
+        of ``sources``. The caller gets ``TransitionNotAllowed``. When
+        side-effects ran before the miss, their work is done, so the miss
+        is a failure of the transition: the failure path runs as in
+        ``_fail_optimistic``. ``failed_state`` is written only if the row
+        is still in a source state, so it never replaces the state the
+        other write set. The failure callbacks get the
+        ``TransitionNotAllowed``.
         """
         try:
-            state.set_state(self.target)
+            self._write_target(state)
+        except TransitionNotAllowed as error:
+            # The compare-and-set found the persisted state outside the
+            # sources: the revalidation failed at write time. Nothing was
+            # written, so the release is immediate, and it logs like the
+            # revalidation in change_state.
+            state.unlock()
+            transition_logger.info(
+                f'{kwargs.get("tr_id")} {TransitionEventType.UNLOCK.value} '
+                f'{state.instance_key} after revalidation failure'
+            )
+            if self.side_effects.commands:
+                self._fail_optimistic(state, error, **kwargs)
+            raise
         except Exception:
             transition_logger.error(
                 f'{kwargs.get("tr_id")} target-state write failed for '
@@ -311,6 +509,43 @@ class Transition:
         self.callbacks.execute(state, **kwargs)
         self.next_transition.execute(state, **kwargs)
 
+    async def acomplete_transition(self, state: State, **kwargs):
+        """``complete_transition`` for async callers.
+
+        Async code runs outside any transaction, so
+        ``DEFER_UNLOCK_UNTIL_COMMIT`` never applies and the lock is
+        released as soon as the target is written. A compare-and-set miss
+        takes the same failure path.
+        """
+        try:
+            await self._awrite_target(state)
+        except TransitionNotAllowed as error:
+            await state.aunlock()
+            transition_logger.info(
+                f'{kwargs.get("tr_id")} {TransitionEventType.UNLOCK.value} '
+                f'{state.instance_key} after revalidation failure'
+            )
+            if self.side_effects.commands:
+                await sync_to_async(self._fail_optimistic)(
+                    state, error, **kwargs)
+            raise
+        except Exception:
+            transition_logger.error(
+                f'{kwargs.get("tr_id")} target-state write failed for '
+                f'{state.instance_key}; releasing the lock before re-raising.'
+            )
+            await self._arelease_lock(state, **kwargs)
+            raise
+        transition_logger.info(
+            f'{kwargs.get("tr_id")} {TransitionEventType.SET_STATE.value} '
+            f'{self.target}'
+        )
+
+        await self._arelease_lock(state, **kwargs)
+
+        await self.callbacks.aexecute(state, **kwargs)
+        await self.next_transition.aexecute(state, **kwargs)
+
     def fail_transition(self, state: State, exception: Exception, **kwargs):
         # try/finally: a failed failed_state write must still release the
         # lock; the original side-effect exception keeps propagating out of
@@ -410,15 +645,102 @@ class Transition:
             f'{state.instance_key}'
         )
 
+    @staticmethod
+    async def _arelease_lock(state: State, **kwargs):
+        await state.aunlock()
+        transition_logger.info(
+            f'{kwargs.get("tr_id")} {TransitionEventType.UNLOCK.value} '
+            f'{state.instance_key}'
+        )
+
+    def _write_target(self, state: State) -> None:
+        """Write ``target``. Where the model allows it, this is one
+        compare-and-set UPDATE against ``sources`` (see
+        ``State.set_state``), and a miss raises like the revalidation."""
+        if not state.can_compare_and_set():
+            state.set_state(self.target)
+        elif not state.set_state(self.target, sources=self.sources):
+            raise TransitionNotAllowed(
+                f"Transition '{self.action_name}' is not allowed: the "
+                f"persisted state is no longer one of its source states "
+                f"(a concurrent transition won the race)."
+            )
+
+    async def _awrite_target(self, state: State) -> None:
+        if not state.can_compare_and_set():
+            await state.aset_state(self.target)
+        elif not await state.aset_state(self.target, sources=self.sources):
+            raise TransitionNotAllowed(
+                f"Transition '{self.action_name}' is not allowed: the "
+                f"persisted state is no longer one of its source states "
+                f"(a concurrent transition won the race)."
+            )
+
+    def _log_start(self, state: State, kwargs: dict, suffix: str = '') -> None:
+        process_class = kwargs.get('process_class', '')
+        process_class_name = process_class.split('.')[-1] if process_class else ''
+        transition_logger.info(
+            f'{kwargs.get("tr_id")} {TransitionEventType.START.value} '
+            f'{process_class_name} {self.action_name} {state.instance_key} '
+            f'{kwargs.get("root_id")} {kwargs.get("parent_id")}{suffix}',
+            extra={'kwargs': redact_log_kwargs(kwargs), 'state_hash': state._get_hash()},
+        )
+
     @staticmethod
     def _init_transition_context(kwargs: dict) -> None:
         kwargs.setdefault('context', {})
 
+    def _needs_state_read(self, state: State) -> bool:
+        # Without side-effects nothing runs between the lock and the target
+        # write, so the compare-and-set write does the source check.
+        return bool(self.side_effects.commands) or not state.can_compare_and_set()
+
+    def _revalidate_under_lock(self, state: State) -> None:
+        """The checks made under the lock: the persisted state is still a
+        source, and no background transition is in progress.
+
+        When both run, the in-flight rows are an ``EXISTS`` subquery of the
+        state read, so they cost one SELECT. Only a found row pays for its
+        classification (retrying or stranded).
+        """
+        gated = _background_rows_possible(state)
+        query = None
+        if gated and self._needs_state_read(state):
+            query = _state_and_in_flight_query(state)
+        if query is not None:
+            db_state, in_flight = query.get()
+            self._check_db_state_in_sources(db_state)
+            if not in_flight:
+                return
+        elif self._needs_state_read(state):
+            self._ensure_db_state_in_sources(state)
+        if gated:
+            self._ensure_no_background_in_flight(state)
+
+    async def _arevalidate_under_lock(self, state: State) -> None:
+        """``_revalidate_under_lock`` on the async ORM. Only the
+        classification of a found row runs in a worker thread."""
+        gated = _background_rows_possible(state)
+        query = None
+        if gated and self._needs_state_read(state):
+            query = _state_and_in_flight_query(state)
+        if query is not None:
+            db_state, in_flight = await query.aget()
+            self._check_db_state_in_sources(db_state)
+            if not in_flight:
+                return
+        elif self._needs_state_read(state):
+            self._check_db_state_in_sources(await state.aget_persisted_state())
+        if gated:
+            await sync_to_async(self._ensure_no_background_in_flight)(state)
+
     def _ensure_db_state_in_sources(self, state: State) -> None:
         """Re-read the persisted state and verify it is still a valid
         source for this transition. Must be called while holding the lock.
         """
-        db_state = state.get_persisted_state()
+        self._check_db_state_in_sources(state.get_persisted_state())
+
+    def _check_db_state_in_sources(self, db_state) -> None:
         if db_state not in self.sources:
             raise TransitionNotAllowed(
                 f"Transition '{self.action_name}' is not allowed: the "
@@ -439,9 +761,7 @@ class Transition:
         an uncompleted row's instance, stranded or not — force-failing a
         stranded row's instance is what the retired sweep used to do.
         """
-        from django.apps import apps
-
-        if not apps.is_installed('django_logic.background'):
+        if not _background_rows_possible(state):
             return False
         from django_logic.background.models import TransitionMessage
 
@@ -465,9 +785,7 @@ class Transition:
         The classification (``TransitionMessage.retry_status``) is shared
         with enqueue's constraint rejection and the public probe.
         """
-        from django.apps import apps
-
-        if not apps.is_installed('django_logic.background'):
+        if not _background_rows_possible(state):
             return
         from django_logic.background.models import TransitionMessage
 
@@ -493,6 +811,47 @@ class Transition:
         )
 
 
+def _background_rows_possible(state: State) -> bool:
+    """Whether an uncompleted ``TransitionMessage`` can exist for ``state``.
+
+    Only a process tree that declares a background transition writes
+    rows. A state built outside a ``Process`` has no ``process_class`` and
+    is always probed.
+    """
+    from django.apps import apps
+
+    if not apps.is_installed('django_logic.background'):
+        return False
+    process_class = getattr(state, 'process_class', None)
+    return process_class is None or process_class._dispatch_index().has_background
+
+
+def _state_and_in_flight_query(state: State):
+    """The state read with the in-flight rows as an ``EXISTS`` column, or
+    ``None`` when the two cannot share one SELECT: the rows live on
+    another database, or a ``State`` subclass reads its state its own
+    way."""
+    from django.db import router
+    from django.db.models import Exists
+
+    from django_logic.background.models import TransitionMessage
+
+    if type(state).get_persisted_state is not State.get_persisted_state:
+        return None
+    using = state.instance._state.db or DEFAULT_DB_ALIAS
+    if (router.db_for_read(TransitionMessage) or DEFAULT_DB_ALIAS) != using:
+        return None
+    return (
+        type(state.instance)._base_manager
+        .using(using)
+        .filter(pk=state.instance.pk)
+        .annotate(background_in_flight=Exists(
+            TransitionMessage.in_flight_for(state.instance, state.process_name)
+        ))
+        .values_list(state.field_name, 'background_in_flight')
+    )
+
+
 class Action(Transition):
     """Transition that does not change state on success.
 
@@ -517,6 +876,8 @@ class Action(Transition):
       (background-only since 0.12.0); ``BackgroundAction`` rejects it too.
     """
 
+    supports_optimistic = False
+
     def __init__(self, action_name: str, sources: list, **kwargs):
         super().__init__(action_name=action_name, sources=sources, target='', **kwargs)
 
@@ -532,9 +893,18 @@ class Action(Transition):
         self.side_effects.execute(state, **kwargs)
         return kwargs.get('tr_id')
 
+    async def achange_state(self, state: State, **kwargs) -> UUID | None:
+        _refuse_engine_param_kwargs(self.action_name, kwargs)
+        self._init_transition_context(kwargs)
+        await self.side_effects.aexecute(state, **kwargs)
+        return kwargs.get('tr_id')
+
     def complete_transition(self, state: State, **kwargs):
         self.callbacks.execute(state, **kwargs)
 
+    async def acomplete_transition(self, state: State, **kwargs):
+        await self.callbacks.aexecute(state, **kwargs)
+
     def fail_transition(self, state: State, exception: Exception, **kwargs):
         """Run the failure path, taking the lock only around the write.
 
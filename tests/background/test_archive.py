@@ -0,0 +1,113 @@
+"""Cold archival: completed rows leave the hot table in bounded chunks, and
+an instance's history still reads them."""
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_logic.background.archive import (
+    STORE_FILE,
+    STORE_HOT,
+    STORE_TABLE,
+    archive_completed,
+    transition_history,
+)
+from django_logic.background.models import (
+    ArchivedTransitionMessage,
+    TransitionMessage,
+)
+from django_logic.background.safety_nets import archive_completed_transitions
+from django_logic.testing import open_transition_message
+from tests import dl_settings
+from tests.background.models import Widget
+
+
+def _completed_row(widget, *, hours_ago, failed=False):
+    row = TransitionMessage.objects.create(
+        app_label='bg_tests', model_name='widget', instance_id=str(widget.pk),
+        process_name='process', transition_name='fulfil',
+        queue_name='django_logic.critical', kwargs={'note': 'x'},
+        is_completed=True, ended_in_failure=failed,
+    )
+    past = timezone.now() - timedelta(hours=hours_ago)
+    TransitionMessage.objects.filter(pk=row.pk).update(
+        created=past, modified=past, completed_at=past)
+    return row
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.widget = Widget.objects.create(status='fulfilled')
+
+    def test_old_completed_rows_move_in_chunks_and_the_rest_stay(self):
+        old = [_completed_row(self.widget, hours_ago=48) for _ in range(5)]
+        recent = _completed_row(self.widget, hours_ago=1)
+        pending = open_transition_message(
+            self.widget, 'process', 'fulfil', queue_name='django_logic.critical')
+        TransitionMessage.objects.filter(pk=pending.pk).update(
+            modified=timezone.now() - timedelta(hours=48))
+
+        self.assertEqual(archive_completed(timedelta(hours=24), batch_size=2), 5)
+        self.assertEqual(
+            set(TransitionMessage.objects.values_list('pk', flat=True)),
+            {recent.pk, pending.pk})
+        self.assertEqual(
+            sorted(ArchivedTransitionMessage.objects.values_list('pk', flat=True)),
+            [row.pk for row in old])
+        archived = ArchivedTransitionMessage.objects.get(pk=old[0].pk)
+        self.assertEqual((archived.kwargs, archived.transition_name),
+                         ({'note': 'x'}, 'fulfil'))
+
+    def test_the_limit_bounds_one_call(self):
+        for _ in range(3):
+            _completed_row(self.widget, hours_ago=48)
+        self.assertEqual(
+            archive_completed(timedelta(hours=24), batch_size=2, limit=3), 3)
+        self.assertEqual(
+            archive_completed(timedelta(hours=24), batch_size=2, limit=3), 0)
+
+    def test_files_hold_the_rows_and_history_reads_every_store(self):
+        in_file = _completed_row(self.widget, hours_ago=72, failed=True)
+        with tempfile.TemporaryDirectory() as directory:
+            archive_completed(timedelta(hours=24), directory=directory)
+            names = os.listdir(directory)
+            self.assertEqual(names, [
+                f'transition_messages-{in_file.pk}-{in_file.pk}.jsonl.gz'])
+            with gzip.open(os.path.join(directory, names[0]), 'rt') as stream:
+                self.assertEqual(json.loads(stream.readline())['id'], in_file.pk)
+
+            in_table = _completed_row(self.widget, hours_ago=48)
+            archive_completed(timedelta(hours=24))
+            hot = _completed_row(self.widget, hours_ago=1)
+            other = Widget.objects.create(status='fulfilled')
+            _completed_row(other, hours_ago=1)
+
+            history = transition_history(self.widget, directory=directory)
+        self.assertEqual(
+            [(row['id'], row['store']) for row in history],
+            [(in_file.pk, STORE_FILE), (in_table.pk, STORE_TABLE),
+             (hot.pk, STORE_HOT)])
+        self.assertTrue(history[0]['ended_in_failure'])
+        self.assertLess(history[0]['created'], history[1]['created'])
+        self.assertEqual(transition_history(self.widget, 'audit_process'), [])
+
+    def test_the_safety_net_archives_only_when_configured(self):
+        _completed_row(self.widget, hours_ago=48)
+        self.assertEqual(archive_completed_transitions(), 0)
+        with override_settings(DJANGO_LOGIC=dl_settings(
+                TRANSITION_MESSAGE_ARCHIVE_AFTER_HOURS=24)):
+            self.assertEqual(archive_completed_transitions(), 1)
+
+    def test_the_command(self):
+        _completed_row(self.widget, hours_ago=48)
+        with self.assertRaises(CommandError):
+            call_command('dl_archive')
+        with self.assertRaises(CommandError):
+            call_command('dl_archive', older_than_hours=1, to_dir='/nonexistent')
+        call_command('dl_archive', older_than_hours=24, stdout=open(os.devnull, 'w'))
+        self.assertEqual(ArchivedTransitionMessage.objects.count(), 1)
@@ -0,0 +1,133 @@
+"""The append-only attempt history in ``TransitionAttempt``."""
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_logic.background.models import (
+    ArchivedTransitionMessage,
+    TransitionAttempt,
+    TransitionMessage,
+    delete_in_pk_windows,
+)
+from django_logic.background.pull import _record_child_death
+from django_logic.background.safety_nets import (
+    cleanup_completed_transitions,
+    run_pending,
+    watchdog_stale_attempts,
+)
+from tests import dl_settings
+from tests.background.models import Widget
+
+_SETTINGS = dl_settings(TRANSITION_MESSAGE_MAX_ERRORS=2)
+
+
+@override_settings(DJANGO_LOGIC=_SETTINGS)
+class AttemptHistoryTests(TestCase):
+    def test_a_success_records_one_attempt(self):
+        widget = Widget.objects.create()
+        widget.process.fulfil()
+
+        row = TransitionMessage.objects.get()
+        attempt = row.attempts.get()
+        self.assertEqual(attempt.number, 1)
+        self.assertEqual(attempt.error, '')
+        self.assertEqual(attempt.started_at, row.started_at)
+        self.assertEqual(attempt.duration_ms, row.duration_ms)
+        self.assertTrue(attempt.worker)
+
+    def test_each_failed_attempt_keeps_its_error(self):
+        widget = Widget.objects.create()
+        with self.assertRaises(ValueError):
+            widget.process.crash()
+        row = TransitionMessage.objects.get()
+        self.assertFalse(row.is_completed)
+        TransitionMessage.objects.filter(pk=row.pk).update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1))
+        with self.assertLogs('django-logic', 'ERROR'):
+            run_pending()
+
+        row.refresh_from_db()
+        self.assertTrue(row.ended_in_failure)
+        attempts = list(row.attempts.order_by('number'))
+        self.assertEqual([attempt.number for attempt in attempts], [1, 2])
+        self.assertTrue(all(attempt.error for attempt in attempts))
+        self.assertEqual(attempts[-1].error, row.last_error_message)
+
+    def test_the_watchdog_records_the_timed_out_attempt(self):
+        widget = Widget.objects.create(status='tb_running')
+        started = timezone.now() - timedelta(seconds=120)
+        row = TransitionMessage.objects.create(
+            app_label='bg_tests', model_name='widget', instance_id=widget.pk,
+            process_name='process', transition_name='timeboxed',
+            queue_name='django_logic.slow', started_at=started,
+            timeout_seconds=60,
+        )
+
+        self.assertEqual(watchdog_stale_attempts(), 1)
+        attempt = TransitionAttempt.objects.get(transition_message=row)
+        self.assertIn('timeout', attempt.error)
+        self.assertEqual(attempt.started_at, started)
+        self.assertGreaterEqual(attempt.duration_ms, 120_000)
+
+    def test_a_died_child_records_the_next_attempt(self):
+        widget = Widget.objects.create()
+        with self.assertRaises(ValueError):
+            widget.process.crash()
+        row = TransitionMessage.objects.get()
+        started = timezone.now() - timedelta(seconds=5)
+        TransitionMessage.objects.filter(pk=row.pk).update(started_at=started)
+
+        _record_child_death(row.pk, 9)
+        row.refresh_from_db()
+        self.assertEqual(row.errors_count, 2)
+        last = row.attempts.order_by('number').last()
+        self.assertEqual(last.number, 2)
+        self.assertIn('exit 9', last.error)
+        self.assertEqual(last.started_at, started)
+        self.assertGreaterEqual(last.duration_ms, 5_000)
+
+    def test_a_completed_row_records_no_death(self):
+        widget = Widget.objects.create()
+        widget.process.fulfil()
+        row = TransitionMessage.objects.get()
+        _record_child_death(row.pk, 9)
+        self.assertEqual(row.attempts.count(), 1)
+
+    def test_cleanup_deletes_only_the_attempts_of_deleted_rows(self):
+        widget = Widget.objects.create()
+        widget.process.fulfil()
+        kept = TransitionAttempt.objects.get()
+        archived = ArchivedTransitionMessage.objects.create(
+            id=kept.transition_message_id + 100, app_label='bg_tests',
+            model_name='widget', instance_id=str(widget.pk),
+            process_name='process', transition_name='fulfil',
+            queue_name='django_logic.critical', created=timezone.now(),
+            modified=timezone.now(),
+        )
+        of_archived = TransitionAttempt.objects.create(
+            transition_message_id=archived.pk, number=1,
+            ended_at=timezone.now())
+        TransitionAttempt.objects.create(
+            transition_message_id=archived.pk + 1, number=1,
+            ended_at=timezone.now())
+
+        cleanup_completed_transitions()
+        self.assertEqual(
+            sorted(TransitionAttempt.objects.values_list('pk', flat=True)),
+            [kept.pk, of_archived.pk])
+
+    def test_windows_delete_every_matching_row(self):
+        now = timezone.now()
+        attempts = TransitionAttempt.objects.bulk_create(
+            TransitionAttempt(transition_message_id=message_id, number=1,
+                              ended_at=now)
+            for message_id in range(1, 8))
+        odd = [attempt.pk for attempt in attempts
+               if attempt.transition_message_id % 2]
+        with self.assertNumQueries(1 + 2 * 4):
+            deleted = delete_in_pk_windows(
+                TransitionAttempt.objects.filter(pk__in=odd), size=2)
+        self.assertEqual(deleted, 4)
+        self.assertFalse(TransitionAttempt.objects.filter(pk__in=odd).exists())
+        self.assertEqual(TransitionAttempt.objects.count(), 3)
@@ -0,0 +1,121 @@
+"""``BackgroundTransition.enqueue_many`` — a background fan-out in one pass.
+
+``Process.bulk_transition`` routes a background action here. The rows are
+inserted with one ``bulk_create``, ``in_progress_state`` is written with one
+UPDATE, an instance that already has an uncompleted row is reported, and
+pull mode notifies the workers once per commit.
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from django_logic.background.models import TransitionMessage
+from django_logic.state import State
+from tests import dl_settings
+from tests.background.models import Widget, WidgetProcess
+
+
+def _uncompleted_row(widget):
+    return TransitionMessage.objects.create(
+        app_label='bg_tests', model_name='widget', instance_id=str(widget.pk),
+        process_name='process', transition_name='fulfil',
+        queue_name='django_logic.critical',
+    )
+
+
+@override_settings(DJANGO_LOGIC=dl_settings(BACKGROUND_EXECUTION='pull'))
+class EnqueueManyPullTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.widgets = [Widget.objects.create() for _ in range(3)]
+
+    def test_a_batch_is_one_insert_one_update_and_one_notification(self):
+        table = TransitionMessage._meta.db_table
+        with CaptureQueriesContext(connection) as queries, \
+                self.captureOnCommitCallbacks() as callbacks:
+            result = WidgetProcess.bulk_transition(
+                Widget.objects.all(), 'fulfil')
+        self.assertEqual(
+            sorted(result.enqueued), [widget.pk for widget in self.widgets])
+        inserts = [q for q in queries.captured_queries
+                   if q['sql'].startswith('INSERT') and table in q['sql']]
+        widget_updates = [
+            q for q in queries.captured_queries
+            if q['sql'].startswith('UPDATE')
+            and Widget._meta.db_table in q['sql']
+        ]
+        self.assertEqual((len(inserts), len(widget_updates)), (1, 1))
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(
+            set(Widget.objects.values_list('status', flat=True)),
+            {'fulfilling'})
+        self.assertEqual(
+            TransitionMessage.objects.filter(is_completed=False).count(), 3)
+        self.assertEqual(
+            State.is_locked_many(
+                [State(w, 'status', 'process') for w in self.widgets]),
+            [False] * 3,
+        )
+
+    def test_conflicts_and_moved_rows_are_reported(self):
+        busy, moved, free = self.widgets
+        existing = _uncompleted_row(busy)
+        Widget.objects.filter(pk=moved.pk).update(status='fulfilled')
+        free_state = State(free, 'status', 'process')
+        result = WidgetProcess.bulk_transition(self.widgets, 'fulfil')
+        self.assertEqual(result.already_in_progress, [busy.pk])
+        self.assertEqual(result.wrong_state, [moved.pk])
+        self.assertEqual(result.enqueued, [free.pk])
+        self.assertEqual(
+            list(TransitionMessage.objects.filter(
+                instance_id=str(busy.pk)).values_list('pk', flat=True)),
+            [existing.pk],
+        )
+        self.assertFalse(free_state.is_locked())
+
+    def test_a_save_receiver_sees_each_in_progress_write(self):
+        saved = []
+
+        def receiver(sender, instance, **kwargs):
+            saved.append((instance.pk, instance.status))
+
+        post_save.connect(receiver, sender=Widget)
+        self.addCleanup(post_save.disconnect, receiver, sender=Widget)
+        result = WidgetProcess.bulk_transition(self.widgets, 'fulfil')
+        self.assertEqual(len(result.enqueued), 3)
+        self.assertEqual(
+            sorted(saved),
+            [(widget.pk, 'fulfilling') for widget in self.widgets])
+
+    def test_a_locked_instance_gets_no_row(self):
+        State(self.widgets[0], 'status', 'process').lock()
+        result = WidgetProcess.bulk_transition(self.widgets, 'fulfil')
+        self.assertEqual(result.locked, [self.widgets[0].pk])
+        self.assertFalse(TransitionMessage.objects.filter(
+            instance_id=str(self.widgets[0].pk)).exists())
+
+    def test_nothing_enqueued_sends_no_notification(self):
+        for widget in self.widgets:
+            _uncompleted_row(widget)
+        with self.captureOnCommitCallbacks() as callbacks:
+            result = WidgetProcess.bulk_transition(self.widgets, 'fulfil')
+        self.assertEqual(len(result.already_in_progress), 3)
+        self.assertEqual(callbacks, [])
+
+
+class EnqueueManySyncModeTests(TestCase):
+    def test_sync_mode_runs_each_row_inline(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        widgets = [Widget.objects.create() for _ in range(2)]
+        result = WidgetProcess.bulk_transition(widgets, 'fulfil')
+        self.assertEqual(sorted(result.enqueued), [w.pk for w in widgets])
+        self.assertEqual(
+            set(Widget.objects.values_list('status', flat=True)),
+            {'fulfilled'})
+        self.assertFalse(
+            TransitionMessage.objects.filter(is_completed=False).exists())
@@ -0,0 +1,99 @@
+"""Weighted fair claiming across a worker's queues: ``parse_queues`` and
+``QueueSchedule``."""
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from django_logic.background.models import Claim, TransitionMessage
+from django_logic.background.pull import QueueSchedule, parse_queues
+from django_logic.testing import open_transition_message
+from tests import dl_settings
+from tests.background.models import Widget
+
+_CRITICAL = 'django_logic.critical'
+_BULK = 'django_logic.bulk'
+
+
+def _waiting_row(queue_name):
+    widget = Widget.objects.create(status='fulfilling')
+    return open_transition_message(
+        widget, 'process', 'fulfil', queue_name=queue_name)
+
+
+class ParseQueuesTests(SimpleTestCase):
+    def test_names_and_weights(self):
+        self.assertEqual(
+            parse_queues('critical:5, bulk:1,default,'),
+            (['critical', 'bulk', 'default'],
+             {'critical': 5, 'bulk': 1, 'default': 1}))
+
+    def test_a_bad_weight_or_a_repeated_queue_is_refused(self):
+        for spec in ('critical:0', 'critical:x', 'critical:-2', 'a,b,a:2'):
+            with self.subTest(spec=spec), self.assertRaises(ValueError):
+                parse_queues(spec)
+
+
+class QueueScheduleTests(SimpleTestCase):
+    def test_turns_follow_the_weights_and_are_spread_out(self):
+        schedule = QueueSchedule(['critical', 'bulk'],
+                                 {'critical': 5, 'bulk': 1})
+        turns = [schedule.next_queue() for _ in range(12)]
+        self.assertEqual(turns.count('critical'), 10)
+        self.assertEqual(turns.count('bulk'), 2)
+        # Smooth: bulk does not wait for five critical turns in a row.
+        self.assertEqual(turns[:6], ['critical', 'critical', 'critical',
+                                     'bulk', 'critical', 'critical'])
+
+    def test_equal_weights_rotate_the_first_queue(self):
+        schedule = QueueSchedule(['a', 'b', 'c'])
+        self.assertEqual([schedule.next_queue() for _ in range(6)],
+                         ['a', 'b', 'c', 'a', 'b', 'c'])
+
+    def test_the_claim_falls_back_to_the_other_queues(self):
+        schedule = QueueSchedule(['a', 'b', 'c'])
+        calls = []
+
+        def claim_next(queues, lease_owner=''):
+            calls.append(queues)
+            return Claim(7, False) if 'c' in queues else None
+
+        with patch('django_logic.background.pull.claim_next', claim_next):
+            self.assertEqual(schedule.claim(), Claim(7, False))
+        self.assertEqual(calls, [['a'], ['b', 'c']])
+
+
+@override_settings(DJANGO_LOGIC=dl_settings(BACKGROUND_EXECUTION='pull'))
+class FairClaimTests(TestCase):
+    def _claim(self, schedule):
+        pk = schedule.claim().pk
+        # SQLite has no row locks, so a claimed row is completed before
+        # the next claim to take it out of the order.
+        TransitionMessage.objects.filter(pk=pk).update(is_completed=True)
+        return pk
+
+    def test_a_busy_queue_does_not_hold_back_an_older_backlog(self):
+        bulk = [_waiting_row(_BULK).pk for _ in range(3)]
+        critical = [_waiting_row(_CRITICAL).pk for _ in range(3)]
+        schedule = QueueSchedule([_CRITICAL, _BULK], {_CRITICAL: 2, _BULK: 1})
+        claimed = [self._claim(schedule) for _ in range(6)]
+        self.assertEqual(
+            claimed,
+            [critical[0], bulk[0], critical[1], critical[2], bulk[1], bulk[2]])
+        self.assertIsNone(schedule.claim())
+
+
+@override_settings(DJANGO_LOGIC=dl_settings(BACKGROUND_EXECUTION='pull'))
+class FairQueuesCommandTests(SimpleTestCase):
+    def test_the_weights_reach_the_worker(self):
+        with patch('django_logic.background.management.commands.'
+                   'dl_worker.run_worker') as run_worker:
+            call_command('dl_worker', once=True,
+                         queues='django_logic.critical:5,django_logic.bulk')
+        run_worker.assert_called_once_with(
+            [_CRITICAL, _BULK], forever=False,
+            weights={_CRITICAL: 5, _BULK: 1})
+
+    def test_a_bad_weight_is_a_command_error(self):
+        with self.assertRaisesMessage(CommandError, '--queues'):
+            call_command('dl_worker', queues='django_logic.critical:0')
@@ -0,0 +1,168 @@
+"""Lease mode: ``TRANSITION_MESSAGE_LEASE_SECONDS``.
+
+The claim writes a lease on the row and commits. The side-effects run with
+no transaction open, and only the final accounting locks the row again. An
+expired lease makes the row claimable again.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from django_logic.background import settings as bg_settings
+from django_logic.background.models import TransitionMessage
+from django_logic.background.pull import claim_next, new_lease_owner, run_once
+from django_logic.background.runner import (
+    _call_hook,
+    abandon_timed_out_attempt,
+    finalize_stuck_attempt,
+)
+from django_logic.testing import open_transition_message
+from tests import dl_settings
+from tests.background.models import Widget
+
+_CRITICAL = ['django_logic.critical']
+
+_LEASE_SETTINGS = dl_settings(
+    BACKGROUND_EXECUTION='pull',
+    TRANSITION_MESSAGE_MAX_ERRORS=3,
+    TRANSITION_MESSAGE_RETRY_MINUTES=0,
+    TRANSITION_MESSAGE_LEASE_SECONDS=60,
+)
+
+
+def _row(status='fulfilling', transition='fulfil'):
+    widget = Widget.objects.create(status=status)
+    return widget, open_transition_message(
+        widget, 'process', transition, queue_name='django_logic.critical')
+
+
+@override_settings(DJANGO_LOGIC=_LEASE_SETTINGS)
+class LeaseClaimTests(TestCase):
+    def test_the_claim_writes_the_lease(self):
+        _widget, row = _row()
+        self.assertEqual(claim_next(_CRITICAL, 'host:1:abc').pk, row.pk)
+        row.refresh_from_db()
+        self.assertEqual(row.lease_owner, 'host:1:abc')
+        self.assertGreater(
+            row.lease_expires_at, timezone.now() + timedelta(seconds=50))
+        self.assertTrue(row.lease_is_live())
+
+    def test_the_claim_and_the_renewal_leave_next_attempt_at_alone(self):
+        _widget, row = _row()
+        due = row.next_attempt_at
+        claim_next(_CRITICAL, 'host:1:abc')
+        self.assertTrue(TransitionMessage.renew_lease(row.pk, 'host:1:abc', 60))
+        row.refresh_from_db()
+        self.assertEqual(row.next_attempt_at, due)
+        self.assertTrue(row.lease_is_live())
+
+    def test_a_live_lease_is_not_claimable_and_an_expired_one_is(self):
+        _widget, row = _row()
+        claim_next(_CRITICAL, 'first')
+        self.assertIsNone(claim_next(_CRITICAL, 'second'))
+        expired = timezone.now() - timedelta(seconds=1)
+        TransitionMessage.objects.filter(pk=row.pk).update(
+            lease_expires_at=expired)
+        self.assertEqual(claim_next(_CRITICAL, 'second').pk, row.pk)
+        row.refresh_from_db()
+        self.assertEqual(row.lease_owner, 'second')
+
+    def test_a_live_lease_reads_as_retrying_past_the_window(self):
+        widget, row = _row()
+        claim_next(_CRITICAL, 'first')
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        TransitionMessage.objects.filter(pk=row.pk).update(
+            modified=an_hour_ago, started_at=an_hour_ago)
+        self.assertEqual(TransitionMessage.retry_status(widget, 'process'),
+                         TransitionMessage.RETRYING)
+        TransitionMessage.objects.filter(pk=row.pk).update(
+            lease_expires_at=an_hour_ago, next_attempt_at=an_hour_ago)
+        self.assertEqual(TransitionMessage.retry_status(widget, 'process'),
+                         TransitionMessage.STRANDED)
+
+    def test_the_safety_nets_leave_a_live_lease_alone(self):
+        _widget, row = _row()
+        claim_next(_CRITICAL, 'first')
+        TransitionMessage.objects.filter(pk=row.pk).update(
+            timeout_seconds=1,
+            started_at=timezone.now() - timedelta(minutes=5),
+            errors_count=3,
+        )
+        with self.assertLogs('django-logic', 'INFO') as logs:
+            self.assertFalse(abandon_timed_out_attempt(row.pk))
+            self.assertFalse(finalize_stuck_attempt(row.pk))
+        self.assertEqual(
+            sum('live lease' in line for line in logs.output), 2)
+        row.refresh_from_db()
+        self.assertFalse(row.is_completed)
+
+    def test_owners_are_unique(self):
+        self.assertNotEqual(new_lease_owner(), new_lease_owner())
+
+
+@override_settings(DJANGO_LOGIC=_LEASE_SETTINGS)
+class LeasedAttemptTests(TransactionTestCase):
+    def _run_with_probe(self, probe):
+        def call_hook(command, instance, **kwargs):
+            probe(instance)
+            return _call_hook(command, instance, **kwargs)
+
+        with patch('django_logic.background.runner._call_hook',
+                   side_effect=call_hook):
+            return run_once(_CRITICAL)
+
+    def test_side_effects_run_outside_a_transaction(self):
+        widget, row = _row()
+        in_atomic = []
+        self.assertTrue(self._run_with_probe(
+            lambda instance: in_atomic.append(connection.in_atomic_block)))
+        self.assertEqual(in_atomic, [False, False])
+        widget.refresh_from_db()
+        self.assertEqual(widget.status, 'fulfilled')
+        self.assertEqual(widget.se_log, 'ok,')
+        row.refresh_from_db()
+        self.assertTrue(row.is_completed)
+        self.assertEqual((row.lease_owner, row.lease_expires_at), ('', None))
+
+    def test_a_failing_side_effect_is_recorded_and_releases_the_lease(self):
+        widget, row = _row(status='crashing', transition='crash')
+        with self.assertLogs('django-logic', 'ERROR'):
+            self.assertTrue(run_once(_CRITICAL))
+        row.refresh_from_db()
+        self.assertEqual(row.errors_count, 1)
+        self.assertFalse(row.is_completed)
+        self.assertEqual((row.lease_owner, row.lease_expires_at), ('', None))
+        widget.refresh_from_db()
+        self.assertEqual(widget.status, 'crashing')
+
+    def test_a_lost_lease_records_nothing(self):
+        widget, row = _row()
+
+        def steal(instance):
+            TransitionMessage.objects.filter(pk=row.pk).update(
+                lease_owner='another-worker')
+
+        with self.assertLogs('django-logic', 'ERROR') as logs:
+            self._run_with_probe(steal)
+        self.assertIn('another attempt owns the row', '\n'.join(logs.output))
+        row.refresh_from_db()
+        self.assertFalse(row.is_completed)
+        self.assertEqual(row.errors_count, 0)
+        self.assertEqual(row.lease_owner, 'another-worker')
+        widget.refresh_from_db()
+        self.assertEqual(widget.status, 'fulfilling')
+
+
+class LeaseSettingTests(TestCase):
+    def test_the_lease_is_off_by_default(self):
+        self.assertIsNone(bg_settings.lease_seconds())
+
+    @override_settings(DJANGO_LOGIC=dl_settings(
+        TRANSITION_MESSAGE_LEASE_SECONDS=0))
+    def test_a_lease_below_one_second_is_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            bg_settings.lease_seconds()
@@ -0,0 +1,100 @@
+"""The partitioned layout: daily partitions on ``created``, and retention
+that drops a day after copying forward the rows the cleanup keeps.
+
+The layout is PostgreSQL-only. On SQLite only the naming and the refusals
+run. The PostgreSQL tests leave the test table partitioned, so the
+PostgreSQL tests that run after them cover the layout as well.
+"""
+from datetime import date, timedelta
+
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from django_logic.background import partitions
+from django_logic.background.models import TransitionMessage
+from django_logic.background.safety_nets import cleanup_completed_transitions
+from django_logic.testing import open_transition_message
+from tests import dl_settings
+from tests.background.models import Widget
+from tests.stability.base import requires_postgres
+
+_SETTINGS = dl_settings(TRANSITION_MESSAGE_CLEANUP_DAYS=7)
+
+
+class PartitionNamingTests(TestCase):
+    def test_one_partition_per_day(self):
+        self.assertEqual(
+            partitions.partition_name(date(2026, 10, 17)),
+            'django_logic_background_transitionmessage_p20261017')
+        self.assertLessEqual(
+            len(partitions.partition_name(date(2026, 10, 17)) + '_one'), 63)
+
+    def test_sqlite_keeps_the_plain_table(self):
+        self.assertFalse(partitions.is_partitioned())
+        with self.assertRaisesMessage(CommandError, 'not partitioned'):
+            call_command('dl_partitions')
+        with self.assertRaisesMessage(CommandError, 'needs PostgreSQL'):
+            call_command('dl_partitions', convert=True)
+
+
+def _row(widget, *, days_ago, completed=True, failed=False):
+    row = TransitionMessage.objects.create(
+        app_label='bg_tests', model_name='widget', instance_id=str(widget.pk),
+        process_name='process', transition_name='fulfil',
+        queue_name='django_logic.critical', kwargs={},
+        is_completed=completed, ended_in_failure=failed,
+    )
+    past = timezone.now() - timedelta(days=days_ago)
+    TransitionMessage.objects.filter(pk=row.pk).update(
+        created=past, modified=past, completed_at=past if completed else None)
+    return row
+
+
+@requires_postgres
+@override_settings(DJANGO_LOGIC=_SETTINGS)
+class PartitionedLayoutTests(TransactionTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        if not partitions.is_partitioned():
+            call_command('dl_partitions', convert=True)
+
+    def test_the_table_keeps_working_partitioned(self):
+        self.assertTrue(partitions.is_partitioned())
+        widget = Widget.objects.create(status='draft')
+        row = open_transition_message(
+            widget, 'process', 'fulfil', queue_name='django_logic.critical')
+        self.assertEqual(TransitionMessage.objects.get().pk, row.pk)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            open_transition_message(widget, 'process', 'fulfil')
+
+    def test_missing_days_are_created_once(self):
+        today = timezone.now().date()
+        self.assertIn(today + timedelta(days=partitions.PARTITIONS_AHEAD_DAYS),
+                      partitions.partition_days())
+        self.assertEqual(partitions.create_partitions(), [])
+        self.assertEqual(len(partitions.create_partitions(
+            partitions.PARTITIONS_AHEAD_DAYS + 1)), 1)
+
+    def test_an_expired_day_is_dropped_and_the_rows_to_keep_move(self):
+        widget = Widget.objects.create(status='fulfilment_failed')
+        done = _row(widget, days_ago=30)
+        stuck = _row(widget, days_ago=30, completed=False)
+        older_failure = _row(widget, days_ago=30, failed=True)
+        newest_failure = _row(widget, days_ago=30, failed=True)
+        TransitionMessage.objects.filter(pk=older_failure.pk).update(
+            completed_at=timezone.now() - timedelta(days=31))
+        day = (timezone.now() - timedelta(days=30)).date()
+        # The rows sit in the DEFAULT partition until their day has one.
+        partitions.create_partition(day)
+        self.assertIn(day, partitions.partition_days())
+
+        cleanup_completed_transitions()
+        self.assertEqual(
+            set(TransitionMessage.objects.values_list('pk', flat=True)),
+            {stuck.pk, newest_failure.pk})
+        self.assertNotIn(day, partitions.partition_days())
+        self.assertNotIn(done.pk, TransitionMessage.objects.values_list(
+            'pk', flat=True))
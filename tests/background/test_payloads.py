@@ -0,0 +1,109 @@
+"""Large kwargs stored out of line, compressed, in ``TransitionPayload``."""
+import zlib
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_logic.background import payloads, serializers
+from django_logic.background.archive import archive_completed, transition_history
+from django_logic.background.models import (
+    ArchivedTransitionMessage,
+    TransitionMessage,
+    TransitionPayload,
+)
+from django_logic.background.safety_nets import cleanup_completed_transitions
+from tests import dl_settings
+from tests.background import models as bg_models
+from tests.background.models import Widget, WidgetProcess
+
+_SETTINGS = dl_settings(TRANSITION_MESSAGE_PAYLOAD_THRESHOLD_BYTES=1024)
+
+_LINES = [{'sku': f'SKU-{n:05d}', 'price': Decimal('9.99')} for n in range(100)]
+
+
+@override_settings(DJANGO_LOGIC=_SETTINGS)
+class PayloadTests(TestCase):
+    def setUp(self):
+        bg_models.LAST_KWARGS.clear()
+        self.widget = Widget.objects.create()
+
+    def test_large_kwargs_move_out_and_reach_the_side_effect(self):
+        self.widget.process.fulfil(lines=_LINES)
+
+        self.assertEqual(bg_models.LAST_KWARGS['lines'], _LINES)
+        row = TransitionMessage.objects.get()
+        payload = TransitionPayload.objects.get()
+        self.assertEqual(row.payload_id, payload.pk)
+        self.assertEqual(set(row.kwargs), set(payloads.INLINE_KEYS))
+        self.assertGreater(payload.size, 1024)
+        self.assertLess(len(bytes(payload.data)), payload.size)
+        self.assertEqual(payloads.stored_kwargs(row)['lines'][0]['sku'],
+                         'SKU-00000')
+
+    def test_small_kwargs_stay_inline(self):
+        self.widget.process.fulfil(note='short')
+        self.assertIsNone(TransitionMessage.objects.get().payload_id)
+        self.assertFalse(TransitionPayload.objects.exists())
+
+    @override_settings(DJANGO_LOGIC=dl_settings())
+    def test_nothing_moves_when_the_setting_is_unset(self):
+        self.widget.process.fulfil(lines=_LINES)
+        self.assertEqual(len(TransitionMessage.objects.get().kwargs['lines']), 100)
+        self.assertFalse(TransitionPayload.objects.exists())
+
+    def test_inline_kwargs_are_encoded_to_json_once(self):
+        encode = serializers.KwargsJSONEncoder.encode
+        encoded = []
+
+        def counting(encoder, value):
+            if type(value) is not serializers.SerializedKwargs:
+                encoded.append(value)
+            return encode(encoder, value)
+
+        with mock.patch.object(serializers.KwargsJSONEncoder, 'encode',
+                               autospec=True, side_effect=counting):
+            self.widget.process.fulfil(note='short')
+        self.assertEqual([value.get('note') for value in encoded], ['short'])
+        self.assertEqual(TransitionMessage.objects.get().kwargs['note'],
+                         'short')
+
+    def test_bulk_enqueue_writes_the_payloads_in_one_pass(self):
+        widgets = [Widget.objects.create() for _ in range(3)]
+        result = WidgetProcess.bulk_transition(widgets, 'fulfil', lines=_LINES)
+        self.assertEqual(sorted(result.enqueued), [w.pk for w in widgets])
+        self.assertEqual(TransitionPayload.objects.count(), 3)
+        self.assertEqual(
+            TransitionMessage.objects.filter(payload__isnull=True).count(), 0)
+
+    def test_zlib_payloads_read_without_zstd(self):
+        with mock.patch.object(payloads, 'zstd', None):
+            self.widget.process.fulfil(lines=_LINES)
+        payload = TransitionPayload.objects.get()
+        self.assertEqual(payload.codec, payloads.CODEC_ZLIB)
+        self.assertTrue(zlib.decompress(bytes(payload.data)).startswith(b'{'))
+
+    def test_archive_and_history_put_the_kwargs_back_inline(self):
+        self.widget.process.fulfil(lines=_LINES)
+        row = TransitionMessage.objects.get()
+        self.assertEqual(transition_history(self.widget)[0]['kwargs']['lines'],
+                         payloads.stored_kwargs(row)['lines'])
+        TransitionMessage.objects.filter(pk=row.pk).update(
+            modified=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(archive_completed(timedelta(days=1)), 1)
+        archived = ArchivedTransitionMessage.objects.get()
+        self.assertEqual(len(archived.kwargs['lines']), 100)
+        self.assertFalse(TransitionPayload.objects.exists())
+
+    def test_cleanup_deletes_the_payloads_no_row_points_to(self):
+        self.widget.process.fulfil(lines=_LINES)
+        kept = TransitionPayload.objects.get()
+        orphan = TransitionPayload.objects.create(codec='zlib', size=0, data=b'')
+        cleanup_completed_transitions()
+        self.assertEqual(
+            list(TransitionPayload.objects.values_list('pk', flat=True)),
+            [kept.pk])
+        self.assertNotEqual(orphan.pk, kept.pk)
@@ -0,0 +1,138 @@
+"""Priority: ``BackgroundTransition(priority=)``, the call's ``priority=``,
+the ``(priority, created)`` claim order, and the aging safety net."""
+from datetime import timedelta
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from django_logic.background import BackgroundTransition
+from django_logic.background import settings as bg_settings
+from django_logic.background.models import DEFAULT_PRIORITY, TransitionMessage
+from django_logic.background.pull import claim_next
+from django_logic.background.safety_nets import age_waiting_transitions
+from django_logic.testing import open_transition_message
+from tests import dl_settings
+from tests.background.models import Widget, WidgetProcess
+
+_CRITICAL = ['django_logic.critical']
+
+
+def _waiting_row(priority, minutes_ago=0):
+    widget = Widget.objects.create(status='fulfilling')
+    row = open_transition_message(
+        widget, 'process', 'fulfil', queue_name='django_logic.critical')
+    TransitionMessage.objects.filter(pk=row.pk).update(
+        priority=priority,
+        created=timezone.now() - timedelta(minutes=minutes_ago))
+    return row
+
+
+class PriorityDeclarationTests(TestCase):
+    def test_the_declared_priority_and_the_call_override(self):
+        transition = BackgroundTransition(
+            'refund', sources=['paid'], target='refunded', priority=1)
+        self.assertEqual(transition.get_priority({}), 1)
+        self.assertEqual(transition.get_priority({'priority': 7}), 7)
+        plain = BackgroundTransition('reindex', sources=['a'], target='b')
+        self.assertEqual(plain.get_priority({}), DEFAULT_PRIORITY)
+
+    def test_a_priority_outside_zero_to_nine_is_refused(self):
+        for priority in (10, -1, True, '1'):
+            with self.subTest(priority=priority), \
+                    self.assertRaises(ImproperlyConfigured):
+                BackgroundTransition(
+                    'refund', sources=['paid'], target='refunded',
+                    priority=priority)
+
+    @override_settings(DJANGO_LOGIC=dl_settings(
+        TRANSITION_MESSAGE_PRIORITY_AGING_MINUTES=0))
+    def test_an_aging_interval_below_one_minute_is_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            bg_settings.priority_aging_minutes()
+
+
+@override_settings(DJANGO_LOGIC=dl_settings(BACKGROUND_EXECUTION='pull'))
+class PriorityEnqueueTests(TestCase):
+    def test_the_call_priority_is_stored_on_its_column_only(self):
+        widget = Widget.objects.create(status='draft')
+        widget.process.fulfil(priority=2, note='x')
+        row = TransitionMessage.objects.get()
+        self.assertEqual(row.priority, 2)
+        self.assertNotIn('priority', row.kwargs)
+        self.assertEqual(row.kwargs['note'], 'x')
+
+    def test_a_bad_call_priority_creates_no_row(self):
+        widget = Widget.objects.create(status='draft')
+        with self.assertRaisesMessage(ValueError, 'priority'):
+            widget.process.fulfil(priority=12)
+        self.assertFalse(TransitionMessage.objects.exists())
+
+    def test_a_call_priority_that_is_not_an_integer_is_a_type_error(self):
+        widget = Widget.objects.create(status='draft')
+        for priority in ('high', 1.0, True):
+            with self.subTest(priority=priority), \
+                    self.assertRaisesMessage(TypeError, 'enqueue option'):
+                widget.process.fulfil(priority=priority)
+        self.assertFalse(TransitionMessage.objects.exists())
+
+    def test_the_call_priority_is_not_dropped_with_a_warning(self):
+        widget = Widget.objects.create(status='draft')
+        with self.assertNoLogs('django-logic', 'WARNING'):
+            widget.process.fulfil(priority=2)
+
+    def test_a_bulk_enqueue_takes_the_call_priority(self):
+        for _ in range(2):
+            Widget.objects.create(status='draft')
+        WidgetProcess.bulk_transition(
+            Widget.objects.all(), 'fulfil', priority=0)
+        self.assertEqual(
+            set(TransitionMessage.objects.values_list('priority', flat=True)),
+            {0})
+
+
+@override_settings(DJANGO_LOGIC=dl_settings(BACKGROUND_EXECUTION='pull'))
+class PriorityClaimTests(TestCase):
+    def test_the_claim_takes_priority_then_age(self):
+        old_bulk = _waiting_row(priority=9, minutes_ago=3)
+        older_refund = _waiting_row(priority=1, minutes_ago=2)
+        newer_refund = _waiting_row(priority=1, minutes_ago=1)
+        claimed = []
+        for _ in range(3):
+            # SQLite has no row locks, so a claimed row is completed
+            # before the next claim to take it out of the order.
+            claimed.append(claim_next(_CRITICAL).pk)
+            TransitionMessage.objects.filter(pk=claimed[-1]).update(
+                is_completed=True)
+        self.assertEqual(
+            claimed, [older_refund.pk, newer_refund.pk, old_bulk.pk])
+
+
+@override_settings(DJANGO_LOGIC=dl_settings(
+    TRANSITION_MESSAGE_PRIORITY_AGING_MINUTES=10))
+class PriorityAgingTests(TestCase):
+    def test_a_row_is_raised_once_it_waited_an_interval_per_level(self):
+        waiting = _waiting_row(priority=3, minutes_ago=31)
+        not_yet = _waiting_row(priority=9, minutes_ago=80)
+        top = _waiting_row(priority=0, minutes_ago=60)
+        modified = TransitionMessage.objects.get(pk=waiting.pk).modified
+
+        self.assertEqual(age_waiting_transitions(), 1)
+        waiting.refresh_from_db()
+        self.assertEqual(waiting.priority, 0)
+        self.assertIsNotNone(waiting.priority_aged_at)
+        self.assertEqual(waiting.modified, modified)
+        not_yet.refresh_from_db()
+        top.refresh_from_db()
+        self.assertEqual((not_yet.priority, top.priority), (9, 0))
+
+    def test_a_row_is_not_rewritten_while_it_waits(self):
+        row = _waiting_row(priority=9, minutes_ago=85)
+        self.assertEqual(age_waiting_transitions(), 0)
+        row.refresh_from_db()
+        self.assertEqual((row.priority, row.priority_aged_at), (9, None))
+
+    def test_completed_rows_are_not_aged(self):
+        row = _waiting_row(priority=9, minutes_ago=60)
+        TransitionMessage.objects.filter(pk=row.pk).update(is_completed=True)
+        self.assertEqual(age_waiting_transitions(), 0)
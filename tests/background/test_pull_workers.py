@@ -2,8 +2,9 @@
 
 The claim needs real row locks (``SKIP LOCKED``), so most of these run on
 PostgreSQL only — the same gating as the other concurrency tests. The
-one SQLite-safe piece is the enqueue contract: pull mode leaves the
-committed row for a worker instead of running inline.
+SQLite-safe pieces are the enqueue contract (pull mode leaves the
+committed row for a worker instead of running inline) and the claim's
+``started_at`` stamp.
 """
 import threading
 from datetime import timedelta
@@ -12,8 +13,10 @@ from django.db import connections, transaction
 from django.test import TestCase, TransactionTestCase, override_settings
 from django.utils import timezone
 
+from django_logic.background import settings as bg_settings
 from django_logic.background.models import TransitionMessage
 from django_logic.background.pull import claim_next, run_once, run_worker
+from django_logic.background.runner import run_background_transition
 from django_logic.testing import open_transition_message
 from tests.background.models import Widget
 from tests.stability.base import requires_postgres
@@ -31,6 +34,16 @@ _CRITICAL = ['django_logic.critical']
 
 @override_settings(DJANGO_LOGIC=_PULL_SETTINGS)
 class PullEnqueueTests(TestCase):
+    def test_the_claim_stamps_started_at(self):
+        widget = Widget.objects.create(status='fulfilling')
+        row = open_transition_message(
+            widget, 'process', 'fulfil', queue_name='django_logic.critical')
+        self.assertEqual(claim_next(_CRITICAL).pk, row.pk)
+        row.refresh_from_db()
+        self.assertIsNotNone(row.started_at)
+        TransitionMessage.objects.filter(pk=row.pk).update(is_completed=True)
+        self.assertIsNone(claim_next(_CRITICAL))
+
     def test_enqueue_leaves_the_row_for_a_worker(self):
         widget = Widget.objects.create(status='draft')
         with self.captureOnCommitCallbacks(execute=True):
@@ -77,17 +90,40 @@ class PullClaimTests(TransactionTestCase):
         self.assertEqual(widget.status, 'fulfilled')
         self.assertTrue(TransitionMessage.objects.get().is_completed)
 
+    def test_the_claim_is_one_statement_and_the_attempt_reuses_its_stamp(self):
+        from unittest.mock import patch
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        widget = Widget.objects.create(status='draft')
+        widget.process.fulfil()
+        with CaptureQueriesContext(connection) as queries:
+            claim = claim_next(_CRITICAL)
+        self.assertEqual(len(queries.captured_queries), 1)
+        sql = queries.captured_queries[0]['sql']
+        self.assertTrue(sql.startswith('UPDATE'))
+        self.assertIn('SKIP LOCKED', sql)
+        self.assertFalse(claim.scheduled)
+        self.assertIsNotNone(
+            TransitionMessage.objects.get(pk=claim.pk).started_at)
+        with patch.object(TransitionMessage, 'stamp_attempt_started') as stamp:
+            run_background_transition(claim.pk, claimed=True,
+                                      scheduled=claim.scheduled)
+        stamp.assert_not_called()
+        widget.refresh_from_db()
+        self.assertEqual(widget.status, 'fulfilled')
+
     def test_a_failed_row_waits_out_the_retry_window(self):
         _, row = self._row()
         now = timezone.now()
-        TransitionMessage.objects.filter(pk=row.pk).update(
-            errors_count=1, last_error_dt=now,
-        )
+        row.record_error(RuntimeError('carrier down'))
+        self.assertGreaterEqual(row.next_attempt_at, now + timedelta(minutes=2))
         self.assertIsNone(claim_next(_CRITICAL))
         TransitionMessage.objects.filter(pk=row.pk).update(
-            last_error_dt=now - timedelta(minutes=3),
+            next_attempt_at=now - timedelta(seconds=1),
         )
-        self.assertEqual(claim_next(_CRITICAL), row.pk)
+        self.assertEqual(claim_next(_CRITICAL).pk, row.pk)
 
     def test_a_running_attempt_is_skipped(self):
         _, row = self._row()
@@ -103,16 +139,20 @@ class PullClaimTests(TransactionTestCase):
         finally:
             release.set()
             holder.join()
-        self.assertEqual(claim_next(_CRITICAL), row.pk)
+        self.assertEqual(claim_next(_CRITICAL).pk, row.pk)
 
     def test_the_queue_filter_holds(self):
         _, row = self._row(queue='django_logic.slow')
         self.assertIsNone(claim_next(_CRITICAL))
-        self.assertEqual(claim_next(['django_logic.slow']), row.pk)
+        self.assertEqual(claim_next(['django_logic.slow']).pk, row.pk)
 
     def test_an_exhausted_row_is_not_claimed(self):
         _, row = self._row()
-        TransitionMessage.objects.filter(pk=row.pk).update(errors_count=3)
+        TransitionMessage.objects.filter(pk=row.pk).update(errors_count=2)
+        row.refresh_from_db()
+        row.record_error(RuntimeError('carrier down'))
+        TransitionMessage.objects.filter(pk=row.pk).update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1))
         self.assertIsNone(claim_next(_CRITICAL))
 
     def test_a_crashing_attempt_is_contained_and_counted(self):
@@ -155,9 +195,12 @@ class PullClaimTests(TransactionTestCase):
         first.process.fulfil()
         second.process.fulfil()
         ran = []
-        with patch('django_logic.background.pull.SAFETY_NET_SECONDS', 0), \
+        every_pass = dict.fromkeys(bg_settings.SAFETY_NETS, 0)
+        with override_settings(DJANGO_LOGIC={
+                **_PULL_SETTINGS,
+                'TRANSITION_MESSAGE_SAFETY_NET_SECONDS': every_pass}), \
                 patch('django_logic.background.pull._run_safety_nets',
-                      side_effect=lambda: ran.append(1)):
+                      side_effect=lambda names: ran.append(names)):
             run_worker(_CRITICAL, forever=False)
         # Nets due after every claim: they ran at least once per drained row,
         # not only after the backlog emptied.
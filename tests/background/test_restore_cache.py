@@ -0,0 +1,111 @@
+"""The worker's restore caches: transitions, process classes and users."""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from django_logic.background import restore_cache
+from django_logic.background.models import TransitionMessage
+from django_logic.background.runner import _find_transition
+from django_logic.background.serializers import restore_user
+from tests import dl_settings
+from tests.background.models import Widget, WidgetProcess
+
+_WIDGET_PROCESS = f'{WidgetProcess.__module__}.WidgetProcess'
+
+
+class RestoreCacheTests(TestCase):
+    def setUp(self):
+        restore_cache.clear()
+        self.addCleanup(restore_cache.clear)
+
+    def _row(self, widget, owner=_WIDGET_PROCESS):
+        return TransitionMessage(
+            app_label='bg_tests', model_name='widget', instance_id=widget.pk,
+            process_name='process', transition_name='fulfil',
+            owning_process_class=owner, queue_name='django_logic.critical',
+        )
+
+    def test_warm_caches_every_bound_background_transition(self):
+        self.assertGreater(restore_cache.warm(), 0)
+        fulfil = WidgetProcess._dispatch_index().background_in_owner(
+            _WIDGET_PROCESS, 'fulfil')
+        self.assertIs(
+            restore_cache.transition(WidgetProcess, _WIDGET_PROCESS, 'fulfil'),
+            fulfil)
+        self.assertIs(restore_cache.transition(WidgetProcess, '', 'fulfil'),
+                      fulfil)
+        with mock.patch('importlib.import_module') as import_module:
+            self.assertIs(restore_cache.process_class(_WIDGET_PROCESS),
+                          WidgetProcess)
+        import_module.assert_not_called()
+
+    def test_a_changed_process_tree_is_not_served_from_the_cache(self):
+        widget = Widget.objects.create()
+        found = _find_transition(widget.process, self._row(widget))
+        self.assertIs(
+            restore_cache.transition(WidgetProcess, _WIDGET_PROCESS, 'fulfil'),
+            found)
+
+        replacement = mock.Mock(is_background=True, action_name='fulfil',
+                                sources=['draft'])
+        with mock.patch.object(WidgetProcess, 'transitions', [replacement]):
+            self.assertIsNone(restore_cache.transition(
+                WidgetProcess, _WIDGET_PROCESS, 'fulfil'))
+            self.assertIs(_find_transition(widget.process, self._row(widget)),
+                          replacement)
+
+    def test_a_missing_owner_is_not_cached(self):
+        widget = Widget.objects.create()
+        with self.assertLogs('django-logic.transition', 'WARNING'):
+            _find_transition(widget.process,
+                             self._row(widget, owner='gone.Process'))
+        self.assertIsNone(
+            restore_cache.transition(WidgetProcess, 'gone.Process', 'fulfil'))
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        restore_cache.clear()
+        self.addCleanup(restore_cache.clear)
+        self.user = get_user_model().objects.create(username='service')
+
+    def test_unset_reads_the_user_table_every_time(self):
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                kwargs = {'user_id': self.user.pk}
+                restore_user(kwargs)
+            self.assertEqual(kwargs['user'], self.user)
+
+    @override_settings(DJANGO_LOGIC=dl_settings(
+        TRANSITION_MESSAGE_USER_CACHE_SECONDS=60))
+    def test_cached_users_are_copies_and_saving_drops_them(self):
+        first = restore_cache.user(self.user.pk)
+        with self.assertNumQueries(0):
+            second = restore_cache.user(self.user.pk)
+        self.assertEqual(second, self.user)
+        self.assertIsNot(second, first)
+        second.username = 'changed by a side-effect'
+        self.assertEqual(restore_cache.user(self.user.pk).username, 'service')
+
+        self.user.username = 'renamed'
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(restore_cache.user(self.user.pk).username,
+                             'renamed')
+
+    @override_settings(DJANGO_LOGIC=dl_settings(
+        TRANSITION_MESSAGE_USER_CACHE_SECONDS=60))
+    def test_entries_expire(self):
+        restore_cache.user(self.user.pk)
+        with mock.patch('time.monotonic', return_value=10 ** 9), \
+                self.assertNumQueries(1):
+            restore_cache.user(self.user.pk)
+
+    @override_settings(DJANGO_LOGIC=dl_settings(
+        TRANSITION_MESSAGE_USER_CACHE_SECONDS=60))
+    def test_a_missing_user_is_not_cached(self):
+        self.assertIsNone(restore_cache.user(self.user.pk + 1))
+        created = get_user_model().objects.create(
+            pk=self.user.pk + 1, username='late')
+        self.assertEqual(restore_cache.user(self.user.pk + 1), created)
@@ -0,0 +1,197 @@
+"""Retry backoff and ``next_attempt_at``: the wait each error schedules, and
+the claim that reads that column and ``MAX_ERRORS``."""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from django_logic.background import BackgroundTransition
+from django_logic.background import settings as bg_settings
+from django_logic.background.backoff import retry_delay
+from django_logic.background.models import TransitionMessage
+from django_logic.background.pull import _record_child_death
+from django_logic.background.runner import abandon_timed_out_attempt
+from django_logic.background.safety_nets import _claimable, run_pending
+from django_logic.testing import open_transition_message
+from tests import dl_settings
+from tests.background.models import Widget, WidgetProcess
+
+_EXPONENTIAL = dl_settings(
+    TRANSITION_MESSAGE_RETRY_BACKOFF='exponential',
+    TRANSITION_MESSAGE_RETRY_MINUTES=1,
+    TRANSITION_MESSAGE_RETRY_MAX_MINUTES=30,
+)
+
+
+def _crash():
+    return next(t for t in WidgetProcess.transitions if t.action_name == 'crash')
+
+
+class RetryDelayTests(SimpleTestCase):
+    @override_settings(DJANGO_LOGIC=dl_settings(TRANSITION_MESSAGE_RETRY_MINUTES=3))
+    def test_fixed_waits_retry_minutes_after_every_error(self):
+        self.assertEqual({retry_delay(n) for n in (1, 2, 5)},
+                         {timedelta(minutes=3)})
+
+    @override_settings(DJANGO_LOGIC=_EXPONENTIAL)
+    def test_exponential_doubles_up_to_the_ceiling_with_jitter(self):
+        with patch('django_logic.background.backoff.random.random',
+                   return_value=1.0):
+            self.assertEqual([retry_delay(n) for n in (1, 2, 3, 6, 500)],
+                             [timedelta(minutes=m) for m in (1, 2, 4, 30, 30)])
+        with patch('django_logic.background.backoff.random.random',
+                   return_value=0.0):
+            self.assertEqual(retry_delay(3), timedelta(minutes=2))
+
+    @override_settings(DJANGO_LOGIC=_EXPONENTIAL)
+    def test_the_transition_backoff_overrides_the_setting(self):
+        self.assertEqual(retry_delay(4, 'fixed'), timedelta(minutes=1))
+        self.assertEqual(retry_delay(4, lambda n: timedelta(seconds=n)),
+                         timedelta(seconds=4))
+
+    @override_settings(DJANGO_LOGIC=dl_settings(TRANSITION_MESSAGE_RETRY_MINUTES=3))
+    def test_a_broken_callable_falls_back_to_the_setting(self):
+        def broken(errors_count):
+            raise KeyError(errors_count)
+
+        for backoff in (broken, lambda n: 30, lambda n: timedelta(-1)):
+            with self.subTest(backoff=backoff), \
+                    self.assertLogs('django-logic', 'ERROR'):
+                self.assertEqual(retry_delay(1, backoff), timedelta(minutes=3))
+
+    def test_bad_declarations_and_settings_are_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            BackgroundTransition('refund', sources=['paid'], target='refunded',
+                                 retry_backoff='linear')
+        with override_settings(DJANGO_LOGIC=dl_settings(
+                TRANSITION_MESSAGE_RETRY_BACKOFF='linear')), \
+                self.assertRaises(ImproperlyConfigured):
+            bg_settings.retry_backoff()
+
+
+@override_settings(DJANGO_LOGIC=dl_settings(
+    TRANSITION_MESSAGE_MAX_ERRORS=3, TRANSITION_MESSAGE_RETRY_MINUTES=2))
+class NextAttemptTests(TestCase):
+    def _row(self):
+        widget = Widget.objects.create(status='fulfilling')
+        return widget, open_transition_message(
+            widget, 'process', 'fulfil', queue_name='django_logic.critical')
+
+    def test_an_error_schedules_the_next_attempt_and_the_last_one_clears_it(self):
+        _widget, row = self._row()
+        self.assertLessEqual(row.next_attempt_at, timezone.now())
+        before = timezone.now()
+        row.record_error(RuntimeError('carrier down'))
+        self.assertGreaterEqual(row.next_attempt_at,
+                                before + timedelta(minutes=2))
+        self.assertFalse(_claimable().exists())
+        row.record_error(RuntimeError('carrier down'))
+        row.record_error(RuntimeError('carrier down'))
+        self.assertEqual(row.errors_count, 3)
+        TransitionMessage.objects.filter(pk=row.pk).update(
+            next_attempt_at=timezone.now())
+        self.assertFalse(_claimable().exists())
+
+    def test_an_error_does_not_read_the_row_back(self):
+        _widget, row = self._row()
+        with CaptureQueriesContext(connection) as queries:
+            row.record_error(RuntimeError('carrier down'))
+        statements = [query['sql'].split()[0]
+                      for query in queries.captured_queries]
+        # The locked read, the UPDATE and the attempt's INSERT.
+        self.assertEqual(
+            [verb for verb in statements if verb != 'SAVEPOINT'
+             and verb != 'RELEASE'],
+            ['SELECT', 'UPDATE', 'INSERT'])
+        stored = TransitionMessage.objects.get(pk=row.pk)
+        self.assertEqual(
+            (row.errors_count, row.next_attempt_at, row.modified),
+            (stored.errors_count, stored.next_attempt_at, stored.modified))
+
+    def test_the_backoff_uses_the_stored_count_not_a_stale_copy(self):
+        _widget, row = self._row()
+        stale = TransitionMessage.objects.get(pk=row.pk)
+        row.record_error(RuntimeError('carrier down'))
+        row.record_error(RuntimeError('carrier down'))
+        # The copy still holds errors_count=0; the wait is the third's.
+        with patch('django_logic.background.backoff.retry_delay',
+                   return_value=timedelta(minutes=2)) as delay:
+            stale.record_error(RuntimeError('carrier down'))
+        self.assertEqual(stale.errors_count, 3)
+        self.assertEqual(delay.call_args.args[0], 3)
+
+    def test_the_claim_reads_next_attempt_at_not_the_retry_arithmetic(self):
+        _widget, row = self._row()
+        where = str(_claimable(['django_logic.critical']).query).split(
+            ' WHERE ')[1].split(' ORDER BY ')[0]
+        self.assertIn('next_attempt_at', where)
+        self.assertNotIn('last_error_dt', where)
+        TransitionMessage.objects.filter(pk=row.pk).update(
+            next_attempt_at=timezone.now() + timedelta(seconds=30))
+        self.assertEqual(run_pending(), 0)
+        TransitionMessage.objects.filter(pk=row.pk).update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(run_pending(), 1)
+
+    def test_the_claim_follows_a_changed_max_errors(self):
+        widget = Widget.objects.create(status='fulfilling')
+        row = open_transition_message(
+            widget, 'process', 'fulfil', queue_name='django_logic.critical',
+            errors_count=3)
+        self.assertLessEqual(row.next_attempt_at, timezone.now())
+        self.assertFalse(_claimable().exists())
+        with override_settings(DJANGO_LOGIC=dl_settings(
+                TRANSITION_MESSAGE_MAX_ERRORS=5)):
+            self.assertTrue(_claimable().exists())
+        with override_settings(DJANGO_LOGIC=dl_settings(
+                TRANSITION_MESSAGE_MAX_ERRORS=2)):
+            TransitionMessage.objects.filter(pk=row.pk).update(errors_count=2)
+            self.assertFalse(_claimable().exists())
+
+    def test_the_transition_retry_backoff_paces_its_row(self):
+        widget = Widget.objects.create(status='draft')
+        before = timezone.now()
+        with patch.object(_crash(), 'retry_backoff',
+                          lambda errors_count: timedelta(hours=3)), \
+                self.assertRaises(ValueError):
+            widget.process.crash()
+        row = TransitionMessage.objects.get()
+        self.assertEqual(row.errors_count, 1)
+        self.assertGreaterEqual(row.next_attempt_at,
+                                before + timedelta(hours=3))
+
+    def test_a_died_attempt_and_a_timeout_keep_the_transition_backoff(self):
+        _widget, row = self._row()
+        started = timezone.now() - timedelta(hours=1)
+        TransitionMessage.objects.filter(pk=row.pk).update(
+            started_at=started, timeout_seconds=60)
+        fulfil = next(t for t in WidgetProcess.transitions
+                      if t.action_name == 'fulfil')
+        with patch.object(fulfil, 'retry_backoff',
+                          lambda errors_count: timedelta(hours=3)):
+            before = timezone.now()
+            _record_child_death(row.pk, 9)
+            row.refresh_from_db()
+            self.assertGreaterEqual(row.next_attempt_at,
+                                    before + timedelta(hours=3))
+            TransitionMessage.objects.filter(pk=row.pk).update(
+                last_error_dt=started - timedelta(seconds=1))
+            with self.assertLogs('django-logic', 'ERROR'):
+                self.assertTrue(abandon_timed_out_attempt(row.pk))
+        row.refresh_from_db()
+        self.assertEqual(row.errors_count, 2)
+        self.assertGreaterEqual(row.next_attempt_at,
+                                before + timedelta(hours=3))
+
+    def test_a_row_waiting_out_a_long_backoff_is_not_stranded(self):
+        widget, row = self._row()
+        two_hours_ago = timezone.now() - timedelta(hours=2)
+        TransitionMessage.objects.filter(pk=row.pk).update(
+            modified=two_hours_ago, errors_count=2,
+            next_attempt_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(TransitionMessage.retry_status(widget, 'process'),
+                         TransitionMessage.RETRYING)
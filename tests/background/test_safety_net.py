@@ -28,6 +28,8 @@ def _make_stale_message(widget, transition_name='fulfil', errors=0, completed=Fa
         queue_name='django_logic.critical',
         kwargs={},
         errors_count=errors,
+        # As record_error leaves it: null at MAX_ERRORS.
+        next_attempt_at=TransitionMessage.next_attempt_after(errors),
         is_completed=completed,
     )
     # Move the timestamps back so the RETRY_MINUTES filter includes the row.
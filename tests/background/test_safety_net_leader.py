@@ -0,0 +1,70 @@
+"""The safety nets: one leader per database, and a cadence per net."""
+import os
+import socket
+from unittest.mock import patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import (
+    SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+
+from django_logic.background import pull
+from django_logic.background import settings as bg_settings
+from tests import dl_settings
+from tests.stability.base import requires_postgres
+
+
+class SafetyNetScheduleTests(SimpleTestCase):
+    def test_every_net_is_due_at_the_start_then_at_its_own_cadence(self):
+        nets = pull.SafetyNetSchedule()
+        self.assertTrue(nets.due())
+        self.assertEqual(nets.take_due(), list(bg_settings.SAFETY_NETS))
+        self.assertFalse(nets.due())
+        nets = pull.SafetyNetSchedule()
+        with override_settings(DJANGO_LOGIC=dl_settings(
+                TRANSITION_MESSAGE_SAFETY_NET_SECONDS={
+                    'watchdog_stale_attempts': 0})):
+            nets.take_due()
+            self.assertEqual(nets.take_due(), ['watchdog_stale_attempts'])
+
+    def test_bad_cadences_are_refused(self):
+        for value in (60, {'cleanup': 60},
+                      {'cleanup_completed_transitions': -1},
+                      {'cleanup_completed_transitions': '3600'}):
+            with self.subTest(value=value), override_settings(
+                    DJANGO_LOGIC=dl_settings(
+                        TRANSITION_MESSAGE_SAFETY_NET_SECONDS=value)), \
+                    self.assertRaises(ImproperlyConfigured):
+                bg_settings.safety_net_seconds()
+
+
+class RunSafetyNetsTests(TestCase):
+    def test_only_the_leader_runs_the_due_nets(self):
+        with patch('django_logic.background.safety_nets.'
+                   'cleanup_completed_transitions') as cleanup, \
+                patch('django_logic.background.safety_nets.'
+                      'watchdog_stale_attempts') as watchdog:
+            pull._run_safety_nets(['cleanup_completed_transitions'])
+            self.assertEqual((cleanup.call_count, watchdog.call_count), (1, 0))
+            with patch.object(pull._leadership, 'holds', return_value=False):
+                pull._run_safety_nets(bg_settings.SAFETY_NETS)
+            self.assertEqual((cleanup.call_count, watchdog.call_count), (1, 0))
+
+    def test_every_worker_leads_without_postgresql(self):
+        self.assertTrue(pull.SafetyNetLeadership().holds())
+        self.assertIsNone(pull.safety_net_leader())
+
+
+@requires_postgres
+class SafetyNetLeadershipTests(TransactionTestCase):
+    def test_one_holder_and_a_failover_when_its_session_ends(self):
+        first, second = pull.SafetyNetLeadership(), pull.SafetyNetLeadership()
+        self.addCleanup(lambda: [leader._close() for leader in (first, second)
+                                 if leader._connection is not None])
+        self.assertTrue(first.holds())
+        self.assertTrue(first.holds())
+        self.assertFalse(second.holds())
+        self.assertEqual(pull.safety_net_leader(),
+                         f'dl_worker {socket.gethostname()}:{os.getpid()}')
+        first._close()
+        self.assertTrue(second.holds())
@@ -0,0 +1,198 @@
+"""Scheduled background transitions: ``run_at=`` and ``countdown=`` write
+the row now and run it only when it is due."""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from django_logic.background import pull
+from django_logic.background.dispatch import in_flight, retry_pending
+from django_logic.background.models import TransitionMessage
+from django_logic.background.runner import run_background_transition
+from django_logic.background.safety_nets import detect_stuck_transitions
+from django_logic.background.serializers import (
+    KwargsSerializationError,
+    serialize_kwargs,
+)
+from django_logic.testing import open_transition_message
+from tests import dl_settings
+from tests.background.models import Widget, WidgetProcess
+
+
+def _transition(action_name):
+    return next(t for t in WidgetProcess.transitions
+                if t.action_name == action_name)
+
+
+def _make_due(row):
+    TransitionMessage.objects.filter(pk=row.pk).update(
+        next_attempt_at=timezone.now() - timedelta(seconds=1))
+
+
+class NotBeforeTests(SimpleTestCase):
+    def test_run_at_and_countdown_give_the_due_time(self):
+        fulfil = _transition('fulfil')
+        run_at = timezone.now() + timedelta(hours=1)
+        self.assertEqual(fulfil.get_not_before({'run_at': run_at}), run_at)
+        before = timezone.now()
+        self.assertGreaterEqual(fulfil.get_not_before({'countdown': 90}),
+                                before + timedelta(seconds=90))
+        self.assertGreaterEqual(
+            fulfil.get_not_before({'countdown': timedelta(minutes=2)}),
+            before + timedelta(minutes=2))
+
+    def test_a_moment_already_past_runs_now(self):
+        fulfil = _transition('fulfil')
+        self.assertIsNone(fulfil.get_not_before({}))
+        self.assertIsNone(fulfil.get_not_before({'countdown': 0}))
+        self.assertIsNone(fulfil.get_not_before(
+            {'run_at': timezone.now() - timedelta(minutes=1)}))
+
+    def test_bad_values_are_refused(self):
+        fulfil = _transition('fulfil')
+        naive = timezone.now().replace(tzinfo=None)
+        for kwargs in ({'run_at': naive}, {'run_at': '2030-01-01'},
+                       {'countdown': -5}, {'countdown': True},
+                       {'countdown': 5, 'run_at': timezone.now()}):
+            with self.subTest(kwargs=kwargs), self.assertRaises(ValueError):
+                fulfil.get_not_before(kwargs)
+
+    def test_serialize_kwargs_drops_them_loudly(self):
+        with self.assertLogs('django-logic', 'WARNING') as logs:
+            self.assertEqual(
+                serialize_kwargs({'run_at': timezone.now(), 'countdown': 5,
+                                  'note': 'x'}),
+                {'note': 'x'})
+        self.assertEqual(len(logs.output), 2)
+        with override_settings(DJANGO_LOGIC=dl_settings(
+                STRICT_KWARGS_SERIALIZATION=True)), \
+                self.assertRaises(KwargsSerializationError):
+            serialize_kwargs({'countdown': 5})
+
+
+class ScheduledRowTests(TestCase):
+    def setUp(self):
+        self.widget = Widget.objects.create(status='draft')
+
+    def test_the_row_leaves_the_instance_alone_until_due(self):
+        self.widget.process.fulfil(countdown=3600)
+        row = TransitionMessage.objects.get()
+        self.assertTrue(row.scheduled)
+        self.assertGreater(row.next_attempt_at, timezone.now())
+        self.widget.refresh_from_db()
+        self.assertEqual(self.widget.status, 'draft')
+        self.assertFalse(in_flight(self.widget))
+        self.assertEqual(retry_pending(), 0)
+
+        _make_due(row)
+        self.assertEqual(retry_pending(), 1)
+        self.widget.refresh_from_db()
+        self.assertEqual(self.widget.status, 'fulfilled')
+        row.refresh_from_db()
+        self.assertTrue(row.is_completed)
+        self.assertFalse(row.scheduled)
+        self.assertNotIn('countdown', self.widget.kwargs_seen[0])
+
+    def test_a_state_change_before_it_is_due_supersedes_it(self):
+        self.widget.process.fulfil(run_at=timezone.now() + timedelta(hours=1))
+        self.widget.process.cancel()
+        row = TransitionMessage.objects.get()
+        _make_due(row)
+        self.assertEqual(retry_pending(), 1)
+        row.refresh_from_db()
+        self.assertTrue(row.is_completed)
+        self.assertTrue(row.last_error_message.startswith(
+            '[superseded] scheduled fulfil'))
+        self.widget.refresh_from_db()
+        self.assertEqual(self.widget.status, 'cancelled')
+        self.assertEqual(self.widget.se_log, '')
+
+    def test_failed_conditions_when_due_supersede_it(self):
+        self.widget.process.fulfil(countdown=60)
+        row = TransitionMessage.objects.get()
+        _make_due(row)
+        with patch.object(_transition('fulfil').conditions, 'execute',
+                          return_value=False):
+            run_background_transition(row.pk)
+        row.refresh_from_db()
+        self.assertTrue(row.is_completed)
+        self.assertIn('conditions no longer hold', row.last_error_message)
+
+    def test_a_busy_process_makes_it_wait_without_an_error(self):
+        self.widget.process.crash(countdown=60)
+        scheduled = TransitionMessage.objects.get()
+        open_transition_message(self.widget, 'process', 'fulfil',
+                                queue_name='django_logic.critical')
+        _make_due(scheduled)
+        run_background_transition(scheduled.pk)
+        scheduled.refresh_from_db()
+        self.assertTrue(scheduled.scheduled)
+        self.assertFalse(scheduled.is_completed)
+        self.assertEqual(scheduled.errors_count, 0)
+        self.assertGreater(scheduled.next_attempt_at, timezone.now())
+        self.widget.refresh_from_db()
+        self.assertEqual(self.widget.status, 'draft')
+
+    def test_the_claim_tells_the_attempt_to_start_the_row(self):
+        self.widget.process.fulfil(countdown=60)
+        row = TransitionMessage.objects.get()
+        _make_due(row)
+        claim = pull.claim_next([row.queue_name])
+        self.assertEqual(claim, (row.pk, True))
+        run_background_transition(claim.pk, claimed=True,
+                                  scheduled=claim.scheduled)
+        self.widget.refresh_from_db()
+        self.assertEqual(self.widget.status, 'fulfilled')
+
+    def test_an_unscheduled_claim_costs_no_scheduled_lookup(self):
+        counts = []
+        for scheduled in (None, False):
+            widget = Widget.objects.create(status='fulfilling')
+            row = open_transition_message(
+                widget, 'process', 'fulfil', queue_name='django_logic.critical')
+            with CaptureQueriesContext(connection) as queries:
+                run_background_transition(row.pk, claimed=True,
+                                          scheduled=scheduled)
+            counts.append(len(queries.captured_queries))
+            widget.refresh_from_db()
+            self.assertEqual(widget.status, 'fulfilled')
+        self.assertEqual(counts[0] - counts[1], 1)
+
+    def test_a_row_not_due_yet_is_not_reported_as_never_started(self):
+        self.widget.process.fulfil(countdown=timedelta(days=7))
+        TransitionMessage.objects.update(
+            created=timezone.now() - timedelta(days=2))
+        with self.assertNoLogs('django-logic', 'ERROR'):
+            detect_stuck_transitions()
+
+    def test_bulk_transition_refuses_to_schedule(self):
+        result = WidgetProcess.bulk_transition(
+            [self.widget], 'fulfil', countdown=60)
+        self.assertIsInstance(result.failed[self.widget.pk], ValueError)
+        self.assertFalse(TransitionMessage.objects.exists())
+
+
+class WaitSecondsTests(TestCase):
+    def test_the_wait_ends_when_the_next_row_is_due(self):
+        queues = ['django_logic.critical']
+        self.assertEqual(pull.wait_seconds(queues), pull.POLL_SECONDS)
+        widget = Widget.objects.create(status='draft')
+        widget.process.fulfil(countdown=2)
+        self.assertLessEqual(pull.wait_seconds(queues), 2)
+        self.assertEqual(pull.wait_seconds(['django_logic.slow']),
+                         pull.POLL_SECONDS)
+        TransitionMessage.objects.update(
+            next_attempt_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(pull.wait_seconds(queues), pull.POLL_SECONDS)
+
+    def test_a_retry_waits_for_the_poll(self):
+        widget = Widget.objects.create(status='fulfilling')
+        row = open_transition_message(widget, 'process', 'fulfil',
+                                      queue_name='django_logic.critical')
+        TransitionMessage.objects.filter(pk=row.pk).update(
+            next_attempt_at=timezone.now() + timedelta(seconds=2))
+        self.assertEqual(pull.wait_seconds(['django_logic.critical']),
+                         pull.POLL_SECONDS)
@@ -2,14 +2,16 @@
 import json
 from datetime import date, datetime, time, timezone as tz
 from decimal import Decimal
+from unittest import mock, skipIf
 from unittest.mock import Mock
 from uuid import UUID
 
 from django.test import SimpleTestCase, override_settings
 
+from django_logic.background import serializers
 from django_logic.background.serializers import (
     decode_value, deserialize_kwargs, restore_user, serialize_kwargs,
-    KwargsSerializationError,
+    KwargsJSONDecoder, KwargsJSONEncoder, KwargsSerializationError,
 )
 
 
@@ -195,6 +197,60 @@ class SerializeKwargsTests(SimpleTestCase):
             serialize_kwargs({'m': {1: 'a'}})
 
 
+    def test_unserializable_error_names_the_type(self):
+        with self.assertRaisesMessage(
+                TypeError, 'Object of type object is not JSON serializable'):
+            serialize_kwargs({'items': [1, {'blob': object()}]})
+
+    def test_unstorable_text_is_reported_before_other_problems(self):
+        with self.assertRaisesMessage(
+                KwargsSerializationError, "kwargs['items'][1]"):
+            serialize_kwargs({'items': [object(), 'a\x00b']})
+
+    def test_line_items_round_trip(self):
+        original = {'lines': [
+            {'sku': f'SKU-{n}', 'qty': n, 'price': Decimal('9.99'),
+             'shipped': None if n % 2 else date(2026, 1, n % 28 + 1)}
+            for n in range(200)
+        ]}
+        self.assertEqual(decode_value(_roundtrip(dict(original))), original)
+
+
+class KwargsColumnCodecTests(SimpleTestCase):
+    """The column's text is the same JSON document with or without orjson."""
+
+    def _dumps(self, value):
+        return json.dumps(value, cls=KwargsJSONEncoder)
+
+    def _loads(self, text):
+        return json.loads(text, cls=KwargsJSONDecoder)
+
+    def test_documents_match_the_standard_library(self):
+        for value in ({'a': 1, 'b': [1.5, None, True], 'c': 'é\n'},
+                      serialize_kwargs({'when': date(2026, 1, 2)}),
+                      {'big': 2 ** 70}, {'m': {1: 'a'}}):
+            with self.subTest(value=value):
+                self.assertEqual(json.loads(self._dumps(value)),
+                                 json.loads(json.dumps(value)))
+                self.assertEqual(self._loads(json.dumps(value)),
+                                 json.loads(json.dumps(value)))
+
+    def test_integers_beyond_64_bits_stay_integers(self):
+        self.assertEqual(self._loads('{"big": 1180591620717411303424}'),
+                         {'big': 2 ** 70})
+
+    def test_the_standard_library_is_used_without_orjson(self):
+        with mock.patch.object(serializers, 'orjson', None):
+            self.assertEqual(self._loads(self._dumps({'a': [1]})), {'a': [1]})
+
+    @skipIf(serializers.orjson is None, 'orjson is not installed')
+    def test_orjson_writes_the_column_when_installed(self):
+        with mock.patch.object(serializers.orjson, 'dumps',
+                               wraps=serializers.orjson.dumps) as dumps:
+            self._dumps({'a': 1})
+        dumps.assert_called_once()
+
+
 class DeserializeKwargsTests(SimpleTestCase):
     def test_none_and_empty_rows(self):
         self.assertEqual(deserialize_kwargs(None), {})
@@ -12,9 +12,12 @@ from django.core.exceptions import ImproperlyConfigured
 from django.test import SimpleTestCase, override_settings
 
 from django_logic.background.settings import (
+    archive_after_hours,
     cleanup_days,
     max_errors,
+    payload_threshold_bytes,
     retry_minutes,
+    user_cache_seconds,
     validate_on_ready,
 )
 from django_logic.conf import lock_timeout
@@ -144,6 +147,52 @@ class SettingValidationTests(SimpleTestCase):
         ):
             self.assertEqual(cleanup_days(), 0)
 
+    # -- TRANSITION_MESSAGE_ARCHIVE_AFTER_HOURS (None or number >= 0) ---------
+
+    def test_archive_after_hours_rejects_garbage(self):
+        for garbage in ('24', True, math.nan, -1):
+            with self.subTest(value=garbage):
+                self.assert_rejected(
+                    _conf(TRANSITION_MESSAGE_ARCHIVE_AFTER_HOURS=garbage),
+                    'TRANSITION_MESSAGE_ARCHIVE_AFTER_HOURS')
+
+    def test_archive_after_hours_defaults_to_off(self):
+        self.assertIsNone(archive_after_hours())
+        with override_settings(
+            DJANGO_LOGIC=_conf(TRANSITION_MESSAGE_ARCHIVE_AFTER_HOURS=0)
+        ):
+            self.assertEqual(archive_after_hours(), 0)
+
+    # -- TRANSITION_MESSAGE_PAYLOAD_THRESHOLD_BYTES (None or whole >= 1) ------
+
+    def test_payload_threshold_rejects_garbage(self):
+        for garbage in ('4096', True, math.nan, 0, 1.5):
+            with self.subTest(value=garbage):
+                self.assert_rejected(
+                    _conf(TRANSITION_MESSAGE_PAYLOAD_THRESHOLD_BYTES=garbage),
+                    'TRANSITION_MESSAGE_PAYLOAD_THRESHOLD_BYTES')
+
+    def test_payload_threshold_defaults_to_inline(self):
+        self.assertIsNone(payload_threshold_bytes())
+        with override_settings(DJANGO_LOGIC=_conf(
+                TRANSITION_MESSAGE_PAYLOAD_THRESHOLD_BYTES=16384.0)):
+            self.assertEqual(payload_threshold_bytes(), 16384)
+
+    # -- TRANSITION_MESSAGE_USER_CACHE_SECONDS (None or number >= 0) ----------
+
+    def test_user_cache_seconds_rejects_garbage(self):
+        for garbage in ('60', True, math.nan, -1):
+            with self.subTest(value=garbage):
+                self.assert_rejected(
+                    _conf(TRANSITION_MESSAGE_USER_CACHE_SECONDS=garbage),
+                    'TRANSITION_MESSAGE_USER_CACHE_SECONDS')
+
+    def test_user_cache_seconds_defaults_to_off(self):
+        self.assertIsNone(user_cache_seconds())
+        with override_settings(DJANGO_LOGIC=_conf(
+                TRANSITION_MESSAGE_USER_CACHE_SECONDS=30)):
+            self.assertEqual(user_cache_seconds(), 30)
+
     # -- LOCK_TIMEOUT (number > 0) -------------------------------------------
 
     def test_lock_timeout_rejects_string(self):
@@ -18,16 +18,17 @@ The mutex is scoped to one instance plus one process:
 from datetime import timedelta
 
 from django.core.cache import cache
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
 from django.test import (
     TestCase,
     TransactionTestCase,
     modify_settings,
     override_settings,
 )
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from django_logic import Action
+from django_logic import Action, Process, Transition
 from django_logic.background.dispatch import in_flight, sync_execution
 from django_logic.background.exceptions import AlreadyInProgress, SourceStateChanged
 from django_logic.background.models import TransitionMessage
@@ -36,7 +37,7 @@ from django_logic.exceptions import (
     TransitionTemporarilyUnavailable,
 )
 from django_logic.state import State
-from tests.background.models import Widget
+from tests.background.models import Widget, WidgetProcess
 from tests import dl_settings
 
 
@@ -134,8 +135,9 @@ class SyncTransitionGatedByTransitionMessageTests(TestCase):
         # shortly" would be wrong forever, and demoting the log to WARNING
         # would stop a stuck instance from paging anyone.
         row = _make_row(self.widget)
+        two_hours_ago = timezone.now() - timedelta(hours=2)
         TransitionMessage.objects.filter(pk=row.pk).update(
-            modified=timezone.now() - timedelta(hours=2))
+            modified=two_hours_ago, next_attempt_at=two_hours_ago)
 
         with self.assertRaises(TransitionNotAllowed) as ctx:
             self.widget.process.cancel()
@@ -167,6 +169,7 @@ class SyncTransitionGatedByTransitionMessageTests(TestCase):
         TransitionMessage.objects.filter(pk=row.pk).update(
             modified=timezone.now() - timedelta(hours=2),
             started_at=timezone.now() - timedelta(hours=2),
+            next_attempt_at=timezone.now() - timedelta(hours=2),
             timeout_seconds=60,
         )
 
@@ -207,8 +210,9 @@ class SyncTransitionGatedByTransitionMessageTests(TestCase):
         # to answer AlreadyInProgress ("retry shortly") forever on a stranded
         # row.
         row = _make_row(self.widget, process_name='process')
+        two_hours_ago = timezone.now() - timedelta(hours=2)
         TransitionMessage.objects.filter(pk=row.pk).update(
-            modified=timezone.now() - timedelta(hours=2))
+            modified=two_hours_ago, next_attempt_at=two_hours_ago)
 
         with self.assertRaises(TransitionNotAllowed) as ctx:
             with sync_execution():
@@ -263,8 +267,9 @@ class SyncTransitionGatedByTransitionMessageTests(TestCase):
         # rule as the gate: a stranded row is not busy, and calling it busy
         # would make the consumer retry forever.
         row = _make_row(self.widget)
+        two_hours_ago = timezone.now() - timedelta(hours=2)
         TransitionMessage.objects.filter(pk=row.pk).update(
-            modified=timezone.now() - timedelta(hours=2))
+            modified=two_hours_ago, next_attempt_at=two_hours_ago)
 
         self.assertFalse(in_flight(self.widget, 'process'))
 
@@ -481,3 +486,63 @@ class EnqueuePostInsertRecheckTests(TransactionTestCase):
 
         self.widget.refresh_from_db()
         self.assertEqual(self.widget.status, 'fulfilled')
+
+
+def _note(instance, **kwargs):
+    pass
+
+
+class _PlainWidgetProcess(Process):
+    transitions = [
+        Transition('cancel', sources=['draft'], target='cancelled',
+                   side_effects=[_note]),
+    ]
+
+
+class _MixedWidgetProcess(WidgetProcess):
+    transitions = WidgetProcess.transitions + [
+        Transition('archive', sources=['draft'], target='archived',
+                   side_effects=[_note]),
+    ]
+
+
+@override_settings(DJANGO_LOGIC=_SYNC_SETTINGS)
+class BackgroundProbeCostTests(TestCase):
+    """What the gate costs a synchronous transition."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.widget = Widget.objects.create()
+
+    def _queries(self, process, action_name):
+        with CaptureQueriesContext(connection) as queries:
+            getattr(process, action_name)()
+        return [q['sql'] for q in queries.captured_queries]
+
+    def test_a_process_without_background_transitions_is_not_probed(self):
+        # No row can exist for such a process; this one is planted to show
+        # the probe really is skipped.
+        _make_row(self.widget)
+        process = _PlainWidgetProcess(field_name='status', instance=self.widget)
+        sql = self._queries(process, 'cancel')
+        self.assertFalse(
+            [q for q in sql if TransitionMessage._meta.db_table in q])
+        self.widget.refresh_from_db()
+        self.assertEqual(self.widget.status, 'cancelled')
+
+    def test_the_probe_is_an_exists_in_the_state_read(self):
+        process = _MixedWidgetProcess(field_name='status', instance=self.widget)
+        sql = self._queries(process, 'archive')
+        selects = [q for q in sql if q.startswith('SELECT')]
+        self.assertEqual(len(selects), 1)
+        self.assertIn('EXISTS', selects[0])
+        self.assertIn(TransitionMessage._meta.db_table, selects[0])
+
+    def test_a_row_found_by_the_exists_still_blocks(self):
+        _make_row(self.widget)
+        process = _MixedWidgetProcess(field_name='status', instance=self.widget)
+        with self.assertRaises(TransitionTemporarilyUnavailable):
+            process.archive()
+        self.widget.refresh_from_db()
+        self.assertEqual(self.widget.status, 'draft')
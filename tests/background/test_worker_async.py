@@ -0,0 +1,136 @@
+"""``dl_worker --async N`` — attempts in flight on one event loop.
+
+The drain runs on SQLite: the claim and the database steps of each attempt
+run in one executor thread, and the coroutine side-effects overlap on the
+loop. The LISTEN connection needs psycopg 3 and PostgreSQL; without them
+the loop polls.
+"""
+import asyncio
+import threading
+from unittest.mock import patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from django_logic.background.async_worker import run_async_worker
+from django_logic.background.models import TransitionMessage
+from django_logic.testing import open_transition_message
+from tests import dl_settings
+from tests.background.models import Widget, WidgetProcess, bg_ok
+
+_CRITICAL = ['django_logic.critical']
+
+_LEASE_SETTINGS = dl_settings(
+    BACKGROUND_EXECUTION='pull',
+    TRANSITION_MESSAGE_MAX_ERRORS=3,
+    TRANSITION_MESSAGE_RETRY_MINUTES=0,
+    TRANSITION_MESSAGE_LEASE_SECONDS=60,
+)
+
+
+def _row():
+    widget = Widget.objects.create(status='fulfilling')
+    open_transition_message(
+        widget, 'process', 'fulfil', queue_name='django_logic.critical')
+    return widget
+
+
+def _fulfil():
+    return next(t for t in WidgetProcess.transitions if t.action_name == 'fulfil')
+
+
+@override_settings(DJANGO_LOGIC=_LEASE_SETTINGS)
+class AsyncDrainTests(TransactionTestCase):
+    def test_coroutine_side_effects_overlap_and_every_row_completes(self):
+        widgets = [_row() for _ in range(3)]
+        entered, all_in = [], asyncio.Event()
+        plain_threads = set()
+
+        async def call_carrier(instance, **kwargs):
+            # Returns only once every attempt is in its side-effect, so
+            # the drain finishes only if the three overlap.
+            entered.append(instance.pk)
+            if len(entered) == len(widgets):
+                all_in.set()
+            await asyncio.wait_for(all_in.wait(), timeout=10)
+
+        def record_thread(instance, **kwargs):
+            plain_threads.add(threading.current_thread().name)
+
+        with patch.object(_fulfil().side_effects, '_commands',
+                          [call_carrier, record_thread, bg_ok]):
+            run_async_worker(_CRITICAL, in_flight=10, threads=1,
+                             forever=False)
+        self.assertEqual(sorted(entered), [w.pk for w in widgets])
+        self.assertEqual(len(plain_threads), 1)
+        self.assertTrue(plain_threads.pop().startswith('dl_worker'))
+        for widget in widgets:
+            widget.refresh_from_db()
+            self.assertEqual((widget.status, widget.se_log),
+                             ('fulfilled', 'ok,'))
+        self.assertFalse(TransitionMessage.objects.filter(
+            is_completed=False).exists())
+
+    @override_settings(DJANGO_LOGIC=dict(
+        _LEASE_SETTINGS, TRANSITION_MESSAGE_RETRY_MINUTES=2))
+    def test_a_failing_coroutine_side_effect_is_recorded(self):
+        widget = _row()
+
+        async def refuse(instance, **kwargs):
+            raise ConnectionError('carrier down')
+
+        with patch.object(_fulfil().side_effects, '_commands', [refuse]), \
+                self.assertLogs('django-logic', 'ERROR'):
+            run_async_worker(_CRITICAL, in_flight=10, forever=False)
+        row = TransitionMessage.objects.get()
+        self.assertEqual(row.errors_count, 1)
+        self.assertIn('carrier down', row.last_error_message)
+        self.assertEqual(row.lease_owner, '')
+        widget.refresh_from_db()
+        self.assertEqual(widget.status, 'fulfilling')
+
+    def test_every_executor_step_closes_stale_connections(self):
+        widget = _row()
+        steps = []
+
+        def count(*args, **kwargs):
+            steps.append(threading.current_thread().name)
+
+        with patch('django_logic.background.runner.close_old_connections',
+                   side_effect=count):
+            run_async_worker(_CRITICAL, in_flight=10, threads=1,
+                             forever=False)
+        widget.refresh_from_db()
+        self.assertEqual(widget.status, 'fulfilled')
+        # The claims, the attempt's steps and the polls: each closes its
+        # connection before and after, and always in an executor thread.
+        self.assertGreater(len(steps), 2)
+        self.assertEqual(len(steps) % 2, 0)
+        self.assertNotIn(threading.main_thread().name, steps)
+
+
+class AsyncWorkerCommandTests(SimpleTestCase):
+    @override_settings(DJANGO_LOGIC=_LEASE_SETTINGS)
+    def test_async_runs_the_event_loop_worker(self):
+        with patch('django_logic.background.management.commands.'
+                   'dl_worker.run_async_worker') as run:
+            call_command('dl_worker', queues='django_logic.critical',
+                         threads=8, once=True, **{'async': 200})
+        run.assert_called_once_with(
+            _CRITICAL, in_flight=200, threads=8, forever=False,
+            weights={'django_logic.critical': 1})
+
+    @override_settings(DJANGO_LOGIC=dl_settings(BACKGROUND_EXECUTION='pull'))
+    def test_async_needs_lease_mode(self):
+        with self.assertRaisesMessage(CommandError, 'LEASE_SECONDS'):
+            call_command('dl_worker', queues='django_logic.critical',
+                         **{'async': 200})
+        with self.assertRaises(ImproperlyConfigured):
+            run_async_worker(_CRITICAL, in_flight=1, forever=False)
+
+    @override_settings(DJANGO_LOGIC=_LEASE_SETTINGS)
+    def test_async_and_the_pool_options_are_refused_together(self):
+        with self.assertRaisesMessage(CommandError, '--async'):
+            call_command('dl_worker', queues='django_logic.critical',
+                         concurrency=2, **{'async': 200})
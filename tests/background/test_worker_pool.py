@@ -0,0 +1,202 @@
+"""``dl_worker --concurrency N`` — the prefork pool.
+
+The supervisor tests fork real children but replace the attempt, so they
+run on SQLite. The end-to-end drain needs row locks and runs on
+PostgreSQL only, like the other claim tests.
+"""
+import os
+import tempfile
+from unittest.mock import patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+
+from django_logic.background.models import Claim, TransitionMessage
+from django_logic.background.pool import _child_loop, run_pool
+from tests import dl_settings
+from tests.background.models import Widget
+from tests.stability.base import requires_postgres
+
+_CRITICAL = ['django_logic.critical']
+
+_PULL_SETTINGS = dl_settings(
+    BACKGROUND_EXECUTION='pull',
+    TRANSITION_MESSAGE_MAX_ERRORS=3,
+    TRANSITION_MESSAGE_RETRY_MINUTES=0,
+    TRANSITION_MESSAGE_LEASE_SECONDS=60,
+)
+
+
+def _read_all(fd):
+    chunks = []
+    while True:
+        chunk = os.read(fd, 1024)
+        if not chunk:
+            return b''.join(chunks).decode()
+        chunks.append(chunk)
+
+
+class ChildLoopTests(SimpleTestCase):
+    def _run(self, pks, **limits):
+        task_read, task_write = os.pipe()
+        result_read, result_write = os.pipe()
+        os.write(task_write, ''.join(f'{pk} - 0\n' for pk in pks).encode())
+        os.close(task_write)
+        ran = []
+        with patch('django_logic.background.runner.run_background_transition',
+                   side_effect=lambda pk, **kwargs: ran.append(pk)):
+            _child_loop(task_read, result_write,
+                        limits.get('max_tasks'), limits.get('max_memory_kib'))
+        os.close(result_write)
+        return ran, _read_all(result_read)
+
+    def test_the_child_runs_every_pk_until_its_pipe_closes(self):
+        ran, results = self._run([4, 5, 6])
+        self.assertEqual(ran, [4, 5, 6])
+        self.assertEqual(results, '4 0\n5 0\n6 0\n')
+
+    def test_the_child_recycles_after_its_task_limit(self):
+        ran, results = self._run([4, 5, 6], max_tasks=2)
+        self.assertEqual(ran, [4, 5])
+        self.assertEqual(results, '4 0\n5 1\n')
+
+    def test_the_child_recycles_at_its_memory_limit(self):
+        with patch('django_logic.background.pool._peak_memory_kib',
+                   return_value=2048):
+            ran, results = self._run([4, 5], max_memory_kib=1024)
+        self.assertEqual(ran, [4])
+        self.assertEqual(results, '4 1\n')
+
+
+def _attempt(log_path):
+    def run(pk, **kwargs):
+        if pk == 2:
+            os._exit(3)
+        with open(log_path, 'a') as log:
+            log.write(f'{pk} {os.getpid()}\n')
+    return run
+
+
+@override_settings(DJANGO_LOGIC=_PULL_SETTINGS)
+class SupervisorTests(SimpleTestCase):
+    def _run_pool(self, pks, **options):
+        queue = list(pks)
+        log_path = tempfile.mktemp(prefix='dl_pool_')
+        self.addCleanup(lambda: os.path.exists(log_path) and os.remove(log_path))
+        with patch('django_logic.background.pull.claim_next',
+                   side_effect=lambda queues, lease_owner: (
+                       Claim(queue.pop(0), False) if queue else None)), \
+                patch('django_logic.background.pull._run_safety_nets'), \
+                patch('django_logic.background.pull._record_child_death') as death, \
+                patch('django_logic.background.runner.run_background_transition',
+                      side_effect=_attempt(log_path)), \
+                self.assertLogs('django-logic', 'ERROR'):
+            run_pool(_CRITICAL, forever=False, **options)
+        with open(log_path) as log:
+            lines = [line.split() for line in log]
+        return death, {int(pk): int(pid) for pk, pid in lines}
+
+    def test_a_death_is_recorded_on_its_row_and_the_pool_drains(self):
+        death, ran = self._run_pool([1, 2, 3, 4, 5], concurrency=2)
+        death.assert_called_once_with(2, 3)
+        self.assertEqual(sorted(ran), [1, 3, 4, 5])
+
+    def test_children_are_recycled_after_their_task_limit(self):
+        _death, ran = self._run_pool(
+            [1, 2, 3, 4], concurrency=1, max_tasks_per_child=1)
+        self.assertEqual(sorted(ran), [1, 3, 4])
+        self.assertEqual(len(set(ran.values())), 3)
+
+    @override_settings(DJANGO_LOGIC=dl_settings(BACKGROUND_EXECUTION='pull'))
+    def test_the_pool_needs_lease_mode(self):
+        with self.assertRaisesMessage(ImproperlyConfigured,
+                                      'TRANSITION_MESSAGE_LEASE_SECONDS'):
+            run_pool(_CRITICAL, concurrency=2, forever=False)
+
+
+@override_settings(DJANGO_LOGIC=_PULL_SETTINGS)
+class SupervisorClaimTests(TestCase):
+    def test_each_row_goes_to_one_child(self):
+        # The real claim against the table: the lease takes a claimed row
+        # out of the claimable set, so no second child gets it. The
+        # attempt never completes its row.
+        widgets = [Widget.objects.create(status='fulfilling') for _ in range(4)]
+        for widget in widgets:
+            TransitionMessage.objects.create(
+                app_label='bg_tests', model_name='widget',
+                instance_id=widget.pk, process_name='process',
+                transition_name='fulfil', queue_name=_CRITICAL[0])
+        log_path = tempfile.mktemp(prefix='dl_pool_')
+        self.addCleanup(lambda: os.path.exists(log_path) and os.remove(log_path))
+
+        def attempt(pk, **kwargs):
+            with open(log_path, 'a') as log:
+                log.write(f'{pk}\n')
+
+        with patch('django_logic.background.pull._run_safety_nets'), \
+                patch('django_logic.background.runner.run_background_transition',
+                      side_effect=attempt):
+            run_pool(_CRITICAL, concurrency=3, forever=False)
+        with open(log_path) as log:
+            ran = [int(line) for line in log]
+        self.assertEqual(sorted(ran), sorted(
+            TransitionMessage.objects.values_list('pk', flat=True)))
+
+
+@override_settings(DJANGO_LOGIC=_PULL_SETTINGS)
+class WorkerCommandTests(SimpleTestCase):
+    def test_without_pool_options_the_serial_loop_runs(self):
+        with patch('django_logic.background.management.commands.'
+                   'dl_worker.run_worker') as run_worker:
+            call_command('dl_worker', queues='django_logic.critical', once=True)
+        run_worker.assert_called_once_with(
+            _CRITICAL, forever=False, weights={'django_logic.critical': 1})
+
+    def test_concurrency_runs_the_pool(self):
+        with patch('django_logic.background.management.commands.'
+                   'dl_worker.run_pool') as pool:
+            call_command('dl_worker', queues='django_logic.critical',
+                         concurrency=4, max_tasks_per_child=100)
+        pool.assert_called_once_with(
+            _CRITICAL, concurrency=4, max_tasks_per_child=100,
+            max_memory_per_child=None, forever=True,
+            weights={'django_logic.critical': 1})
+
+    @override_settings(DJANGO_LOGIC=dl_settings(BACKGROUND_EXECUTION='pull'))
+    def test_concurrency_without_lease_mode_is_refused(self):
+        with self.assertRaisesMessage(CommandError, 'lease mode'):
+            call_command('dl_worker', queues='django_logic.critical',
+                         concurrency=4)
+
+    def test_a_limit_below_one_is_refused(self):
+        with self.assertRaisesMessage(CommandError, '--concurrency'):
+            call_command('dl_worker', queues='django_logic.critical',
+                         concurrency=0)
+
+
+@override_settings(DJANGO_LOGIC=_PULL_SETTINGS)
+@requires_postgres
+class PoolDrainTests(TransactionTestCase):
+    databases = '__all__'
+
+    def test_the_pool_drains_real_rows_and_counts_a_crash(self):
+        widgets = [Widget.objects.create(status='draft') for _ in range(3)]
+        for widget in widgets:
+            widget.process.fulfil()
+        dying = Widget.objects.create(status='draft')
+        dying.process.die_once(marker_path=tempfile.mktemp(prefix='dl_die_'))
+        with self.assertLogs('django-logic', 'ERROR'):
+            run_pool(_CRITICAL, concurrency=2, forever=False)
+        for widget in widgets:
+            widget.refresh_from_db()
+            self.assertEqual(widget.status, 'fulfilled')
+        dying.refresh_from_db()
+        self.assertEqual(dying.status, 'survived')
+        row = TransitionMessage.objects.get(instance_id=str(dying.pk))
+        self.assertEqual(row.errors_count, 1)
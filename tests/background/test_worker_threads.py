@@ -0,0 +1,148 @@
+"""``dl_worker --threads N`` — attempts on a thread pool.
+
+The loop tests replace the attempt, so they run on SQLite.
+The end-to-end drain needs row locks and runs on PostgreSQL only, like the
+other claim tests.
+"""
+import threading
+from unittest.mock import patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+
+from django_logic.background.models import Claim, TransitionMessage
+from django_logic.background.threads import run_threads
+from tests import dl_settings
+from tests.background.models import Widget
+from tests.stability.base import requires_postgres
+
+_CRITICAL = ['django_logic.critical']
+
+_PULL_SETTINGS = dl_settings(
+    BACKGROUND_EXECUTION='pull',
+    TRANSITION_MESSAGE_MAX_ERRORS=3,
+    TRANSITION_MESSAGE_RETRY_MINUTES=0,
+    TRANSITION_MESSAGE_LEASE_SECONDS=60,
+)
+
+
+@override_settings(DJANGO_LOGIC=_PULL_SETTINGS)
+class ThreadLoopTests(SimpleTestCase):
+    def _run_threads(self, pks, attempt, threads):
+        queue = list(pks)
+        with patch('django_logic.background.pull.claim_next',
+                   side_effect=lambda queues, lease_owner: (
+                       Claim(queue.pop(0), False) if queue else None)), \
+                patch('django_logic.background.pull._run_safety_nets'), \
+                patch('django_logic.background.pull.wait_seconds',
+                      return_value=0.05), \
+                patch('django_logic.background.runner.run_background_transition',
+                      side_effect=attempt):
+            run_threads(_CRITICAL, threads=threads, forever=False)
+
+    def test_attempts_run_at_the_same_time_on_their_own_threads(self):
+        # Each attempt waits for a second one, so the run finishes only if
+        # two attempts are open at once.
+        both_running = threading.Barrier(2, timeout=10)
+        ran = {}
+
+        def attempt(pk, **kwargs):
+            both_running.wait()
+            ran[pk] = threading.current_thread().name
+
+        self._run_threads([1, 2, 3, 4], attempt, threads=2)
+        self.assertEqual(sorted(ran), [1, 2, 3, 4])
+        self.assertEqual(len(set(ran.values())), 2)
+        self.assertTrue(all(name.startswith('dl_worker')
+                            for name in ran.values()))
+
+    def test_a_raising_attempt_is_logged_and_the_rest_run(self):
+        ran = []
+
+        def attempt(pk, **kwargs):
+            if pk == 2:
+                raise RuntimeError('connection reset')
+            ran.append(pk)
+
+        with self.assertLogs('django-logic', 'ERROR') as logs:
+            self._run_threads([1, 2, 3], attempt, threads=2)
+        self.assertEqual(sorted(ran), [1, 3])
+        self.assertIn('TransitionMessage#2 raised RuntimeError',
+                      '\n'.join(logs.output))
+
+    @override_settings(DJANGO_LOGIC=dl_settings(BACKGROUND_EXECUTION='pull'))
+    def test_the_threads_need_lease_mode(self):
+        with self.assertRaisesMessage(ImproperlyConfigured,
+                                      'TRANSITION_MESSAGE_LEASE_SECONDS'):
+            run_threads(_CRITICAL, threads=2, forever=False)
+
+
+@override_settings(DJANGO_LOGIC=_PULL_SETTINGS)
+class ThreadClaimTests(TestCase):
+    def test_each_row_goes_to_one_thread(self):
+        # The real claim against the table: the lease takes a claimed row
+        # out of the claimable set, so no second thread gets it. The
+        # attempt never completes its row.
+        widgets = [Widget.objects.create(status='fulfilling') for _ in range(4)]
+        for widget in widgets:
+            TransitionMessage.objects.create(
+                app_label='bg_tests', model_name='widget',
+                instance_id=widget.pk, process_name='process',
+                transition_name='fulfil', queue_name=_CRITICAL[0])
+        ran = []
+        with patch('django_logic.background.pull._run_safety_nets'), \
+                patch('django_logic.background.runner.run_background_transition',
+                      side_effect=lambda pk, **kwargs: ran.append(pk)):
+            run_threads(_CRITICAL, threads=3, forever=False)
+        self.assertEqual(sorted(ran), sorted(
+            TransitionMessage.objects.values_list('pk', flat=True)))
+
+
+@override_settings(DJANGO_LOGIC=_PULL_SETTINGS)
+class WorkerThreadsCommandTests(SimpleTestCase):
+    def test_threads_run_the_thread_pool(self):
+        with patch('django_logic.background.management.commands.'
+                   'dl_worker.run_threads') as run:
+            call_command('dl_worker', queues='django_logic.critical',
+                         threads=16, once=True)
+        run.assert_called_once_with(
+            _CRITICAL, threads=16, forever=False, weights={'django_logic.critical': 1})
+
+    def test_threads_and_the_pool_options_are_refused_together(self):
+        with self.assertRaisesMessage(CommandError, '--threads'):
+            call_command('dl_worker', queues='django_logic.critical',
+                         threads=4, concurrency=2)
+
+    @override_settings(DJANGO_LOGIC=dl_settings(BACKGROUND_EXECUTION='pull'))
+    def test_threads_without_lease_mode_are_refused(self):
+        with self.assertRaisesMessage(CommandError, 'lease mode'):
+            call_command('dl_worker', queues='django_logic.critical',
+                         threads=4)
+
+    def test_threads_below_one_are_refused(self):
+        with self.assertRaisesMessage(CommandError, '--threads'):
+            call_command('dl_worker', queues='django_logic.critical',
+                         threads=0)
+
+
+@override_settings(DJANGO_LOGIC=_PULL_SETTINGS)
+@requires_postgres
+class ThreadDrainTests(TransactionTestCase):
+    databases = '__all__'
+
+    def test_the_threads_drain_real_rows(self):
+        widgets = [Widget.objects.create(status='draft') for _ in range(6)]
+        for widget in widgets:
+            widget.process.fulfil()
+        run_threads(_CRITICAL, threads=3, forever=False)
+        for widget in widgets:
+            widget.refresh_from_db()
+            self.assertEqual(widget.status, 'fulfilled')
+        self.assertFalse(
+            TransitionMessage.objects.filter(is_completed=False).exists())
@@ -25,3 +25,10 @@ class MtiParent(models.Model):
 
 class MtiChild(MtiParent):
     extra = models.CharField(max_length=32, blank=True)
+
+
+class Ticket(models.Model):
+    """A state field next to a version column, for optimistic transitions
+    that also compare a version."""
+    status = models.CharField(max_length=16, default='open')
+    version = models.PositiveIntegerField(default=0)
@@ -330,7 +330,7 @@ class TestCacheBackendFailure(StabilityTestCase):
         """If cache.add raises (Redis down), the transition should not proceed."""
         order = Order.objects.create(status='approved')
 
-        with patch('django_logic.state.cache') as mock_cache:
+        with patch('django_logic.locks.cache') as mock_cache:
             mock_cache.add.side_effect = ConnectionError("Redis connection refused")
             mock_cache.get.side_effect = ConnectionError("Redis connection refused")
 
@@ -345,7 +345,7 @@ class TestCacheBackendFailure(StabilityTestCase):
         """
         order = Order.objects.create(status='approved')
 
-        with patch('django_logic.state.cache') as mock_cache:
+        with patch('django_logic.locks.cache') as mock_cache:
             mock_cache.get.side_effect = ConnectionError("Redis down")
             state = State(order, 'status', process_name='process')
 
@@ -366,13 +366,13 @@ class TestCacheBackendFailure(StabilityTestCase):
         self.track_lock(state)
 
         # Failure at the ownership read.
-        with patch('django_logic.state.cache') as mock_cache:
+        with patch('django_logic.locks.cache') as mock_cache:
             mock_cache.get.side_effect = ConnectionError("Redis down")
             with self.assertRaises(ConnectionError):
                 state.unlock()
 
         # Failure at the delete (ownership read succeeds).
-        with patch('django_logic.state.cache') as mock_cache:
+        with patch('django_logic.locks.cache') as mock_cache:
             mock_cache.get.return_value = state._lock_token
             mock_cache.delete.side_effect = ConnectionError("Redis down")
             with self.assertRaises(ConnectionError):
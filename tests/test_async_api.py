@@ -0,0 +1,155 @@
+"""The async API — ``await instance.process.a<action_name>()``.
+
+The lock goes through the backend's async methods and the state read and
+write through the async ORM. Coroutine hooks are awaited; plain hooks run
+in a worker thread. The sync API runs coroutine hooks too.
+"""
+import inspect
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from django_logic.exceptions import TransitionNotAllowed
+from django_logic.locks import CacheLockBackend
+from django_logic.process import Process, ProcessManager
+from django_logic.transition import Action, Transition
+from tests.models import Invoice, Ticket
+
+CALLS = []
+
+
+async def async_side_effect(instance, **kwargs):
+    CALLS.append(f'async_side_effect:{instance.status}')
+
+
+def sync_side_effect(instance, **kwargs):
+    CALLS.append('sync_side_effect')
+
+
+async def async_callback(instance, **kwargs):
+    CALLS.append(f'async_callback:{instance.status}')
+
+
+async def async_explode(instance, **kwargs):
+    raise ValueError('boom')
+
+
+async def async_failing_callback(instance, **kwargs):
+    raise RuntimeError('ignored')
+
+
+async def is_customer_received(instance, **kwargs):
+    return instance.customer_received
+
+
+class _AsyncProcess(Process):
+    process_name = 'async_process'
+    transitions = [
+        Transition('send', sources=['draft'], target='sent',
+                   side_effects=[async_side_effect, sync_side_effect],
+                   callbacks=[async_callback]),
+        Transition('pay', sources=['draft'], target='paid',
+                   side_effects=[async_explode], failed_state='failed'),
+        Transition('void', sources=['draft'], target='void',
+                   conditions=[is_customer_received]),
+        Action('remind', sources=['draft'],
+               callbacks=[async_failing_callback, async_callback]),
+    ]
+
+
+class _OptimisticAsyncProcess(Process):
+    process_name = 'optimistic_async_process'
+    optimistic = True
+    version_field = 'version'
+    transitions = [Transition('close', sources=['open'], target='closed')]
+
+
+class AsyncApiTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        CALLS.clear()
+        cache.clear()
+        ProcessManager.bind_model_process(
+            Invoice, _AsyncProcess, state_field='status')
+        self.addCleanup(
+            ProcessManager.unbind_model_process, Invoice, _AsyncProcess)
+        self.invoice = Invoice.objects.create(status='draft')
+
+    async def test_an_async_action_runs_the_transition(self):
+        with patch.object(CacheLockBackend, 'acquire') as acquire:
+            tr_id = await self.invoice.async_process.asend()
+        acquire.assert_not_called()
+        self.assertIsNotNone(tr_id)
+        self.assertEqual(self.invoice.status, 'sent')
+        self.assertEqual(
+            (await Invoice.objects.aget(pk=self.invoice.pk)).status, 'sent')
+        self.assertEqual(CALLS, [
+            'async_side_effect:draft', 'sync_side_effect',
+            'async_callback:sent',
+        ])
+        self.assertFalse(await self.invoice.async_process.state.ais_locked())
+
+    async def test_a_locked_state_is_refused(self):
+        process = self.invoice.async_process
+        self.assertTrue(await process.state.alock())
+        with self.assertRaisesMessage(TransitionNotAllowed, 'locked'):
+            await process.asend()
+        self.assertEqual(CALLS, [])
+
+    async def test_a_moved_row_is_refused_and_unlocked(self):
+        await Invoice.objects.filter(pk=self.invoice.pk).aupdate(status='void')
+        process = self.invoice.async_process
+        with self.assertRaises(TransitionNotAllowed):
+            await process.asend()
+        self.assertFalse(await process.state.ais_locked())
+        self.assertEqual(CALLS, [])
+
+    async def test_a_failing_side_effect_writes_failed_state(self):
+        process = self.invoice.async_process
+        with self.assertRaisesMessage(ValueError, 'boom'):
+            await process.apay()
+        self.assertEqual(
+            (await Invoice.objects.aget(pk=self.invoice.pk)).status, 'failed')
+        self.assertFalse(await process.state.ais_locked())
+
+    async def test_a_failing_callback_does_not_stop_the_next(self):
+        with self.assertLogs('django-logic.transition', 'ERROR') as logs:
+            await self.invoice.async_process.aremind()
+        self.assertIn('ignored', logs.output[0])
+        self.assertEqual(self.invoice.status, 'draft')
+        self.assertEqual(CALLS, ['async_callback:draft'])
+
+    async def test_available_actions_run_async_conditions(self):
+        process = self.invoice.async_process
+        self.assertEqual(
+            await process.aget_available_actions(), ['pay', 'remind', 'send'])
+        self.invoice.customer_received = True
+        self.assertEqual(
+            await process.aget_available_actions(),
+            ['pay', 'remind', 'send', 'void'])
+
+    async def test_an_optimistic_process_runs_through_the_async_api(self):
+        ticket = await Ticket.objects.acreate()
+        process = _OptimisticAsyncProcess(field_name='status', instance=ticket)
+        await process.aclose()
+        await ticket.arefresh_from_db()
+        self.assertEqual((ticket.status, ticket.version), ('closed', 1))
+
+    def test_the_sync_api_runs_coroutine_hooks(self):
+        self.invoice.async_process.send()
+        self.assertEqual(CALLS, [
+            'async_side_effect:draft', 'sync_side_effect',
+            'async_callback:sent',
+        ])
+
+    def test_only_a_declared_action_gets_an_async_form(self):
+        process = self.invoice.async_process
+        self.assertTrue(inspect.iscoroutinefunction(process.asend))
+        self.assertTrue(process.asend.alters_data)
+        self.assertFalse(inspect.iscoroutinefunction(process.send))
+        self.assertFalse(inspect.iscoroutinefunction(process.archive))
+
+    async def test_positional_arguments_are_refused(self):
+        with self.assertRaisesMessage(TypeError, 'keyword arguments only'):
+            await self.invoice.async_process.asend(None)
@@ -0,0 +1,103 @@
+"""``Process.available_actions_for`` — the available actions of many
+instances in one call.
+
+A list page used to call ``get_available_actions`` per row, which costs one
+lock read per row and level. These pin that the bulk answer matches the
+per-instance one, and that the locks are read with a single cache call.
+"""
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+
+from django_logic.process import Process, ProcessManager
+from django_logic.state import State
+from django_logic.transition import Transition
+from tests.models import Invoice
+
+
+def _is_available(instance, **kwargs):
+    return instance.is_available
+
+
+class _Nested(Process):
+    conditions = [_is_available]
+    transitions = [Transition('archive', sources=['sent'], target='archived')]
+
+
+class _ListProcess(Process):
+    process_name = 'list_process'
+    nested_processes = [_Nested]
+    transitions = [
+        Transition('send', sources=['draft'], target='sent'),
+        Transition('void', sources=['draft', 'sent'], target='void'),
+    ]
+
+
+class BulkAvailableActionsTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        ProcessManager.bind_model_process(
+            Invoice, _ListProcess, state_field='status')
+        self.addCleanup(
+            ProcessManager.unbind_model_process, Invoice, _ListProcess)
+        self.addCleanup(cache.clear)
+        self.invoices = [
+            Invoice.objects.create(status='draft'),
+            Invoice.objects.create(status='sent'),
+            Invoice.objects.create(status='sent', is_available=False),
+            Invoice.objects.create(status='void'),
+        ]
+
+    def test_matches_the_per_instance_answer(self):
+        expected = {
+            invoice.pk: invoice.list_process.get_available_actions()
+            for invoice in self.invoices
+        }
+        self.assertEqual(
+            _ListProcess.available_actions_for(Invoice.objects.all()), expected)
+        self.assertEqual(expected[self.invoices[1].pk], ['archive', 'void'])
+        self.assertEqual(expected[self.invoices[2].pk], ['void'])
+
+    def test_a_locked_instance_has_no_actions(self):
+        self.invoices[0].list_process.state.lock()
+        result = _ListProcess.available_actions_for(self.invoices)
+        self.assertEqual(result[self.invoices[0].pk], [])
+        self.assertEqual(result[self.invoices[1].pk], ['archive', 'void'])
+
+    def test_locks_are_read_with_one_cache_call(self):
+        with patch('django_logic.locks.cache.get_many',
+                   wraps=cache.get_many) as get_many, \
+                patch.object(State, 'is_locked') as is_locked:
+            _ListProcess.available_actions_for(self.invoices)
+        self.assertEqual(get_many.call_count, 1)
+        # The 'void' row has no candidate, so its lock is never asked for.
+        self.assertEqual(len(get_many.call_args.args[0]), 3)
+        is_locked.assert_not_called()
+
+    def test_an_empty_input_returns_an_empty_dict(self):
+        self.assertEqual(_ListProcess.available_actions_for([]), {})
+
+    def test_an_unbound_class_needs_a_field_name(self):
+        class _Unbound(Process):
+            transitions = [Transition('send', sources=['draft'], target='sent')]
+
+        with self.assertRaisesMessage(ImproperlyConfigured, 'field_name='):
+            _Unbound.available_actions_for(self.invoices)
+        self.assertEqual(
+            _Unbound.available_actions_for(self.invoices, field_name='status')
+            [self.invoices[0].pk],
+            ['send'],
+        )
+
+    def test_a_state_class_with_its_own_is_locked_is_asked_directly(self):
+        class _AlwaysLocked(State):
+            def is_locked(self):
+                return True
+
+        states = [
+            _AlwaysLocked(self.invoices[0], 'status'),
+            State(self.invoices[1], 'status'),
+        ]
+        self.assertEqual(State.is_locked_many(states), [True, False])
@@ -0,0 +1,152 @@
+"""``Process.bulk_transition`` — one action over many instances.
+
+The locks are taken in one backend pass and the persisted states re-read
+with one SELECT. A transition without side-effects writes every target with
+one UPDATE. Each row's outcome comes back in a ``BulkTransitionResult``.
+"""
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from django_logic.bulk import BulkTransitionResult
+from django_logic.locks import CacheLockBackend
+from django_logic.process import Process, ProcessManager
+from django_logic.state import State
+from django_logic.transition import Action, Transition
+from tests.models import Invoice
+
+CALLS = []
+
+
+def record_side_effect(instance, **kwargs):
+    CALLS.append(('side_effect', instance.pk))
+
+
+def explode_on_flagged(instance, **kwargs):
+    if not instance.is_available:
+        raise ValueError('boom')
+
+
+def record_callback(instance, **kwargs):
+    CALLS.append(('callback', instance.pk, instance.status))
+
+
+def is_customer_received(instance, **kwargs):
+    return instance.customer_received
+
+
+class _BulkProcess(Process):
+    process_name = 'bulk_process'
+    transitions = [
+        Transition('release', sources=['approved'], target='released',
+                   callbacks=[record_callback]),
+        Transition('ship', sources=['released'], target='shipped',
+                   side_effects=[record_side_effect, explode_on_flagged],
+                   failed_state='failed'),
+        Transition('confirm', sources=['approved'], target='confirmed',
+                   conditions=[is_customer_received]),
+        Action('ping', sources=['approved'], callbacks=[record_callback]),
+    ]
+
+
+class BulkTransitionTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        CALLS.clear()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        ProcessManager.bind_model_process(
+            Invoice, _BulkProcess, state_field='status')
+        self.addCleanup(
+            ProcessManager.unbind_model_process, Invoice, _BulkProcess)
+
+    def _make(self, *statuses, **fields):
+        return [Invoice.objects.create(status=status, **fields)
+                for status in statuses]
+
+    def _statuses(self):
+        return dict(Invoice.objects.values_list('pk', 'status'))
+
+    def test_a_plain_edge_moves_every_row_with_one_update(self):
+        invoices = self._make('approved', 'approved', 'approved')
+        table = Invoice._meta.db_table
+        with CaptureQueriesContext(connection) as queries:
+            result = _BulkProcess.bulk_transition(
+                Invoice.objects.all(), 'release')
+        statements = [
+            query['sql'].split()[0] for query in queries.captured_queries
+            if table in query['sql']
+        ]
+        self.assertEqual(statements, ['SELECT', 'SELECT', 'UPDATE'])
+        self.assertEqual(sorted(result.moved), [i.pk for i in invoices])
+        self.assertEqual(len(result), 3)
+        self.assertEqual(set(self._statuses().values()), {'released'})
+        self.assertEqual(
+            sorted(CALLS), [('callback', i.pk, 'released') for i in invoices])
+        self.assertEqual(State.is_locked_many(
+            [State(i, 'status') for i in invoices]), [False] * 3)
+
+    def test_the_locks_are_taken_and_released_in_one_pass(self):
+        self._make('approved', 'approved')
+        with patch.object(CacheLockBackend, 'acquire_many',
+                          autospec=True,
+                          side_effect=CacheLockBackend.acquire_many) as acquire, \
+                patch('django_logic.locks.cache.delete_many',
+                      wraps=cache.delete_many) as delete_many:
+            _BulkProcess.bulk_transition(Invoice.objects.all(), 'release')
+        self.assertEqual(acquire.call_count, 1)
+        self.assertEqual(delete_many.call_count, 1)
+
+    def test_outcomes_are_reported_per_row(self):
+        moved, held, wrong = self._make('approved', 'approved', 'approved')
+        refused, = self._make('approved')
+        State(held, 'status').lock()
+        Invoice.objects.filter(pk=wrong.pk).update(status='void')
+        result = _BulkProcess.bulk_transition(
+            [moved, held, wrong], 'release')
+        self.assertEqual(result.moved, [moved.pk])
+        self.assertEqual(result.locked, [held.pk])
+        self.assertEqual(result.wrong_state, [wrong.pk])
+        self.assertEqual(self._statuses()[wrong.pk], 'void')
+
+        result = _BulkProcess.bulk_transition([refused, moved], 'confirm')
+        self.assertEqual(set(result.refused), {refused.pk, moved.pk})
+        self.assertEqual(result.moved, [])
+
+    def test_side_effects_run_per_row_and_a_failure_stays_in_its_row(self):
+        good, bad = self._make('released', 'released')
+        Invoice.objects.filter(pk=bad.pk).update(is_available=False)
+        with self.assertLogs('django-logic.transition', 'ERROR'):
+            result = _BulkProcess.bulk_transition(
+                Invoice.objects.all(), 'ship')
+        self.assertEqual(result.moved, [good.pk])
+        self.assertEqual(list(result.failed), [bad.pk])
+        self.assertIsInstance(result.failed[bad.pk], ValueError)
+        self.assertEqual(
+            self._statuses(), {good.pk: 'shipped', bad.pk: 'failed'})
+        self.assertEqual(
+            CALLS, [('side_effect', good.pk), ('side_effect', bad.pk)])
+
+    def test_an_action_runs_row_by_row(self):
+        first, second = self._make('approved', 'approved')
+        result = _BulkProcess.bulk_transition(Invoice.objects.all(), 'ping')
+        self.assertEqual(sorted(result.moved), [first.pk, second.pk])
+        self.assertEqual(set(self._statuses().values()), {'approved'})
+
+    def test_an_empty_input_returns_an_empty_result(self):
+        self.assertEqual(
+            _BulkProcess.bulk_transition(Invoice.objects.none(), 'release'),
+            BulkTransitionResult(),
+        )
+
+    def test_each_row_gets_its_own_tr_id(self):
+        self._make('approved', 'approved')
+        seen = []
+        with patch.object(Transition, '_log_start', autospec=True,
+                          side_effect=lambda self, state, kwargs, suffix='':
+                          seen.append(kwargs['tr_id'])):
+            _BulkProcess.bulk_transition(Invoice.objects.all(), 'release')
+        self.assertEqual(len(set(seen)), 2)
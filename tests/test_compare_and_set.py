@@ -0,0 +1,169 @@
+"""Compare-and-set state writes.
+
+Where the model allows it, a synchronous transition writes its target with
+one ``UPDATE ... WHERE pk = ? AND state IN (sources)``. That statement is
+also the revalidation: a transition without side-effects issues no SELECT
+at all, and nothing re-reads the row after the write. A model with a
+``save()`` override or save-signal receivers keeps the ``save()`` path.
+"""
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Model
+from django.db.models.signals import post_save
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from django_logic.exceptions import TransitionNotAllowed
+from django_logic.state import State
+from django_logic.transition import Transition
+from tests.models import Invoice, MtiChild, MtiParent
+from tests.stability.base import requires_postgres
+
+
+def _noop(instance, **kwargs):
+    pass
+
+
+class _SaveOnlyState(State):
+    compare_and_set_writes = False
+
+
+class CompareAndSetTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.invoice = Invoice.objects.create(status='draft')
+
+    def _invoice_queries(self, transition, state_class=State):
+        state = state_class(self.invoice, 'status')
+        with CaptureQueriesContext(connection) as queries:
+            transition.change_state(state)
+        table = Invoice._meta.db_table
+        return [
+            query['sql'].split()[0] for query in queries.captured_queries
+            if table in query['sql']
+        ]
+
+    def test_a_plain_edge_writes_with_one_update(self):
+        transition = Transition('send', sources=['draft'], target='sent')
+        self.assertEqual(self._invoice_queries(transition), ['UPDATE'])
+        self.assertEqual(self.invoice.status, 'sent')
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.status, 'sent')
+
+    def test_side_effects_keep_the_read_before_they_run(self):
+        transition = Transition(
+            'send', sources=['draft'], target='sent', side_effects=[_noop])
+        self.assertEqual(
+            self._invoice_queries(transition), ['SELECT', 'UPDATE'])
+
+    def test_a_moved_row_refuses_and_releases_the_lock(self):
+        Invoice.objects.filter(pk=self.invoice.pk).update(status='void')
+        state = State(self.invoice, 'status')
+        transition = Transition('send', sources=['draft'], target='sent')
+        with self.assertRaisesMessage(TransitionNotAllowed, 'no longer'):
+            transition.change_state(state)
+        self.assertFalse(state.is_locked())
+        self.assertEqual(self.invoice.status, 'draft')
+        self.assertEqual(state.get_persisted_state(), 'void')
+
+    def test_a_save_override_keeps_the_save_path(self):
+        with patch.object(Invoice, 'save', autospec=True,
+                          side_effect=Model.save) as save:
+            queries = self._invoice_queries(
+                Transition('send', sources=['draft'], target='sent'))
+        save.assert_called_once()
+        self.assertEqual(queries, ['SELECT', 'UPDATE', 'SELECT'])
+
+    def test_a_save_receiver_keeps_the_save_path(self):
+        received = []
+
+        def receiver(sender, instance, **kwargs):
+            received.append(instance.status)
+
+        post_save.connect(receiver, sender=Invoice)
+        self.addCleanup(post_save.disconnect, receiver, sender=Invoice)
+        Transition('send', sources=['draft'], target='sent').change_state(
+            State(self.invoice, 'status'))
+        self.assertEqual(received, ['sent'])
+
+    def test_a_state_class_can_opt_out(self):
+        queries = self._invoice_queries(
+            Transition('send', sources=['draft'], target='sent'),
+            state_class=_SaveOnlyState,
+        )
+        self.assertEqual(queries, ['SELECT', 'UPDATE', 'SELECT'])
+
+    def test_set_state_with_sources_reports_a_miss_on_either_path(self):
+        for state_class in (State, _SaveOnlyState):
+            with self.subTest(state_class=state_class.__name__):
+                state = state_class(self.invoice, 'status')
+                self.assertFalse(state.set_state('sent', sources=['void']))
+                self.assertEqual(self.invoice.status, 'draft')
+
+    def test_the_written_value_is_the_one_a_read_returns(self):
+        field = Invoice._meta.get_field('status')
+        with patch.object(field, 'from_db_value', create=True,
+                          side_effect=lambda value, *args: value.upper()):
+            state = State(self.invoice, 'status')
+            self.assertTrue(state.set_state('sent', sources=['draft']))
+            self.assertEqual(self.invoice.status,
+                             Invoice.objects.get(pk=self.invoice.pk).status)
+        self.assertEqual(self.invoice.status, 'SENT')
+
+    def test_empty_sources_match_nothing(self):
+        for state_class in (State, _SaveOnlyState):
+            with self.subTest(state_class=state_class.__name__):
+                state = state_class(self.invoice, 'status')
+                with self.assertNumQueries(0 if state_class is State else 1):
+                    self.assertFalse(state.set_state('sent', sources=[]))
+                self.assertEqual(state.get_persisted_state(), 'draft')
+
+    def test_a_miss_after_side_effects_runs_the_failure_path(self):
+        failures = []
+
+        def move_the_row(instance, **kwargs):
+            Invoice.objects.filter(pk=instance.pk).update(status='void')
+
+        def on_failure(instance, exception, **kwargs):
+            failures.append(exception)
+
+        transition = Transition(
+            'send', sources=['draft'], target='sent', failed_state='failed',
+            side_effects=[move_the_row], failure_callbacks=[on_failure])
+        state = State(self.invoice, 'status')
+        with self.assertRaises(TransitionNotAllowed) as raised:
+            transition.change_state(state)
+        self.assertEqual(failures, [raised.exception])
+        self.assertFalse(state.is_locked())
+        # failed_state would replace the state the other write set.
+        self.assertEqual(state.get_persisted_state(), 'void')
+        self.assertEqual(self.invoice.status, 'draft')
+
+
+@requires_postgres
+class MultiTableCompareAndSetTests(TestCase):
+    """The state field of an MTI child lives in the parent's table."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.child = MtiChild.objects.create(status='draft')
+
+    def test_the_update_targets_the_parents_table(self):
+        state = State(self.child, 'status')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(state.set_state('sent', sources=['draft']))
+        [update] = [query['sql'] for query in queries.captured_queries]
+        self.assertIn(MtiParent._meta.db_table, update)
+        self.assertEqual(MtiParent.objects.get(pk=self.child.pk).status,
+                         'sent')
+        self.assertEqual(self.child.status, 'sent')
+
+    def test_a_moved_parent_row_is_a_miss(self):
+        MtiParent.objects.filter(pk=self.child.pk).update(status='void')
+        self.assertFalse(
+            State(self.child, 'status').set_state('sent', sources=['draft']))
+        self.assertEqual(self.child.status, 'draft')
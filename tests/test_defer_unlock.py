@@ -217,10 +217,10 @@ class DeferUnlockUntilCommitTests(TestCase):
         lock until TTL when the outer transaction rolls back."""
         original = State.set_state
 
-        def failing_target(state_self, value):
+        def failing_target(state_self, value, **kwargs):
             if value == 'done_plain':
                 raise RuntimeError('target write failed')
-            return original(state_self, value)
+            return original(state_self, value, **kwargs)
 
         with mock.patch.object(State, 'set_state', failing_target):
             with self.assertRaises(RuntimeError):
@@ -232,10 +232,10 @@ class DeferUnlockUntilCommitTests(TestCase):
     def test_failed_target_write_without_prior_write_unlocks_immediately(self):
         original = State.set_state
 
-        def failing_target(state_self, value):
+        def failing_target(state_self, value, **kwargs):
             if value == 'approved':
                 raise RuntimeError('target write failed')
-            return original(state_self, value)
+            return original(state_self, value, **kwargs)
 
         with mock.patch.object(State, 'set_state', failing_target):
             with self.assertRaises(RuntimeError):
@@ -0,0 +1,156 @@
+"""The compiled dispatch index on ``Process``.
+
+Action resolution, ``get_available_*`` and worker restore read per-class
+lookup tables instead of walking ``nested_processes`` on every call. These
+pin what the tables must preserve: the walk's order and deduplication, the
+process-level guards along the path, and a rebuild when a class's
+``transitions`` or ``nested_processes`` changes after the class exists.
+"""
+from django.test import TestCase
+
+from django_logic.process import Process
+from django_logic.transition import Transition
+from tests.models import Invoice
+
+
+_built = []
+
+
+class _CountingProcess(Process):
+    """Records every construction, so a test can see which levels a lookup
+    instantiated."""
+
+    def __init__(self, *args, **kwargs):
+        _built.append(type(self).__name__)
+        super().__init__(*args, **kwargs)
+
+
+class _LeafA(_CountingProcess):
+    transitions = [Transition('leaf_a', sources=['draft'], target='a')]
+
+
+class _LeafB(_CountingProcess):
+    transitions = [Transition('leaf_b', sources=['sent'], target='b')]
+
+
+def _gate_closed(instance, **kwargs):
+    return False
+
+
+class _GuardedLeaf(_CountingProcess):
+    conditions = [_gate_closed]
+    nested_processes = [_LeafB]
+    transitions = [Transition('guarded', sources=['draft'], target='g')]
+
+
+class _Root(_CountingProcess):
+    nested_processes = [_LeafA, _GuardedLeaf, _LeafA]
+    transitions = [
+        Transition('root_go', sources=['draft'], target='done'),
+        Transition('root_send', sources=['draft', 'sent'], target='sent'),
+    ]
+
+
+class DispatchIndexTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        _built.clear()
+
+    def _process(self, status='draft', process_cls=_Root):
+        _built.clear()
+        return process_cls(field_name='status', instance=Invoice(status=status))
+
+    def test_the_index_is_built_when_the_class_is_created(self):
+        self.assertIn('_compiled_dispatch_index', vars(_Root))
+
+    def test_entries_follow_the_depth_first_walk_once_per_class(self):
+        index = _Root._dispatch_index()
+        self.assertEqual(
+            [entry.transition.action_name for entry in index.entries],
+            ['root_go', 'root_send', 'leaf_a', 'guarded', 'leaf_b'],
+        )
+        entry = index.by_action['leaf_b'][0]
+        self.assertEqual(entry.path, (_Root, _GuardedLeaf, _LeafB))
+        self.assertEqual(entry.sources, frozenset({'sent'}))
+
+    def test_an_action_lookup_builds_only_the_levels_on_its_path(self):
+        process = self._process()
+        _built.clear()
+        self.assertEqual(
+            [t.action_name for t in process.get_available_transitions(
+                action_name='leaf_a')],
+            ['leaf_a'],
+        )
+        self.assertEqual(_built, ['_LeafA'])
+
+    def test_a_failing_parent_guard_still_hides_its_subtree(self):
+        process = self._process(status='sent')
+        self.assertEqual(process.get_available_actions(), ['root_send'])
+
+    def test_the_owner_is_the_declaring_process(self):
+        transition, owner = self._process()._resolve_transition_with_owner(
+            'leaf_a')
+        self.assertEqual(transition.action_name, 'leaf_a')
+        self.assertIs(type(owner), _LeafA)
+
+    def test_listing_reads_only_transitions_sourced_in_the_current_state(self):
+        self.assertEqual(
+            self._process()._dispatch_index().entries_for_state('nowhere'), ())
+        self.assertEqual(self._process(status='nowhere').get_available_actions(), [])
+
+    def test_replacing_nested_processes_rebuilds_the_index(self):
+        class _Late(Process):
+            transitions = [Transition('late', sources=['draft'], target='l')]
+
+        class _Host(Process):
+            transitions = []
+
+        before = _Host._dispatch_index()
+        _Host.nested_processes = [_Late]
+        self.addCleanup(delattr, _Host, 'nested_processes')
+        self.assertIsNot(_Host._dispatch_index(), before)
+        self.assertEqual(self._process(process_cls=_Host).get_available_actions(),
+                         ['late'])
+
+    def test_appending_to_a_nested_class_rebuilds_the_parent_index(self):
+        class _Child(Process):
+            transitions = []
+
+        class _Parent(Process):
+            nested_processes = [_Child]
+
+        self.assertEqual(self._process(process_cls=_Parent).get_available_actions(), [])
+        _Child.transitions.append(
+            Transition('added', sources=['draft'], target='x'))
+        self.assertEqual(
+            self._process(process_cls=_Parent).get_available_actions(), ['added'])
+
+    def test_an_element_swapped_in_place_rebuilds_the_index(self):
+        class _Swapped(Process):
+            transitions = [Transition('old', sources=['draft'], target='o')]
+
+        self.assertEqual(
+            self._process(process_cls=_Swapped).get_available_actions(),
+            ['old'])
+        _Swapped.transitions[0] = Transition(
+            'new', sources=['draft'], target='n')
+        self.assertEqual(
+            self._process(process_cls=_Swapped).get_available_actions(),
+            ['new'])
+
+    def test_changed_sources_rebuild_the_index(self):
+        class _Moved(Process):
+            transitions = [Transition('go', sources=['draft'], target='g')]
+
+        self.assertEqual(
+            self._process(process_cls=_Moved).get_available_actions(), ['go'])
+        _Moved.transitions[0].sources = ['elsewhere']
+        self.assertEqual(
+            self._process(process_cls=_Moved).get_available_actions(), [])
+
+    def test_a_subclass_does_not_share_its_parents_index(self):
+        class _Sub(_Root):
+            transitions = [Transition('sub_only', sources=['draft'], target='s')]
+
+        self.assertNotIn('root_go', _Sub._dispatch_index().by_action)
+        self.assertIn('root_go', _Root._dispatch_index().by_action)
@@ -27,7 +27,7 @@ from tests.models import Invoice
 from tests import dl_settings
 
 
-def _boom_set_state(self, value):
+def _boom_set_state(self, value, **kwargs):
     raise RuntimeError(f'simulated DB failure writing {value!r}')
 
 
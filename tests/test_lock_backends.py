@@ -0,0 +1,223 @@
+"""``DJANGO_LOGIC['LOCK_BACKEND']`` — where the state lock lives.
+
+The same contract runs against every shipped backend: one holder at a time,
+a stale token cannot release a successor, and ``None`` force-releases. The
+Redis and PostgreSQL runs need the real service and skip without it.
+"""
+import gc
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from django_logic.conf import validate_core_settings
+from django_logic.locks import (
+    LocalLockBackend,
+    PostgresAdvisoryLockBackend,
+    get_lock_backend,
+)
+from django_logic.state import State
+from tests import dl_settings
+from tests.models import Invoice
+from tests.stability.base import requires_postgres, requires_real_redis
+
+
+class _LockBackendContract:
+    backend_path = None
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        override = override_settings(
+            DJANGO_LOGIC=dl_settings(LOCK_BACKEND=self.backend_path))
+        override.enable()
+        self.addCleanup(override.disable)
+        self.invoice = Invoice.objects.create(status='draft')
+
+    def _state(self):
+        return State(Invoice.objects.get(pk=self.invoice.pk), 'status')
+
+    def test_the_setting_selects_the_backend(self):
+        self.assertEqual(
+            f'{type(get_lock_backend()).__module__}.'
+            f'{type(get_lock_backend()).__name__}',
+            self.backend_path,
+        )
+
+    def test_only_one_holder_at_a_time(self):
+        first, second = self._state(), self._state()
+        self.assertTrue(first.lock())
+        self.addCleanup(first.unlock)
+        self.assertFalse(second.lock())
+        self.assertTrue(second.is_locked())
+        first.unlock()
+        self.assertFalse(second.is_locked())
+        self.assertTrue(second.lock())
+        second.unlock()
+
+    def test_a_stale_token_does_not_release_the_holder(self):
+        holder = self._state()
+        self.assertTrue(holder.lock())
+        self.addCleanup(holder.unlock)
+        stale = self._state()
+        stale._lock_token = 'not-the-owner'
+        stale.unlock()
+        self.assertTrue(holder.is_locked())
+
+    def test_a_state_that_never_locked_force_releases(self):
+        holder = self._state()
+        self.assertTrue(holder.lock())
+        self._state().unlock()
+        self.assertFalse(holder.is_locked())
+
+    def test_is_locked_many_answers_in_order(self):
+        other = Invoice.objects.create(status='draft')
+        locked = self._state()
+        self.assertTrue(locked.lock())
+        self.addCleanup(locked.unlock)
+        self.assertEqual(
+            State.is_locked_many([locked, State(other, 'status')]),
+            [True, False],
+        )
+
+    def test_lock_many_takes_each_free_lock_once(self):
+        other = Invoice.objects.create(status='draft')
+        holder = self._state()
+        self.assertTrue(holder.lock())
+        self.addCleanup(holder.unlock)
+        fresh, duplicate = State(other, 'status'), State(other, 'status')
+        self.assertEqual(
+            State.lock_many([self._state(), fresh, duplicate]),
+            [False, True, False],
+        )
+        State.unlock_many([fresh, duplicate])
+        self.assertEqual(
+            State.is_locked_many([holder, fresh]), [True, False])
+
+
+class CacheLockBackendTests(_LockBackendContract, TestCase):
+    backend_path = 'django_logic.locks.CacheLockBackend'
+
+
+class LocalLockBackendTests(_LockBackendContract, TestCase):
+    backend_path = 'django_logic.locks.LocalLockBackend'
+
+    def test_an_expired_lock_can_be_taken_again(self):
+        backend = LocalLockBackend()
+        self.assertIsNotNone(backend.acquire('key', 0))
+        self.assertFalse(backend.is_locked('key'))
+        self.assertIsNotNone(backend.acquire('key', 60))
+
+
+@requires_real_redis
+class RedisLockBackendTests(_LockBackendContract, TestCase):
+    backend_path = 'django_logic.locks.RedisLockBackend'
+
+
+@requires_postgres
+class PostgresAdvisoryLockBackendTests(_LockBackendContract, TestCase):
+    backend_path = 'django_logic.locks.PostgresAdvisoryLockBackend'
+
+    def test_the_holding_session_cannot_lock_twice(self):
+        # pg_try_advisory_lock is re-entrant in one session. The state lock
+        # must not be, or a transition could start inside its own callback.
+        state = self._state()
+        self.assertTrue(state.lock())
+        self.addCleanup(state.unlock)
+        self.assertFalse(self._state().lock())
+
+
+def _lock_connection(*results):
+    """A stand-in lock connection whose queries return or raise
+    ``results`` in turn."""
+    connection = mock.MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.execute.side_effect = [
+        result if isinstance(result, Exception) else None
+        for result in results]
+    cursor.fetchall.side_effect = [
+        result for result in results if not isinstance(result, Exception)]
+    connection.is_usable.return_value = False
+    return connection
+
+
+class AdvisoryLockSessionTests(SimpleTestCase):
+    """The session handling, without a PostgreSQL server."""
+
+    def test_a_broken_connection_is_replaced_and_its_locks_forgotten(self):
+        backend = PostgresAdvisoryLockBackend()
+        first = _lock_connection([(True,)], OperationalError('gone'))
+        second = _lock_connection([(True,)])
+        with mock.patch('django_logic.locks.connections.create_connection',
+                        side_effect=[first, second]):
+            self.assertIsNotNone(backend.acquire('a' * 32, 60))
+            # The session that held 'a' ended with its connection.
+            self.assertIsNotNone(backend.acquire('b' * 32, 60))
+            self.assertEqual(set(backend._session().held),
+                             {backend.lock_id('b' * 32)})
+        first.close.assert_called_once()
+
+    def test_an_error_on_a_usable_connection_is_raised(self):
+        backend = PostgresAdvisoryLockBackend()
+        connection = _lock_connection(OperationalError('lock timeout'))
+        connection.is_usable.return_value = True
+        with mock.patch('django_logic.locks.connections.create_connection',
+                        return_value=connection), \
+                self.assertRaises(OperationalError):
+            backend.acquire('a' * 32, 60)
+        connection.close.assert_not_called()
+
+    def test_the_connection_of_an_ended_thread_is_closed(self):
+        backend = PostgresAdvisoryLockBackend()
+        connection = _lock_connection([(True,)])
+        with mock.patch('django_logic.locks.connections.create_connection',
+                        return_value=connection):
+            thread = threading.Thread(
+                target=backend.acquire, args=('a' * 32, 60))
+            thread.start()
+            thread.join()
+        gc.collect()
+        connection.close.assert_called_once()
+
+
+class LockBackendSettingTests(SimpleTestCase):
+    def test_the_lock_id_is_a_signed_64_bit_integer(self):
+        for key in ('0' * 32, 'f' * 32, State(Invoice(pk=1), 'status')._get_hash()):
+            lock_id = PostgresAdvisoryLockBackend.lock_id(key)
+            self.assertGreaterEqual(lock_id, -(1 << 63))
+            self.assertLess(lock_id, 1 << 63)
+
+    def test_a_path_that_does_not_import_is_refused(self):
+        with override_settings(DJANGO_LOGIC=dl_settings(
+                LOCK_BACKEND='django_logic.locks.NoSuchBackend')):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'LOCK_BACKEND'):
+                get_lock_backend()
+
+    def test_a_class_that_is_not_a_lock_backend_is_refused(self):
+        with override_settings(DJANGO_LOGIC=dl_settings(
+                LOCK_BACKEND='django_logic.state.State')):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'LockBackend'):
+                get_lock_backend()
+
+    def test_boot_validation_refuses_a_non_string(self):
+        with override_settings(DJANGO_LOGIC=dl_settings(LOCK_BACKEND=42)):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'LOCK_BACKEND'):
+                validate_core_settings()
+
+    def test_pull_mode_refuses_the_process_local_backend(self):
+        from django_logic.background.settings import _check_lock_cache_in_pull_mode
+
+        with override_settings(DEBUG=False, DJANGO_LOGIC=dl_settings(
+                LOCK_BACKEND='django_logic.locks.LocalLockBackend')):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'process memory'):
+                _check_lock_cache_in_pull_mode()
+
+    def test_pull_mode_does_not_need_a_shared_cache_for_advisory_locks(self):
+        from django_logic.background.settings import _check_lock_cache_in_pull_mode
+
+        with override_settings(DEBUG=False, DJANGO_LOGIC=dl_settings(
+                LOCK_BACKEND='django_logic.locks.PostgresAdvisoryLockBackend')):
+            _check_lock_cache_in_pull_mode()
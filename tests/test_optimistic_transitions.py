@@ -0,0 +1,135 @@
+"""Optimistic transitions — no state lock, a compare-and-set at the end.
+
+``optimistic=True`` on a transition, or ``optimistic = True`` on the process
+that declares it, skips ``state.lock()``. The side-effects and the target
+write share one savepoint. When the row moved first, the write misses, the
+side-effects roll back and ``TransitionTemporarilyUnavailable`` is raised.
+"""
+from unittest.mock import patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+
+from django_logic.background import BackgroundTransition
+from django_logic.exceptions import TransitionTemporarilyUnavailable
+from django_logic.locks import CacheLockBackend
+from django_logic.process import Process
+from django_logic.transition import Action, Transition
+from tests.models import Invoice, Ticket
+
+CALLS = []
+
+
+def create_audit_row(instance, **kwargs):
+    CALLS.append('side_effect')
+    Invoice.objects.create(status='audit')
+
+
+def explode(instance, **kwargs):
+    Invoice.objects.create(status='audit')
+    raise ValueError('boom')
+
+
+def record_callback(instance, **kwargs):
+    CALLS.append('callback')
+
+
+def record_failure(instance, exception, **kwargs):
+    CALLS.append(f'failure:{exception}')
+
+
+class _OptimisticProcess(Process):
+    process_name = 'optimistic_process'
+    optimistic = True
+    version_field = 'version'
+    transitions = [
+        Transition('close', sources=['open'], target='closed',
+                   side_effects=[create_audit_row]),
+        Transition('reopen', sources=['closed'], target='open',
+                   optimistic=False),
+    ]
+
+
+class OptimisticTransitionTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        CALLS.clear()
+        self.invoice = Invoice.objects.create(status='draft')
+
+    def _send(self, **kwargs):
+        return Transition('send', sources=['draft'], target='sent',
+                          optimistic=True, **kwargs)
+
+    def _run(self, transition, invoice=None):
+        process = _OptimisticProcess(
+            field_name='status', instance=invoice or self.invoice)
+        return transition.change_state(process.state, tr_id='t')
+
+    def test_no_lock_is_taken(self):
+        with patch.object(CacheLockBackend, 'acquire') as acquire:
+            self._run(self._send(side_effects=[create_audit_row],
+                                 callbacks=[record_callback]))
+        acquire.assert_not_called()
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.status, 'sent')
+        self.assertEqual(CALLS, ['side_effect', 'callback'])
+
+    def test_a_lost_race_rolls_the_side_effects_back(self):
+        Invoice.objects.filter(pk=self.invoice.pk).update(status='sent')
+        transition = self._send(side_effects=[create_audit_row],
+                                callbacks=[record_callback])
+        with self.assertRaises(TransitionTemporarilyUnavailable):
+            self._run(transition)
+        self.assertFalse(Invoice.objects.filter(status='audit').exists())
+        self.assertEqual(self.invoice.status, 'draft')
+        self.assertEqual(CALLS, ['side_effect'])
+
+    def test_a_failing_side_effect_rolls_back_and_writes_failed_state(self):
+        transition = self._send(
+            side_effects=[explode], failed_state='failed',
+            failure_callbacks=[record_failure])
+        with self.assertRaisesMessage(ValueError, 'boom'):
+            self._run(transition)
+        self.assertFalse(Invoice.objects.filter(status='audit').exists())
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.status, 'failed')
+        self.assertEqual(CALLS, ['failure:boom'])
+
+    def test_the_process_flag_applies_with_its_version_field(self):
+        ticket = Ticket.objects.create()
+        with patch.object(CacheLockBackend, 'acquire') as acquire:
+            _OptimisticProcess(field_name='status', instance=ticket).close()
+        acquire.assert_not_called()
+        ticket.refresh_from_db()
+        self.assertEqual((ticket.status, ticket.version), ('closed', 1))
+
+    def test_a_stale_version_loses_the_race(self):
+        ticket = Ticket.objects.create()
+        Ticket.objects.filter(pk=ticket.pk).update(version=5)
+        process = _OptimisticProcess(field_name='status', instance=ticket)
+        with self.assertRaises(TransitionTemporarilyUnavailable):
+            process.close()
+        self.assertEqual((ticket.status, ticket.version), ('open', 0))
+        self.assertFalse(Invoice.objects.filter(status='audit').exists())
+
+    def test_a_transition_can_opt_back_into_the_lock(self):
+        ticket = Ticket.objects.create(status='closed')
+        with patch.object(CacheLockBackend, 'acquire',
+                          return_value='token') as acquire:
+            _OptimisticProcess(field_name='status', instance=ticket).reopen()
+        acquire.assert_called_once()
+
+    def test_a_caller_cannot_pass_version_field(self):
+        ticket = Ticket.objects.create()
+        with self.assertRaisesMessage(TypeError, 'version_field'):
+            _OptimisticProcess(field_name='status', instance=ticket).close(
+                version_field='status')
+
+    def test_types_without_a_final_write_refuse_the_mode(self):
+        for make in (
+            lambda: Action('poke', sources=['draft'], optimistic=True),
+            lambda: BackgroundTransition(
+                'sync', sources=['draft'], target='done', optimistic=True),
+        ):
+            with self.assertRaises(ImproperlyConfigured):
+                make()